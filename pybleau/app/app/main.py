@@ -1,15 +1,22 @@
 
 import logging
+from os.path import splitext
+
 from six import string_types
 
 from pybleau.app.ui.dataframe_analyzer_model_view import DataFrameAnalyzer, \
     DataFrameAnalyzerView
+from pybleau.utils.chunked_reader import ChunkedDataFrameReader, \
+    CSV_EXTENSIONS, HDF_EXTENSIONS, ReadingCancelled
+from pybleau.utils.dataframe_cache import DataFrameFileCache, \
+    DEFAULT_CACHE_DIR
 from pybleau.utils.pandas_utils import pd_read_any
 
 logger = logging.getLogger(__name__)
 
 
-def main(target, read_func_kw=None, ui_kind="start", **kwargs):
+def main(target, read_func_kw=None, ui_kind="start", use_cache=False,
+         cache_dir=DEFAULT_CACHE_DIR, show_progress=True, **kwargs):
     """" Launch the DF explorer as a standalone application.
 
     Parameters
@@ -25,6 +32,21 @@ def main(target, read_func_kw=None, ui_kind="start", **kwargs):
         Type of window to create. Passed to Traitsui's `edit_traits`. Use
         "start" to create the GUI event loop instead of using `edit_traits`.
 
+    use_cache : bool, optional
+        Whether to load the target file from (and store it into) the on-disk
+        dataframe cache, to skip parsing it again on the next launch. Off by
+        default since cached files are written to the user's home directory.
+
+    cache_dir : str, optional
+        Directory of the on-disk dataframe cache. Defaults to
+        ~/.pybleau/df_cache, bounded to 1 GB (least recently used files
+        evicted first).
+
+    show_progress : bool, optional
+        Whether to read CSV and HDF target files in chunks, displaying the
+        reading progress in a dialog which can cancel it. The application
+        isn't launched if the reading is cancelled.
+
     kwargs : dict
         Keywords to control the attributes of the instance of
         `pybleau.app.ui.dataframe_analyzer_model_view.DataFrameAnalyzerView`
@@ -33,12 +55,72 @@ def main(target, read_func_kw=None, ui_kind="start", **kwargs):
     if read_func_kw is None:
         read_func_kw = {}
 
+    # DF loaded here isn't shared with anyone: no need to copy it.
+    copy_source = True
     if isinstance(target, string_types):
-        target = pd_read_any(target, **read_func_kw)
+        if use_cache:
+            cache = DataFrameFileCache(cache_dir=cache_dir)
+        else:
+            cache = None
+        ext = splitext(target)[1].lower()
+        if show_progress and ext in CSV_EXTENSIONS + HDF_EXTENSIONS:
+            try:
+                target = read_with_progress(target, cache=cache,
+                                            **read_func_kw)
+            except ReadingCancelled as e:
+                logger.info(str(e))
+                return
+        else:
+            target = pd_read_any(target, cache=cache, **read_func_kw)
+        copy_source = False
 
-    analyzer = DataFrameAnalyzer(source_df=target)
+    analyzer = DataFrameAnalyzer(source_df=target, copy_source=copy_source)
     view = DataFrameAnalyzerView(model=analyzer, **kwargs)
     if ui_kind == "start":
         view.configure_traits()
     else:
         view.edit_traits(kind=ui_kind)
+
+
+def read_with_progress(target, cache=None, **kwargs):
+    """ Read a CSV or HDF file in chunks, displaying the progress in a dialog
+    which can cancel the reading.
+
+    Parameters
+    ----------
+    target : str
+        Path to the file to load.
+
+    cache : DataFrameFileCache, optional
+        On-disk cache to load the DF from, and to store it into once read.
+
+    kwargs : dict
+        Keywords passed to pd_read_any, including the chunked reader's options
+        (columns, sample_fraction, downcast and chunksize).
+
+    Raises
+    ------
+    ReadingCancelled
+        If the reading was cancelled from the dialog.
+    """
+    from pyface.api import ProgressDialog
+
+    reader = ChunkedDataFrameReader()
+    dialog = ProgressDialog(title="Loading data", max=100, can_cancel=True,
+                            message="Loading {}...".format(target))
+
+    def update_dialog(progress):
+        # Processes the UI events, including the cancel button's:
+        cont, _ = dialog.update(int(100 * progress))
+        if not cont:
+            reader.cancel()
+
+    dialog.open()
+    reader.on_trait_change(update_dialog, "progress")
+    try:
+        return pd_read_any(target, cache=cache, chunk_reader=reader, **kwargs)
+    finally:
+        reader.on_trait_change(update_dialog, "progress", remove=True)
+        # The dialog closes itself once complete:
+        if dialog.control is not None:
+            dialog.close()
@@ -33,6 +33,11 @@ class TestLaunchMainApp(TestCase):
         self.df.to_csv(self.filename)
         main(target=self.filename, ui_kind=None)
 
+    def test_launch_app_around_csv_file_no_progress(self):
+        self.filename += ".csv"
+        self.df.to_csv(self.filename)
+        main(target=self.filename, ui_kind=None, show_progress=False)
+
     def test_launch_app_around_excel_file(self):
         self.filename += ".xls"
         self.df.to_excel(self.filename)
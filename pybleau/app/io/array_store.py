@@ -0,0 +1,313 @@
+""" Content-addressed binary store for the DataFrames of a project.
+
+Projects typically contain several copies of largely identical data: the
+analyzer's source data, and the data of every frozen plot. When saving a
+project with an ArrayStore, DataFrame columns are written once each into a
+binary sidecar file, and the serialized project only contains references to
+them. Frozen plot data is stored, whenever possible, as the row positions of a
+subset of a data source already in the store.
+
+The sidecar file is made of a magic string, the length of a JSON header
+describing each array, the header itself, and the raw array buffers, aligned
+so they can be memory-mapped when loading the project. Arrays of python
+objects are never pickled, so loading a project can't run arbitrary code:
+string columns are stored as UTF-8 text with an array of offsets, other object
+columns as JSON, and they are decoded when first accessed. Arrays of objects
+which can't be encoded this way are rejected.
+"""
+from contextlib import contextmanager
+import json
+import logging
+import os
+from os.path import abspath, dirname
+import struct
+from tempfile import mkstemp
+
+import numpy as np
+import pandas as pd
+
+from traits.api import Any, Dict, HasStrictTraits, List, Str
+
+from .object_arrays import decode_object_array, encode_object_array
+from .plot_data_export import array_digest
+
+logger = logging.getLogger(__name__)
+
+#: Key under which serialized objects reference their data in the store
+ARRAY_STORE_DATA_KEY = "array_store_data"
+
+#: Magic string starting all array store files
+ARRAY_STORE_MAGIC = b"PYBLEAU_ARRAYS\x00\x01"
+
+#: Byte alignment of the arrays in the store file
+ARRAY_ALIGNMENT = 64
+
+#: Number of characters of the content digests used as array keys
+ARRAY_STORE_KEY_LENGTH = 32
+
+#: Store in use by the (de)serializers, if any
+_ACTIVE_ARRAY_STORE = None
+
+
+class ArrayStore(HasStrictTraits):
+    """ Store of unique arrays, with (de)serializable DataFrame references.
+    """
+    #: Path to the file the store was loaded from, if any
+    filepath = Str
+
+    #: Arrays in the store, mapped by key, as numpy or pandas extension arrays
+    arrays = Dict
+
+    #: DataFrames (and their reference) that other DataFrames can reference
+    #: subsets of
+    _parent_frames = List
+
+    #: Description of the arrays of the loaded file not yet accessed
+    _file_entries = Dict
+
+    #: Content of the loaded file
+    _file_buffer = Any
+
+    # Public interface --------------------------------------------------------
+
+    def add_array(self, values):
+        """ Add an array to the store if not already there, and return its key.
+        """
+        key = array_digest(values)[:ARRAY_STORE_KEY_LENGTH]
+        if key not in self.arrays and key not in self._file_entries:
+            if isinstance(values, (pd.Series, pd.Index)):
+                if isinstance(values.dtype, np.dtype):
+                    values = values.to_numpy()
+                else:
+                    values = values.array
+            self.arrays[key] = values
+        return key
+
+    def get_array(self, key):
+        """ Returns the array stored under the key provided.
+        """
+        if key not in self.arrays:
+            self.arrays[key] = self._read_file_entry(key)
+        return self.arrays[key]
+
+    def add_dataframe(self, df, as_parent=False):
+        """ Add a DataFrame's arrays to the store and return a reference to it.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame to store.
+
+        as_parent : bool
+            Whether DataFrames added later can be stored as row subsets of this
+            one.
+
+        Returns
+        -------
+        dict
+            JSON serializable reference to the DataFrame, to rebuild it with
+            `get_dataframe`.
+        """
+        for parent_df, parent_ref in self._parent_frames:
+            positions = _row_positions(df, parent_df)
+            if positions is not None:
+                return {"parent": parent_ref,
+                        "rows": self.add_array(positions),
+                        "columns": list(df.columns)}
+
+        if isinstance(df.index, pd.RangeIndex):
+            index = [df.index.start, df.index.stop, df.index.step]
+            ref = {"range_index": index}
+        else:
+            ref = {"index": self.add_array(df.index)}
+
+        ref["index_name"] = df.index.name
+        ref["columns"] = [[col, self.add_array(df[col])] for col in df.columns]
+        if as_parent:
+            self._parent_frames.append((df, ref))
+        return ref
+
+    def get_dataframe(self, ref):
+        """ Rebuild a DataFrame from its reference in the store.
+        """
+        if "parent" in ref:
+            parent = self.get_dataframe(ref["parent"])
+            rows = self.get_array(ref["rows"])
+            return parent[ref["columns"]].iloc[rows]
+
+        if "range_index" in ref:
+            index = pd.RangeIndex(*ref["range_index"], name=ref["index_name"])
+        else:
+            index = pd.Index(self.get_array(ref["index"]),
+                             name=ref["index_name"])
+
+        data = {col: self.get_array(key) for col, key in ref["columns"]}
+        # Don't copy the arrays, which may be memory-mapped:
+        return pd.DataFrame(data, index=index,
+                            columns=[col for col, _ in ref["columns"]],
+                            copy=False)
+
+    def save(self, filepath):
+        """ Write all arrays of the store to a binary sidecar file.
+
+        The file is written next to the target and then moved over it, since
+        the arrays to write may be memory-mapped from the target file itself.
+
+        Raises
+        ------
+        TypeError
+            If an array of python objects contains values which can't be
+            encoded (only strings, numbers, booleans and None can).
+        """
+        entries = {}
+        buffers = []
+        offset = 0
+        for key in list(self._file_entries) + list(self.arrays):
+            buf, entry = _array_to_buffer(self.get_array(key))
+            offset = _aligned(offset)
+            entry.update(offset=offset, nbytes=len(buf))
+            entries[key] = entry
+            buffers.append((offset, buf))
+            offset += len(buf)
+
+        header = json.dumps(entries).encode("utf-8")
+        data_start = _aligned(len(ARRAY_STORE_MAGIC) + 8 + len(header))
+        fd, tmp_path = mkstemp(dir=dirname(abspath(filepath)),
+                               suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(ARRAY_STORE_MAGIC)
+                f.write(struct.pack("<Q", len(header)))
+                f.write(header)
+                for offset, buf in buffers:
+                    f.seek(data_start + offset)
+                    f.write(buf)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, filepath, mmap_mode="c"):
+        """ Create a store from a sidecar file, memory-mapping its arrays.
+
+        Parameters
+        ----------
+        filepath : str
+            Path to the file to load.
+
+        mmap_mode : str or None
+            Memory-mapping mode of the file (see numpy.memmap). The default
+            copy-on-write mode keeps the file untouched if the data is
+            modified. Pass None to read the whole file into memory.
+        """
+        with open(filepath, "rb") as f:
+            magic = f.read(len(ARRAY_STORE_MAGIC))
+            if magic != ARRAY_STORE_MAGIC:
+                msg = "File {} isn't a pybleau array store.".format(filepath)
+                logger.exception(msg)
+                raise ValueError(msg)
+            header_len, = struct.unpack("<Q", f.read(8))
+            entries = json.loads(f.read(header_len).decode("utf-8"))
+
+        data_start = _aligned(len(ARRAY_STORE_MAGIC) + 8 + header_len)
+        if not any(entry["nbytes"] for entry in entries.values()):
+            buffer = np.empty(0, dtype=np.uint8)
+        elif mmap_mode is None:
+            buffer = np.fromfile(filepath, dtype=np.uint8, offset=data_start)
+        else:
+            buffer = np.memmap(filepath, dtype=np.uint8, mode=mmap_mode,
+                               offset=data_start)
+
+        return cls(filepath=filepath, _file_entries=entries,
+                   _file_buffer=buffer)
+
+    # Private interface -------------------------------------------------------
+
+    def _read_file_entry(self, key):
+        entry = self._file_entries.pop(key)
+        start = entry["offset"]
+        buf = self._file_buffer[start:start + entry["nbytes"]]
+        if entry["encoding"] is not None:
+            size = int(np.prod(entry["shape"]))
+            values = decode_object_array(buf, entry["encoding"], size)
+            values = values.reshape(entry["shape"])
+        else:
+            values = buf.view(np.dtype(entry["dtype"])).reshape(entry["shape"])
+
+        if entry["pandas_dtype"]:
+            dtype = pd.api.types.pandas_dtype(entry["pandas_dtype"])
+            if isinstance(dtype, pd.DatetimeTZDtype):
+                # Stored as UTC datetimes:
+                values = pd.array(values).tz_localize("UTC").tz_convert(
+                    dtype.tz
+                )
+            else:
+                values = pd.array(values, dtype=dtype)
+        return values
+
+
+@contextmanager
+def active_array_store(store):
+    """ Context manager making the (de)serializers use the store provided.
+    """
+    global _ACTIVE_ARRAY_STORE
+
+    previous_store = _ACTIVE_ARRAY_STORE
+    _ACTIVE_ARRAY_STORE = store
+    try:
+        yield store
+    finally:
+        _ACTIVE_ARRAY_STORE = previous_store
+
+
+def get_active_array_store():
+    """ Returns the store the (de)serializers currently use, if any.
+    """
+    return _ACTIVE_ARRAY_STORE
+
+
+# Private functions -----------------------------------------------------------
+
+def _aligned(offset):
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def _array_to_buffer(values):
+    """ Returns the bytes to store for an array, and its description.
+    """
+    pandas_dtype = None
+    if not isinstance(values, np.ndarray):
+        pandas_dtype = str(values.dtype)
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.tz_convert("UTC").tz_localize(None).to_numpy()
+        else:
+            values = values.to_numpy(dtype=object, na_value=None)
+
+    entry = {"dtype": values.dtype.str, "shape": list(values.shape),
+             "pandas_dtype": pandas_dtype, "encoding": None}
+    if values.dtype.hasobject:
+        buf, entry["encoding"] = encode_object_array(values.reshape(-1))
+    else:
+        buf = np.ascontiguousarray(values).reshape(-1).view(np.uint8)
+    return buf, entry
+
+
+def _row_positions(df, parent_df):
+    """ Returns the row positions of df in parent_df if df is a subset of its
+    rows and columns, None otherwise.
+    """
+    if df is parent_df or df.index.name != parent_df.index.name or \
+            not parent_df.index.is_unique or \
+            not df.columns.isin(parent_df.columns).all():
+        return None
+
+    positions = parent_df.index.get_indexer(df.index)
+    if len(positions) and positions.min() < 0:
+        return None
+
+    for col in df.columns:
+        if not parent_df[col].iloc[positions].equals(df[col]):
+            return None
+
+    return positions
@@ -1,16 +1,14 @@
-import json
-from os.path import abspath, basename, dirname, expanduser, isdir, isfile, \
+from concurrent.futures import wait
+from os.path import abspath, dirname, expanduser, isdir, isfile, \
     join, splitext
 import os
 import logging
-from tempfile import mkstemp
-from zipfile import ZipFile
-import pandas as pd
+from tempfile import TemporaryDirectory
 from six import string_types
 
 from pyface.api import error, information
 from traits.api import Any, Bool, cached_property, Directory, Enum, File, \
-    HasStrictTraits, Instance, List, Property, Range, Str
+    HasStrictTraits, Instance, Int, List, Property, Range, Str
 from traitsui.api import FileEditor, HGroup, Item, Label, OKCancelButtons, \
     Spring, VGroup, View
 
@@ -19,15 +17,19 @@ from app_common.std_lib.filepath_utils import open_file, string2filename
 from app_common.std_lib.logging_utils import ACTION_LEVEL
 
 from ...vega_translators.vega_chaco import chaco2vega
-from ...vega_translators.vega_utils import df_to_vega
+from ...vega_translators.vega_utils import df_to_vega, VegaDataValues, \
+    write_vega_json
 from ...reporting.string_definitions import CONTENT_KEY, DATA_FILE_KEY, \
     DATA_FILE_KEY_KEY, DATA_KEY, DATASETS_KEY, IDX_NAME_KEY
+from ..model.plot_descriptor import CUSTOM_PLOT_TYPE
+from .plot_image_rendering import create_render_pool, plot_data_columns, \
+    plot_render_state, render_plot_image
+from .plot_data_export import DEFAULT_DATASET_NAME, deduplicate_plot_data, \
+    SUPPORTED_FORMATS, write_tables
 from .plot_io_utils import plot_data2dataframes
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_DATASET_NAME = "Source data"
-
 DATA_FILE_COMP_KEY = "compression_info"
 
 EXTERNAL_DATA_FNAME = "exported_data"
@@ -53,6 +55,13 @@ EXPORT_IN_FILE = "In-file"
 
 EXPORT_SEPARATE = "Separate file"
 
+#: Minimum number of plot images to render them in worker processes, since
+#: starting the workers takes a few seconds
+MIN_PLOTS_FOR_PARALLEL_RENDERING = 4
+
+#: Time (in seconds) between checks for cancellation while rendering images
+CANCEL_POLL_INTERVAL = 0.2
+
 
 class DataFramePlotManagerExporter(HasStrictTraits):
     """ Exporter of a DataFramePlotManager content to various formats.
@@ -71,7 +80,7 @@ class DataFramePlotManagerExporter(HasStrictTraits):
 
     data_filename = Str(EXTERNAL_DATA_FNAME)
 
-    data_format = Enum([".csv", ".xlsx", ".h5"])
+    data_format = Enum(SUPPORTED_FORMATS)
 
     #: Whether to skip plots whose visible flag is off
     skip_hidden = Bool(True)
@@ -99,6 +108,15 @@ class DataFramePlotManagerExporter(HasStrictTraits):
 
     json_index = Range(low=0, high=4, value=2)
 
+    #: Whether to export data as per-column value lists rather than records
+    #: (more compact, see vega_utils.columnar_transform)
+    vega_columnar_data = Bool(False)
+
+    #: Whether to convert the data only while streaming it to the target
+    #: file, so it is never all held in memory. The returned content then
+    #: holds VegaDataValues rather than JSON-ready values.
+    defer_vega_data = Bool(False)
+
     _many_plots = Bool
 
     # PPT format specific parameters ------------------------------------------
@@ -107,6 +125,25 @@ class DataFramePlotManagerExporter(HasStrictTraits):
 
     presentation_subtitle = Str
 
+    # Image rendering parameters ----------------------------------------------
+
+    #: Maximum number of processes rendering plot images in parallel (0 or 1
+    #: to render them one at a time, in this process). Off by default: each
+    #: worker is a new python process importing the plotting libraries, and
+    #: receives a copy of the data of the plots it renders, which only pays
+    #: off for exports of many large plots.
+    max_render_workers = Int(1)
+
+    #: Number of plot images to render in the export in progress
+    num_images_to_render = Int
+
+    #: Number of plot images of the export in progress already rendered
+    num_images_rendered = Int
+
+    #: Set to True (for e.g. from another thread) to cancel the image export
+    #: in progress
+    cancel_requested = Bool
+
     def traits_view(self):
         is_ppt = "export_format == '{}'".format(PPT_FORMAT)
         is_vega = "export_format == '{}'".format(VEGA_FORMAT)
@@ -216,6 +253,8 @@ class DataFramePlotManagerExporter(HasStrictTraits):
         if not isdir(self.target_dir):
             os.makedirs(self.target_dir)
 
+        # Plots of lazily loaded projects may not be built yet:
+        self.df_plotter.materialize_plots()
         plot_list = self.df_plotter.contained_plots
 
         if self.export_data == EXPORT_YES:
@@ -231,6 +270,7 @@ class DataFramePlotManagerExporter(HasStrictTraits):
         else:
             filename_patt = "plot_{i}.{ext}"
 
+        images = []
         for i, desc in enumerate(plot_list):
             if self.skip_hidden and not desc.visible:
                 continue
@@ -250,8 +290,10 @@ class DataFramePlotManagerExporter(HasStrictTraits):
                 logger.exception(msg)
                 raise IOError(msg)
 
-            save_plot_to_file(desc.plot, filepath=filepath, dpi=self.image_dpi,
-                              **kwargs)
+            images.append((i, desc, filepath))
+
+        for _ in self._render_plot_images(images, **kwargs):
+            pass
 
     def to_pptx(self, **kwargs):
         """ Export all plots as a PPTX presentation with a plot per slide.
@@ -266,6 +308,7 @@ class DataFramePlotManagerExporter(HasStrictTraits):
         if not isdir(target_dir):
             os.makedirs(target_dir)
 
+        self.df_plotter.materialize_plots()
         plot_list = self.df_plotter.contained_plots
 
         if self.export_data == EXPORT_YES:
@@ -288,17 +331,24 @@ class DataFramePlotManagerExporter(HasStrictTraits):
         presentation = Presentation()
         title_slide(presentation, title_text=self.presentation_title,
                     sub_title_text=self.presentation_subtitle)
-        img_path = mkstemp()[1] + ".png"
 
-        for i, desc in enumerate(plot_list):
-            if self.skip_hidden and not desc.visible:
-                continue
+        with TemporaryDirectory() as img_dir:
+            images = []
+            for i, desc in enumerate(plot_list):
+                if self.skip_hidden and not desc.visible:
+                    continue
 
-            save_plot_to_file(desc.plot, filepath=img_path, dpi=self.image_dpi,
-                              **kwargs)
-            title = "plot_{}".format(i)
-            image_to_slide(presentation, img_path=img_path, slide_title=title)
-            os.remove(img_path)
+                img_path = join(img_dir, "plot_{}.png".format(i))
+                images.append((i, desc, img_path))
+
+            # Slides are added as soon as their image is ready:
+            for i, img_path in self._render_plot_images(images, **kwargs):
+                title = "plot_{}".format(i)
+                image_to_slide(presentation, img_path=img_path,
+                               slide_title=title)
+
+        if self.cancel_requested:
+            return
 
         presentation.save(self.target_file)
 
@@ -342,14 +392,24 @@ class DataFramePlotManagerExporter(HasStrictTraits):
                     self._export_data_source_to_file(export_dir)
 
             elif self.export_data == EXPORT_IN_FILE:
-                df_data[DATA_KEY] = df_to_vega(self.df_plotter.data_source)
+                data = self.df_plotter.data_source
+                if self.defer_vega_data:
+                    df_data[DATA_KEY] = VegaDataValues(
+                        data, columnar=self.vega_columnar_data
+                    )
+                else:
+                    df_data[DATA_KEY] = df_to_vega(
+                        data, columnar=self.vega_columnar_data
+                    )
                 df_data[IDX_NAME_KEY] = self.df_plotter.data_source.index.name
                 content[DATASETS_KEY][DEFAULT_DATASET_NAME] = df_data
 
         for desc in self.df_plotter.contained_plots:
             if self.export_data == EXPORT_INLINE:
                 plot_desc = chaco2vega(desc.plot_config,
-                                       export_data="inline")
+                                       export_data="inline",
+                                       columnar=self.vega_columnar_data,
+                                       lazy_data=self.defer_vega_data)
             elif self.export_data == EXPORT_IN_FILE:
                 plot_desc = chaco2vega(desc.plot_config,
                                        export_data=DEFAULT_DATASET_NAME)
@@ -366,8 +426,8 @@ class DataFramePlotManagerExporter(HasStrictTraits):
                 logger.exception(msg)
                 raise IOError(msg)
 
-            json.dump(content, open(self.target_file, "w"),
-                      indent=self.json_index)
+            with open(self.target_file, "w") as f:
+                write_vega_json(content, f, indent=self.json_index)
 
         return content
 
@@ -403,6 +463,8 @@ class DataFramePlotManagerExporter(HasStrictTraits):
             df.to_excel(target, sheet_name=key, **kwargs)
         elif data_format == ".h5":
             df.to_hdf(target, key=key, **kwargs)
+        elif data_format == ".npz":
+            write_tables({key: df}, target, data_format)
         else:
             msg = "Format {} not implemented. Please report this issue."
             msg = msg.format(data_format)
@@ -414,8 +476,10 @@ class DataFramePlotManagerExporter(HasStrictTraits):
     def _export_plot_data_to_file(self, plot_list, data_path, **kwargs):
         """ Export the plots' PlotData to a file.
 
-        Supported formats include zipped .csv, multi-tab .xlsx and multi-key
-        HDF5.
+        Supported formats include zipped .csv, multi-tab .xlsx, multi-key
+        HDF5 and compressed columnar .npz. Each unique array is stored once,
+        and a manifest table describes where each plot dataset's columns are
+        stored (see plot_data_export module).
 
         Parameters
         ----------
@@ -431,67 +495,133 @@ class DataFramePlotManagerExporter(HasStrictTraits):
         if not splitext(data_path)[1]:
             data_path += data_format
 
+        if data_format == ".csv":
+            # All csv tables are streamed into a single zip archive:
+            data_path = splitext(data_path)[0] + ".zip"
+            source_key = string2filename(DEFAULT_DATASET_NAME)
+        else:
+            source_key = DEFAULT_DATASET_NAME
+
         if isfile(data_path):
             msg = "Target data path specified already exists: {}. It will be" \
                   " overwritten.".format(data_path)
             logger.warning(msg)
 
-        data_dir = dirname(data_path)
+        datasets = {}
+        for i, desc in enumerate(plot_list):
+            df_dict = plot_data2dataframes(desc)
+            for name, df in df_dict.items():
+                datasets["plot_{}_{}".format(i, name)] = df
 
-        if data_format == ".xlsx":
-            writer = pd.ExcelWriter(data_path)
-        elif data_format == ".h5":
-            writer = pd.HDFStore(data_path)
+        tables = deduplicate_plot_data(self.df_plotter.data_source, datasets,
+                                       source_key=source_key)
+        write_tables(tables, data_path, data_format, **kwargs)
 
-        try:
-            if data_format == ".csv":
-                data_path = join(data_dir,
-                                 string2filename(DEFAULT_DATASET_NAME)+".csv")
-                self._export_data_source_to_file(target=data_path)
-            elif data_format == ".xlsx":
-                writer = pd.ExcelWriter(data_path)
-                self._export_data_source_to_file(target=writer,
-                                                 key=DEFAULT_DATASET_NAME)
-            else:
-                self._export_data_source_to_file(target=writer,
-                                                 key=DEFAULT_DATASET_NAME)
+        if self.interactive:
+            msg = "Plot data is stored in: {}".format(data_path)
+            information(None, msg)
 
-            created_csv_files = [data_path]
-            for i, desc in enumerate(plot_list):
-                df_dict = plot_data2dataframes(desc)
-                for name, df in df_dict.items():
-                    key = "plot_{}_{}".format(i, name)
-                    if data_format == ".csv":
-                        target_fpath = join(data_dir,
-                                            string2filename(key)+".csv")
-                        df.to_csv(target_fpath)
-                        created_csv_files.append(target_fpath)
-                    elif data_format == ".xlsx":
-                        df.to_excel(writer, sheet_name=key, **kwargs)
-                    elif data_format == ".h5":
-                        df.to_hdf(data_path, key=key, **kwargs)
-                    else:
-                        msg = "Data format {} not implemented. Please report" \
-                              " this issue.".format(data_format)
-                        logger.exception(msg)
-                        raise NotImplementedError(msg)
+    def _render_plot_images(self, images, **kwargs):
+        """ Render plot images, and yield them in order as they are ready.
+
+        When there are enough of them, images are rendered in parallel in a
+        pool of worker processes, each rebuilding the plots from their
+        configurator. Custom plots, which have no configurator, and plots
+        failing to render in a worker are rendered in this process. Progress
+        is reported in num_images_rendered, and setting cancel_requested
+        stops the rendering.
+
+        Parameters
+        ----------
+        images : list(tuple)
+            Index, PlotDescriptor and target image path of each plot.
+
+        Yields
+        ------
+        tuple
+            Index and image path of each plot, in order.
+        """
+        self.cancel_requested = False
+        self.num_images_rendered = 0
+        self.num_images_to_render = len(images)
+
+        pool = self._create_render_pool([desc for _, desc, _ in images])
+        try:
+            futures = []
+            for _, desc, filepath in images:
+                if pool is not None and self._can_render_in_worker(desc):
+                    state = plot_render_state(desc, self._factory_klass(desc))
+                    futures.append(pool.submit(render_plot_image, state,
+                                               self._data(desc), filepath,
+                                               self.image_dpi, **kwargs))
+                else:
+                    futures.append(None)
+
+            for (i, desc, filepath), future in zip(images, futures):
+                while future is not None and not future.done() and \
+                        not self.cancel_requested:
+                    wait([future], timeout=CANCEL_POLL_INTERVAL)
+
+                if self.cancel_requested:
+                    msg = "Plot image export cancelled after {} of {} images."
+                    msg = msg.format(self.num_images_rendered, len(images))
+                    logger.info(msg)
+                    return
+
+                if future is None or future.exception() is not None:
+                    if future is not None:
+                        msg = "Failed to render plot {} in a worker process" \
+                              " ({}): rendering it from the displayed plot."
+                        logger.warning(msg.format(i, future.exception()))
+                    save_plot_to_file(desc.plot, filepath=filepath,
+                                      dpi=self.image_dpi, **kwargs)
+
+                self.num_images_rendered += 1
+                yield i, filepath
         finally:
-            if data_format in [".xlsx", ".h5"]:
-                writer.close()
+            if pool is not None:
+                # Don't render the pending images if the export stopped:
+                for future in futures:
+                    if future is not None:
+                        future.cancel()
+                pool.shutdown()
+
+    def _create_render_pool(self, plot_list):
+        """ Returns a pool of worker processes to render the plots with, or
+        None if they should be rendered in this process.
+        """
+        rendered_plots = [desc for desc in plot_list
+                          if self._can_render_in_worker(desc)]
+        if self.max_render_workers <= 1 or \
+                len(rendered_plots) < MIN_PLOTS_FOR_PARALLEL_RENDERING:
+            return None
 
-        if data_format == ".csv" and len(created_csv_files) > 1:
-            # zip up all csv files:
-            data_path = join(data_dir, self.data_filename + ".zip")
-            with ZipFile(data_path, "w") as f:
-                for f_path in created_csv_files:
-                    f.write(f_path, basename(f_path))
+        max_workers = min(self.max_render_workers, len(rendered_plots))
+        try:
+            return create_render_pool(max_workers=max_workers)
+        except Exception as e:
+            msg = "Failed to start the image rendering processes ({}): " \
+                  "rendering images one at a time.".format(e)
+            logger.warning(msg)
+            return None
 
-            for f_path in created_csv_files:
-                os.remove(f_path)
+    def _can_render_in_worker(self, desc):
+        """ Whether a plot can be rebuilt from its configurator in a worker.
+        """
+        return desc.plot_type != CUSTOM_PLOT_TYPE and \
+            desc.plot_config is not None and desc.plot is not None and \
+            self._factory_klass(desc) is not None
 
-        if self.interactive:
-            msg = "Plot data is stored in: {}".format(data_path)
-            information(None, msg)
+    def _factory_klass(self, desc):
+        return self.df_plotter.plot_factories.get(desc.plot_config.plot_type)
+
+    @staticmethod
+    def _data(desc):
+        """ Returns the data sent to the worker rendering a plot: only the
+        columns of its data source it plots.
+        """
+        config = desc.plot_config
+        return config.data_source[plot_data_columns(config)]
 
     # Property getters/setters ------------------------------------------------
 
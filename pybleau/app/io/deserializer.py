@@ -4,21 +4,42 @@ import logging
 
 from app_common.apptools.io.deserializer import dataElementDeSerializer
 
+from .array_store import active_array_store, ARRAY_STORE_DATA_KEY, \
+    get_active_array_store
 
 logger = logging.getLogger(__name__)
 
 
-def deserialize(serial_data, array_collection=None):
+#: Whether analyzer deserializers restore plots without building them
+_LAZY_PLOT_CREATION = False
+
+
+def deserialize(serial_data, array_collection=None, array_store=None,
+                lazy_plots=False):
     """ Functional entry point to deserialize any serial data.
 
-    See app_common implementation for details.
+    See app_common implementation for details. Pass the ArrayStore loaded from
+    the project's binary sidecar file if it was serialized with one.
+
+    In lazy mode, plot managers restore their plot descriptions and
+    configurators, but only build the plots once shown, or requested with
+    DataFramePlotManager.materialize_plots. Combined with an ArrayStore loaded
+    with memory-mapping, the source data is then only read from disk as it is
+    accessed.
     """
     from app_common.apptools.io.deserializer import deserialize
+    global _LAZY_PLOT_CREATION
 
     local_deserializers = {key: val for key, val in globals().items()
                            if key.endswith("DeSerializer")}
-    return deserialize(serial_data, array_collection=array_collection,
-                       additional_deserializers=local_deserializers)
+    previous_lazy_mode = _LAZY_PLOT_CREATION
+    _LAZY_PLOT_CREATION = lazy_plots
+    try:
+        with active_array_store(array_store):
+            return deserialize(serial_data, array_collection=array_collection,
+                               additional_deserializers=local_deserializers)
+    finally:
+        _LAZY_PLOT_CREATION = previous_lazy_mode
 
 
 class dataFrameAnalyzerDeSerializer(dataElementDeSerializer):
@@ -26,17 +47,33 @@ class dataFrameAnalyzerDeSerializer(dataElementDeSerializer):
     protocol_version = 1
 
     def get_instance(self, constructor_data):
+        kwargs = constructor_data['kwargs']
+        if ARRAY_STORE_DATA_KEY in kwargs:
+            store = get_active_array_store()
+            data_ref = kwargs.pop(ARRAY_STORE_DATA_KEY)
+            kwargs.update(self.restore_data(data_ref, store))
+
         instance = super(dataFrameAnalyzerDeSerializer, self).get_instance(
             constructor_data
         )
         for plot_manager in instance.plot_manager_list:
             plot_manager.source_analyzer = instance
             plot_manager.data_source = instance.filtered_df
+            plot_manager.lazy_plot_creation = _LAZY_PLOT_CREATION
             # Now that the data_source is set, we can rebuild the plots:
             plot_manager._create_initial_plots_from_descriptions()
 
         return instance
 
+    def restore_data(self, data_ref, store):
+        """ Returns the analyzer's data arguments, rebuilt from the store.
+
+        The stored data was already sanitized, so it is borrowed rather than
+        copied, to keep memory-mapped columns unread until accessed.
+        """
+        return {"source_df": store.get_dataframe(data_ref),
+                "copy_source": False}
+
     def _klass_default(self):
         from pybleau.app.model.dataframe_analyzer import \
             DataFrameAnalyzer
@@ -46,6 +83,10 @@ class dataFrameAnalyzerDeSerializer(dataElementDeSerializer):
 class multiDataFrameAnalyzerDeSerializer(dataFrameAnalyzerDeSerializer):
     protocol_version = 0
 
+    def restore_data(self, data_ref, store):
+        source_dfs = {key: store.get_dataframe(ref) for key, ref in data_ref}
+        return {"_source_dfs": source_dfs}
+
     def _klass_default(self):
         from pybleau.app.model.multi_dfs_dataframe_analyzer import \
             MultiDataFrameAnalyzer
@@ -66,6 +107,17 @@ class plotDescriptorDeSerializer(dataElementDeSerializer):
 
     protocol_version = 1
 
+    def get_instance(self, constructor_data):
+        # Frozen plots stored with an array store reference their data:
+        data_ref = constructor_data['kwargs'].pop(ARRAY_STORE_DATA_KEY, None)
+        instance = super(plotDescriptorDeSerializer, self).get_instance(
+            constructor_data
+        )
+        if data_ref is not None:
+            store = get_active_array_store()
+            instance.plot_config.data_source = store.get_dataframe(data_ref)
+        return instance
+
     def _klass_default(self):
         from pybleau.app.model.plot_descriptor import PlotDescriptor
         return PlotDescriptor
@@ -119,6 +171,13 @@ class histogramPlotConfiguratorDeSerializer(dataElementDeSerializer):
         return HistogramPlotConfigurator
 
 
+class multiHistogramPlotConfiguratorDeSerializer(dataElementDeSerializer):
+    def _klass_default(self):
+        from pybleau.app.plotting.multi_plot_config import \
+            MultiHistogramPlotConfigurator
+        return MultiHistogramPlotConfigurator
+
+
 class histogramPlotStyleDeSerializer(dataElementDeSerializer):
 
     protocol_version = 1
@@ -0,0 +1,83 @@
+""" Encoding of arrays of python objects into bytes, without pickling them.
+
+Pickled data can run arbitrary code when loaded. Arrays of python objects are
+instead encoded as UTF-8 text with an array of offsets when they only contain
+strings and None, or as JSON when they contain other plain scalars. Arrays
+containing any other type of value are rejected.
+"""
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+#: Encodings of the arrays of python objects
+UTF8_ENCODING = "utf-8"
+JSON_ENCODING = "json"
+
+#: Python types supported in arrays of objects stored as JSON
+JSON_SCALAR_TYPES = (bool, int, float, str, type(None))
+
+
+def encode_object_array(values):
+    """ Returns the bytes encoding a 1D array of python objects, and the
+    encoding used.
+
+    Raises
+    ------
+    TypeError
+        If the array contains values which can't be encoded (only strings,
+        numbers, booleans and None can).
+    """
+    is_none = np.array([value is None for value in values], dtype=bool)
+    strings = values[~is_none]
+    if all(type(value) is str for value in strings):
+        # Offsets are in characters, so the text is decoded all at once:
+        lengths = np.zeros(len(values), dtype=np.int64)
+        lengths[~is_none] = [len(value) for value in strings]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        try:
+            text = "".join(strings).encode(UTF8_ENCODING)
+        except UnicodeEncodeError as e:
+            msg = "Can't store strings which aren't valid unicode: {}"
+            msg = msg.format(e)
+            logger.exception(msg)
+            raise TypeError(msg)
+        buf = b"".join([offsets.tobytes(), is_none.tobytes(), text])
+        return buf, UTF8_ENCODING
+
+    values = [value.item() if isinstance(value, np.generic) else value
+              for value in values]
+    for value in values:
+        if type(value) not in JSON_SCALAR_TYPES:
+            msg = "Can't store values of type {} in a column of python " \
+                  "objects: only strings, numbers, booleans and None are " \
+                  "supported.".format(type(value).__name__)
+            logger.exception(msg)
+            raise TypeError(msg)
+
+    return json.dumps(values).encode("utf-8"), JSON_ENCODING
+
+
+def decode_object_array(buf, encoding, size):
+    """ Rebuild a 1D array of python objects from bytes made by
+    `encode_object_array`.
+    """
+    values = np.empty(size, dtype=object)
+    if encoding == UTF8_ENCODING:
+        offsets_end = (size + 1) * 8
+        offsets = np.frombuffer(buf[:offsets_end], dtype=np.int64)
+        is_none = np.frombuffer(buf[offsets_end:offsets_end + size],
+                                dtype=bool)
+        text = bytes(buf[offsets_end + size:]).decode(UTF8_ENCODING)
+        values[:] = [text[start:end] for start, end in
+                     zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+        values[is_none] = None
+    elif encoding == JSON_ENCODING:
+        values[:] = json.loads(bytes(buf).decode("utf-8"))
+    else:
+        msg = "Unknown array encoding {}.".format(encoding)
+        logger.exception(msg)
+        raise ValueError(msg)
+    return values
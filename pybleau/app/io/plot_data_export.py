@@ -0,0 +1,264 @@
+""" Deduplicated export of the data behind plots.
+
+Plots of the same data source typically plot the same columns, so exporting a
+table per plot and per renderer stores the same values over and over. Instead,
+every exported array is identified by a hash of its content and stored only
+once. A manifest table records, for each column of each plot dataset, which
+table and column hold its values. Columns equal to a source data column
+reference it rather than being stored again.
+
+Tables are streamed straight into the target file, without temporary files:
+
+- ``.csv``: a zip archive of CSV files,
+- ``.xlsx``: an Excel workbook with a sheet per table,
+- ``.h5``: an HDF5 file with a node per table,
+- ``.npz``: a compressed columnar numpy archive, with a ``.npy`` member per
+  column. Columns of python objects are encoded rather than pickled, and may
+  only contain strings, numbers, booleans and None.
+"""
+import hashlib
+from io import TextIOWrapper
+import json
+import logging
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import numpy as np
+import pandas as pd
+
+from .object_arrays import decode_object_array, encode_object_array
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET_NAME = "Source data"
+
+#: Name of the table describing where the columns of each dataset are stored
+MANIFEST_TABLE_NAME = "plot_data_manifest"
+
+#: Column names of the manifest table
+MANIFEST_COLUMNS = ["dataset", "column", "table", "table_column"]
+
+#: Name of the tables storing unique arrays, grouped by length
+ARRAY_TABLE_NAME_PATTERN = "plot_arrays_{}"
+
+#: Number of characters of the array digests used as column names
+ARRAY_KEY_LENGTH = 16
+
+#: Name of the npz member describing the tables it contains
+NPZ_LAYOUT_MEMBER = "layout.json"
+
+SUPPORTED_FORMATS = [".csv", ".xlsx", ".h5", ".npz"]
+
+
+def array_digest(values):
+    """ Returns a hash of the content of an array, including its dtype.
+
+    Parameters
+    ----------
+    values : np.ndarray or pd.Series
+        Array to hash.
+    """
+    values = pd.Series(values)
+    digest = hashlib.blake2b(str(values.dtype).encode())
+    if values.dtype == object or isinstance(values.dtype,
+                                            pd.api.extensions.ExtensionDtype):
+        hashes = pd.util.hash_pandas_object(values, index=False)
+        digest.update(hashes.to_numpy().tobytes())
+    else:
+        digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def deduplicate_plot_data(source_df, datasets,
+                          source_key=DEFAULT_DATASET_NAME):
+    """ Build the tables storing datasets with each unique array stored once.
+
+    Parameters
+    ----------
+    source_df : pd.DataFrame
+        Data source of the plots, stored as is.
+
+    datasets : dict
+        Plot datasets (DataFrames) to store, mapped by name.
+
+    source_key : str
+        Name of the table storing the source data.
+
+    Returns
+    -------
+    dict
+        Tables to write, mapped by name. Contains the source data, a table of
+        unique arrays per array length and the manifest table.
+    """
+    known_arrays = {}
+    for col in source_df.columns:
+        digest = array_digest(source_df[col])
+        known_arrays.setdefault(digest, (source_df[col], source_key, col))
+
+    array_tables = {}
+    manifest = []
+    for name, df in datasets.items():
+        for col in df.columns:
+            digest = array_digest(df[col])
+            if digest not in known_arrays:
+                table = ARRAY_TABLE_NAME_PATTERN.format(len(df))
+                array_key = digest[:ARRAY_KEY_LENGTH]
+                array_tables.setdefault(table, {})[array_key] = \
+                    df[col].to_numpy()
+                known_arrays[digest] = (df[col], table, array_key)
+            _, table, table_col = known_arrays[digest]
+            manifest.append((name, col, table, table_col))
+
+    tables = {source_key: source_df}
+    for table, arrays in array_tables.items():
+        tables[table] = pd.DataFrame(arrays)
+    tables[MANIFEST_TABLE_NAME] = pd.DataFrame(manifest,
+                                               columns=MANIFEST_COLUMNS)
+    return tables
+
+
+def write_tables(tables, data_path, data_format, **kwargs):
+    """ Stream tables into a single data file.
+
+    Parameters
+    ----------
+    tables : dict
+        DataFrames to write, mapped by name.
+
+    data_path : str
+        Path to the file to create.
+
+    data_format : str
+        Format of the file to create, among SUPPORTED_FORMATS.
+
+    kwargs : dict
+        Additional writer options (e.g. compression options for HDF5).
+    """
+    if data_format == ".csv":
+        with ZipFile(data_path, "w", compression=ZIP_DEFLATED) as archive:
+            for name, df in tables.items():
+                with archive.open(name + ".csv", "w") as member:
+                    with TextIOWrapper(member, encoding="utf-8",
+                                       newline="") as stream:
+                        df.to_csv(stream, **kwargs)
+    elif data_format == ".xlsx":
+        with pd.ExcelWriter(data_path) as writer:
+            for name, df in tables.items():
+                df.to_excel(writer, sheet_name=name, **kwargs)
+    elif data_format == ".h5":
+        with pd.HDFStore(data_path, mode="w", **kwargs) as store:
+            for name, df in tables.items():
+                store.put(name, df)
+    elif data_format == ".npz":
+        _write_npz_tables(tables, data_path)
+    else:
+        msg = "Data format {} not implemented. Please report this issue."
+        msg = msg.format(data_format)
+        logger.exception(msg)
+        raise NotImplementedError(msg)
+
+
+def read_tables(data_path, data_format):
+    """ Read all tables written by `write_tables` into a data file.
+
+    Returns
+    -------
+    dict
+        DataFrames read, mapped by name.
+    """
+    if data_format == ".csv":
+        tables = {}
+        with ZipFile(data_path) as archive:
+            for member in archive.namelist():
+                with archive.open(member) as f:
+                    tables[member[:-len(".csv")]] = pd.read_csv(f,
+                                                                index_col=0)
+        return tables
+    elif data_format == ".xlsx":
+        return pd.read_excel(data_path, sheet_name=None, index_col=0)
+    elif data_format == ".h5":
+        with pd.HDFStore(data_path, mode="r") as store:
+            return {key.lstrip("/"): store[key] for key in store.keys()}
+    elif data_format == ".npz":
+        return _read_npz_tables(data_path)
+
+    msg = "Data format {} not implemented. Please report this issue."
+    msg = msg.format(data_format)
+    logger.exception(msg)
+    raise NotImplementedError(msg)
+
+
+def read_plot_data(data_path, data_format, source_key=DEFAULT_DATASET_NAME):
+    """ Rebuild all datasets from a file created from deduplicated tables.
+
+    Returns
+    -------
+    dict
+        Source data and plot datasets, mapped by name.
+    """
+    tables = read_tables(data_path, data_format)
+    datasets = {source_key: tables[source_key]}
+    manifest = tables[MANIFEST_TABLE_NAME]
+    for name, rows in manifest.groupby("dataset", sort=False):
+        datasets[name] = pd.DataFrame({
+            col: tables[table][table_col].to_numpy()
+            for col, table, table_col in zip(rows["column"], rows["table"],
+                                             rows["table_column"])
+        })
+    return datasets
+
+
+# Private functions -----------------------------------------------------------
+
+def _write_npz_tables(tables, data_path):
+    """ Write tables into a compressed npz archive, a member per column.
+
+    Columns of python objects are never pickled, so reading the archive can't
+    run arbitrary code: they are stored as encoded bytes (see
+    `encode_object_array`), and may only contain strings, numbers, booleans
+    and None.
+    """
+    layout = {}
+    with ZipFile(data_path, "w", compression=ZIP_DEFLATED) as archive:
+        for i, (name, df) in enumerate(tables.items()):
+            members = []
+            encodings = []
+            arrays = [("index", df.index)] + list(df.items())
+            for j, (_, values) in enumerate(arrays):
+                member = "table{}_{}.npy".format(i, j)
+                arr = np.asarray(values)
+                encoding = None
+                if arr.dtype.hasobject:
+                    buf, encoding = encode_object_array(arr)
+                    arr = np.frombuffer(buf, dtype=np.uint8)
+                with archive.open(member, "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, arr, allow_pickle=False)
+                members.append(member)
+                encodings.append(encoding)
+            layout[name] = {"index_name": df.index.name,
+                            "columns": [str(col) for col in df.columns],
+                            "members": members,
+                            "encodings": encodings,
+                            "length": len(df)}
+
+        archive.writestr(NPZ_LAYOUT_MEMBER, json.dumps(layout))
+
+
+def _read_npz_tables(data_path):
+    tables = {}
+    with ZipFile(data_path) as archive:
+        layout = json.loads(archive.read(NPZ_LAYOUT_MEMBER))
+        for name, table_layout in layout.items():
+            arrays = []
+            for member, encoding in zip(table_layout["members"],
+                                        table_layout["encodings"]):
+                with archive.open(member) as f:
+                    arr = np.lib.format.read_array(f, allow_pickle=False)
+                if encoding is not None:
+                    arr = decode_object_array(arr, encoding,
+                                              table_layout["length"])
+                arrays.append(arr)
+            index = pd.Index(arrays[0], name=table_layout["index_name"])
+            tables[name] = pd.DataFrame(
+                dict(zip(table_layout["columns"], arrays[1:])), index=index
+            )
+    return tables
@@ -0,0 +1,105 @@
+""" Rendering of plot images in worker processes.
+
+Rasterizing many plots at a high resolution is CPU bound, and can't be sped up
+with threads. To export them, plots are rebuilt off-screen in a pool of worker
+processes, from a copy of their configurator's traits and from the columns of
+their data source they plot, sent to the worker with each plot.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import sys
+
+from chaco.api import HPlotContainer, OverlayPlotContainer
+
+from app_common.chaco.plot_io import save_plot_to_file
+
+logger = logging.getLogger(__name__)
+
+
+def plot_render_state(desc, factory_klass):
+    """ Returns what a worker process needs to rebuild and render a plot.
+
+    Parameters
+    ----------
+    desc : PlotDescriptor
+        Descriptor of the plot to render, with its configurator.
+
+    factory_klass : type
+        Factory class to build the plot with.
+    """
+    config = desc.plot_config
+    config_traits = config.trait_get(config.copyable_trait_names())
+    config_traits.pop("data_source", None)
+    return {"config_klass": config.__class__, "config_traits": config_traits,
+            "factory_klass": factory_klass,
+            "size": list(desc.plot.outer_bounds)}
+
+
+def plot_data_columns(config):
+    """ Returns the columns of a configurator's data source its plot uses.
+
+    These are the columns named by its column traits (x_col_name,
+    hover_col_names, columns_to_melt, ...), so that the workers don't receive
+    the entire data source.
+    """
+    df_columns = config.data_source.columns
+    used = set()
+    for name in config.copyable_trait_names():
+        if name.endswith("col_name"):
+            used.add(getattr(config, name))
+        elif name.endswith("col_names") or name == "columns_to_melt":
+            used.update(getattr(config, name))
+    return [col for col in df_columns if col in used]
+
+
+def create_render_pool(max_workers=None):
+    """ Returns a pool of processes to render plots in.
+
+    Where supported (python 3.7+), processes are spawned rather than forked,
+    since the parent is typically a multi-threaded UI application.
+    """
+    kwargs = {}
+    if sys.version_info >= (3, 7):
+        kwargs["mp_context"] = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, **kwargs)
+
+
+def render_plot_image(state, data_source, filepath, dpi, **kwargs):
+    """ Rebuild a plot from its render state and data, and save it as an
+    image.
+
+    Runs in a worker process of a pool created by `create_render_pool`.
+
+    Returns
+    -------
+    str
+        Path to the image created.
+    """
+    config = state["config_klass"](
+        data_source=data_source,
+        **state["config_traits"]
+    )
+    factory = state["factory_klass"](**config.to_dict())
+    plot = factory.generate_plot()["plot"]
+    plot.outer_bounds = state["size"]
+    _apply_style_ranges(config, plot, factory)
+    plot.do_layout(force=True)
+    save_plot_to_file(plot, filepath=filepath, dpi=dpi, **kwargs)
+    return filepath
+
+
+# Private functions -----------------------------------------------------------
+
+def _apply_style_ranges(config, plot, factory):
+    """ Apply the styler's axis ranges to the rebuilt plot, like the plot
+    manager does to the displayed plots.
+    """
+    if isinstance(plot, HPlotContainer):
+        for comp in plot.components:
+            if isinstance(comp, OverlayPlotContainer):
+                plot = comp
+                break
+
+    config.plot_style.apply_axis_ranges(plot)
+    factory.align_all_renderers(plot)
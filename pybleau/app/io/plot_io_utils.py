@@ -5,9 +5,12 @@ import pandas as pd
 
 from pybleau.app.plotting.plot_config import BAR_PLOT_TYPE, LINE_PLOT_TYPE, \
     HIST_PLOT_TYPE, SCATTER_PLOT_TYPE
+from pybleau.app.utils.string_definitions import MULTI_HIST_PLOT_TYPE
 
 TWO_D_PLOT_TYPES = {SCATTER_PLOT_TYPE, LINE_PLOT_TYPE, BAR_PLOT_TYPE}
 
+HIST_PLOT_TYPES = {HIST_PLOT_TYPE, MULTI_HIST_PLOT_TYPE}
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,7 +43,9 @@ def plot_data2dataframes(plot_desc):
             )
         return df_dict
 
-    elif plot_desc.plot_type == HIST_PLOT_TYPE:
+    elif plot_desc.plot_type in HIST_PLOT_TYPES:
+        # Overlaid histograms share their bin centers, so all counts fit in 1
+        # DataFrame:
         return {"": pd.DataFrame(plot_desc.plot.data.arrays)}
 
     else:
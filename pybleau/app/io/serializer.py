@@ -8,10 +8,13 @@ import logging
 from app_common.apptools.io.serializer import DataElement_Serializer, \
     Serializer
 
+from .array_store import active_array_store, ARRAY_STORE_DATA_KEY, \
+    get_active_array_store
+
 logger = logging.getLogger(__name__)
 
 
-def serialize(obj, array_collection=None):
+def serialize(obj, array_collection=None, array_store=None):
     """ Serialization functional entry point.
 
     Parameters
@@ -21,6 +24,11 @@ def serialize(obj, array_collection=None):
 
     array_collection : dict
         Dictionary mapping all numpy arrays stored to an id in the serial data.
+
+    array_store : ArrayStore, optional
+        Store to write the analyzers' and frozen plots' DataFrames to, to save
+        as a binary sidecar file. If provided, the serial data only contains
+        references to these DataFrames.
     """
     from app_common.apptools.io.serializer import serialize
     from pybleau import __build__, __version__
@@ -29,21 +37,42 @@ def serialize(obj, array_collection=None):
     software_version = [__version__, __build__]
     local_serializers = {key: val for key, val in globals().items()
                          if key.endswith("_Serializer")}
-    return serialize(obj, array_collection=array_collection,
-                     software_name="{} {}".format(APP_FAMILY, APP_TITLE),
-                     software_uuid=APP_UUID,
-                     software_version=software_version,
-                     additional_serializers=local_serializers)
+    with active_array_store(array_store):
+        return serialize(obj, array_collection=array_collection,
+                         software_name="{} {}".format(APP_FAMILY, APP_TITLE),
+                         software_uuid=APP_UUID,
+                         software_version=software_version,
+                         additional_serializers=local_serializers)
 
 
 class DataFrameAnalyzer_Serializer(DataElement_Serializer):
 
     protocol_version = 1
 
+    def get_instance_data(self, obj):
+        store = get_active_array_store()
+        if store is None:
+            return super(DataFrameAnalyzer_Serializer, self).get_instance_data(obj)  # noqa
+
+        # Store the data before the plots, so that frozen plots can reference
+        # a subset of it:
+        data_ref = self.store_data(obj, store)
+        data = super(DataFrameAnalyzer_Serializer, self).get_instance_data(obj)
+        data[ARRAY_STORE_DATA_KEY] = data_ref
+        return data
+
     def attr_names_to_serialize(self, obj):
-        return ['name', 'uuid', 'source_df', 'filter_exp', 'summary_index',
-                'sort_by_col', 'data_selected', 'num_displayed_rows',
-                "plot_manager_list", "column_metadata"]
+        names = ['name', 'uuid', 'source_df', 'filter_exp', 'summary_index',
+                 'sort_by_col', 'data_selected', 'num_displayed_rows',
+                 "plot_manager_list", "column_metadata"]
+        if get_active_array_store() is not None:
+            names.remove("source_df")
+        return names
+
+    def store_data(self, obj, store):
+        """ Add the analyzed data to the array store and return a reference.
+        """
+        return store.add_dataframe(obj.source_df, as_parent=True)
 
 
 class MultiDataFrameAnalyzer_Serializer(DataFrameAnalyzer_Serializer):
@@ -52,10 +81,16 @@ class MultiDataFrameAnalyzer_Serializer(DataFrameAnalyzer_Serializer):
 
     def attr_names_to_serialize(self, obj):
         names = super(MultiDataFrameAnalyzer_Serializer, self).attr_names_to_serialize(obj)  # noqa
-        names.remove("source_df")
-        names.append("_source_dfs")
+        if "source_df" in names:
+            names.remove("source_df")
+        if get_active_array_store() is None:
+            names.append("_source_dfs")
         return names
 
+    def store_data(self, obj, store):
+        return [[key, store.add_dataframe(df, as_parent=True)]
+                for key, df in obj._source_dfs.items()]
+
 
 class DataFramePlotManager_Serializer(DataElement_Serializer):
 
@@ -73,9 +108,15 @@ class PlotDescriptor_Serializer(DataElement_Serializer):
         data = super(PlotDescriptor_Serializer, self).get_instance_data(obj)
         # If the plot is frozen, store also the config's data_source:
         if obj.frozen:
-            data['plot_config']["data_source"] = self.serialize(
-                obj.plot_config.data_source
-            )
+            store = get_active_array_store()
+            if store is None:
+                data['plot_config']["data_source"] = self.serialize(
+                    obj.plot_config.data_source
+                )
+            else:
+                data[ARRAY_STORE_DATA_KEY] = store.add_dataframe(
+                    obj.plot_config.data_source
+                )
         return data
 
     def attr_names_to_serialize(self, obj):
@@ -94,7 +135,8 @@ class BaseSinglePlotConfigurator_Serializer(DataElement_Serializer):
         keys_to_serialize = ["plot_style", "source_template"]
         # These are needed by the factory but not to serialize since they are
         # read from the DF:
-        skip = {"x_arr", "y_arr", "z_arr", 'hover_data'}
+        skip = {"x_arr", "y_arr", "z_arr", 'hover_data', "x_sorted",
+                "y_err_arr"}
         for key in obj._dict_keys:
             if key in skip:
                 continue
@@ -129,8 +171,20 @@ class HistogramPlotConfigurator_Serializer(BaseSinglePlotConfigurator_Serializer
     pass
 
 
+class MultiHistogramPlotConfigurator_Serializer(HistogramPlotConfigurator_Serializer):  # noqa
+    def attr_names_to_serialize(self, obj):
+        # The histogrammed columns aren't in _dict_keys since they are passed
+        # to the factory as arrays:
+        keys = super(MultiHistogramPlotConfigurator_Serializer, self).attr_names_to_serialize(obj)  # noqa
+        return keys + ["x_col_names", "multi_mode"]
+
+
 class HeatmapPlotConfigurator_Serializer(BaseSinglePlotConfigurator_Serializer):  # noqa
-    pass
+    def attr_names_to_serialize(self, obj):
+        # Add the binning keys since they are not in _dict_keys and therefore
+        # not collected by parent class implementation
+        keys = super(HeatmapPlotConfigurator_Serializer, self).attr_names_to_serialize(obj)  # noqa
+        return keys + ["x_num_bins", "y_num_bins"]
 
 
 class BaseXYPlotStyle_Serializer(Serializer):
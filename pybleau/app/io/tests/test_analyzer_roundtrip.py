@@ -1,3 +1,4 @@
+from functools import partial
 from unittest import TestCase
 
 import numpy as np
@@ -7,6 +8,7 @@ from app_common.apptools.io.assertion_utils import assert_roundtrip_identical
 from pybleau.app.api import DataFrameAnalyzer
 from pybleau.app.model.multi_dfs_dataframe_analyzer import \
     MultiDataFrameAnalyzer
+from pybleau.app.io.array_store import ArrayStore
 from pybleau.app.io.deserializer import deserialize
 from pybleau.app.io.serializer import serialize
 from pybleau.app.model.dataframe_plot_manager import DataFramePlotManager
@@ -285,3 +287,30 @@ class TestRoundTripAnalyzerWithPlots(TestCase, BaseAnalysisRoundTrip):
         plot_desc = new_analysis.plot_manager_list[0].contained_plots[0]
         self.assertEqual(plot_desc.plot_config.plot_style.interpolation,
                          "bilinear")
+
+
+class TestRoundTripAnalyzerWithArrayStore(TestRoundTripAnalyzerWithPlots):
+    """ Serialize an analyzer containing plots, storing DFs in an ArrayStore.
+    """
+    def assert_roundtrip_identical(self, obj, **kwargs):
+        store = ArrayStore()
+        skips = ANALYSIS_SKIPS | PLOTTER_SKIPS
+        return assert_roundtrip_identical(
+            obj, serial_func=partial(serialize, array_store=store),
+            deserial_func=partial(deserialize, array_store=store),
+            ignore=skips, **kwargs
+        )
+
+
+class TestRoundTripMultiDfAnalyzerWithArrayStore(
+        TestRoundTripMultiDfAnalyzer):
+    """ Serialize a multi-DF analyzer, storing DFs in an ArrayStore.
+    """
+    def assert_roundtrip_identical(self, obj, **kwargs):
+        store = ArrayStore()
+        skips = ANALYSIS_SKIPS | PLOTTER_SKIPS
+        return assert_roundtrip_identical(
+            obj, serial_func=partial(serialize, array_store=store),
+            deserial_func=partial(deserialize, array_store=store),
+            ignore=skips, **kwargs
+        )
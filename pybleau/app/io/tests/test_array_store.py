@@ -0,0 +1,130 @@
+from decimal import Decimal
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.io.array_store import active_array_store, ArrayStore, \
+    get_active_array_store
+from pybleau.app.io.object_arrays import JSON_ENCODING, UTF8_ENCODING
+
+TEST_DF = pd.DataFrame({"a": np.arange(8.), "b": list("abcdefgh"),
+                        "c": pd.date_range("2020-01-01", periods=8)},
+                       index=pd.Index(np.arange(8) * 2, name="idx"))
+
+
+class TestArrayStore(TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+        self.filepath = join(self.tmp_dir, "project.arrays")
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_identical_arrays_stored_once(self):
+        store = ArrayStore()
+        ref = store.add_dataframe(TEST_DF)
+        ref2 = store.add_dataframe(TEST_DF.copy())
+        self.assertEqual(ref, ref2)
+        # 1 index and 3 columns:
+        self.assertEqual(len(store.arrays), 4)
+
+    def test_subset_stored_as_row_positions(self):
+        store = ArrayStore()
+        store.add_dataframe(TEST_DF, as_parent=True)
+        subset = TEST_DF[TEST_DF["a"] > 3][["b", "a"]]
+        ref = store.add_dataframe(subset)
+        self.assertIn("rows", ref)
+        self.assertEqual(len(store.arrays), 5)
+        assert_frame_equal(store.get_dataframe(ref), subset)
+
+    def test_modified_subset_stored_as_columns(self):
+        store = ArrayStore()
+        store.add_dataframe(TEST_DF, as_parent=True)
+        subset = TEST_DF[TEST_DF["a"] > 3].assign(a=-1.)
+        ref = store.add_dataframe(subset)
+        self.assertNotIn("rows", ref)
+        assert_frame_equal(store.get_dataframe(ref), subset)
+
+    def test_save_load(self):
+        store = ArrayStore()
+        ref = store.add_dataframe(TEST_DF, as_parent=True)
+        subset = TEST_DF.iloc[::3]
+        subset_ref = store.add_dataframe(subset)
+        range_df = TEST_DF.reset_index(drop=True)
+        range_ref = store.add_dataframe(range_df)
+        store.save(self.filepath)
+
+        for mmap_mode in ["c", None]:
+            new_store = ArrayStore.load(self.filepath, mmap_mode=mmap_mode)
+            assert_frame_equal(new_store.get_dataframe(ref), TEST_DF)
+            assert_frame_equal(new_store.get_dataframe(subset_ref), subset)
+            assert_frame_equal(new_store.get_dataframe(range_ref), range_df)
+
+        # Numerical columns are memory-mapped:
+        new_store = ArrayStore.load(self.filepath)
+        key = ref["columns"][0][1]
+        self.assertIsInstance(new_store.get_array(key), np.memmap)
+
+        # Modifying loaded data doesn't modify the file:
+        df = new_store.get_dataframe(ref)
+        df.iloc[0, 0] = 100.
+        reloaded = ArrayStore.load(self.filepath).get_dataframe(ref)
+        assert_frame_equal(reloaded, TEST_DF)
+
+    def test_save_over_loaded_file(self):
+        store = ArrayStore()
+        ref = store.add_dataframe(TEST_DF)
+        store.save(self.filepath)
+
+        # The arrays to save are memory-mapped from the file overwritten:
+        loaded = ArrayStore.load(self.filepath)
+        new_store = ArrayStore()
+        new_ref = new_store.add_dataframe(loaded.get_dataframe(ref))
+        new_store.save(self.filepath)
+        reloaded = ArrayStore.load(self.filepath).get_dataframe(new_ref)
+        assert_frame_equal(reloaded, TEST_DF)
+
+    def test_object_columns_roundtrip(self):
+        df = pd.DataFrame({
+            "str": ["a", None, "\u00e9t\u00e9", ""],
+            "mixed": np.array([1, "1", None, True], dtype=object),
+            "floats": np.array([1.5, np.nan, 2, "x"], dtype=object),
+            "tz": pd.date_range("2020-01-01", periods=4, tz="US/Eastern"),
+        })
+        store = ArrayStore()
+        ref = store.add_dataframe(df)
+        store.save(self.filepath)
+        loaded_store = ArrayStore.load(self.filepath)
+        encodings = {entry["encoding"]
+                     for entry in loaded_store._file_entries.values()}
+        self.assertEqual(encodings, {None, UTF8_ENCODING, JSON_ENCODING})
+
+        loaded = loaded_store.get_dataframe(ref)
+        assert_frame_equal(loaded, df)
+        self.assertEqual(loaded["mixed"].tolist(), [1, "1", None, True])
+
+    def test_unsupported_objects_rejected(self):
+        df = pd.DataFrame({"a": [Decimal("1.5"), Decimal("2")]})
+        store = ArrayStore()
+        store.add_dataframe(df)
+        with self.assertRaises(TypeError):
+            store.save(self.filepath)
+
+    def test_load_invalid_file(self):
+        with open(self.filepath, "wb") as f:
+            f.write(b"not an array store")
+
+        with self.assertRaises(ValueError):
+            ArrayStore.load(self.filepath)
+
+    def test_active_array_store(self):
+        store = ArrayStore()
+        self.assertIsNone(get_active_array_store())
+        with active_array_store(store):
+            self.assertIs(get_active_array_store(), store)
+        self.assertIsNone(get_active_array_store())
@@ -29,10 +29,12 @@ if KIWI_AVAILABLE and BACKEND_AVAILABLE:
         EXPORT_INLINE, EXPORT_NO, EXPORT_YES, IMG_FORMAT, PPT_FORMAT, \
         VEGA_FORMAT, EXTERNAL_DATA_FNAME
     from pybleau.app.model.dataframe_plot_manager import DataFramePlotManager
+    from pybleau.app.io.plot_data_export import read_plot_data
+    from pybleau.app.io.plot_io_utils import plot_data2dataframes
     from pybleau.reporting.string_definitions import IDX_NAME_KEY, \
         CONTENT_KEY, DATASETS_KEY
     from pybleau.app.model.plot_descriptor import PlotDescriptor
-    from pybleau.app.plotting.multi_plot_config import \
+    from pybleau.app.plotting.multi_plot_config import MULTI_CURVE, \
         MultiHistogramPlotConfigurator
     from pybleau.app.plotting.plot_config import BarPlotConfigurator, \
         HistogramPlotConfigurator, LinePlotConfigurator, \
@@ -172,23 +174,17 @@ class BasePlotManagerExportTester(object):
             assert_frame_equal(df_back, TEST_DF)
 
         if num_dataset > 1:
-            if ext == ".h5":
-                with pd.HDFStore(data_file) as s:
-                    self.assertEqual(len(s.keys()), num_dataset)
-                    for key in s.keys():
-                        self.assertIsInstance(s[key], pd.DataFrame)
-            elif ext == ".xlsx":
-                with pd.ExcelFile(data_file) as f:
-                    self.assertEqual(len(f.sheet_names), num_dataset)
-                    for key in f.sheet_names:
-                        self.assertIsInstance(reader(f, sheet_name=key),
-                                              pd.DataFrame)
-            elif ext == ".csv":
-                content = os.listdir(dirname(data_file))
-                self.assertEqual(len(content), num_dataset)
-                for fname in content:
-                    df = read_csv(join(dirname(data_file), fname))
-                    self.assertIsInstance(df, pd.DataFrame)
+            # Plot datasets are rebuilt from the deduplicated tables:
+            if ext == ".csv":
+                archive = join(self.target_dir, EXTERNAL_DATA_FNAME + ".zip")
+                source_key = string2filename(DEFAULT_DATASET_NAME)
+                datasets = read_plot_data(archive, ext, source_key=source_key)
+            else:
+                datasets = read_plot_data(data_file, ext)
+
+            self.assertEqual(len(datasets), num_dataset)
+            for df in datasets.values():
+                self.assertIsInstance(df, pd.DataFrame)
 
 
 @skipIf(not BACKEND_AVAILABLE or not KIWI_AVAILABLE, msg)
@@ -246,6 +242,46 @@ class TestPlotManagerExportImages(BasePlotManagerExportTester, TestCase):
         self.assertEqual(set(content), {"0_Plot_0.PNG", "1_Plot_1.PNG",
                                         "2_Plot_2.PNG"})
 
+    def test_export_4_plots_in_worker_processes(self):
+        model = DataFramePlotManager(contained_plots=[self.desc, self.desc2,
+                                                      self.desc3, self.desc4],
+                                     data_source=TEST_DF)
+        exporter = NonInteractiveExporter(df_plotter=model,
+                                          target_dir=self.target_dir,
+                                          max_render_workers=2)
+        exporter.to_folder()
+        content = os.listdir(self.target_dir)
+        self.assertEqual(set(content), {"0_Plot_0.PNG", "1_Plot_1.PNG",
+                                        "2_Plot_2.PNG", "3_Plot_3.PNG"})
+        self.assertEqual(exporter.num_images_to_render, 4)
+        self.assertEqual(exporter.num_images_rendered, 4)
+
+    def test_worker_data_only_plotted_columns(self):
+        exporter = NonInteractiveExporter(df_plotter=self.model,
+                                          target_dir=self.target_dir)
+        # Images are rendered in this process unless requested:
+        self.assertEqual(exporter.max_render_workers, 1)
+        data = exporter._data(self.desc4)
+        self.assertEqual(list(data.columns), ["a", "b", "d"])
+        data = exporter._data(self.desc)
+        self.assertEqual(list(data.columns), ["a"])
+
+    def test_cancel_export(self):
+        model = DataFramePlotManager(contained_plots=[self.desc, self.desc2,
+                                                      self.desc3],
+                                     data_source=TEST_DF)
+        exporter = NonInteractiveExporter(df_plotter=model,
+                                          target_dir=self.target_dir,
+                                          max_render_workers=0)
+
+        def cancel():
+            exporter.cancel_requested = True
+
+        exporter.on_trait_change(cancel, "num_images_rendered")
+        exporter.to_folder()
+        self.assertEqual(os.listdir(self.target_dir), ["0_Plot_0.PNG"])
+        self.assertEqual(exporter.num_images_rendered, 1)
+
     def test_export_1_plot_export_source_data(self):
         for fmt in [".h5", ".csv", ".xlsx"]:
             exporter = NonInteractiveExporter(df_plotter=self.model,
@@ -774,6 +810,45 @@ class TestPlotManagerExportVega(BasePlotManagerExportTester, TestCase,
                     'mark': 'bar'}
         self.assert_vega_export_equal(content[CONTENT_KEY][1], expected)
 
+    def test_export_overlaid_hist_plot_w_data(self):
+        config = MultiHistogramPlotConfigurator(data_source=TEST_DF,
+                                                plot_title="Plot",
+                                                multi_mode=MULTI_CURVE)
+        config.x_col_names = ["a", "b"]
+        self.model._add_new_plots(config)
+
+        self.exporter.export_data = EXPORT_IN_FILE
+        content = self.exporter.to_vega()
+        self.assert_rebuild_df(content)
+        self.assertEqual(len(content[CONTENT_KEY]), 1)
+        expected = {'$schema': TARGET_VEGA_SCHEMA,
+                    'data': {"name": DEFAULT_DATASET_NAME},
+                    'transform': [{"fold": ["a", "b"],
+                                   "as": ["variable", "value"]}],
+                    'encoding': {
+                        "x": {
+                          "bin": True,
+                          "field": "value",
+                          "type": "quantitative"
+                        },
+                        "y": {
+                          "aggregate": "count",
+                          "type": "quantitative",
+                          "stack": None
+                        },
+                        "color": {
+                          "field": "variable",
+                          "type": "nominal"
+                        }
+                    },
+                    'mark': 'bar'}
+        self.assert_vega_export_equal(content[CONTENT_KEY][0], expected)
+
+        # The plot's data, with 1 count column per histogram, is exported:
+        df_dict = plot_data2dataframes(self.model.contained_plots[0])
+        self.assertEqual(len(df_dict), 1)
+        self.assertEqual(len(df_dict[""].columns), 3)
+
     # Assertion methods -------------------------------------------------------
 
     def assert_vega_export_equal(self, desc1, desc2):
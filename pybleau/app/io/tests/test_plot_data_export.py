@@ -0,0 +1,106 @@
+from decimal import Decimal
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from zipfile import ZipFile
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.io.plot_data_export import array_digest, \
+    ARRAY_TABLE_NAME_PATTERN, DEFAULT_DATASET_NAME, deduplicate_plot_data, \
+    MANIFEST_TABLE_NAME, read_plot_data, read_tables, write_tables
+
+TEST_DF = pd.DataFrame({"a": [1., 2., 3., 4.], "b": [1, 1, 2, 2],
+                        "c": list("xyzx")})
+
+
+class TestArrayDigest(TestCase):
+    def test_equal_content_same_digest(self):
+        self.assertEqual(array_digest(np.arange(5.)),
+                         array_digest(pd.Series(np.arange(5.), index=list("abcde"))))  # noqa
+        self.assertEqual(array_digest(TEST_DF["c"]),
+                         array_digest(TEST_DF["c"].copy()))
+
+    def test_different_content_or_dtype(self):
+        self.assertNotEqual(array_digest(np.arange(5.)),
+                            array_digest(np.arange(1., 6.)))
+        self.assertNotEqual(array_digest(np.arange(5.)),
+                            array_digest(np.arange(5)))
+        self.assertNotEqual(array_digest(TEST_DF["c"]),
+                            array_digest(TEST_DF["c"][::-1].values))
+
+
+class TestDeduplicatePlotData(TestCase):
+    def setUp(self):
+        self.datasets = {
+            "plot_0_": pd.DataFrame({"a": TEST_DF["a"].values,
+                                     "b": TEST_DF["b"].values}),
+            "plot_1_x": pd.DataFrame({"a": [1., 4.], "b": [1, 2]}),
+            "plot_2_x": pd.DataFrame({"a": [1., 4.], "b": [1, 2]}),
+        }
+        self.tmp_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tmp_dir)
+
+    def test_arrays_stored_once(self):
+        tables = deduplicate_plot_data(TEST_DF, self.datasets)
+        self.assertEqual(set(tables), {DEFAULT_DATASET_NAME,
+                                       ARRAY_TABLE_NAME_PATTERN.format(2),
+                                       MANIFEST_TABLE_NAME})
+        # Columns identical to source columns aren't stored again:
+        self.assertEqual(tables[ARRAY_TABLE_NAME_PATTERN.format(2)].shape,
+                         (2, 2))
+        manifest = tables[MANIFEST_TABLE_NAME]
+        self.assertEqual(len(manifest), 6)
+        source_rows = manifest[manifest["dataset"] == "plot_0_"]
+        self.assertEqual(set(source_rows["table"]), {DEFAULT_DATASET_NAME})
+
+    def test_roundtrip(self):
+        tables = deduplicate_plot_data(TEST_DF, self.datasets)
+        for fmt in [".csv", ".npz"]:
+            path = join(self.tmp_dir, "data" + fmt)
+            write_tables(tables, path, fmt)
+            datasets = read_plot_data(path, fmt)
+            self.assertEqual(list(datasets), [DEFAULT_DATASET_NAME] +
+                             list(self.datasets))
+            for name, df in self.datasets.items():
+                assert_frame_equal(datasets[name], df, check_dtype=False)
+
+            assert_frame_equal(datasets[DEFAULT_DATASET_NAME], TEST_DF,
+                               check_dtype=False)
+
+    def test_npz_preserves_dtypes(self):
+        path = join(self.tmp_dir, "data.npz")
+        write_tables({DEFAULT_DATASET_NAME: TEST_DF}, path, ".npz")
+        with ZipFile(path) as archive:
+            self.assertEqual(len(archive.namelist()), 5)
+
+        df = read_tables(path, ".npz")[DEFAULT_DATASET_NAME]
+        assert_frame_equal(df, TEST_DF, check_dtype=False)
+        self.assertEqual(df["a"].dtype, TEST_DF["a"].dtype)
+        self.assertEqual(df["b"].dtype, TEST_DF["b"].dtype)
+
+    def test_npz_object_columns_not_pickled(self):
+        path = join(self.tmp_dir, "data.npz")
+        df = pd.DataFrame({"c": np.array(["x", None, "é"], dtype=object),
+                           "d": np.array([1, "y", 2.5], dtype=object)},
+                          index=np.array(list("abc"), dtype=object))
+        write_tables({DEFAULT_DATASET_NAME: df}, path, ".npz")
+        with ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.endswith(".npy"):
+                    with archive.open(member) as f:
+                        np.lib.format.read_array(f, allow_pickle=False)
+
+        result = read_tables(path, ".npz")[DEFAULT_DATASET_NAME]
+        assert_frame_equal(result, df)
+
+    def test_npz_unsupported_object_column(self):
+        path = join(self.tmp_dir, "data.npz")
+        df = pd.DataFrame({"a": [Decimal(1)]})
+        with self.assertRaises(TypeError):
+            write_tables({DEFAULT_DATASET_NAME: df}, path, ".npz")
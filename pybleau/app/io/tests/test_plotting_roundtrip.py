@@ -9,6 +9,8 @@ from pybleau.app.io.serializer import serialize
 from pybleau.app.io.deserializer import deserialize
 from pybleau.app.api import DataFrameAnalyzer, DataFramePlotManager
 from pybleau.app.model.plot_descriptor import PlotDescriptor
+from pybleau.app.plotting.multi_plot_config import MULTI_CURVE, \
+    MultiHistogramPlotConfigurator
 from pybleau.app.plotting.plot_config import BarPlotConfigurator, \
     HeatmapPlotConfigurator, HistogramPlotConfigurator, LinePlotConfigurator, \
     ScatterPlotConfigurator
@@ -42,6 +44,17 @@ class TestRoundTripDataFramePlotManager(TestCase):
                               plot_title="Plot 1")
         self.assert_df_plotter_roundtrip(desc)
 
+    def test_round_trip_df_plotter_with_overlaid_hist(self):
+        multi_config = MultiHistogramPlotConfigurator(
+            data_source=TEST_DF, x_col_names=["Col_1", "Col_4"],
+            multi_mode=MULTI_CURVE
+        )
+        config = multi_config.to_config_list()[0]
+        config.plot_style.num_bins = 5
+        desc = PlotDescriptor(plot_config=config, plot_title="Plot 1",
+                              plot_type=config.plot_type)
+        self.assert_df_plotter_roundtrip(desc)
+
     def test_round_trip_df_plotter_with_bar(self):
         config2 = BarPlotConfigurator(data_source=TEST_DF)
         config2.x_col_name = "Col_1"
@@ -1,5 +1,5 @@
 import logging
-from pandas import concat, DataFrame
+from pandas import DataFrame
 import numpy as np
 from functools import partial
 
@@ -9,7 +9,12 @@ from traits.api import Bool, cached_property, Callable, Dict, Enum, Event, \
 from app_common.std_lib.str_utils import add_suffix_if_exists, sanitize_string
 from app_common.model_tools.data_element import DataElement
 
+from ..tools.filter_engine import FilterEngine
 from ..tools.filter_expression_manager import FilterExpression
+from ..tools.sort_engine import INDEX_KEY, SortEngine
+from ..tools.summary_engine import describe_categorical, describe_numerical
+from ..utils.selection_utils import index_values_to_positions, \
+    Selection, selections_equal
 try:
     from .dataframe_plot_manager import DataFramePlotManager
 except ImportError:
@@ -38,19 +43,30 @@ class InvalidQuery(ValueError):
 class DataFrameAnalyzer(DataElement):
     """ Tool that filters data from and builds a customizable summary of a DF.
 
-    NOTE: the source dataframe is copied because its column names may be
-    changed so that the filtering tool may be used (requires column names to be
-    valid variable name).
-
-    TODO: This class copies the source_df which could lead to large amount of
-    memory wasted if the DF is large. Is there a way to avoid that copy?
+    NOTE: by default, the source dataframe is copied because its column names
+    may be changed so that the filtering tool may be used (requires column
+    names to be valid variable name).
+
+    To avoid that copy for large DataFrames, create the analyzer with
+    `copy_source=False`: the source_df then shares its data with the
+    DataFrame provided, and only its column labels are sanitized. In that
+    borrowed mode, the source data isn't sorted along its index either:
+    sorting by the index goes through a cached positional permutation. The
+    borrowed data is never modified: the first call to `set_source_df_val`
+    (e.g. editing a table cell) copies the source data first. Modifying
+    `source_df` in place directly bypasses that protection.
     """
 
     # Data storage attributes -------------------------------------------------
 
-    #: **Copy** of the data to analyze, where column names have been sanitized
+    #: Data to analyze, where column names have been sanitized. A copy of the
+    #: provided DF unless the analyzer was created with copy_source=False.
     source_df = Instance(DataFrame)
 
+    #: Whether source_df shares its data with the DF it was created from.
+    #: Reset once the source data is copied before being modified.
+    source_borrowed = Bool(False)
+
     #: Complete list of data columns to display and analyze
     column_list = Property(List(Str), depends_on="source_df, col_list_changed")
 
@@ -60,6 +76,9 @@ class DataFrameAnalyzer(DataElement):
     #: Custom metadata describing the columns of the source_df
     column_metadata = Dict
 
+    #: Version of the source data, incremented every time it changes
+    _source_data_version = Int
+
     #: Result of filtering the source_df with the filter_exp expression
     filtered_df = Instance(DataFrame)
 
@@ -86,14 +105,44 @@ class DataFrameAnalyzer(DataElement):
     #: List of known filter expressions (mapped to a unique name)
     known_filter_exps = List(FilterExpression)
 
+    #: Engine evaluating filter_exp, caching the masks of its clauses
+    _filter_engine = Instance(FilterEngine, ())
+
+    #: Query that produced the current filtered_df (empty if not filtered)
+    _applied_query = Str
+
+    #: Version of the source data the _applied_query was evaluated on
+    _applied_query_version = Int
+
     #: Result of the summary statistics analysis (floating point columns)
-    summary_df = Instance(DataFrame)
+    summary_df = Property(Instance(DataFrame),
+                          depends_on="_num_summary_invalidated")
 
     #: List of analysis elements we need
     summary_index = List(DEFAULT_SUMMARY_ELEMENTS)
 
-    #: Result of the summary statistics analysis (floating point columns)
-    summary_categorical_df = Instance(DataFrame)
+    #: Result of the summary statistics analysis (categorical columns)
+    summary_categorical_df = Property(Instance(DataFrame),
+                                      depends_on="_cat_summary_invalidated")
+
+    #: Whether to hold off summary change notifications (e.g. summaries not
+    #: displayed). Summaries are always computed when read.
+    hold_summary_updates = Bool(False)
+
+    #: Computed summaries (mapping summary name to DF), cleared when outdated
+    _summary_cache = Dict
+
+    #: Names of the summaries invalidated while updates were held
+    _held_summary_invalidations = List
+
+    #: Event fired when the numerical summary is outdated
+    _num_summary_invalidated = Event
+
+    #: Event fired when the categorical summary is outdated
+    _cat_summary_invalidated = Event
+
+    #: Whether the filtered_df is being modified only by reordering its rows
+    reordering_filtered_df = Bool(False)
 
     #: Behavior when a filter leads to an exception. Mostly useful for testing
     filter_error_handling = Enum(["raise", "warn", "ignore"])
@@ -107,12 +156,15 @@ class DataFrameAnalyzer(DataElement):
     #: Whether the source data's index is sorted
     data_sorted = Bool
 
+    #: Engine sorting the filtered data, caching the source_df permutations
+    _sort_engine = Instance(SortEngine, ())
+
     #: Name of the index if any
     index_name = Property(Str, depends_on="source_df")
 
-    #: List of DF row locations currently selected. Used by PlotManager and
-    #: TableEditor, but not invariant under sorting operations.
-    selected_idx = List(Int)
+    #: Sorted array of DF row locations currently selected. Used by
+    #: PlotManager and TableEditor, but not invariant under sorting operations.
+    selected_idx = Selection
 
     #: List of DF index values that are selected
     data_selected = List
@@ -131,14 +183,14 @@ class DataFrameAnalyzer(DataElement):
     categorical_dtypes = List(CATEGORICAL_COL_TYPES)
 
     def __init__(self, convert_source_dtypes=False, data_sorted=True,
-                 **traits):
+                 copy_source=True, **traits):
 
         traits["data_sorted"] = data_sorted
         source_df = traits.get("source_df", None)
         if isinstance(source_df, DataFrame):
             # If the index isn't unique, selection functionalities will break.
             index = source_df.index
-            if len(index.unique()) != len(index):
+            if not index.is_unique:
                 # The breakage will come from the fact that the translation
                 # between a selection position to a selected index isn't
                 # bijective:
@@ -148,10 +200,21 @@ class DataFrameAnalyzer(DataElement):
                 logger.exception(msg)
                 raise NotImplementedError(msg)
 
-            traits["source_df"] = copy_and_sanitize(
-                source_df, convert_dtypes=convert_source_dtypes,
-                sort_index=data_sorted
-            )
+            if copy_source:
+                traits["source_df"] = copy_and_sanitize(
+                    source_df, convert_dtypes=convert_source_dtypes,
+                    sort_index=data_sorted
+                )
+            else:
+                traits["source_borrowed"] = True
+                traits["source_df"] = borrow_and_sanitize(
+                    source_df, convert_dtypes=convert_source_dtypes
+                )
+                # The borrowed data isn't sorted: sort the filtered data
+                # instead:
+                if data_sorted and not index.is_monotonic_increasing:
+                    index_name = "index" if index.name is None else index.name
+                    traits.setdefault("sort_by_col", index_name)
         else:
             msg = "Creating a {} without the source dataframe. Most " \
                   "functionality will break until that attribute is set."
@@ -165,10 +228,6 @@ class DataFrameAnalyzer(DataElement):
 
         super(DataFrameAnalyzer, self).__init__(**traits)
 
-        if self.source_df is not None:
-            self.compute_summary()
-            self.compute_categorical_summary()
-
         if sort_by:
             self.sort_by_col = sort_by
 
@@ -190,10 +249,13 @@ class DataFrameAnalyzer(DataElement):
     def map_df_index_to_idx(self, index_vals):
         """ Maps a list of index values to a list of positions along the DF.
 
-        Note: this call looses the order of index_vals because of isin. isin is
-        used to avoid for loops, as selection may contain a lot of values.
+        Note: the positions are returned in ascending order, regardless of the
+        order of index_vals. Values are looked up in the filtered_df index's
+        hash table, which is only built once per filtered_df, to avoid for
+        loops, as selection may contain a lot of values.
         """
-        return list(np.where(self.filtered_df.index.isin(index_vals))[0])
+        index = self.filtered_df.index
+        return index_values_to_positions(index, index_vals)
 
     def recompute_filtered_df(self):
         """ Force a recomputation of the filtered DF from the source one.
@@ -204,7 +266,35 @@ class DataFrameAnalyzer(DataElement):
         """ Shuffle the filtered DF order randomly.
         """
         self.sort_by_col = NO_SORTING_ENTRY
-        self.filtered_df = self.filtered_df.sample(frac=1)
+        self._set_reordered_filtered_df(self.filtered_df.sample(frac=1))
+
+    def set_source_df_val(self, index, col, value, change_notify=True):
+        """ Set a source DF element to a value.
+
+        WARNING: per the `.loc` implementation in pandas, if the index doesn't
+        exist, a new row will be added to the DF!
+
+        Parameters
+        ----------
+        index : any
+            Value of the index to set.
+
+        col : any
+            Value of the column to set. Must exist.
+
+        value: object
+            The value the column should be set to.
+
+        change_notify : bool, optional
+            Whether to rebuild all downstream dataframes (filtered,
+            displayed). Results cached for the previous data (filter masks,
+            sort orders) are invalidated regardless.
+        """
+        if self.source_borrowed:
+            self._copy_borrowed_source_df()
+
+        self.source_df.loc[index, col] = value
+        self._source_data_modified(change_notify=change_notify)
 
     # Traits Listeners --------------------------------------------------------
 
@@ -217,34 +307,33 @@ class DataFrameAnalyzer(DataElement):
                 logger.error(msg)
                 self.column_metadata.pop(key)
 
-    @on_trait_change("plot_manager_list.index_selected[]", post_init=True)
+    @on_trait_change("plot_manager_list.index_selected", post_init=True)
     def update_selected_idx(self, object, name, old, new):
         """ Selection modified in plot tools: update table selections.
         """
         new = object.index_selected
-        if set(self.selected_idx) != set(new):
+        if not selections_equal(self.selected_idx, new):
             self.selected_idx = new
 
-    @on_trait_change("selected_idx[]", post_init=True)
+    @on_trait_change("selected_idx", post_init=True)
     def update_selected_idx_in_plotter(self):
         """ Update selection in all plot managers if selection changed in table
         """
         for plot_manager in self.plot_manager_list:
             current = plot_manager.index_selected
-            if set(current) != set(self.selected_idx):
+            if not selections_equal(current, self.selected_idx):
                 plot_manager.index_selected = self.selected_idx
 
         self.selected_data_in_plotter_updated = True
 
-    @on_trait_change("selected_idx[]", post_init=True)
+    @on_trait_change("selected_idx", post_init=True)
     def update_data_selected(self):
         """ Update the selection in terms of the DF index values, which remains
         unmodified even when changing the way the data is sorted.
         """
-        # Store the selection in terms of the DF index
-        data_selected = self.map_idx_to_df_index(self.selected_idx)
-        if set(self.data_selected) != set(data_selected):
-            self.data_selected = data_selected
+        # Store the selection in terms of the DF index. No notification if
+        # unchanged:
+        self.data_selected = self.map_idx_to_df_index(self.selected_idx)
 
     @on_trait_change("data_selected")
     def update_selected_idx_from_data(self):
@@ -252,7 +341,7 @@ class DataFrameAnalyzer(DataElement):
         """
         # Store the selection in terms of the DF index
         selected_idx = self.map_df_index_to_idx(self.data_selected)
-        if set(self.selected_idx) != set(selected_idx):
+        if not selections_equal(self.selected_idx, selected_idx):
             self.selected_idx = selected_idx
 
     @on_trait_change("filtered_df", post_init=True)
@@ -263,73 +352,69 @@ class DataFrameAnalyzer(DataElement):
         for plot_manager in self.plot_manager_list:
             plot_manager.data_source = new
 
-    @on_trait_change("filtered_df, summary_index[]", post_init=True)
     def compute_summary(self):
+        """ Compute (if outdated) and return the numerical data summary.
+        """
+        if "summary_df" in self._summary_cache:
+            return self._summary_cache["summary_df"]
+
         data = self.filtered_df
         if data is None or len(data) == 0:
-            self.summary_df = DataFrame([])
-            return self.summary_df
-
-        try:
-            summary = data.describe(exclude=self.categorical_dtypes)
-        except ValueError as e:
-            msg = "Failed to describe. Most likely due to no floating point " \
-                  "columns found in data. Error was {}".format(e)
-            logger.debug(msg)
-            self.summary_df = DataFrame([])
-            return self.summary_df
+            summary = DataFrame([])
+        else:
+            summary = describe_numerical(
+                data, self.summary_index, exclude=self.categorical_dtypes
+            )
 
-        all_summaries = [summary]
-        for entry in self.summary_index:
-            if entry.endswith("%") and entry not in summary.index:
-                percent = float(entry[:-1])
-                values = compute_percentile(data[summary.columns], percent)
-                values_df = DataFrame({entry: values}).transpose()
-                all_summaries.append(values_df)
+        self._summary_cache["summary_df"] = summary
+        return summary
 
-        try:
-            summary = concat(all_summaries, sort=True)
-        except TypeError:
-            # For pandas <= 0.20
-            import warnings
-            msg = "Pandas version 0.20 and before will not be supported long" \
-                  " term: it is recommended to update."
-            warnings.warn(msg)
-            summary = concat(all_summaries)
-
-        self.summary_df = summary.reindex(list(self.summary_index))
-        return self.summary_df
-
-    @on_trait_change("filtered_df", post_init=True)
     def compute_categorical_summary(self):
+        """ Compute (if outdated) and return the categorical data summary.
+        """
+        if "summary_categorical_df" in self._summary_cache:
+            return self._summary_cache["summary_categorical_df"]
+
         data = self.filtered_df
         if data is None:
-            self.summary_categorical_df = DataFrame([])
-            return self.summary_categorical_df
+            summary = DataFrame([])
+        else:
+            summary = describe_categorical(
+                data, include=self.categorical_dtypes
+            )
 
-        try:
-            summary = data.describe(include=self.categorical_dtypes)
-        except ValueError:
-            # No categorical data
-            self.summary_categorical_df = DataFrame([])
-            return self.summary_categorical_df
-
-        next_values = []
-        next_freqs = []
-        for col in summary.columns:
-            value_counts = data[col].value_counts()
-            if len(value_counts) <= 1:
-                next_values.append(np.nan)
-                next_freqs.append(np.nan)
+        self._summary_cache["summary_categorical_df"] = summary
+        return summary
+
+    @on_trait_change("filtered_df, summary_index[]", post_init=True)
+    def invalidate_summaries(self, name, new):
+        """ Mark summaries outdated when the filtered rows or stats change.
+
+        Summaries are recomputed lazily, next time they are read. Reordering
+        the filtered data doesn't invalidate them.
+        """
+        if self.reordering_filtered_df:
+            return
+
+        summary_names = ["summary_df"]
+        if name == "filtered_df":
+            summary_names.append("summary_categorical_df")
+
+        for summary_name in summary_names:
+            self._summary_cache.pop(summary_name, None)
+            if self.hold_summary_updates:
+                if summary_name not in self._held_summary_invalidations:
+                    self._held_summary_invalidations.append(summary_name)
             else:
-                next_values.append(value_counts.index[1])
-                next_freqs.append(int(value_counts.iloc[1]))
+                self._notify_summary_invalidated(summary_name)
+
+    def _hold_summary_updates_changed(self, new):
+        if new:
+            return
 
-        adtl_data = {"next": next_values, "next_freq": next_freqs}
-        adtl_summary = DataFrame(adtl_data, index=summary.columns).transpose()
-        self.summary_categorical_df = concat([summary, adtl_summary]).reindex(
-            DEFAULT_CATEG_SUMMARY_ELEMENTS)
-        return self.summary_categorical_df
+        for summary_name in self._held_summary_invalidations:
+            self._notify_summary_invalidated(summary_name)
+        self._held_summary_invalidations = []
 
     def _filter_transformation_changed(self):
         self.recompute_filtered_df()
@@ -359,17 +444,18 @@ class DataFrameAnalyzer(DataElement):
                 logger.warn(msg.format(new, e))
 
     @on_trait_change("filtered_df, num_displayed_rows, show_selected_only, "
-                     "selected_idx[]")
+                     "selected_idx")
     def recompute_displayed_df(self):
         self.displayed_df = self._compute_displayed_df()
 
     def _source_df_changed(self):
         """ Update the filtered data and the sorting options and attribute.
         """
+        self._source_data_version += 1
         self.recompute_filtered_df()
 
         index = self.source_df.index
-        self.data_sorted = sorted(index) == index.tolist()
+        self.data_sorted = index.is_monotonic_increasing
         if not self.data_sorted:
             self.sort_by_col = NO_SORTING_ENTRY
         else:
@@ -377,8 +463,13 @@ class DataFrameAnalyzer(DataElement):
 
         self._update_column_descriptions()
 
+    def _col_list_changed_fired(self):
+        # Columns were modified in place: cached results may be invalid:
+        self._source_data_version += 1
+
     def _sort_by_col_changed(self, new):
-        self.filtered_df = self._sort_df_by(self.filtered_df, new)
+        sorted_df = self._sort_df_by(self.filtered_df, new)
+        self._set_reordered_filtered_df(sorted_df)
         # Remap the selections
         if self.data_selected:
             self.selected_idx = self.map_df_index_to_idx(self.data_selected)
@@ -409,13 +500,58 @@ class DataFrameAnalyzer(DataElement):
             ascending = True
 
         if by == self.index_name:
-            df = df.sort_index(ascending=ascending)
-        else:
-            df = df.sort_values(by=by, ascending=ascending)
-        return df
+            by = INDEX_KEY
+
+        # Sort using the (cached) permutation sorting the entire source data:
+        engine = self._sort_engine
+        engine.data_version = self._source_data_version
+        return engine.sort(self.source_df, df, by=by, ascending=ascending)
 
     # Private interface -------------------------------------------------------
 
+    def _notify_summary_invalidated(self, summary_name):
+        """ Fire the change notification of an outdated summary.
+
+        Listeners (if any) trigger the summary's recomputation.
+        """
+        if summary_name == "summary_df":
+            self._num_summary_invalidated = True
+        else:
+            self._cat_summary_invalidated = True
+
+    def _copy_borrowed_source_df(self):
+        """ Stop sharing the source data with the DF the analyzer was created
+        from, so modifying it in place leaves that DF untouched.
+        """
+        # Same data and labels: no need to rebuild the downstream dataframes
+        # or the sorting options.
+        self.trait_setq(source_df=self.source_df.copy(),
+                        source_borrowed=False)
+
+    def _source_data_modified(self, change_notify=True):
+        """ The source data was modified in place: invalidate the results
+        cached for it, and rebuild the downstream dataframes if requested.
+        """
+        self._source_data_version += 1
+        if not change_notify:
+            return
+
+        filtered_df = self.filtered_df
+        self.recompute_filtered_df()
+        if self.filtered_df is filtered_df:
+            # Unfiltered data, modified in place: notify listeners anyway:
+            self.trait_property_changed("filtered_df", filtered_df,
+                                        filtered_df)
+
+    def _set_reordered_filtered_df(self, df):
+        """ Set the filtered_df to a DF only differing by its rows' order.
+        """
+        self.reordering_filtered_df = True
+        try:
+            self.filtered_df = df
+        finally:
+            self.reordering_filtered_df = False
+
     def _update_column_descriptions(self):
         """ Remove column descriptions if a column has been removed.
         """
@@ -456,6 +592,7 @@ class DataFrameAnalyzer(DataElement):
 
         if not self.filter_exp.strip():
             new_df = self.source_df
+            self._applied_query = ""
         else:
             query = self.filter_transformation(
                 self._clean_filter_exp(self.filter_exp)
@@ -465,7 +602,24 @@ class DataFrameAnalyzer(DataElement):
                 logger.error(msg)
                 raise InvalidQuery(msg)
 
-            new_df = self.source_df.query(query)
+            engine = self._filter_engine
+            engine.data_version = self._source_data_version
+            new_df = None
+            # If the new query only adds conditions to the current one,
+            # evaluate them on the current filtered data only, as long as it
+            # was filtered from the current source data. Modifying the source
+            # data in place (set_source_df_val, col_list_changed) changes its
+            # version:
+            data_unchanged = \
+                self._applied_query_version == self._source_data_version
+            if self._applied_query and data_unchanged:
+                new_df = engine.refine(self.filtered_df, self._applied_query,
+                                       query)
+            if new_df is None:
+                new_df = engine.filter(self.source_df, query)
+
+            self._applied_query = query
+            self._applied_query_version = self._source_data_version
 
         if self.sort_by_col:
             new_df = self._sort_df_by(new_df, self.sort_by_col)
@@ -545,6 +699,12 @@ class DataFrameAnalyzer(DataElement):
     def _get_column_list(self):
         return self.source_df.columns.tolist()
 
+    def _get_summary_df(self):
+        return self.compute_summary()
+
+    def _get_summary_categorical_df(self):
+        return self.compute_categorical_summary()
+
     # Traits initialization methods -------------------------------------------
 
     def _displayed_df_default(self):
@@ -574,24 +734,10 @@ def copy_and_sanitize(source_df, convert_dtypes=False, sort_index=True):
 
     # Convert column names to be valid variable names (so they can be used in
     # filter expressions)
-    new_cols = []
-    for col in source_df.columns:
-        new_col = sanitize_string(col)
-        # Make sure the cleaning operation doesn't lead to a column collision:
-        new_col = add_suffix_if_exists(new_col, new_cols, suffix_patt="_{}")
-        new_cols.append(new_col)
-
-    df.columns = new_cols
+    df.columns = sanitize_column_names(source_df.columns)
 
     if convert_dtypes:
-        # Try to convert columns to floats
-        for col in df.columns:
-            try:
-                df[col] = df[col].astype("float64")
-            except ValueError as e:
-                msg = "Unable to convert column {} to floats (error was {})."
-                msg = msg.format(col, e)
-                logger.debug(msg)
+        _convert_columns_to_float(df)
 
     if sort_index:
         df = df.sort_index(ascending=True)
@@ -599,6 +745,48 @@ def copy_and_sanitize(source_df, convert_dtypes=False, sort_index=True):
     return df
 
 
+def borrow_and_sanitize(source_df, convert_dtypes=False):
+    """ Prepare the source DataFrame to create a DataFrameAnalyzer w/o copy.
+
+    The DataFrame returned is a shallow copy of the original: it shares its
+    data with source_df, and only its column names are sanitized so that they
+    are valid variable names. It is not sorted along its index. Optionally,
+    columns are converted to float, in which case only the converted columns
+    are copied.
+    """
+    df = source_df.copy(deep=False)
+    df.columns = sanitize_column_names(source_df.columns)
+
+    if convert_dtypes:
+        _convert_columns_to_float(df)
+
+    return df
+
+
+def sanitize_column_names(columns):
+    """ Returns list of valid, unique variable names for the columns provided.
+    """
+    new_cols = []
+    for col in columns:
+        new_col = sanitize_string(col)
+        # Make sure the cleaning operation doesn't lead to a column collision:
+        new_col = add_suffix_if_exists(new_col, new_cols, suffix_patt="_{}")
+        new_cols.append(new_col)
+    return new_cols
+
+
+def _convert_columns_to_float(df):
+    """ Try to convert all columns of the provided DF to floats, in place.
+    """
+    for col in df.columns:
+        try:
+            df[col] = df[col].astype("float64")
+        except ValueError as e:
+            msg = "Unable to convert column {} to floats (error was {})."
+            msg = msg.format(col, e)
+            logger.debug(msg)
+
+
 def compute_percentile(data, percent):
     """ Compute percentile for all float columns of a DF and return as Series.
     """
@@ -13,15 +13,17 @@ from app_common.std_lib.logging_utils import ACTION_LEVEL
 from app_common.std_lib.sys_utils import extract_traceback
 from chaco.api import BasePlotContainer, HPlotContainer, \
     OverlayPlotContainer, Plot
-from traits.api import Dict, Enum, Instance, Int, List, on_trait_change, \
-    Property, Set, Str
+from traits.api import Bool, Dict, Enum, Instance, Int, List, \
+    on_trait_change, Property, Set, Str
 
 from pybleau.app.model.multi_canvas_manager import MultiCanvasManager
+from pybleau.app.model.plot_data_refresher import PlotDataRefresher
 from pybleau.app.model.plot_descriptor import CONTAINER_IDX_REMOVAL, \
     CUSTOM_PLOT_TYPE, PlotDescriptor
 from pybleau.app.model.plot_template_manager import PlotTemplateManager
 from pybleau.app.plotting.i_plot_template_interactor import \
     IPlotTemplateInteractor
+from pybleau.app.plotting.lod import LODArrayDataSource
 from pybleau.app.plotting.multi_plot_config import \
     MultiHistogramPlotConfigurator, MULTI_LINE_PLOT_TYPE, \
     MultiLinePlotConfigurator
@@ -35,6 +37,8 @@ from pybleau.app.plotting.plot_factories import DEFAULT_FACTORIES, \
     DISCONNECTED_SELECTION_COLOR, SELECTION_COLOR, SELECTION_METADATA_NAME
 from pybleau.app.plotting.template_plot_selector import \
     TemplatePlotNameSelector
+from pybleau.app.utils.selection_utils import Selection, \
+    selections_equal, to_selection
 from pybleau.app.utils.string_definitions import CMAP_SCATTER_PLOT_TYPE, \
     HEATMAP_PLOT_TYPE, HIST_PLOT_TYPE, MULTI_HIST_PLOT_TYPE
 
@@ -103,8 +107,26 @@ class DataFramePlotManager(DataElement):
     #: Map of all inspector tools from their plot description id
     inspectors = Dict
 
-    #: List of indices selected
-    index_selected = List
+    #: Sorted array of the positions selected
+    index_selected = Selection
+
+    #: Whether to compute the plots' data in worker threads when the data
+    #: source changes. Plots are then updated from the UI event loop.
+    refresh_in_background = Bool(False)
+
+    #: Computes the plots' data in worker threads for background refreshes
+    plot_refresher = Instance(PlotDataRefresher, ())
+
+    #: Ids of hidden plots whose data is outdated, refreshed once shown
+    _outdated_plot_ids = Set(Str)
+
+    #: Whether to build the plots of the initial plot descriptions only once
+    #: they are shown or requested (see materialize_plots), rather than at
+    #: creation
+    lazy_plot_creation = Bool(False)
+
+    #: Ids of plot descriptions whose plot isn't built yet
+    _unbuilt_plot_ids = Set(Str)
 
     containers_in_use = Property(Set,
                                  depends_on="contained_plots:container_idx")
@@ -242,6 +264,13 @@ class DataFramePlotManager(DataElement):
                 self.contained_plots.remove(plot_desc)
 
             self.contained_plot_map.pop(plot_desc.id, None)
+            self._outdated_plot_ids.discard(plot_desc.id)
+            self.plot_refresher.discard(plot_desc)
+
+            if plot_desc.id in self._unbuilt_plot_ids:
+                # Never added to a container:
+                self._unbuilt_plot_ids.remove(plot_desc.id)
+                continue
 
             self.canvas_manager.remove_plot_from_container(plot_desc,
                                                            container=container)
@@ -252,45 +281,116 @@ class DataFramePlotManager(DataElement):
                                      "component.index.metadata_changed",
                                      remove=True)
 
+    def materialize_plots(self, plot_descriptions=None):
+        """ Build the plots of descriptions created lazily, if not built yet.
+
+        Parameters
+        ----------
+        plot_descriptions : PlotDescriptor or list(PlotDescriptor) or None
+            Description(s) of the plots to build. Leave as None to build all
+            plots not built yet.
+        """
+        if plot_descriptions is None:
+            plot_descriptions = list(self.contained_plots)
+        elif isinstance(plot_descriptions, PlotDescriptor):
+            plot_descriptions = [plot_descriptions]
+
+        num_failed = len(self.failed_plots)
+        # Building existing plots doesn't consume plot ids:
+        next_plot_id = self.next_plot_id
+        for desc in plot_descriptions:
+            if desc.id not in self._unbuilt_plot_ids or \
+                    desc not in self.contained_plots:
+                continue
+
+            self._unbuilt_plot_ids.remove(desc.id)
+            position = self.contained_plots.index(desc)
+            self._create_plot_from_description(position, desc)
+
+        self.next_plot_id = next_plot_id
+
+        failed_plots = self.failed_plots[num_failed:]
+        if failed_plots:
+            self.delete_plots(failed_plots)
+
+    def get_unbuilt_plots(self, container_idx=None):
+        """ Returns the descriptions of visible plots whose plot isn't built.
+
+        Parameters
+        ----------
+        container_idx : int or None
+            Index of the container to return the unbuilt plots of. Leave as
+            None to return them for all containers. Plots without a container
+            yet are considered to be in the first one.
+        """
+        num_containers = len(self.canvas_manager.container_managers)
+        unbuilt_plots = []
+        for desc in self.contained_plots:
+            if desc.id not in self._unbuilt_plot_ids or not desc.visible:
+                continue
+            idx = min(max(desc.container_idx, 0), num_containers - 1)
+            if container_idx is None or idx == container_idx:
+                unbuilt_plots.append(desc)
+        return unbuilt_plots
+
     # Private interface -------------------------------------------------------
 
     def _create_initial_plots_from_descriptions(self):
         """ Initialize from list of plot descriptions (which gets serialized).
+
+        In lazy plot creation mode, plots with a configurator are only built
+        once shown or requested.
         """
         for i, desc in enumerate(self.contained_plots):
-            try:
-                # Enforce the id since it will drive what plot gets removed and
-                # replaced by the updated version:
-                desc.id = str(i)
-                # Set/sync config data sources unless frozen
-                if not desc.frozen:
-                    desc.plot_config.data_source = self.data_source
-
-                # The following attributes are only stored in the descriptors
-                # so they shouldn't be lost:
-                attrs = ["visible", "frozen", "data_filter", "container_idx"]
-                desc_attrs = {attr: getattr(desc, attr) for attr in attrs}
-
-                if desc.plot_config.plot_type in self.plot_factories.keys():
-                    self._add_new_plot(desc.plot_config, position=i,
-                                       list_op="replace",
-                                       initial_creation=False, **desc_attrs)
-                else:
-                    self._add_raw_plot(desc, position=i, list_op="replace")
-            except Exception as e:
-                tb = extract_traceback()
-                msg = "Failed to recreate the plot number {} ({} named {}" \
-                      " of '{}' vs '{}', z_col '{}').\nError was {}. " \
-                      "Traceback was:\n{}"
-                msg = msg.format(i, desc.plot_type, desc.plot_title,
-                                 desc.x_col_name, desc.y_col_name,
-                                 desc.z_col_name, e, tb)
-                logger.error(msg)
-                self.failed_plots.append(desc)
+            # Enforce the id since it will drive what plot gets removed and
+            # replaced by the updated version:
+            desc.id = str(i)
+            config = desc.plot_config
+            if self.lazy_plot_creation and config is not None and \
+                    config.plot_type in self.plot_factories:
+                self.contained_plot_map[desc.id] = desc
+                self._unbuilt_plot_ids.add(desc.id)
+            else:
+                self._create_plot_from_description(i, desc)
+
+        if self.lazy_plot_creation:
+            self.next_plot_id = len(self.contained_plots)
 
         if self.failed_plots:
             self.delete_plots(self.failed_plots)
 
+    def _create_plot_from_description(self, position, desc):
+        """ Build a description's plot, replacing it in the list of plots.
+
+        Failures are logged, and the description added to the failed plots.
+        """
+        try:
+            # Set/sync config data sources unless frozen
+            if not desc.frozen:
+                desc.plot_config.data_source = self.data_source
+
+            # The following attributes are only stored in the descriptors
+            # so they shouldn't be lost:
+            attrs = ["visible", "frozen", "data_filter", "container_idx"]
+            desc_attrs = {attr: getattr(desc, attr) for attr in attrs}
+
+            if desc.plot_config.plot_type in self.plot_factories.keys():
+                self._add_new_plot(desc.plot_config, position=position,
+                                   list_op="replace",
+                                   initial_creation=False, **desc_attrs)
+            else:
+                self._add_raw_plot(desc, position=position, list_op="replace")
+        except Exception as e:
+            tb = extract_traceback()
+            msg = "Failed to recreate the plot number {} ({} named {}" \
+                  " of '{}' vs '{}', z_col '{}').\nError was {}. " \
+                  "Traceback was:\n{}"
+            msg = msg.format(position, desc.plot_type, desc.plot_title,
+                             desc.x_col_name, desc.y_col_name,
+                             desc.z_col_name, e, tb)
+            logger.error(msg)
+            self.failed_plots.append(desc)
+
     def _add_raw_plot(self, desc, position=None, list_op="insert",
                       container=None):
         """ Add descriptor holding already made plot to the canvas.
@@ -416,7 +516,8 @@ class DataFramePlotManager(DataElement):
         self.canvas_manager.add_plot_to_container(desc, position,
                                                   container=container)
 
-        if factory.inspector is not None:
+        # Scatter plots in density mode have no inspector:
+        if factory.inspector:
             self.inspectors[desc.id] = factory.inspector
 
         self.next_plot_id += 1
@@ -486,13 +587,26 @@ class DataFramePlotManager(DataElement):
         """ Store the new selection and apply it to all inspectors.
         """
         selection = object.metadata[SELECTION_METADATA_NAME]
-        if self.index_selected != selection:
+        if isinstance(object, LODArrayDataSource):
+            # Decimated renderer: convert to positions along the full data
+            selection = object.to_source_selection(selection)
+        else:
+            selection = to_selection(selection)
+
+        if not selections_equal(self.index_selected, selection):
             self.index_selected = selection
 
     def _set_selection_to(self, tool, selection):
         for datasource_name in ["index", "value"]:
             datasource = getattr(tool.component, datasource_name)
-            datasource.metadata[SELECTION_METADATA_NAME] = selection
+            if isinstance(datasource, LODArrayDataSource):
+                datasource_selection = datasource.from_source_selection(
+                    selection
+                )
+            else:
+                # Chaco's selection tools edit the selection as a list:
+                datasource_selection = selection.tolist()
+            datasource.metadata[SELECTION_METADATA_NAME] = datasource_selection
 
     # Traits property getters/setters -----------------------------------------
 
@@ -522,6 +636,12 @@ class DataFramePlotManager(DataElement):
     def plot_container_changed(self, desc, _, old, new):
         """ The descriptor's container_idx was changed: move or remove.
         """
+        if desc.id in self._unbuilt_plot_ids and \
+                new != CONTAINER_IDX_REMOVAL:
+            # Not in a container yet: the plot is added to the new container
+            # when built.
+            return
+
         num_containers = len(self.canvas_manager.container_managers)
         if new == CONTAINER_IDX_REMOVAL:
             # The requested container is no container: it needs to be deleted
@@ -549,18 +669,22 @@ class DataFramePlotManager(DataElement):
     def _source_analyzer_changed(self):
         self.data_source = self.source_analyzer.filtered_df
 
-    def _data_source_changed(self, new_df):
+    def _data_source_changed(self, old_df, new_df):
         """ Change the data source: update non-frozen plots.
 
         We can't rebuild the plots, because they are currently inserted in the
-        enable container.
-
-        FIXME: rebuilding histogram or scatters is unnecessary when sorting DF:
-         should we try to detect situations when a full rebuilding isn't
-         necessary.
+        enable container: only their data is updated. When the source analyzer
+        signals that the new data only differs by the order of its rows (its
+        data is being sorted), plots that don't depend on the row order are
+        skipped. Hidden plots are updated once shown.
         """
-        contained_plots = self.contained_plots
-        for plot_desc in contained_plots:
+        # Comparing the dataframes would cost more than the plot updates it
+        # may skip: only trust the analyzer.
+        reordered = self.source_analyzer is not None and \
+            self.source_analyzer.reordering_filtered_df
+
+        plots_to_refresh = []
+        for plot_desc in self.contained_plots:
             if plot_desc.frozen or plot_desc.plot is None:
                 # The plot is not created yet or set to not change: skip
                 continue
@@ -571,36 +695,29 @@ class DataFramePlotManager(DataElement):
             else:
                 plot_desc.data_filter = ""
 
-            config = plot_desc.plot_config
-            config.data_source = new_df
-            factory = plot_desc.plot_factory
-
-            # Create a new factory to see what datasets/renderers need to be
-            # added/removed:
-            new_factory = self._factory_from_config(config)
-
-            new_data = new_factory.plot_data.arrays
-            existing_data = factory.plot_data.arrays
-            removed_datasets = set(existing_data.keys()) - set(new_data.keys())
-
-            # Update data and existing renderers
-            factory.plot_data.update_data(new_data)
-            factory.update_renderers_from_data(removed=removed_datasets)
-
-            # Add new renderers
-            new_descs = []
-            new_styles = []
-            desc_list = new_factory.renderer_desc
-            style_list = new_factory.plot_style.renderer_styles
-            existing_renderers = {(desc['x'], desc['y']) for desc in
-                                  factory.renderer_desc}
-            for desc, style in zip(desc_list, style_list):
-                if (desc['x'], desc['y']) not in existing_renderers:
-                    new_descs.append(desc)
-                    new_styles.append(style)
-
-            factory.append_new_renderers(desc_list=new_descs,
-                                         styles=new_styles)
+            plot_desc.plot_config.data_source = new_df
+            if reordered and not plot_desc.plot_factory.depends_on_row_order:
+                continue
+
+            if plot_desc.visible:
+                plots_to_refresh.append(plot_desc)
+            else:
+                self._outdated_plot_ids.add(plot_desc.id)
+
+        self._refresh_plots(plots_to_refresh)
+
+    @on_trait_change("plot_refresher:data_computed", dispatch="ui")
+    def _apply_computed_plot_data(self, result):
+        """ A plot's data was computed in the background: update the plot.
+        """
+        refresh_id, plot_desc, factory_kw = result
+        if not self.plot_refresher.accept_result(refresh_id, plot_desc):
+            return
+
+        if plot_desc.frozen or plot_desc not in self.contained_plots:
+            return
+
+        plot_desc.plot_factory.update_data(**factory_kw)
 
     @on_trait_change("contained_plots:plot_factory:context_menu_manager:"
                      "style_edit_requested", post_init=True)
@@ -679,15 +796,28 @@ class DataFramePlotManager(DataElement):
 
     @on_trait_change("contained_plots:visible", post_init=True)
     def show_hide_plot(self, plot_desc, attr_name, old, visible):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            if visible:
+                self.materialize_plots(plot_desc)
+            return
+
         key = self.canvas_manager.build_container_key(plot_desc)
         container = self.canvas_manager.get_container_for_plot(plot_desc)
         if visible:
+            if plot_desc.id in self._outdated_plot_ids:
+                self._outdated_plot_ids.remove(plot_desc.id)
+                if not plot_desc.frozen:
+                    self._refresh_plots([plot_desc])
             container.show_plot(key)
         else:
             container.hide_plot(key)
 
     @on_trait_change("contained_plots:plot_title", post_init=True)
     def update_plot_title(self, plot_desc, attr_name, old, new_title):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            # Nothing to update until the plot is built:
+            return
+
         plot = self._get_overlay_plot_cont_from_desc(plot_desc)
         plot.title.text = new_title
         container = self.canvas_manager.get_container_for_plot(plot_desc)
@@ -695,6 +825,10 @@ class DataFramePlotManager(DataElement):
 
     @on_trait_change("contained_plots:x_axis_title", post_init=True)
     def update_plot_x_title(self, plot_desc, attr_name, old, new_title):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            # Nothing to update until the plot is built:
+            return
+
         plot = self._get_overlay_plot_cont_from_desc(plot_desc)
         plot.x_axis.title = new_title
         container = self.canvas_manager.get_container_for_plot(plot_desc)
@@ -702,6 +836,10 @@ class DataFramePlotManager(DataElement):
 
     @on_trait_change("contained_plots:y_axis_title", post_init=True)
     def update_plot_y_title(self, plot_desc, attr_name, old, new_title):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            # Nothing to update until the plot is built:
+            return
+
         plot = self._get_overlay_plot_cont_from_desc(plot_desc)
         plot.y_axis.title = new_title
         container = self.canvas_manager.get_container_for_plot(plot_desc)
@@ -709,6 +847,10 @@ class DataFramePlotManager(DataElement):
 
     @on_trait_change("contained_plots:secondary_y_axis_title", post_init=True)
     def update_plot_second_y_title(self, plot_desc, attr_name, old, new_title):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            # Nothing to update until the plot is built:
+            return
+
         container = self.canvas_manager.get_container_for_plot(plot_desc)
         plot = self._get_overlay_plot_cont_from_desc(plot_desc)
 
@@ -720,6 +862,10 @@ class DataFramePlotManager(DataElement):
 
     @on_trait_change("contained_plots:z_axis_title", post_init=True)
     def update_plot_z_title(self, plot_desc, attr_name, old, new_title):
+        if plot_desc.id in self._unbuilt_plot_ids:
+            # Nothing to update until the plot is built:
+            return
+
         container = self.canvas_manager.get_container_for_plot(plot_desc)
         if plot_desc.plot_type in CMAP_PLOT_TYPES:
             # Change the plot's colorbar:
@@ -739,10 +885,14 @@ class DataFramePlotManager(DataElement):
                 continue
 
             tool = inspector[0]
-            current_selection = tool.component.index.metadata[
-                SELECTION_METADATA_NAME
-            ]
-            if current_selection != self.index_selected:
+            datasource = tool.component.index
+            if isinstance(datasource, LODArrayDataSource):
+                current_selection = datasource.source_selection
+            else:
+                current_selection = to_selection(
+                    datasource.metadata[SELECTION_METADATA_NAME]
+                )
+            if not selections_equal(current_selection, self.index_selected):
                 self._set_selection_to(tool, self.index_selected)
 
     def _inspectors_items_changed(self, event):
@@ -750,8 +900,7 @@ class DataFramePlotManager(DataElement):
             tool.on_trait_change(self._update_selection,
                                  "component.index.metadata_changed")
             # Initialize the selection
-            tool.component.index.metadata[SELECTION_METADATA_NAME] = \
-                self.index_selected
+            self._set_selection_to(tool, self.index_selected)
 
     @on_trait_change("contained_plots:frozen", post_init=True)
     def disconnect_selection(self, object, name, old, new):
@@ -759,6 +908,10 @@ class DataFramePlotManager(DataElement):
         listener must be turned off.
         """
         desc_id = object.id
+        if desc_id in self._unbuilt_plot_ids:
+            # No inspector until the plot is built:
+            return
+
         tool, overlay = self.inspectors[desc_id]
         attr = "component.index.metadata_changed"
         if new:
@@ -773,6 +926,17 @@ class DataFramePlotManager(DataElement):
 
     # Private interface methods -----------------------------------------------
 
+    def _refresh_plots(self, plot_descs):
+        """ Update plots' data from their configurator's data source.
+        """
+        if self.refresh_in_background:
+            self.plot_refresher.submit(plot_descs)
+            return
+
+        for plot_desc in plot_descs:
+            config = plot_desc.plot_config
+            plot_desc.plot_factory.update_data(**config.to_dict())
+
     def _get_desc_for_menu_manager(self, manager) -> PlotDescriptor:
         desc = None
         for desc in self.contained_plots:
@@ -1,7 +1,7 @@
 import logging
 import pandas as pd
 
-from traits.api import Dict, Event, Instance, Property
+from traits.api import Dict, Event, Instance, List, Property
 
 from .dataframe_analyzer import copy_and_sanitize, DataFrameAnalyzer
 
@@ -13,7 +13,9 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
 
     The soure_df is here built from a dictionary of dataframes, mapping names
     to sub-dataframes, and gets recomputed by concatenating all values from the
-    _source_dfs dict.
+    _source_dfs dict. The concatenation is cached (at the cost of a copy of
+    the data) until the sub-dataframes are replaced or modified, so that
+    sorting and filtering don't concatenate them again each time.
 
     To control how the columns are split, create the analyzer providing the
     _source_dfs map rather than the source_df.
@@ -36,6 +38,12 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
 
     _source_dfs_changed = Event
 
+    #: Cached concatenation of the dataframe parts making the source_df
+    _concatenated_df = Instance(pd.DataFrame)
+
+    #: Dataframe parts the cached concatenation was built from
+    _concatenated_parts = List
+
     def __init__(self, convert_source_dtypes=False, data_sorted=True,
                  **traits):
 
@@ -156,7 +164,8 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
 
         change_notify : bool, optional
             Whether to trigger an event to rebuild all downstream dataframes
-            (source, filtered, displayed).
+            (source, filtered, displayed). Results cached for the previous
+            data (filter masks, sort orders) are invalidated regardless.
         """
         if col in self._column_loc:
             target_df = self._column_loc[col]
@@ -171,6 +180,8 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
             self._source_df_columns[target_df_name].append(col)
 
         target_df[col] = value
+        # Results cached for the previous data are outdated either way:
+        self._source_data_modified(change_notify=False)
         if change_notify:
             self._source_dfs_changed = True
 
@@ -193,15 +204,25 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
 
         change_notify : bool, optional
             Whether to trigger an event to rebuild all downstream dataframes
-            (source, filtered, displayed).
+            (source, filtered, displayed). Results cached for the previous
+            data (filter masks, sort orders) are invalidated regardless.
         """
         df = self._column_loc[col]
         df.loc[index, col] = value
+        # Results cached for the previous data are outdated either way:
+        self._source_data_modified(change_notify=False)
         if change_notify:
             self._source_dfs_changed = True
 
     # Private interface -------------------------------------------------------
 
+    def _source_data_modified(self, change_notify=True):
+        # The parts were modified in place: the concatenation is outdated.
+        self._concatenated_df = None
+        super(MultiDataFrameAnalyzer, self)._source_data_modified(
+            change_notify=change_notify
+        )
+
     def _compute_source_df_columns(self, source_dfs=None):
         if source_dfs is None:
             source_dfs = self._source_dfs
@@ -212,10 +233,21 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
     # Property getters/setters ------------------------------------------------
 
     def _get_source_df(self):
-        """ Rebuild the source_df proxy from _source_dfs.
+        """ Returns the source_df proxy, concatenating the _source_dfs if they
+        changed since the last concatenation.
         """
-        if self._source_dfs:
-            return pd.concat(self._source_dfs.values(), axis=1)
+        if not self._source_dfs:
+            return
+
+        parts = list(self._source_dfs.values())
+        cached_parts = self._concatenated_parts
+        parts_replaced = len(parts) != len(cached_parts) or \
+            any(part is not old for part, old in zip(parts, cached_parts))
+        if self._concatenated_df is None or parts_replaced:
+            self._concatenated_df = pd.concat(parts, axis=1)
+            self._concatenated_parts = parts
+
+        return self._concatenated_df
 
     def _set_source_df(self, df):
         """ Set the source_df proxy to a new value.
@@ -242,6 +274,13 @@ class MultiDataFrameAnalyzer(DataFrameAnalyzer):
             for key in self._source_dfs:
                 self._source_dfs[key] = df[self._source_df_columns[key]]
 
+    # Traits listeners --------------------------------------------------------
+
+    def __source_dfs_changed_fired(self):
+        # The parts may have been modified in place. Runs before the source_df
+        # notification:
+        self._concatenated_df = None
+
     # Traits initiatlizers ----------------------------------------------------
 
     def __column_loc_default(self):
@@ -0,0 +1,147 @@
+""" Computation of the data of plots in worker threads.
+
+When the data source of a plot manager changes (for example as the user types
+a filter), extracting the arrays of each plot from the new dataframe can take
+a while. The PlotDataRefresher computes them in a pool of threads, from
+private copies of the plot configurators, and notifies listeners when each
+plot's data is ready, so that only the update of the plots themselves happens
+on the UI thread. Submitting a new refresh cancels the one in progress.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+
+from traits.api import Any, Dict, Event, HasStrictTraits, Int, List
+
+logger = logging.getLogger(__name__)
+
+
+class PlotDataRefresher(HasStrictTraits):
+    """ Computes the factory inputs of plots in a pool of worker threads.
+
+    Listeners to `data_computed` are notified from the worker threads with a
+    (refresh id, plot descriptor, factory inputs) tuple. They should
+    dispatch their handling to the UI thread, and check that the refresh is
+    still current with `accept_result` before updating the plot.
+    """
+    #: Maximum number of worker threads (None for the executor default)
+    max_workers = Any
+
+    #: Event fired from a worker thread when a plot's data is computed
+    data_computed = Event
+
+    #: Id of the current refresh. Results of previous refreshes are discarded
+    _refresh_id = Int
+
+    #: Plot descriptors whose data hasn't been applied yet, mapped by id
+    _pending = Dict
+
+    #: Futures of the current refresh
+    _futures = List
+
+    #: Thread pool, created on first use
+    _executor = Any
+
+    def submit(self, plot_descs):
+        """ Compute the data of the plots in the background, from their
+        configurator's current data source.
+
+        The refresh in progress is cancelled, and plots it hadn't updated yet
+        are refreshed again as part of this one.
+
+        Returns
+        -------
+        int
+            Id of the refresh.
+        """
+        self.cancel()
+        for plot_desc in plot_descs:
+            self._pending[plot_desc.id] = plot_desc
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="pybleau_plot_refresh"
+            )
+
+        refresh_id = self._refresh_id
+        for plot_desc in list(self._pending.values()):
+            # The worker gets its own copy of the configurator, so that its
+            # cached arrays can't be invalidated while they are computed:
+            config = clone_config(plot_desc.plot_config)
+            future = self._executor.submit(self._compute, refresh_id,
+                                           plot_desc, config)
+            self._futures.append(future)
+        return refresh_id
+
+    def cancel(self):
+        """ Cancel the refresh in progress.
+
+        Computations that didn't start are cancelled, and results of the
+        running ones will be discarded. Cancelled plots remain pending.
+        """
+        self._refresh_id += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+
+    def accept_result(self, refresh_id, plot_desc):
+        """ Returns whether a computed result is current and should be applied
+        to the plot, and marks the plot as refreshed if so.
+        """
+        if refresh_id != self._refresh_id:
+            return False
+
+        # A plot deleted and replaced by a new one with the same id must not
+        # mark the new plot as refreshed:
+        if self._pending.get(plot_desc.id) is not plot_desc:
+            return False
+
+        del self._pending[plot_desc.id]
+        return True
+
+    def discard(self, plot_desc):
+        """ Stop refreshing a plot, for example because it was deleted.
+        """
+        if self._pending.get(plot_desc.id) is plot_desc:
+            del self._pending[plot_desc.id]
+
+    def wait(self, timeout=None):
+        """ Block until all computations of the current refresh are done.
+        """
+        wait(list(self._futures), timeout=timeout)
+
+    def shutdown(self):
+        """ Cancel the current refresh and release the worker threads.
+        """
+        self.cancel()
+        self._pending = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # Private interface -------------------------------------------------------
+
+    def _compute(self, refresh_id, plot_desc, config):
+        if refresh_id != self._refresh_id:
+            return
+
+        try:
+            factory_kw = config.to_dict()
+        except Exception as e:
+            msg = "Failed to compute the data of plot {}: {}".format(
+                plot_desc.id, e)
+            logger.exception(msg)
+            return
+
+        if refresh_id != self._refresh_id:
+            return
+
+        self.data_computed = (refresh_id, plot_desc, factory_kw)
+
+
+def clone_config(config):
+    """ Returns a copy of a plot configurator sharing its data and style.
+    """
+    traits = {"data_source": config.data_source}
+    traits.update(config.trait_get(config.copyable_trait_names()))
+    return config.__class__(**traits)
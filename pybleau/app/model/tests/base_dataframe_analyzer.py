@@ -52,6 +52,33 @@ class FilterDataFrameAnalyzer(UnittestTools):
         analyzer.filter_exp = ""
         assert_frame_equal(analyzer.filtered_df, analyzer.source_df)
 
+    def test_refine_and_loosen_filter(self):
+        df = self.df
+        analyzer = self.analyzer_klass(source_df=df)
+        # Aggregates added to a query depend on all rows, not only the
+        # filtered ones:
+        for filter_exp in ["a > 2", "a > 2 and b < 90", "a > 2 and b < 90 "
+                           "and c == 'a'", "b < 90", "a > 2 & b < 90",
+                           "a > 2 & b < 90 and b > b.mean()"]:
+            analyzer.filter_exp = filter_exp
+            assert_frame_equal(analyzer.filtered_df, df.query(filter_exp))
+
+        # Refining after the source data changed:
+        analyzer.source_df = self.df2
+        analyzer.filter_exp = "a > 2 & b < 90 and b > 10"
+        assert_frame_equal(analyzer.filtered_df,
+                           self.df2.query(analyzer.filter_exp))
+
+    def test_refine_filter_after_modifying_source_in_place(self):
+        analyzer = self.analyzer_klass(source_df=self.df2)
+        analyzer.filter_exp = "a > 2"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [2, 3, 4])
+        analyzer.set_source_df_val(0, "a", 10, change_notify=False)
+        # The filtered data is outdated: the refined filter is evaluated on
+        # the source data:
+        analyzer.filter_exp = "a > 2 and b < 18"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [0, 3, 4])
+
     def test_filter_no_auto_apply(self):
         df = self.df2
         analyzer = self.analyzer_klass(source_df=df, filter_auto_apply=False)
@@ -246,6 +273,39 @@ class SummaryDataFrameAnalyzer(UnittestTools):
         self.assertEqual(summary.loc["mean", "a"], 2)
         self.assertEqual(summary.loc["mean", "b"], 20)
 
+    def test_summaries_computed_lazily(self):
+        analyzer = self.analyzer_klass(source_df=self.df)
+        self.assertEqual(analyzer._summary_cache, {})
+        self.assertEqual(analyzer.summary_df.loc["mean", "a"], 5)
+        self.assertEqual(set(analyzer._summary_cache), {"summary_df"})
+
+        analyzer.filter_exp = "a == 2"
+        self.assertEqual(analyzer._summary_cache, {})
+        self.assertEqual(analyzer.summary_df.loc["mean", "a"], 2)
+        self.assertEqual(analyzer.summary_categorical_df.loc["top", "c"], "c")
+
+    def test_sorting_doesnt_invalidate_summaries(self):
+        analyzer = self.analyzer_klass(source_df=self.df)
+        summary = analyzer.summary_df
+        cat_summary = analyzer.summary_categorical_df
+        with self.assertTraitDoesNotChange(analyzer, "summary_df"):
+            analyzer.sort_by_col = "b" + REVERSED_SUFFIX
+            analyzer.shuffle_filtered_df()
+
+        self.assertIs(analyzer.summary_df, summary)
+        self.assertIs(analyzer.summary_categorical_df, cat_summary)
+
+    def test_hold_summary_updates(self):
+        analyzer = self.analyzer_klass(source_df=self.df,
+                                       hold_summary_updates=True)
+        with self.assertTraitDoesNotChange(analyzer, "summary_df"):
+            analyzer.filter_exp = "a == 2"
+
+        with self.assertTraitChanges(analyzer, "summary_df"):
+            analyzer.hold_summary_updates = False
+
+        self.assertEqual(analyzer.summary_df.loc["mean", "a"], 2)
+
     def test_special_summary_list(self):
         # Replace 0.5% by 0.1%
         summary_index = [u'mean', u'std', u'min', u'0.1%', u'1%', u'25%',
@@ -591,19 +651,19 @@ class SelectionPlotDataFrameAnalyzer(UnittestTools):
 
         # Set analyzer selection:
         model.selected_idx = [0, 2, 5]
-        self.assertEqual(plot_manager.index_selected, [0, 2, 5])
+        self.assertEqual(plot_manager.index_selected.tolist(), [0, 2, 5])
 
-        # Append to analyzer selection
-        model.selected_idx.append(6)
-        self.assertEqual(plot_manager.index_selected, [0, 2, 5, 6])
+        # Extend analyzer selection
+        model.selected_idx = [0, 2, 5, 6]
+        self.assertEqual(plot_manager.index_selected.tolist(), [0, 2, 5, 6])
 
-        # Set analyzer selection:
+        # Set plot_manager selection:
         plot_manager.index_selected = [1, 4]
-        self.assertEqual(model.selected_idx, [1, 4])
+        self.assertEqual(model.selected_idx.tolist(), [1, 4])
 
-        # Append to analyzer selection
-        plot_manager.index_selected.append(3)
-        self.assertEqual(model.selected_idx, [1, 4, 3])
+        # Extend plot_manager selection: selections are kept sorted
+        plot_manager.index_selected = [1, 4, 3]
+        self.assertEqual(model.selected_idx.tolist(), [1, 3, 4])
 
     def test_multi_plotter_selection_connected(self):
         df = self.df
@@ -616,33 +676,33 @@ class SelectionPlotDataFrameAnalyzer(UnittestTools):
 
         # Set analyzer selection:
         model.selected_idx = [0, 2, 5]
-        self.assertEqual(plot_manager.index_selected, [0, 2, 5])
-        self.assertEqual(plot_manager2.index_selected, [0, 2, 5])
+        self.assertEqual(plot_manager.index_selected.tolist(), [0, 2, 5])
+        self.assertEqual(plot_manager2.index_selected.tolist(), [0, 2, 5])
 
-        # Append to analyzer selection
-        model.selected_idx.append(6)
-        self.assertEqual(plot_manager.index_selected, [0, 2, 5, 6])
-        self.assertEqual(plot_manager2.index_selected, [0, 2, 5, 6])
+        # Extend analyzer selection
+        model.selected_idx = [0, 2, 5, 6]
+        self.assertEqual(plot_manager.index_selected.tolist(), [0, 2, 5, 6])
+        self.assertEqual(plot_manager2.index_selected.tolist(), [0, 2, 5, 6])
 
         # Set plot_manager selection:
         plot_manager.index_selected = [1, 4]
-        self.assertEqual(model.selected_idx, [1, 4])
-        self.assertEqual(plot_manager2.index_selected, [1, 4])
+        self.assertEqual(model.selected_idx.tolist(), [1, 4])
+        self.assertEqual(plot_manager2.index_selected.tolist(), [1, 4])
 
-        # Append to plot_manager selection
-        plot_manager.index_selected.append(3)
-        self.assertEqual(model.selected_idx, [1, 4, 3])
-        self.assertEqual(plot_manager2.index_selected, [1, 4, 3])
+        # Extend plot_manager selection
+        plot_manager.index_selected = [1, 4, 3]
+        self.assertEqual(model.selected_idx.tolist(), [1, 3, 4])
+        self.assertEqual(plot_manager2.index_selected.tolist(), [1, 3, 4])
 
         # Set plot_manager2 selection:
         plot_manager2.index_selected = [1, 4]
-        self.assertEqual(model.selected_idx, [1, 4])
-        self.assertEqual(plot_manager.index_selected, [1, 4])
+        self.assertEqual(model.selected_idx.tolist(), [1, 4])
+        self.assertEqual(plot_manager.index_selected.tolist(), [1, 4])
 
-        # Append to plot_manager2 selection
-        plot_manager2.index_selected.append(3)
-        self.assertEqual(model.selected_idx, [1, 4, 3])
-        self.assertEqual(plot_manager.index_selected, [1, 4, 3])
+        # Extend plot_manager2 selection
+        plot_manager2.index_selected = [1, 4, 3]
+        self.assertEqual(model.selected_idx.tolist(), [1, 3, 4])
+        self.assertEqual(plot_manager.index_selected.tolist(), [1, 3, 4])
 
     def test_change_plotter_datasource_when_filter(self):
         df = self.df
@@ -724,7 +784,32 @@ class SelectionPlotDataFrameAnalyzer(UnittestTools):
             with self.assertTraitDoesNotChange(model, "data_selected"):
                 model.sort_by_col = "index" + REVERSED_SUFFIX
 
-        self.assertEqual(model.selected_idx, [len(df)-1])
+        self.assertEqual(model.selected_idx.tolist(), [len(df)-1])
+
+    def test_map_df_index_to_idx(self):
+        df = self.df
+        model = self.analyzer_klass(source_df=df)
+        model.sort_by_col = "index" + REVERSED_SUFFIX
+        index_vals = [df.index[0], df.index[2], "NOT IN INDEX"]
+        self.assertEqual(model.map_df_index_to_idx(index_vals).tolist(),
+                         [len(df)-3, len(df)-1])
+        self.assertEqual(model.map_df_index_to_idx([]).tolist(), [])
+
+    def test_reordered_selection_not_propagated(self):
+        df = self.df
+        model = self.analyzer_klass(source_df=df)
+        model.selected_idx = [0, 1]
+        with self.assertTraitDoesNotChange(model, "data_selected"):
+            model.selected_idx = [1, 0]
+
+        self.assertEqual(model.selected_idx.tolist(), [0, 1])
+
+    def test_selection_from_mask(self):
+        df = self.df
+        model = self.analyzer_klass(source_df=df)
+        model.selected_idx = df["a"].to_numpy() > 8
+        self.assertEqual(model.selected_idx.tolist(), [9, 10])
+        self.assertEqual(model.data_selected, [df.index[9], df.index[10]])
 
     # Helper methods ----------------------------------------------------------
 
@@ -765,14 +850,13 @@ class DisplayingDataFrameAnalyzer(UnittestTools):
             analyzer.show_selected_only = True
 
         self.assertEqual(len(analyzer.displayed_df), 0)
-        analyzer.selected_idx.append(0)
+        analyzer.selected_idx = [0]
         self.assertEqual(len(analyzer.displayed_df), 1)
         self.assertEqual(analyzer.displayed_df.index.tolist(), [df.index[0]])
-        analyzer.selected_idx.append(3)
-        analyzer.selected_idx.append(2)
+        analyzer.selected_idx = [0, 3, 2]
         self.assertEqual(len(analyzer.displayed_df), 3)
         self.assertEqual(analyzer.displayed_df.index.tolist(),
-                         [df.index[0], df.index[3], df.index[2]])
+                         [df.index[0], df.index[2], df.index[3]])
 
         with self.assertTraitChanges(analyzer, "displayed_df"):
             analyzer.show_selected_only = False
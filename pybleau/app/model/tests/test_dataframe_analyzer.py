@@ -1,5 +1,8 @@
 from unittest import skipIf, TestCase
 import os
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
 
 from .base_dataframe_analyzer import Analyzer, DisplayingDataFrameAnalyzer, \
     FilterDataFrameAnalyzer, SelectionPlotDataFrameAnalyzer, \
@@ -8,7 +11,8 @@ from .base_dataframe_analyzer import Analyzer, DisplayingDataFrameAnalyzer, \
 BACKEND_AVAILABLE = os.environ.get("ETS_TOOLKIT", "qt4") != "null"
 
 if BACKEND_AVAILABLE:
-    from pybleau.app.model.dataframe_analyzer import DataFrameAnalyzer
+    from pybleau.app.model.dataframe_analyzer import DataFrameAnalyzer, \
+        NO_SORTING_ENTRY, REVERSED_SUFFIX
 
 msg = "No UI backend to paint into"
 
@@ -43,6 +47,46 @@ class TestAnalyzer(Analyzer, TestCase):
             analyzer.col_list_changed = True
         self.assert_col_list_synchronized(analyzer, list("abd"))
 
+    def test_borrow_source_df(self):
+        df = pd.DataFrame({"a b": [1, 2], "c*d": [3., 4.]})
+        analyzer = self.analyzer_klass(source_df=df, copy_source=False)
+        self.assertTrue(analyzer.source_borrowed)
+        self.assertEqual(analyzer.source_df.columns.tolist(), ["a_b", "c_d"])
+        # Data is shared with the original DF:
+        self.assertTrue(np.shares_memory(analyzer.source_df["c_d"].values,
+                                         df["c*d"].values))
+        analyzer.filter_exp = "c_d > 3"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [1])
+
+    def test_borrowed_source_df_not_modified(self):
+        df = pd.DataFrame({"a b": [1, 2], "c*d": [3., 4.]})
+        analyzer = self.analyzer_klass(source_df=df, copy_source=False)
+        analyzer.set_source_df_val(0, "c_d", 5.)
+        self.assertFalse(analyzer.source_borrowed)
+        self.assertEqual(analyzer.source_df["c_d"].tolist(), [5., 4.])
+        self.assertEqual(analyzer.filtered_df["c_d"].tolist(), [5., 4.])
+        # The original DF is untouched:
+        self.assertEqual(df["c*d"].tolist(), [3., 4.])
+        self.assertEqual(df.columns.tolist(), ["a b", "c*d"])
+
+    def test_borrow_unsorted_source_df(self):
+        df = pd.DataFrame({"a": range(5)}, index=[1, 2, 5, 6, 3])
+        analyzer = self.analyzer_klass(source_df=df, copy_source=False)
+        # Source data not sorted, but the filtered data is:
+        self.assertEqual(analyzer.source_df.index.tolist(), [1, 2, 5, 6, 3])
+        self.assertEqual(analyzer.sort_by_col, "index")
+        expected = df.sort_index()
+        assert_frame_equal(analyzer.filtered_df, expected)
+
+        analyzer.sort_by_col = "index" + REVERSED_SUFFIX
+        expected = df.sort_index(ascending=False)
+        assert_frame_equal(analyzer.filtered_df, expected)
+
+        analyzer.sort_by_col = NO_SORTING_ENTRY
+        analyzer.filter_exp = "a > 1"
+        analyzer.sort_by_col = "index"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [3, 5, 6])
+
 
 @skipIf(not BACKEND_AVAILABLE, msg)
 class TestFilterDataFrameAnalyzer(FilterDataFrameAnalyzer, TestCase):
@@ -856,6 +856,50 @@ class TestPlotManagerCreateWithPlots(BasePlotManagerTools, TestCase):
         self.assertEqual(len(container_manager.container.components), 1)
         self.assertIs(container_manager.container.components[0], desc.plot)
 
+    def test_create_lazily_with_contained_plots(self):
+        descs = []
+        for visible in [True, False]:
+            config = HistogramPlotConfigurator(data_source=TEST_DF)
+            config.x_col_name = "a"
+            descs.append(PlotDescriptor(x_col_name="a", plot_config=config,
+                                        visible=visible))
+
+        model = DataFramePlotManager(contained_plots=descs,
+                                     data_source=TEST_DF,
+                                     lazy_plot_creation=True)
+        container_manager = model.canvas_manager.container_managers[0]
+        self.assertEqual(container_manager.plot_map, {})
+        self.assertEqual(model.next_plot_id, 2)
+        for desc in model.contained_plots:
+            self.assertIsNone(desc.plot)
+
+        # Explicitly requested:
+        model.materialize_plots(model.contained_plots[0])
+        self.assertEqual(len(container_manager.plot_map), 1)
+        self.assertIsNotNone(model.contained_plots[0].plot)
+        self.assertIsNone(model.contained_plots[1].plot)
+        self.assertEqual(model.next_plot_id, 2)
+
+        # Shown:
+        model.contained_plots[1].visible = True
+        self.assertEqual(len(container_manager.plot_map), 2)
+        desc = model.contained_plots[1]
+        self.assertIsNotNone(desc.plot)
+        self.assertIn(desc.plot, container_manager.container.components)
+
+    def test_delete_lazily_created_plot(self):
+        config = HistogramPlotConfigurator(data_source=TEST_DF)
+        config.x_col_name = "a"
+        desc = PlotDescriptor(x_col_name="a", plot_config=config)
+        model = DataFramePlotManager(contained_plots=[desc],
+                                     data_source=TEST_DF,
+                                     lazy_plot_creation=True)
+        model.delete_plots(desc)
+        self.assertEqual(model.contained_plots, [])
+        model.materialize_plots()
+        container_manager = model.canvas_manager.container_managers[0]
+        self.assertEqual(container_manager.plot_map, {})
+
     def test_create_with_broken_contained_plot(self):
         config = HistogramPlotConfigurator(data_source=TEST_DF)
         config.x_col_name = "DOESNT_EXIST"
@@ -1016,6 +1060,20 @@ class TestPlotManagerFromDFAnalyzer(TestCase, UnittestTools):
         self.assertIs(self.model.source_analyzer, self.source_analyzer)
         assert_frame_equal(self.model.data_source, TEST_DF.query("a > 1"))
 
+    def test_no_hist_update_on_analyzer_sorting(self):
+        config = MultiHistogramPlotConfigurator(data_source=TEST_DF,
+                                                plot_title="Plot {i}")
+        config.x_col_names = ["a"]
+        self.model._add_new_plots(config)
+
+        data0 = self.model.contained_plots[0].plot.data
+        with self.assertTraitChanges(self.model, "data_source"):
+            with self.assertTraitDoesNotChange(data0, "data_changed"):
+                self.source_analyzer.sort_by_col = "b"
+
+        with self.assertTraitChanges(data0, "data_changed"):
+            self.source_analyzer.filter_exp = "a > 1"
+
     def test_update_source_analyzer_frozen(self):
         config = ScatterPlotConfigurator(data_source=TEST_DF)
         config.x_col_name = "a"
@@ -1070,6 +1128,43 @@ class TestPlotManagerDataUpdate(TestCase, UnittestTools):
         self.assertEqual(data0[HISTOGRAM_Y_LABEL].sum(), len(TEST_DF) // 2)
         self.assertEqual(data1[HISTOGRAM_Y_LABEL].sum(), len(TEST_DF) // 2)
 
+    def test_update_hist_on_data_sorting_without_analyzer(self):
+        config = MultiHistogramPlotConfigurator(data_source=TEST_DF,
+                                                plot_title="Plot {i}")
+        config.x_col_names = ["a"]
+        self.model._add_new_plots(config)
+        self.assert_plot_created()
+
+        # Without an analyzer to signal the reordering, plots are updated:
+        data0 = self.model.contained_plots[0].plot.data
+        new_df = self.model.data_source.sort_values("b", ascending=False)
+        with self.assertTraitChanges(data0, "data_changed"):
+            self.model.data_source = new_df
+
+    def test_update_scatter_on_data_sorting(self):
+        config = ScatterPlotConfigurator(data_source=TEST_DF, x_col_name="a",
+                                         y_col_name="b")
+        self.model._add_new_plot(config)
+
+        new_df = self.model.data_source.sort_values("b", ascending=False)
+        self.model.data_source = new_df
+        # Selections are positional, so the scatter data follows the new order
+        self.assert_renderer_data_is_from_df(new_df)
+
+    def test_hidden_plot_updated_when_shown(self):
+        config = ScatterPlotConfigurator(data_source=TEST_DF, x_col_name="a",
+                                         y_col_name="b")
+        self.model._add_new_plot(config)
+        plot_desc = self.model.contained_plots[0]
+        plot_desc.visible = False
+
+        new_df = self.model.data_source.query("a > 2")
+        self.model.data_source = new_df
+        self.assert_renderer_data_is_from_df(TEST_DF)
+
+        plot_desc.visible = True
+        self.assert_renderer_data_is_from_df(new_df)
+
     def test_update_line_on_data_update(self):
 
         config = LinePlotConfigurator(data_source=TEST_DF,
@@ -1193,7 +1288,7 @@ class TestPlotManagerInspectorTools(TestCase, UnittestTools):
 
     def test_empty(self):
         self.assertEqual(len(self.model.inspectors), 0)
-        self.assertEqual(self.model.index_selected, [])
+        self.assertEqual(self.model.index_selected.tolist(), [])
 
     def test_store_inspectors(self):
         self.model._add_new_plot(self.config)
@@ -1210,24 +1305,24 @@ class TestPlotManagerInspectorTools(TestCase, UnittestTools):
         self.model._add_new_plot(self.config)
         tool0 = self.model.inspectors["0"][0]
         tool1 = self.model.inspectors["1"][0]
-        self.assertEqual(self.model.index_selected, [])
+        self.assertEqual(self.model.index_selected.tolist(), [])
 
         tool0._select(3)
-        self.assertEqual(self.model.index_selected, [3])
+        self.assertEqual(self.model.index_selected.tolist(), [3])
         selection0 = tool0.component.index.metadata[SELECTION_METADATA_NAME]
         self.assertEqual(selection0, [3])
         selection1 = tool1.component.index.metadata[SELECTION_METADATA_NAME]
         self.assertEqual(selection1, [3])
 
         tool1._select(0)
-        self.assertEqual(self.model.index_selected, [3, 0])
+        self.assertEqual(self.model.index_selected.tolist(), [0, 3])
         selection0 = tool0.component.index.metadata[SELECTION_METADATA_NAME]
-        self.assertEqual(selection0, [3, 0])
+        self.assertEqual(sorted(selection0), [0, 3])
         selection1 = tool1.component.index.metadata[SELECTION_METADATA_NAME]
-        self.assertEqual(selection1, [3, 0])
+        self.assertEqual(sorted(selection1), [0, 3])
 
         tool1._deselect(3)
-        self.assertEqual(self.model.index_selected, [0])
+        self.assertEqual(self.model.index_selected.tolist(), [0])
         selection0 = tool0.component.index.metadata[SELECTION_METADATA_NAME]
         self.assertEqual(selection0, [0])
         selection1 = tool1.component.index.metadata[SELECTION_METADATA_NAME]
@@ -1239,11 +1334,11 @@ class TestPlotManagerInspectorTools(TestCase, UnittestTools):
         self.model._add_new_plot(self.config)
         tool0, overlay0 = self.model.inspectors["0"]
         tool1, overlay1 = self.model.inspectors["1"]
-        self.assertEqual(self.model.index_selected, [])
+        self.assertEqual(self.model.index_selected.tolist(), [])
 
         tool0._select(3)
         first_selection = [3]
-        self.assertEqual(self.model.index_selected, first_selection)
+        self.assertEqual(self.model.index_selected.tolist(), first_selection)
         selection0 = tool0.component.index.metadata[SELECTION_METADATA_NAME]
         self.assertEqual(selection0, first_selection)
         selection1 = tool1.component.index.metadata[SELECTION_METADATA_NAME]
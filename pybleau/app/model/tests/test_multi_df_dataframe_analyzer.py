@@ -12,6 +12,7 @@ from .base_dataframe_analyzer import Analyzer, DisplayingDataFrameAnalyzer, \
 BACKEND_AVAILABLE = os.environ.get("ETS_TOOLKIT", "qt4") != "null"
 
 if BACKEND_AVAILABLE:
+    from pybleau.app.model.dataframe_analyzer import REVERSED_SUFFIX
     from pybleau.app.model.multi_dfs_dataframe_analyzer import \
         MultiDataFrameAnalyzer
 
@@ -106,6 +107,41 @@ class TestAnalyzer(Analyzer, TestCase):
         self.assertEqual(analyzer.filtered_df.loc[3, "x"], 15)
         self.assertEqual(analyzer.displayed_df.loc[3, "x"], 15)
 
+    def test_modify_source_df_without_notification_invalidates_masks(self):
+        analyzer = self.analyzer_klass(_source_dfs={"a": self.df2,
+                                                    "b": self.df3})
+        analyzer.filter_exp = "x > 3"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [3, 4])
+
+        analyzer.set_source_df_val(0, "x", 10, change_notify=False)
+        analyzer.set_source_df_col("y", [5, 5, 5, 5, 5], change_notify=False)
+        # Filtering again uses the new values rather than cached masks:
+        analyzer.filter_exp = "x > 3 and y < 10"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [0, 3, 4])
+
+    def test_source_df_concatenated_once(self):
+        analyzer = self.analyzer_klass(_source_dfs={"a": self.df2,
+                                                    "b": self.df3})
+        source_df = analyzer.source_df
+        analyzer.sort_by_col = "y"
+        analyzer.sort_by_col = "x" + REVERSED_SUFFIX
+        self.assertIs(analyzer.source_df, source_df)
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [4, 3, 2, 1, 0])
+
+        # Modifying a part rebuilds the concatenation:
+        analyzer.set_source_df_val(0, "x", 10, change_notify=False)
+        self.assertIsNot(analyzer.source_df, source_df)
+        self.assertEqual(analyzer.source_df.loc[0, "x"], 10)
+        analyzer.sort_by_col = "x"
+        self.assertEqual(analyzer.filtered_df.index.tolist(), [1, 2, 3, 4, 0])
+
+        # So does replacing a part:
+        source_df = analyzer.source_df
+        analyzer._source_dfs["b"] = self.df3 * 2
+        self.assertIsNot(analyzer.source_df, source_df)
+        assert_frame_equal(analyzer.source_df,
+                           pd.concat([self.df2, self.df3 * 2], axis=1))
+
     def test_modify_source_df_value_bad_col(self):
         analyzer = self.analyzer_klass(_source_dfs={"a": self.df,
                                                     "b": self.df3})
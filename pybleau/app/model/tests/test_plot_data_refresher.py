@@ -0,0 +1,106 @@
+from threading import Event as ThreadingEvent
+from unittest import TestCase
+
+import pandas as pd
+from traits.api import HasStrictTraits, Instance, Str
+
+from pybleau.app.model.plot_data_refresher import clone_config, \
+    PlotDataRefresher
+
+TEST_DF = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+
+
+class FakeConfig(HasStrictTraits):
+    data_source = Instance(pd.DataFrame)
+
+    x_col_name = Str
+
+    def to_dict(self):
+        return {"x_arr": self.data_source[self.x_col_name].values}
+
+
+class BlockingConfig(FakeConfig):
+    started = Instance(ThreadingEvent, ())
+
+    release = Instance(ThreadingEvent, ())
+
+    def to_dict(self):
+        self.started.set()
+        self.release.wait(5)
+        return super(BlockingConfig, self).to_dict()
+
+
+class FakeDesc(HasStrictTraits):
+    id = Str
+
+    plot_config = Instance(FakeConfig)
+
+
+class TestPlotDataRefresher(TestCase):
+    def setUp(self):
+        self.refresher = PlotDataRefresher(max_workers=2)
+        self.results = []
+        self.refresher.on_trait_change(lambda new: self.results.append(new),
+                                       "data_computed")
+
+    def tearDown(self):
+        self.refresher.shutdown()
+
+    def test_clone_config(self):
+        config = FakeConfig(data_source=TEST_DF, x_col_name="a")
+        clone = clone_config(config)
+        self.assertIsNot(clone, config)
+        self.assertIs(clone.data_source, TEST_DF)
+        self.assertEqual(clone.x_col_name, "a")
+
+    def test_refresh(self):
+        descs = [FakeDesc(id=str(i), plot_config=FakeConfig(
+            data_source=TEST_DF, x_col_name=col)) for i, col in
+            enumerate("ab")]
+        refresh_id = self.refresher.submit(descs)
+        self.refresher.wait(5)
+
+        self.assertEqual(len(self.results), 2)
+        results = {desc.id: kw for _, desc, kw in self.results}
+        self.assertEqual(list(results["0"]["x_arr"]), [1, 2, 3])
+        self.assertEqual(list(results["1"]["x_arr"]), [4, 5, 6])
+        for result_id, desc, _ in self.results:
+            self.assertEqual(result_id, refresh_id)
+            self.assertTrue(self.refresher.accept_result(result_id, desc))
+
+    def test_new_refresh_cancels_previous(self):
+        config = BlockingConfig(data_source=TEST_DF, x_col_name="a")
+        desc = FakeDesc(id="0", plot_config=config)
+        # The worker computes with a copy of the configurator:
+        self.refresher.submit([desc])
+        self.refresher.wait(0.1)
+        self.assertEqual(self.results, [])
+
+        desc.plot_config = FakeConfig(data_source=TEST_DF.iloc[:1],
+                                      x_col_name="a")
+        # Not applied yet, so refreshed again:
+        new_id = self.refresher.submit([])
+        config.release.set()
+        self.refresher.wait(5)
+
+        # Only the new refresh produces a result:
+        self.assertEqual(len(self.results), 1)
+        result_id, result_desc, kw = self.results[0]
+        self.assertEqual(result_id, new_id)
+        self.assertIs(result_desc, desc)
+        self.assertEqual(list(kw["x_arr"]), [1])
+        self.assertTrue(self.refresher.accept_result(result_id, result_desc))
+
+    def test_result_for_other_plot_with_same_id(self):
+        descs = [FakeDesc(id="0", plot_config=FakeConfig(
+            data_source=TEST_DF, x_col_name="a"))]
+        refresh_id = self.refresher.submit(descs)
+        self.refresher.wait(5)
+
+        # A deleted plot whose id was reused doesn't mark the new plot as
+        # refreshed, nor stops its refresh:
+        old_desc = FakeDesc(id="0")
+        self.assertFalse(self.refresher.accept_result(refresh_id, old_desc))
+        self.refresher.discard(old_desc)
+        self.assertTrue(self.refresher.accept_result(refresh_id, descs[0]))
+        self.assertFalse(self.refresher.accept_result(refresh_id, descs[0]))
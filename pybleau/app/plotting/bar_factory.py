@@ -6,13 +6,14 @@ import numpy as np
 import pandas as pd
 import logging
 
-from traits.api import Any, Constant
-
-from app_common.chaco.plot_factory import create_line_plot
+from traits.api import Any, Constant, Dict, Instance, Str
+from chaco.api import ArrayDataSource, ErrorBarPlot
 
 from .plot_config import BAR_PLOT_TYPE
 from .bar_plot_style import IGNORE_DATA_DUPLICATES
-from .base_factories import CATEGORICAL_TYPES, StdXYPlotFactory
+from .base_factories import CATEGORICAL_TYPES, DEFAULT_RENDERER_NAME, \
+    StdXYPlotFactory
+from .grouped_stats import category_codes, grouped_mean_std
 
 BAR_SQUEEZE_FACTOR = 0.8
 
@@ -32,6 +33,18 @@ class BarPlotFactory(StdXYPlotFactory):
     #: Optional error bars (when multiple values contribute to a single bar)
     error_bars = Any  # Either(Array, Dict)
 
+    #: Optional precomputed error bar sizes, mapped like y_arr, for bars whose
+    #: heights were aggregated beforehand (for e.g. from melted columns)
+    y_err_arr = Any  # Either(Array, Dict)
+
+    #: Error bar renderers, 1 per hue value ("" if no hue), drawing the error
+    #: bars of all the bars of that hue
+    error_bar_renderers = Dict(Str, Instance(ErrorBarPlot))
+
+    #: Index of the x labels, shared by all hue values to compute their bar
+    #: heights
+    _x_label_index = Any
+
     def add_renderers(self, plot):
         """ Generate all bar renderers and optional error bars sticks.
         """
@@ -42,9 +55,7 @@ class BarPlotFactory(StdXYPlotFactory):
                 style.bar_width = self._compute_bar_width()
 
         super(BarPlotFactory, self).add_renderers(plot)
-
-        if self.error_bars is not None and len(self.error_bars):
-            self._draw_error_bars(plot)
+        self._draw_error_bars(plot)
 
     def _add_arrays_for_hue(self, data_map, x_arr, y_arr, hue_val, hue_val_idx,
                             adtl_arrays):
@@ -58,11 +69,19 @@ class BarPlotFactory(StdXYPlotFactory):
         y = y_arr[hue_val]
         if self.x_labels:
             _, y, errors = _split_avg_for_bar_heights(
-                x, y, force_index=self.x_labels
+                x, y, force_index=self._x_label_index
             )
+            if self.y_err_arr is not None:
+                # Each x value appears once, so this only reorders the errors
+                # along the x labels:
+                _, errors, _ = _split_avg_for_bar_heights(
+                    x, self.y_err_arr[hue_val],
+                    force_index=self._x_label_index
+                )
             show_error_bars = self.plot_style.show_error_bars
             if show_error_bars:
                 self.error_bars[hue_name] = errors
+                self._add_error_bar_arrays(data_map, y, errors, hue_name)
 
             # Strings along x: replace with equi-distant positions...
             x = np.arange(len(self.x_labels), dtype="float64")
@@ -76,59 +95,99 @@ class BarPlotFactory(StdXYPlotFactory):
         data_map[x_name], data_map[y_name] = x, y
         return hue_name, x_name, y_name
 
+    def update_data(self, y_err_arr=None, **kwargs):
+        """ Update the existing plot with new data arrays.
+
+        See base class for details.
+        """
+        self.y_err_arr = y_err_arr
+        super(BarPlotFactory, self).update_data(**kwargs)
+
+    def reset_data_attributes(self):
+        self.error_bars = None
+        self._x_label_index = None
+
+    def update_renderers_from_data(self, removed=None):
+        """ The plot_data was updated: update/remove existing renderers.
+
+        Error bar renderers are updated too, or removed if their data
+        disappeared.
+        """
+        super(BarPlotFactory, self).update_renderers_from_data(removed=removed)
+
+        for hue_name in list(self.error_bar_renderers.keys()):
+            renderer = self.error_bar_renderers[hue_name]
+            low_key, high_key = self._error_bar_keys(hue_name)
+            if low_key in self.plot_data.arrays:
+                renderer.value_low.set_data(self.plot_data.arrays[low_key])
+                renderer.value_high.set_data(self.plot_data.arrays[high_key])
+            else:
+                self._remove_error_bar_renderer(hue_name)
+
+    def append_new_renderers(self, desc_list, styles):
+        """ Append new renderers to an existing factory plot.
+
+        Error bars are drawn for the new renderers if needed.
+        """
+        super(BarPlotFactory, self).append_new_renderers(desc_list, styles)
+        self._draw_error_bars(self.plot)
+
     def _draw_error_bars(self, plot):
-        """ Add data and renderers for drawing error bars around bar heights.
+        """ Add 1 error bar renderer per hue value, if not already present.
+
+        Each error bar renderer draws the error bars of all the bars of a bar
+        renderer, sharing its index data and mappers.
         """
-        if self.z_col_name:
-            self._draw_error_bars_multi_renderer(plot)
+        if self._hue_values:
+            hue_names = self._hue_values
         else:
-            self._draw_error_bars_single_renderer(plot)
+            hue_names = [""]
+
+        for hue_name in hue_names:
+            low_key, high_key = self._error_bar_keys(hue_name)
+            if hue_name in self.error_bar_renderers or \
+                    low_key not in self.plot_data.arrays:
+                continue
+
+            bar_renderer = self.renderers[hue_name or DEFAULT_RENDERER_NAME]
+            value_low = ArrayDataSource(self.plot_data.arrays[low_key])
+            value_high = ArrayDataSource(self.plot_data.arrays[high_key])
+            # Make sure the error bars are in view:
+            bar_renderer.value_mapper.range.add(value_low, value_high)
+            error_renderer = ErrorBarPlot(
+                index=bar_renderer.index, value=bar_renderer.value,
+                value_low=value_low, value_high=value_high,
+                index_mapper=bar_renderer.index_mapper,
+                value_mapper=bar_renderer.value_mapper,
+                color=ERROR_BAR_COLOR
+            )
+            plot.add(error_renderer)
+            self.error_bar_renderers[hue_name] = error_renderer
 
-    def _draw_error_bars_single_renderer(self, plot):
-        """ Add data and renderers for drawing error bars around bar heights.
+    def _remove_error_bar_renderer(self, hue_name):
+        """ Remove the error bars of the provided hue value from the plot.
         """
-        bar_height = self.plot_data.arrays[self.y_col_name]
-        bar_positions = self.plot_data.arrays[self.x_col_name]
-        for i, (y_val, stddev) in enumerate(zip(bar_height, self.error_bars)):
-            x = bar_positions[i]
-            x_data_name = ERROR_BAR_DATA_KEY_PREFIX + "{}_x".format(i)
-            y_data_name = ERROR_BAR_DATA_KEY_PREFIX + "{}_y".format(i)
-            self.plot_data.set_data(x_data_name, np.array([x, x]))
-            y_array = np.array([y_val+stddev/2., y_val-stddev/2.])
-            self.plot_data.set_data(y_data_name, y_array)
-            error_bar_renderer_name = "plot{}".format(i+1)
-            error_renderer = create_line_plot(data=(np.array([x, x]), y_array),
-                                              color=ERROR_BAR_COLOR)
-            plot.add(error_renderer)
-            self.renderers[error_bar_renderer_name] = error_renderer
+        renderer = self.error_bar_renderers.pop(hue_name)
+        renderer.value_mapper.range.remove(renderer.value_low,
+                                           renderer.value_high)
+        self.plot.remove(renderer)
 
-    def _draw_error_bars_multi_renderer(self, plot):
-        """ Add data and renderers for drawing error bars around bar heights.
+    def _add_error_bar_arrays(self, data_map, y_arr, errors, hue_name=""):
+        """ Add the low and high ends of the error bars to the data_map.
         """
-        for j, hue_name in enumerate(self._hue_values):
-            x_key = self._plotdata_array_key(self.x_col_name, hue_name)
-            y_key = self._plotdata_array_key(self.y_col_name, hue_name)
-            bar_height = self.plot_data.arrays[y_key]
-            bar_positions = self.plot_data.arrays[x_key]
-            errors = self.error_bars[hue_name]
-            for i, (y_val, stddev) in enumerate(zip(bar_height, errors)):
-                x = bar_positions[i]
-                renderer_num = j*len(bar_positions) + i
-                x_data_name = ERROR_BAR_DATA_KEY_PREFIX + "{}_x".format(
-                    renderer_num
-                )
-                y_data_name = ERROR_BAR_DATA_KEY_PREFIX + "{}_y".format(
-                    renderer_num
-                )
-                x_array = np.array([x, x])
-                self.plot_data.set_data(x_data_name, x_array)
-                y_array = np.array([y_val+stddev/2., y_val-stddev/2.])
-                self.plot_data.set_data(y_data_name, y_array)
-                name = "plot{}".format(renderer_num)
-                error_renderer = create_line_plot(data=(x_array, y_array),
-                                                  color=ERROR_BAR_COLOR)
-                plot.add(error_renderer)
-                self.renderers[name] = error_renderer
+        low_key, high_key = self._error_bar_keys(hue_name)
+        data_map[low_key] = y_arr - errors / 2.
+        data_map[high_key] = y_arr + errors / 2.
+
+    def _error_bar_keys(self, hue_name=""):
+        """ Keys of the low and high ends of the error bars of a hue value.
+        """
+        low_key = self._plotdata_array_key(ERROR_BAR_DATA_KEY_PREFIX + "low",
+                                           hue_name)
+        high_key = self._plotdata_array_key(
+            ERROR_BAR_DATA_KEY_PREFIX + "high", hue_name
+        )
+        return low_key, high_key
 
     def _compute_bar_width(self):
         """ Compute the width of each bar.
@@ -180,15 +239,21 @@ class BarPlotFactory(StdXYPlotFactory):
                 show_error_bars = self.plot_style.show_error_bars
                 if show_error_bars:
                     self.error_bars = errors
+            elif self.y_err_arr is not None and \
+                    self.plot_style.show_error_bars:
+                self.error_bars = np.asarray(self.y_err_arr, dtype="float64")
 
             if not self.x_labels:
                 self.x_labels = list(x_arr)
 
             x_arr = np.arange(len(self.x_labels))
 
-        return super(BarPlotFactory, self)._plot_data_single_renderer(
+        data_map = super(BarPlotFactory, self)._plot_data_single_renderer(
             x_arr, y_arr, z_arr, **adtl_arrays
         )
+        if self.error_bars is not None:
+            self._add_error_bar_arrays(data_map, y_arr, self.error_bars)
+        return data_map
 
     def _plot_data_multi_renderer(self, x_arr=None, y_arr=None, z_arr=None,
                                   **adtl_arrays):
@@ -206,6 +271,9 @@ class BarPlotFactory(StdXYPlotFactory):
 
                 self.x_labels = sorted(x_labels)
 
+        if self.x_labels:
+            self._x_label_index = pd.Index(list(self.x_labels))
+
         return super(BarPlotFactory, self)._plot_data_multi_renderer(
             x_arr=x_arr, y_arr=y_arr, z_arr=z_arr, **adtl_arrays
         )
@@ -214,7 +282,8 @@ class BarPlotFactory(StdXYPlotFactory):
 def _split_avg_for_bar_heights(x_arr, y_arr, force_index=None):
     """ Recompute y_arr grouping all values by their x value, and averaging
 
-    Uses pandas' groupby functionality.
+    The mean, standard deviation and count of each group are computed in a
+    single vectorized pass (see :mod:`pybleau.app.plotting.grouped_stats`).
 
     Parameters
     ----------
@@ -224,9 +293,9 @@ def _split_avg_for_bar_heights(x_arr, y_arr, force_index=None):
     y_arr : np.array
         Content of the column to display as bar heights.
 
-    force_index : list
+    force_index : list or pd.Index
         List of index values to force the computation of the values and errors
-        for.
+        for. Pass a pd.Index to reuse it across calls.
 
     Returns
     -------
@@ -234,19 +303,9 @@ def _split_avg_for_bar_heights(x_arr, y_arr, force_index=None):
         Labels to display along the x axis, the averaged bar heights and
         the error bars.
     """
-    df = pd.DataFrame({"x": x_arr, "y": y_arr})
-    grpby = df.groupby(by="x")
-    grouped_avg_y = grpby.mean()["y"]
-
-    if force_index:
-        grouped_avg_y = grouped_avg_y.reindex(list(force_index))
-
-    labels = list(grouped_avg_y.index)
-    y_arr = grouped_avg_y.values
-
-    if force_index:
-        error_bars = grpby.std()["y"].reindex(list(force_index)).values
-    else:
-        error_bars = grpby.std()["y"].values
+    if force_index is not None and not len(force_index):
+        force_index = None
 
+    codes, labels = category_codes(x_arr, labels=force_index)
+    y_arr, error_bars, _ = grouped_mean_std(codes, y_arr, len(labels))
     return labels, y_arr, error_bars
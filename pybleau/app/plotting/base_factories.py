@@ -19,7 +19,8 @@ import numpy as np
 import pandas as pd
 import logging
 
-from traits.api import Any, Dict, HasStrictTraits, Instance, List, Set, Str
+from traits.api import Any, Bool, Dict, HasStrictTraits, Instance, Int, \
+    List, Set, Str
 from chaco.api import ArrayPlotData, ColorBar, DataRange1D, HPlotContainer, \
     LabelAxis, LinearMapper, LogMapper, PlotAxis, PlotLabel
 
@@ -34,10 +35,13 @@ from app_common.chaco.plot_factory import create_bar_plot, \
 from app_common.chaco.legend import Legend, LegendHighlighter
 
 from .axis_style import LOG_AXIS_STYLE
+from .grouped_plot_data import GroupedArrayPlotData
+from .lod import DEFAULT_LOD_THRESHOLD, LINE_LOD, RendererLOD, SCATTER_LOD
 from .multi_mapper_plot import MultiMapperPlot
 from .plot_context_menu_manager import PlotContextMenuManager
 from .plot_style import BaseXYPlotStyle
-from .renderer_style import STYLE_L_ORIENT, STYLE_R_ORIENT
+from .renderer_style import REND_TYPE_LINE, REND_TYPE_SCAT, \
+    STYLE_L_ORIENT, STYLE_R_ORIENT
 
 SELECTION_COLOR = "red"
 
@@ -116,6 +120,10 @@ class BasePlotFactory(HasStrictTraits):
     #: Handling of context menu generation and events
     context_menu_manager = Instance(PlotContextMenuManager, ())
 
+    #: Whether the plot changes when only the order of the data rows changes
+    #: (line connections, selection positions, ...)
+    depends_on_row_order = Bool(True)
+
     def generate_plot(self):
         raise NotImplementedError("Base class: use subclass.")
 
@@ -255,6 +263,14 @@ class StdXYPlotFactory(BasePlotFactory):
     #: Renderer list, mapped to their name
     renderers = Dict
 
+    #: Number of points above which line and scatter renderers only display
+    #: a decimated version of their data. Set to 0 to always display all.
+    lod_threshold = Int(DEFAULT_LOD_THRESHOLD)
+
+    #: Level of detail controllers of the decimated renderers, mapped to the
+    #: renderer name
+    renderer_lods = Dict
+
     #: Optional legend object to be added to the future plot
     legend = Instance(Legend)
 
@@ -302,11 +318,20 @@ class StdXYPlotFactory(BasePlotFactory):
             data_map = self._plot_data_single_renderer(
                 x_arr, y_arr, z_arr, **adtl_arrays
             )
+            self.plot_data = ArrayPlotData(**data_map)
         elif isinstance(x_arr, dict):
             assert set(x_arr.keys()) == set(y_arr.keys())
             data_map = self._plot_data_multi_renderer(
                 x_arr, y_arr, z_arr, **adtl_arrays
             )
+            # Store each column once, sorted by hue, rather than 1 array per
+            # column and hue value:
+            hue_names = [str(hue_val) for hue_val in sorted(x_arr.keys())]
+            columns = [self.x_col_name, self.y_col_name] + list(adtl_arrays)
+            self.plot_data = GroupedArrayPlotData.from_data_map(
+                data_map, columns, hue_names,
+                key_func=self._plotdata_array_key
+            )
         else:
             msg = "x_arr/y_arr should be either an array or a dictionary " \
                   "mapping the z/hue value to the corresponding x array, but" \
@@ -314,7 +339,6 @@ class StdXYPlotFactory(BasePlotFactory):
             msg = msg.format(x_arr, type(x_arr))
             raise ValueError(msg)
 
-        self.plot_data = ArrayPlotData(**data_map)
         return data_map
 
     def _plot_data_single_renderer(self, x_arr=None, y_arr=None, z_arr=None,
@@ -469,6 +493,7 @@ class StdXYPlotFactory(BasePlotFactory):
         renderer = self._build_renderer(desc, style)
         plot.add(renderer)
         self.renderers[desc["name"]] = renderer
+        self._add_renderer_lod(desc, style, renderer)
 
         if first_renderer:
             left_axis, bottom_axis = add_default_axes(renderer)
@@ -545,6 +570,29 @@ class StdXYPlotFactory(BasePlotFactory):
                               value_mapper_class=y_mapper_class,
                               **style.to_plot_kwargs())
 
+    def _add_renderer_lod(self, desc, style, renderer):
+        """ Display a decimated version of large line and scatter data.
+
+        Not used when hovering displays other columns, since the hover tool
+        looks its data up by position along the renderer's data.
+        """
+        lod_kinds = {REND_TYPE_LINE: LINE_LOD, REND_TYPE_SCAT: SCATTER_LOD}
+        if style.renderer_type not in lod_kinds or not self.lod_threshold or \
+                self.hover_col_names:
+            return
+
+        x = self.plot_data.get_data(desc["x"])
+        y = self.plot_data.get_data(desc["y"])
+        numerical = all(arr.dtype.kind in "biuf" for arr in [x, y])
+        if not numerical or len(x) <= self.lod_threshold:
+            return
+
+        kind = lod_kinds[style.renderer_type]
+        lod = RendererLOD(renderer=renderer, kind=kind, x=x, y=y,
+                          max_points=self.lod_threshold)
+        lod.attach()
+        self.renderer_lods[desc["name"]] = lod
+
     def set_legend(self, plot, align="ur", padding=10):
         """ Add legend and make it relocatable & clickable if tools requested.
 
@@ -562,6 +610,80 @@ class StdXYPlotFactory(BasePlotFactory):
 
     # Post creation renderer management methods -------------------------------
 
+    def update_data(self, x_arr=None, y_arr=None, z_arr=None, hover_data=None,
+                    **traits):
+        """ Update the existing plot with new data arrays.
+
+        Only the plot data is recomputed: renderers are updated, removed if
+        their data disappeared, or created for new data, but the plot, its
+        tools and styles are preserved.
+
+        Parameters
+        ----------
+        x_arr, y_arr, z_arr : np.array or dict
+            New data arrays, as passed to the factory constructor.
+
+        hover_data : dict, optional
+            New additional arrays, as passed to the factory constructor.
+
+        traits : dict
+            Other attributes, as exported by the plot configurator. Only the
+            x_labels, y_labels and plot_style are used.
+        """
+        if isinstance(x_arr, pd.Series):
+            x_arr = x_arr.values
+
+        if isinstance(y_arr, pd.Series):
+            y_arr = y_arr.values
+
+        if hover_data is None:
+            hover_data = {}
+
+        existing_data = self.plot_data
+        existing_desc = self.renderer_desc
+
+        # Recompute the data and renderer descriptions from scratch, like a
+        # new factory would:
+        self.renderer_desc = []
+        self._hue_values = []
+        self.x_labels = traits.get("x_labels", [])
+        self.y_labels = traits.get("y_labels", [])
+        self.reset_data_attributes()
+        self.initialize_plot_data(x_arr=x_arr, y_arr=y_arr, z_arr=z_arr,
+                                  **hover_data)
+        new_data = self.plot_data
+        new_desc = self.renderer_desc
+        self.plot_data = existing_data
+        self.renderer_desc = existing_desc
+
+        if isinstance(existing_data, GroupedArrayPlotData):
+            removed_datasets = existing_data.update_from(new_data)
+        else:
+            removed_datasets = set(existing_data.arrays.keys()) - \
+                set(new_data.arrays.keys())
+            existing_data.update_data(new_data.arrays)
+
+        self.update_renderers_from_data(removed=removed_datasets)
+
+        # Add renderers for new data, styled like in a new factory:
+        plot_style = traits.get("plot_style", self.plot_style)
+        existing_renderers = {(desc['x'], desc['y']) for desc in
+                              self.renderer_desc}
+        new_descs = []
+        new_styles = []
+        for desc, style in zip(new_desc, plot_style.renderer_styles):
+            if (desc['x'], desc['y']) not in existing_renderers:
+                new_descs.append(desc)
+                new_styles.append(style)
+
+        self.append_new_renderers(desc_list=new_descs, styles=new_styles)
+        self.adjust_plot_style()
+
+    def reset_data_attributes(self):
+        """ Reset attributes computed from the data, before updating the data.
+        """
+        pass
+
     def update_renderers_from_data(self, removed=None):
         """ The plot_data was updated: update/remove existing renderers.
         """
@@ -590,16 +712,27 @@ class StdXYPlotFactory(BasePlotFactory):
                 logger.exception(msg)
                 raise ValueError(msg)
             else:
-                x = self.plot_data.get_data(desc["x"])
-                y = self.plot_data.get_data(desc["y"])
-                renderer.index.set_data(x)
-                renderer.value.set_data(y)
+                self._update_renderer_data(desc, renderer)
+
+    def _update_renderer_data(self, desc, renderer):
+        """ Set the data of an existing renderer from the plot data.
+        """
+        x = self.plot_data.get_data(desc["x"])
+        y = self.plot_data.get_data(desc["y"])
+        if desc["name"] in self.renderer_lods:
+            self.renderer_lods[desc["name"]].set_full_data(x, y)
+        else:
+            renderer.index.set_data(x)
+            renderer.value.set_data(y)
 
     def remove_renderer(self, rend_desc):
         """ Remove renderer described by provided descriptor from current plot.
         """
         rend_name = rend_desc["name"]
         renderer = self.renderers.pop(rend_name)
+        lod = self.renderer_lods.pop(rend_name, None)
+        if lod is not None:
+            lod.detach()
 
         self.plot.remove(renderer)
 
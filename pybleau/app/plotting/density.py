@@ -0,0 +1,406 @@
+""" Density display of large scatter data.
+
+Beyond a few hundred thousand points, drawing every marker of a scatter plot
+is slow, and the result is an opaque blob where the distribution of the points
+can't be read anymore. In density mode, the points are binned on a grid of
+cells of a few pixels covering the visible range, and the grid is displayed as
+an image:
+
+- without a color dimension, or for each value of a categorical color
+  dimension, the number of points in each cell is displayed in the renderer's
+  color, with an opacity growing with the (log of the) count,
+- for a continuous color dimension, the mean z value of the points in each
+  cell is displayed with the renderer's colormap.
+
+All images of a plot share a ScatterDensity object, which holds the full data
+of each layer and recomputes the grids whenever the visible range or the size
+of the images changes, so that zooming in reveals the details of the
+distribution.
+"""
+import logging
+
+import numpy as np
+from traits.api import Any, Array, Bool, HasStrictTraits, Instance, Int, \
+    List, Str, Tuple
+
+from chaco.api import DataRange1D, DataRange2D, GridDataSource, GridMapper, \
+    ImageData, ImagePlot
+
+from .lod import DEFAULT_RESOLUTION
+
+logger = logging.getLogger(__name__)
+
+#: Size in pixels of the cells the points are counted in
+DEFAULT_DENSITY_CELL_SIZE = 2
+
+#: Minimum opacity of non-empty cells, so isolated points remain visible
+MIN_DENSITY_ALPHA = 0.2
+
+
+class DensityImagePlot(ImagePlot):
+    """ Image renderer displaying the density of a scatter dataset.
+    """
+    #: Color of the icon representing the renderer in legends
+    icon_color = Tuple((0., 0., 1., 1.))
+
+    #: Color mapper for the mean z values (None for count images)
+    color_mapper = Any
+
+    def _render_icon(self, gc, x, y, width, height):
+        with gc:
+            gc.set_fill_color(self.icon_color)
+            gc.rect(x, y, width, height)
+            gc.fill_path()
+
+
+class DensityLayer(HasStrictTraits):
+    """ Full data of one density image.
+    """
+    #: Name of the renderer displaying the layer
+    name = Str
+
+    #: Full resolution data along the x dimension
+    x = Array
+
+    #: Full resolution data along the y dimension
+    y = Array
+
+    #: Values to average in each cell (None to count the points)
+    weights = Any
+
+    #: Color of the counts, as a RGBA tuple of floats
+    color = Tuple((0., 0., 1., 1.))
+
+    #: Overall opacity of the image
+    alpha = Any(1.)
+
+    #: Image renderer
+    renderer = Instance(DensityImagePlot)
+
+
+class ScatterDensity(HasStrictTraits):
+    """ Computes and displays density images of scatter datasets.
+
+    All layers are displayed on the same grid, covering the shared
+    `index_range`.
+    """
+    #: Range shared by all images, defining the binned area
+    index_range = Instance(DataRange2D)
+
+    #: Size in pixels of the cells the points are counted in
+    cell_size = Int(DEFAULT_DENSITY_CELL_SIZE)
+
+    #: Data and renderer of each image, in drawing order
+    layers = List(Instance(DensityLayer))
+
+    #: Cell boundaries of the current grid, shared by all images
+    grid = Instance(GridDataSource)
+
+    #: Extremes of the data of all layers, to compute the auto range from
+    _extent = Instance(GridDataSource)
+
+    #: Whether the images are being updated
+    _updating = Bool
+
+    def add_layer(self, name, x, y, weights=None, color=(0., 0., 1., 1.),
+                  alpha=1., colormap=None):
+        """ Add a density image for a dataset and return its renderer.
+
+        Parameters
+        ----------
+        name : str
+            Name of the renderer.
+
+        x, y : np.array
+            Full resolution coordinates of the points.
+
+        weights : np.array, optional
+            Values to display the mean of in each cell. Counts are displayed
+            if not provided.
+
+        color : tuple
+            RGBA color (floats between 0 and 1) to display counts with.
+
+        alpha : float
+            Overall opacity of the image.
+
+        colormap : callable, optional
+            Chaco colormap factory to display the mean weights with. Required
+            if weights are provided.
+        """
+        if weights is not None and colormap is None:
+            msg = "A colormap is needed to display the mean of the weights."
+            logger.exception(msg)
+            raise ValueError(msg)
+
+        color_mapper = None
+        if colormap is not None:
+            color_mapper = colormap(DataRange1D())
+
+        renderer = DensityImagePlot(
+            index=self.grid, index_mapper=GridMapper(range=self.index_range),
+            value=ImageData(data=np.zeros((1, 1, 4), dtype=np.uint8),
+                            value_depth=4),
+            icon_color=tuple(color), color_mapper=color_mapper
+        )
+        layer = DensityLayer(name=name, x=x, y=y, weights=weights,
+                             color=tuple(color), alpha=alpha,
+                             renderer=renderer)
+        self.layers.append(layer)
+        # The mapper is updated when the range or the size of the image change:
+        renderer.on_trait_change(self._update, "index_mapper.updated")
+        self._update_color_range(layer)
+        self._update_extent()
+        self.update(force=True)
+        return renderer
+
+    def set_layer_data(self, name, x, y, weights=None):
+        """ Replace the full data of a layer, and update the images.
+        """
+        layer = self._get_layer(name)
+        layer.trait_set(x=x, y=y, weights=weights)
+        self._update_color_range(layer)
+        self._update_extent()
+        self.update(force=True)
+
+    def remove_layer(self, name):
+        """ Remove a layer (but not its renderer from the plot).
+        """
+        layer = self._get_layer(name)
+        layer.renderer.on_trait_change(self._update, "index_mapper.updated",
+                                       remove=True)
+        self.layers.remove(layer)
+        self._update_extent()
+        self.update(force=True)
+
+    def update(self, force=False):
+        """ Recompute the images for the current view.
+
+        Parameters
+        ----------
+        force : bool
+            Recompute the images even if the grid didn't change (for example
+            because the data did).
+        """
+        if self._updating or not self.layers:
+            return
+
+        x_bounds, y_bounds, shape = self._grid_definition()
+        x_edges = np.linspace(x_bounds[0], x_bounds[1], shape[0] + 1)
+        y_edges = np.linspace(y_bounds[0], y_bounds[1], shape[1] + 1)
+        xdata, ydata = self.grid.get_data()
+        unchanged = np.array_equal(xdata.get_data(), x_edges) and \
+            np.array_equal(ydata.get_data(), y_edges)
+        if unchanged and not force:
+            return
+
+        self._updating = True
+        try:
+            self.grid.set_data(x_edges, y_edges)
+            grids = [density_grid(layer.x, layer.y, x_bounds, y_bounds, shape,
+                                  weights=layer.weights)
+                     for layer in self.layers]
+            # Counts of all layers share the same scale, to compare them:
+            counts = [grid for grid, layer in zip(grids, self.layers)
+                      if layer.weights is None]
+            max_count = max([grid.max() for grid in counts] + [0])
+            for grid, layer in zip(grids, self.layers):
+                if layer.weights is None:
+                    image = shade_counts(grid, layer.color,
+                                         max_count=max_count,
+                                         alpha=layer.alpha)
+                else:
+                    image = shade_means(grid, layer.renderer.color_mapper,
+                                        alpha=layer.alpha)
+                layer.renderer.value.set_data(image)
+        finally:
+            self._updating = False
+
+    # Private interface -------------------------------------------------------
+
+    def _update(self):
+        self.update()
+
+    def _get_layer(self, name):
+        for layer in self.layers:
+            if layer.name == name:
+                return layer
+
+        msg = "No density layer named {}.".format(name)
+        logger.exception(msg)
+        raise KeyError(msg)
+
+    def _grid_definition(self):
+        """ Returns the x and y bounds and the (x, y) shape of the grid.
+        """
+        data_range = self.index_range
+        x_bounds = data_range.x_range.low, data_range.x_range.high
+        y_bounds = data_range.y_range.low, data_range.y_range.high
+
+        width, height = self.layers[0].renderer.bounds
+        shape = []
+        for size in [width, height]:
+            if size < 1:
+                size = DEFAULT_RESOLUTION
+            shape.append(max(int(size) // self.cell_size, 1))
+        return x_bounds, y_bounds, tuple(shape)
+
+    def _update_extent(self):
+        """ Set the auto range to the extremes of the data of all layers.
+        """
+        extents = []
+        for dim in ["x", "y"]:
+            values = [getattr(layer, dim) for layer in self.layers]
+            values = [arr[np.isfinite(arr)] for arr in values]
+            values = [arr for arr in values if len(arr)]
+            if values:
+                low = min(arr.min() for arr in values)
+                high = max(arr.max() for arr in values)
+            else:
+                low, high = 0., 1.
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+            extents.append(np.array([low, high], dtype=float))
+
+        self._extent.set_data(*extents)
+
+    def _update_color_range(self, layer):
+        """ Fix the colormap range to the extremes of the layer's weights, so
+        colors don't change when zooming.
+        """
+        if layer.weights is None:
+            return
+
+        weights = layer.weights[np.isfinite(layer.weights)]
+        if len(weights):
+            layer.renderer.color_mapper.range.set_bounds(weights.min(),
+                                                         weights.max())
+
+    # Traits initialization methods -------------------------------------------
+
+    def __extent_default(self):
+        return GridDataSource(xdata=np.array([0., 1.]),
+                              ydata=np.array([0., 1.]))
+
+    def _grid_default(self):
+        return GridDataSource(xdata=np.array([0., 1.]),
+                              ydata=np.array([0., 1.]))
+
+    def _index_range_default(self):
+        # Only the data extremes drive the auto range, not the grid, which
+        # follows the range:
+        return DataRange2D(sources=[self._extent])
+
+
+def density_grid(x, y, x_bounds, y_bounds, shape, weights=None):
+    """ Returns the number of points (or mean of weights) in each grid cell.
+
+    Parameters
+    ----------
+    x, y : np.array
+        Coordinates of the points. Points with NaN coordinates are ignored.
+
+    x_bounds, y_bounds : tuple
+        Low and high bounds of the grid along each dimension.
+
+    shape : tuple(int, int)
+        Number of cells along x and along y.
+
+    weights : np.array, optional
+        Values to average in each cell. Points with a NaN weight are ignored.
+
+    Returns
+    -------
+    np.array
+        Array of shape (num_y, num_x), counts or means of each cell, with NaN
+        for the means of empty cells. The first row is the lowest along y.
+    """
+    num_x, num_y = shape
+    cells, valid = _cell_indices(x, y, x_bounds, y_bounds, shape)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        valid &= ~np.isnan(weights)
+
+    cells = cells[valid]
+    counts = np.bincount(cells, minlength=num_x * num_y)
+    if weights is None:
+        return counts.reshape(num_y, num_x).astype(float)
+
+    sums = np.bincount(cells, weights=weights[valid], minlength=num_x * num_y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return means.reshape(num_y, num_x)
+
+
+def shade_counts(counts, color, max_count=None, alpha=1.):
+    """ Returns a RGBA image of counts, with an opacity growing with the log
+    of the count. Empty cells are transparent.
+
+    Parameters
+    ----------
+    counts : np.array
+        2D array of counts.
+
+    color : tuple
+        RGB(A) color of the image, as floats between 0 and 1.
+
+    max_count : float, optional
+        Count displayed fully opaque. Defaults to the largest count.
+
+    alpha : float
+        Overall opacity of the image.
+    """
+    if max_count is None:
+        max_count = counts.max() if counts.size else 0
+
+    image = np.zeros(counts.shape + (4,), dtype=np.uint8)
+    image[..., :3] = np.round(np.asarray(color[:3]) * 255)
+    if max_count > 0:
+        opacity = MIN_DENSITY_ALPHA + (1 - MIN_DENSITY_ALPHA) * \
+            np.log1p(counts) / np.log1p(max_count)
+        opacity[counts <= 0] = 0
+        image[..., 3] = np.round(opacity * alpha * 255)
+    return image
+
+
+def shade_means(means, color_mapper, alpha=1.):
+    """ Returns a RGBA image of values mapped to colors by a chaco color
+    mapper. NaN cells are transparent.
+    """
+    missing = np.isnan(means)
+    values = np.where(missing, color_mapper.range.low, means)
+    colors = color_mapper.map_screen(values)
+    colors[..., 3] *= alpha
+    colors[missing, 3] = 0
+    return np.round(colors * 255).astype(np.uint8)
+
+
+# Private functions -----------------------------------------------------------
+
+
+def _cell_indices(x, y, x_bounds, y_bounds, shape):
+    """ Returns the flat index of the cell of each point (row major, rows
+    along y), and which points are inside the grid.
+    """
+    positions = []
+    for values, (low, high), num_cells in zip([x, y], [x_bounds, y_bounds],
+                                              shape):
+        values = np.asarray(values, dtype=float)
+        if not high > low:
+            positions.append(np.full(len(values), -1))
+            continue
+
+        with np.errstate(invalid="ignore"):
+            pos = np.floor((values - low) * (num_cells / (high - low)))
+            # Points on the high bound belong to the last cell:
+            pos[values == high] = num_cells - 1
+        positions.append(pos)
+
+    col, row = positions
+    with np.errstate(invalid="ignore"):
+        valid = (col >= 0) & (col < shape[0]) & (row >= 0) & (row < shape[1])
+
+    cells = np.zeros(len(col), dtype=np.int64)
+    cells[valid] = row[valid].astype(np.int64) * shape[0] + \
+        col[valid].astype(np.int64)
+    return cells, valid
@@ -0,0 +1,192 @@
+""" ArrayPlotData storing the arrays of multi-renderer plots by column.
+
+When a plot contains 1 renderer per hue value, each column (x, y, hover
+columns, ...) is stored as a single buffer sorted by hue value, together with
+the offsets of each hue group. The arrays exposed to the renderers under the
+usual `col_name + hue_name` keys are views into these buffers, and the entire
+content can be replaced at once by swapping the buffers and offsets.
+"""
+import numpy as np
+from traits.api import Array, Callable, Dict, List, Str
+
+from chaco.api import ArrayPlotData
+
+
+def default_group_key(col_name, group_name):
+    return col_name + group_name
+
+
+class GroupedArrayPlotData(ArrayPlotData):
+    """ ArrayPlotData whose grouped arrays are views into 1 buffer per column.
+    """
+    #: Names of the groups (renderers), in the order of the buffers
+    group_names = List(Str)
+
+    #: Start of each group in the buffers, followed by the end of the last one
+    offsets = Array
+
+    #: Column names mapped to the column's values, sorted by group
+    buffers = Dict
+
+    #: Function building the array key from a column name and a group name
+    key_func = Callable(default_group_key)
+
+    @classmethod
+    def from_data_map(cls, data_map, columns, group_names,
+                      key_func=default_group_key):
+        """ Build from a flat map of arrays, grouping the columns' arrays.
+
+        Parameters
+        ----------
+        data_map : dict
+            Map of array keys to arrays, built using key_func for the grouped
+            arrays.
+
+        columns : list(str)
+            Names of the columns to group. Columns whose group lengths differ
+            from the first column's are kept as separate arrays.
+
+        group_names : list(str)
+            Names of the groups, in their order.
+
+        key_func : callable
+            Function building an array key from a column and a group name.
+        """
+        data_map = dict(data_map)
+        buffers = {}
+        offsets = None
+        for col in columns:
+            keys = [key_func(col, name) for name in group_names]
+            if col in buffers or any(key not in data_map for key in keys):
+                continue
+
+            buffer, col_offsets = concatenate_groups(
+                [data_map[key] for key in keys]
+            )
+            if offsets is None:
+                offsets = col_offsets
+            elif not np.array_equal(offsets, col_offsets):
+                continue
+
+            buffers[col] = buffer
+            for key in keys:
+                data_map.pop(key)
+
+        plot_data = cls()
+        plot_data.key_func = key_func
+        if offsets is None:
+            offsets = np.zeros(len(group_names) + 1, dtype=int)
+        plot_data.set_grouped_data(buffers, offsets, group_names, **data_map)
+        return plot_data
+
+    def set_grouped_data(self, buffers, offsets, group_names,
+                         **other_arrays):
+        """ Replace the entire content of the plot data in 1 operation.
+
+        Parameters
+        ----------
+        buffers : dict
+            Column names mapped to their values sorted by group.
+
+        offsets : np.array
+            Start of each group in the buffers, followed by the end of the
+            last group.
+
+        group_names : list(str)
+            Names of the groups.
+
+        other_arrays : dict
+            Additional, non-grouped arrays.
+
+        Returns
+        -------
+        list
+            Keys of the arrays that were removed.
+        """
+        arrays = {}
+        for col, buffer in buffers.items():
+            for i, name in enumerate(group_names):
+                key = self.key_func(col, name)
+                arrays[key] = buffer[offsets[i]:offsets[i+1]]
+        arrays.update(other_arrays)
+
+        old_keys = set(self.arrays)
+        new_keys = set(arrays)
+        self.buffers = buffers
+        self.offsets = offsets
+        self.group_names = list(group_names)
+        self.arrays = arrays
+
+        removed = sorted(old_keys - new_keys)
+        self.data_changed = {"changed": sorted(old_keys & new_keys),
+                             "added": sorted(new_keys - old_keys),
+                             "removed": removed}
+        return removed
+
+    def update_from(self, plot_data):
+        """ Replace the content with the content of another plot data.
+
+        Returns
+        -------
+        list
+            Keys of the arrays that were removed.
+        """
+        if isinstance(plot_data, GroupedArrayPlotData):
+            grouped_keys = {self.key_func(col, name)
+                            for col in plot_data.buffers
+                            for name in plot_data.group_names}
+            others = {key: arr for key, arr in plot_data.arrays.items()
+                      if key not in grouped_keys}
+            return self.set_grouped_data(plot_data.buffers, plot_data.offsets,
+                                         plot_data.group_names, **others)
+
+        return self.set_grouped_data({}, np.zeros(1, dtype=int), [],
+                                     **plot_data.arrays)
+
+    def get_group_data(self, col_name, group_name):
+        """ Returns the view on a column's values for a group.
+        """
+        i = self.group_names.index(group_name)
+        return self.buffers[col_name][self.offsets[i]:self.offsets[i+1]]
+
+
+def concatenate_groups(arrays):
+    """ Returns the concatenation of a list of arrays and their offsets.
+
+    If the arrays are consecutive views into the same 1D buffer (for example
+    when built by `HueGroups.split`), that buffer is returned without copy.
+    """
+    lengths = [len(arr) for arr in arrays]
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(int)
+    if not arrays:
+        return np.array([]), offsets
+
+    arrays = [np.asarray(arr) for arr in arrays]
+    buffer = _shared_buffer(arrays)
+    if buffer is not None:
+        return buffer, offsets
+
+    return np.concatenate(arrays), offsets
+
+
+def _shared_buffer(arrays):
+    """ Returns the buffer the arrays are consecutive views of, or None.
+    """
+    base = arrays[0].base
+    if not isinstance(base, np.ndarray) or base.ndim != 1 or \
+            not base.flags.c_contiguous:
+        return None
+
+    address = base.__array_interface__["data"][0]
+    itemsize = base.itemsize
+    for arr in arrays:
+        if arr.base is not base or arr.dtype != base.dtype or \
+                not arr.flags.c_contiguous or \
+                arr.__array_interface__["data"][0] != address:
+            return None
+        address += len(arr) * itemsize
+
+    end = base.__array_interface__["data"][0] + len(base) * itemsize
+    if address != end:
+        return None
+    return base
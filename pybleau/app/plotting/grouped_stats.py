@@ -0,0 +1,80 @@
+""" Vectorized per-category statistics, to aggregate bar heights and errors.
+
+Equivalent to `DataFrame({"x": x, "y": y}).groupby("x")["y"].agg(["mean",
+"std", "count"])`, but the rows are assigned a category code once (by
+factorization, or by lookup into known labels shared by all hue groups), after
+which all statistics are computed together with `np.bincount` rather than in
+separate groupby passes.
+"""
+import numpy as np
+import pandas as pd
+
+
+def category_codes(x_arr, labels=None):
+    """ Returns the category code of each value, and the category labels.
+
+    Parameters
+    ----------
+    x_arr : np.array or pd.Series
+        Category of each row.
+
+    labels : list or pd.Index, optional
+        Categories to compute the codes against, in their order. Values not
+        in the labels get the code -1. Defaults to the sorted unique values
+        of x_arr. Pass a pd.Index to reuse its hash table across calls.
+
+    Returns
+    -------
+    tuple(np.array, list)
+        Integer code of each row (-1 for nulls and unknown values), and the
+        labels the codes point to.
+    """
+    if labels is None:
+        codes, uniques = pd.factorize(x_arr, sort=True)
+        return codes, list(pd.Index(uniques))
+
+    if not isinstance(labels, pd.Index):
+        labels = pd.Index(list(labels))
+    return labels.get_indexer(x_arr), list(labels)
+
+
+def grouped_mean_std(codes, y_arr, num_groups):
+    """ Returns the mean, standard deviation and count of y per category.
+
+    NaN y values and rows with a negative code are ignored. Like pandas, the
+    standard deviation is the sample one (ddof=1), and is NaN for categories
+    with fewer than 2 values, like the mean of empty categories.
+
+    Parameters
+    ----------
+    codes : np.array
+        Category code of each row, as returned by `category_codes`.
+
+    y_arr : np.array or pd.Series
+        Values to aggregate.
+
+    num_groups : int
+        Number of categories.
+
+    Returns
+    -------
+    tuple(np.array, np.array, np.array)
+        Mean, standard deviation and number of values of each category.
+    """
+    y_arr = np.asarray(y_arr, dtype=np.float64)
+    valid = (codes >= 0) & ~np.isnan(y_arr)
+    codes = codes[valid]
+    y_arr = y_arr[valid]
+
+    counts = np.bincount(codes, minlength=num_groups)
+    sums = np.bincount(codes, weights=y_arr, minlength=num_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        # Second pass on the deviations rather than sums of squares, to avoid
+        # catastrophic cancellations:
+        deviations = (y_arr - means[codes]) ** 2
+        sq_devs = np.bincount(codes, weights=deviations, minlength=num_groups)
+        stds = np.sqrt(sq_devs / (counts - 1))
+
+    stds[counts < 2] = np.nan
+    return means, stds, counts
@@ -0,0 +1,110 @@
+""" Pivoting of dataframe columns into the dense grid displayed by heatmaps.
+
+Equivalent to `df.pivot_table(index=y_col, columns=x_col, values=z_col)`, but
+the position of each row along each axis of the grid is computed once, by
+factorization (or binning, for continuous data), and can be cached and reused
+when only the aggregated column changes. The mean of each cell is then
+computed with a vectorized scatter-add (`np.bincount`) into the flattened
+grid.
+"""
+import numpy as np
+import pandas as pd
+from traits.api import Array, Bool, HasStrictTraits
+
+
+class PivotAxis(HasStrictTraits):
+    """ Position of each row of a dataset along one axis of a pivoted grid.
+    """
+    #: Position along the axis of each row, -1 for rows to ignore (nulls)
+    codes = Array
+
+    #: Value of each position along the axis: sorted unique values, or bin
+    #: centers
+    labels = Array
+
+    #: Whether the axis is made of bins of continuous values
+    binned = Bool
+
+    @classmethod
+    def from_values(cls, values, num_bins=0):
+        """ Build from an array (or Series) of values, in any order.
+
+        Parameters
+        ----------
+        values : np.array or pd.Series
+            Value of each row along the axis.
+
+        num_bins : int, optional
+            Number of evenly spaced bins to split the (numerical) values into.
+            By default, there is 1 position per unique value.
+        """
+        if not num_bins:
+            codes, uniques = pd.factorize(values, sort=True)
+            return cls(codes=codes, labels=np.asarray(uniques))
+
+        values = np.asarray(values, dtype=np.float64)
+        finite = np.isfinite(values)
+        if finite.any():
+            low, high = values[finite].min(), values[finite].max()
+        else:
+            low, high = 0., 1.
+
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+
+        bin_edges = np.linspace(low, high, num_bins + 1)
+        # Like np.histogram, the last bin includes its upper edge:
+        codes = np.searchsorted(bin_edges, values, side="right") - 1
+        codes[values == high] = num_bins - 1
+        codes[~finite] = -1
+        labels = (bin_edges[1:] + bin_edges[:-1]) / 2.
+        return cls(codes=codes, labels=labels, binned=True)
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def pivot_mean(row_axis, col_axis, values):
+    """ Returns the grid of the mean values for each row and column position.
+
+    Like `pd.pivot_table`, NaN values are ignored, cells without values are
+    NaN, and unbinned rows and columns without any value are dropped.
+
+    Parameters
+    ----------
+    row_axis : PivotAxis
+        Position of each value along the rows of the grid (y dimension).
+
+    col_axis : PivotAxis
+        Position of each value along the columns of the grid (x dimension).
+
+    values : np.array or pd.Series
+        Values to aggregate.
+
+    Returns
+    -------
+    pd.DataFrame
+        Grid of mean values, indexed by the row labels, with the column labels
+        as columns.
+    """
+    num_rows, num_cols = len(row_axis), len(col_axis)
+    values = np.asarray(values, dtype=np.float64)
+    valid = (row_axis.codes >= 0) & (col_axis.codes >= 0) & ~np.isnan(values)
+    cells = row_axis.codes[valid] * num_cols + col_axis.codes[valid]
+
+    size = num_rows * num_cols
+    counts = np.bincount(cells, minlength=size).reshape(num_rows, num_cols)
+    sums = np.bincount(cells, weights=values[valid], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grid = sums.reshape(num_rows, num_cols) / counts
+
+    row_labels, col_labels = row_axis.labels, col_axis.labels
+    if not row_axis.binned:
+        kept_rows = counts.any(axis=1)
+        grid, row_labels = grid[kept_rows], row_labels[kept_rows]
+    if not col_axis.binned:
+        kept_cols = counts.any(axis=0)
+        grid, col_labels = grid[:, kept_cols], col_labels[kept_cols]
+
+    return pd.DataFrame(grid, index=pd.Index(row_labels),
+                        columns=pd.Index(col_labels))
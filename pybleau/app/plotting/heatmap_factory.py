@@ -5,7 +5,7 @@ from __future__ import print_function, division
 import logging
 import numpy as np
 
-from traits.api import Constant
+from traits.api import Bool, Constant
 from chaco.api import ImagePlot, PlotAxis
 
 from app_common.chaco.plot_factory import create_contour_plot, create_img_plot
@@ -26,6 +26,9 @@ class HeatmapPlotFactory(StdXYPlotFactory, CmapedXYPlotFactoryMixin):
     """
     plot_type = Constant(HEATMAP_PLOT_TYPE)
 
+    #: The pivoted data doesn't depend on the order of the data
+    depends_on_row_order = Bool(False)
+
     def _plot_data_single_renderer(self, x_arr=None, y_arr=None, z_arr=None,
                                    **adtl_arrays):
         """ Build plot data when single renderer is present.
@@ -0,0 +1,112 @@
+""" Histogram computation from cached sorted data.
+
+Computing a histogram with `np.histogram` scans (and filters) the entire
+dataset each time, so that changing the number of bins or the bin limits of a
+histogram of tens of millions of values takes seconds. Instead, the finite
+values of each dataset are sorted once into a SortedColumn, after which the
+count of any bin is the difference between the positions of its edges along
+the sorted values, found by binary search: re-binning costs
+O(num_bins * log(n)) rather than O(n).
+
+Several datasets (columns or hue groups) are binned against shared bin edges,
+computed from their combined range, so their histograms can be overlaid.
+"""
+import numpy as np
+from traits.api import Array, HasStrictTraits
+
+
+class SortedColumn(HasStrictTraits):
+    """ Sorted finite values of a dataset, to compute its histograms from.
+    """
+    #: Sorted values, without NaNs and infinities
+    values = Array
+
+    @classmethod
+    def from_values(cls, values):
+        """ Build from an array (or Series) of values, in any order.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            values = values[np.isfinite(values)]
+        return cls(values=np.sort(values))
+
+    @property
+    def low(self):
+        """ Smallest value, or None if the dataset is empty.
+        """
+        return self.values[0] if len(self.values) else None
+
+    @property
+    def high(self):
+        """ Largest value, or None if the dataset is empty.
+        """
+        return self.values[-1] if len(self.values) else None
+
+    def counts(self, bin_edges):
+        """ Returns the number of values in each bin.
+
+        Like for `np.histogram`, all bins are half-open except the last one,
+        which includes its upper edge, and values outside the edges are
+        ignored.
+        """
+        positions = np.searchsorted(self.values, bin_edges, side="left")
+        positions[-1] = np.searchsorted(self.values, bin_edges[-1],
+                                        side="right")
+        return np.diff(positions)
+
+
+def compute_bin_edges(sorted_columns, num_bins, bin_limits=None):
+    """ Returns evenly spaced bin edges covering the values of all datasets.
+
+    Parameters
+    ----------
+    sorted_columns : list(SortedColumn)
+        Datasets the histogram will be built for.
+
+    num_bins : int
+        Number of bins.
+
+    bin_limits : tuple, optional
+        Lower and upper edges of the bins. Defaults to the range of the data,
+        extended by 0.5 on each side if it is empty, like `np.histogram`.
+    """
+    if bin_limits:
+        low, high = bin_limits
+    else:
+        lows = [col.low for col in sorted_columns if col.low is not None]
+        highs = [col.high for col in sorted_columns if col.high is not None]
+        if lows:
+            low, high = min(lows), max(highs)
+        else:
+            low, high = 0., 1.
+
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+
+    return np.linspace(low, high, num_bins + 1)
+
+
+def multi_histogram(sorted_columns, num_bins, bin_limits=None):
+    """ Returns the shared bin edges and the counts of several datasets.
+
+    Parameters
+    ----------
+    sorted_columns : list(SortedColumn)
+        Datasets to build the histogram of.
+
+    num_bins : int
+        Number of bins.
+
+    bin_limits : tuple, optional
+        Lower and upper edges of the bins. Defaults to the range of all data.
+
+    Returns
+    -------
+    tuple(np.array, np.array)
+        Bin edges, and 2D array of counts with 1 row per dataset.
+    """
+    bin_edges = compute_bin_edges(sorted_columns, num_bins,
+                                  bin_limits=bin_limits)
+    counts = np.array([col.counts(bin_edges) for col in sorted_columns],
+                      dtype=np.int64).reshape(len(sorted_columns), num_bins)
+    return bin_edges, counts
@@ -3,18 +3,21 @@
 
 from __future__ import print_function, division
 
-import numpy as np
 import logging
 
-from traits.api import Array, Constant, Instance, Str
+from traits.api import Any, Array, Bool, Constant, Instance, Str
 from chaco.api import ArrayPlotData
 
 from .plot_config import HIST_PLOT_TYPE
+from .histogram_data import multi_histogram, SortedColumn
 from .histogram_plot_style import HistogramPlotStyle
 from .base_factories import StdXYPlotFactory, DEFAULT_RENDERER_NAME
 
 HISTOGRAM_Y_LABEL = "Frequency"
 
+#: Plot data key of the bar locations when overlaying multiple histograms
+BIN_CENTERS_KEY = "bin_centers"
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,9 +48,20 @@ class HistogramPlotFactory(StdXYPlotFactory):
     {'plot': <chaco.plot.Plot at 0x12278a590>,
      ...}
 
-    FIXME: Make this class a subclass of the BarPlotFactory!
+    To overlay the histograms of multiple datasets (columns or hue groups),
+    binned along the same edges, pass a dictionary mapping the dataset names
+    to their arrays. 1 renderer style is needed per dataset:
+    >>> x = {"age": array([1, 2, 3, 2]), "weight": array([2, 3, 4, 2])}
+    >>> plot_style = HistogramPlotStyle(renderer_styles=[BarRendererStyle(),
+    ...                                                  BarRendererStyle()])
+    >>> h = HistogramPlotFactory(x_arr=x, plot_style=plot_style)
+
+    The data is binned from sorted copies of the arrays (see
+    :mod:`pybleau.app.plotting.histogram_data`). Pass them as `x_sorted` (a
+    SortedColumn or a dictionary of them) to reuse them across factories, for
+    example when changing the number of bins.
 
-    TODO: support displaying a histogram for multiple datasets.
+    FIXME: Make this class a subclass of the BarPlotFactory!
     """
     #: Label to display along the y-axis
     y_axis_title = Str(HISTOGRAM_Y_LABEL)
@@ -58,6 +72,13 @@ class HistogramPlotFactory(StdXYPlotFactory):
     #: Edges of the histogram bars
     bin_edges = Array
 
+    #: Sorted finite x values (SortedColumn, or dict of them mapped like
+    #: x_arr), computed from x_arr if not provided
+    x_sorted = Any
+
+    #: Bin counts don't depend on the order of the data
+    depends_on_row_order = Bool(False)
+
     #: Plot styling object
     plot_style = Instance(HistogramPlotStyle, ())
 
@@ -84,11 +105,21 @@ class HistogramPlotFactory(StdXYPlotFactory):
                              **adtl_arrays):
         """ Set the plot_data and the list of renderer descriptions.
         """
+        if self.x_sorted is None:
+            if isinstance(x_arr, dict):
+                self.x_sorted = {key: SortedColumn.from_values(arr)
+                                 for key, arr in x_arr.items()}
+            else:
+                self.x_sorted = SortedColumn.from_values(x_arr)
+
+        if isinstance(self.x_sorted, dict):
+            return self._plot_data_multi_histogram()
+
         # Compute the bin edges and probabilities and create the PlotData:
         bin_lims = self.plot_style.bin_limits
         num_bins = self.plot_style.num_bins
         data_map, self.bin_edges = self.build_hist_data(
-            self.x_col_name, x_arr, num_bins, bin_lims=bin_lims
+            self.x_col_name, self.x_sorted, num_bins, bin_lims=bin_lims
         )
         self.plot_data = ArrayPlotData(**data_map)
 
@@ -97,6 +128,15 @@ class HistogramPlotFactory(StdXYPlotFactory):
         self.renderer_desc = [renderer_data]
         return data_map
 
+    def update_data(self, x_arr=None, x_sorted=None, **kwargs):
+        """ Update the existing plot with new data arrays.
+
+        See base class for details. The sorted data is recomputed from x_arr
+        if not provided.
+        """
+        self.x_sorted = x_sorted
+        super(HistogramPlotFactory, self).update_data(x_arr=x_arr, **kwargs)
+
     @staticmethod
     def build_hist_data(x_col_name, x_arr, num_bins=10, bin_lims=None):
         """ Chaco histogram building helper: build ArrayPlotData input from
@@ -108,8 +148,9 @@ class HistogramPlotFactory(StdXYPlotFactory):
             Name of the column to build the histogram of. Used as key to
             returned data map.
 
-        x_arr : numpy array
-            Array of data to build the histogram of.
+        x_arr : numpy array or SortedColumn
+            Array of data to build the histogram of, or its sorted finite
+            values.
 
         num_bins : int
             Number of bins to build histogram with.
@@ -117,17 +158,40 @@ class HistogramPlotFactory(StdXYPlotFactory):
         bin_lims : tuple
             Boundaries to bin the data.
         """
-        if bin_lims:
-            bins = np.linspace(bin_lims[0], bin_lims[1], num_bins+1)
-        else:
-            bins = num_bins
+        if not isinstance(x_arr, SortedColumn):
+            x_arr = SortedColumn.from_values(x_arr)
 
-        clean_data = x_arr[~np.isnan(x_arr)]
-        prob, bin_edges = np.histogram(clean_data, bins=bins)
+        bin_edges, counts = multi_histogram([x_arr], num_bins,
+                                            bin_limits=bin_lims)
         bar_locs = (bin_edges[1:] + bin_edges[:-1]) / 2.
-        data_map = {x_col_name: bar_locs, HISTOGRAM_Y_LABEL: prob}
+        data_map = {x_col_name: bar_locs, HISTOGRAM_Y_LABEL: counts[0]}
         return data_map, bin_edges
 
+    # Private interface -------------------------------------------------------
+
+    def _plot_data_multi_histogram(self):
+        """ Build the plot data and 1 renderer per dataset, sharing bin edges.
+        """
+        names = list(self.x_sorted.keys())
+        self.bin_edges, counts = multi_histogram(
+            [self.x_sorted[name] for name in names],
+            self.plot_style.num_bins, bin_limits=self.plot_style.bin_limits
+        )
+        bar_locs = (self.bin_edges[1:] + self.bin_edges[:-1]) / 2.
+        data_map = {BIN_CENTERS_KEY: bar_locs}
+        self.renderer_desc = []
+        self._hue_values = []
+        for name, name_counts in zip(names, counts):
+            name = str(name)
+            y_name = self._plotdata_array_key(HISTOGRAM_Y_LABEL, name)
+            data_map[y_name] = name_counts
+            self._hue_values.append(name)
+            self.renderer_desc.append({"x": BIN_CENTERS_KEY, "y": y_name,
+                                       "name": name})
+
+        self.plot_data = ArrayPlotData(**data_map)
+        return data_map
+
     @staticmethod
     def compute_bar_width(bin_edges, num_bins, bar_width_factor=1.):
         """ Chaco histogram building helper: compute the bar widths.
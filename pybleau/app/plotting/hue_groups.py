@@ -0,0 +1,72 @@
+""" Splitting of dataframe columns into hue groups, computed once per grouping.
+
+Equivalent to iterating over `df.groupby(hue_col)` to collect the arrays of
+each group, but the group of each row is computed once (factorization and a
+stable sort), and each column to split is reordered once into a contiguous
+buffer, of which each group's array is a view.
+"""
+import numpy as np
+import pandas as pd
+from traits.api import Array, Dict, HasStrictTraits, List
+
+
+class HueGroups(HasStrictTraits):
+    """ Positions of the rows of a dataframe, grouped by hue value.
+
+    Groups are sorted by hue value, rows with a null hue value are ignored,
+    and the order of the rows is preserved within each group, like for
+    `DataFrame.groupby`.
+    """
+    #: Sorted hue values, one per group
+    keys = List
+
+    #: Positions of the rows sorted by group (rows with null hues first)
+    permutation = Array
+
+    #: Position along the permutation of the start of each group, followed by
+    #: the end of the last group
+    offsets = Array
+
+    #: Cache of the columns sorted along the permutation, mapped by name
+    _sorted_columns = Dict
+
+    @classmethod
+    def from_values(cls, hue_values):
+        """ Group positions by the values of the hue array or Series.
+        """
+        codes, uniques = pd.factorize(hue_values, sort=True)
+        permutation = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        num_nulls = len(codes) - counts.sum()
+        offsets = num_nulls + np.concatenate([[0], np.cumsum(counts)])
+        return cls(keys=list(pd.Index(uniques)), permutation=permutation,
+                   offsets=offsets)
+
+    def sorted_column(self, name, values):
+        """ Returns the values sorted by group, cached by name.
+        """
+        if name not in self._sorted_columns:
+            values = np.asarray(values)
+            self._sorted_columns[name] = values[self.permutation]
+        return self._sorted_columns[name]
+
+    def split(self, name, values):
+        """ Returns a dict mapping each hue value to its group's values.
+
+        Parameters
+        ----------
+        name : str
+            Name of the column, to cache its sorted values.
+
+        values : np.array or pd.Series
+            Values of all the rows of the grouped dataframe.
+
+        Returns
+        -------
+        dict
+            Hue values mapped to views into the sorted values.
+        """
+        sorted_values = self.sorted_column(name, values)
+        offsets = self.offsets
+        return {key: sorted_values[offsets[i]:offsets[i+1]]
+                for i, key in enumerate(self.keys)}
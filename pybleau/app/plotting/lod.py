@@ -0,0 +1,372 @@
+""" Level of detail (LOD) display of large line and scatter renderers.
+
+Drawing millions of points makes panning and zooming unusable, even though
+most of them land on the same pixels. A RendererLOD sits between the full
+resolution data and a chaco renderer, and only hands the renderer the points
+that make a visible difference for the current view:
+
+- for lines (with sorted x values), the first, last, minimum and maximum
+  points of each pixel column, which draw the same line as the full data,
+- for scatters, a stratified sample: up to a maximum number of points per
+  cell of a few pixels, so that sparse regions and outliers are always drawn
+  while dense regions are thinned out.
+
+The decimation is recomputed from the full data each time the visible ranges
+or the size of the renderer change, so zooming in reveals all points.
+
+The renderer's index and value data sources are replaced by
+LODArrayDataSource instances, which record the positions of the displayed
+points in the full data, to translate selections from and to the positions in
+the full data.
+"""
+import logging
+
+import numpy as np
+from traits.api import Any, Array, Bool, Enum, HasStrictTraits, Int
+
+from chaco.api import ArrayDataSource, LogMapper
+
+logger = logging.getLogger(__name__)
+
+LINE_LOD = "line"
+
+SCATTER_LOD = "scatter"
+
+#: Number of points above which the full data isn't handed to the renderer
+DEFAULT_LOD_THRESHOLD = 100000
+
+#: Number of pixels assumed while the renderer hasn't been laid out yet
+DEFAULT_RESOLUTION = 1000
+
+#: Size in pixels of the cells scatter points are sampled in
+DEFAULT_CELL_SIZE = 3
+
+#: Metadata key of the selected points, as used by chaco's inspector tools
+SELECTION_METADATA_NAME = "selections"
+
+
+class LODArrayDataSource(ArrayDataSource):
+    """ Data source containing a subset of the points of a full dataset.
+
+    The selection metadata of this data source is expressed in positions along
+    the displayed subset, like for any data source. Use `to_source_selection`
+    and `from_source_selection` to convert to/from positions in the full data.
+    """
+    #: Positions in the full data of the points in this data source (sorted)
+    source_positions = Array
+
+    #: Selection, as positions in the full data, including hidden points
+    source_selection = Array
+
+    def to_source_selection(self, selection):
+        """ Convert a selection of displayed points to positions in the full
+        data, preserving the selection of points that aren't displayed.
+        """
+        positions = self.source_positions
+        displayed = positions[np.asarray(selection, dtype=np.int64)]
+        previous = self.source_selection
+        hidden = previous[~np.isin(previous, positions)]
+        self.source_selection = np.union1d(hidden, displayed).astype(np.int64)
+        return self.source_selection
+
+    def from_source_selection(self, selection):
+        """ Convert a selection of positions in the full data to positions
+        along the displayed points.
+        """
+        self.source_selection = np.asarray(selection, dtype=np.int64)
+        return lod_positions(self.source_positions, self.source_selection)
+
+
+class RendererLOD(HasStrictTraits):
+    """ Displays a decimated version of the full data in a renderer.
+    """
+    #: Line or scatter renderer to display the data in
+    renderer = Any
+
+    #: Type of decimation
+    kind = Enum(SCATTER_LOD, LINE_LOD)
+
+    #: Full resolution data along the index dimension
+    x = Array
+
+    #: Full resolution data along the value dimension
+    y = Array
+
+    #: Maximum number of points to draw
+    max_points = Int(DEFAULT_LOD_THRESHOLD)
+
+    #: Size in pixels of the cells scatter points are sampled in
+    cell_size = Int(DEFAULT_CELL_SIZE)
+
+    #: Positions in the full data of the points currently displayed
+    positions = Array
+
+    #: Whether the x values are sorted (lines can only be decimated if so)
+    _x_sorted = Bool
+
+    #: Positions of the data extremes, always displayed to keep auto ranges
+    _extreme_positions = Array
+
+    #: Random values to select scatter points, fixed to keep samples stable
+    _random_values = Array
+
+    #: Whether the renderer's data is being updated by self
+    _updating = Bool
+
+    def attach(self):
+        """ Replace the renderer's data sources and start following its ranges.
+        """
+        renderer = self.renderer
+        for name, mapper in [("index", renderer.index_mapper),
+                             ("value", renderer.value_mapper)]:
+            old = getattr(renderer, name)
+            new = LODArrayDataSource(old.get_data(),
+                                     sort_order=old.sort_order)
+            mapper.range.remove(old)
+            mapper.range.add(new)
+            setattr(renderer, name, new)
+
+        self._analyze_data()
+        renderer.on_trait_change(self.update, "index_mapper.updated")
+        renderer.on_trait_change(self.update, "value_mapper.updated")
+        self.update()
+
+    def detach(self):
+        """ Stop following the renderer's ranges.
+        """
+        self.renderer.on_trait_change(self.update, "index_mapper.updated",
+                                      remove=True)
+        self.renderer.on_trait_change(self.update, "value_mapper.updated",
+                                      remove=True)
+
+    def set_full_data(self, x, y):
+        """ Replace the full resolution data, and update the renderer.
+        """
+        self.x = x
+        self.y = y
+        self._analyze_data()
+        self.positions = np.array([], dtype=np.int64)
+        self.update()
+
+    def update(self):
+        """ Recompute the points to display for the current view.
+        """
+        if self._updating:
+            return
+
+        positions = self._compute_positions()
+        if np.array_equal(positions, self.positions):
+            return
+
+        self._updating = True
+        try:
+            self.positions = positions
+            renderer = self.renderer
+            # Selection tools update the index selection:
+            selection = renderer.index.source_selection
+            for source, data in [(renderer.index, self.x),
+                                 (renderer.value, self.y)]:
+                source.source_positions = positions
+                source.set_data(data[positions])
+                source.metadata[SELECTION_METADATA_NAME] = \
+                    source.from_source_selection(selection)
+        finally:
+            self._updating = False
+
+    # Private interface -------------------------------------------------------
+
+    def _analyze_data(self):
+        x, y = self.x, self.y
+        self._x_sorted = bool(np.all(x[1:] >= x[:-1]))
+        extremes = [np.nanargmin, np.nanargmax]
+        positions = []
+        for values in [x, y]:
+            if len(values) and not np.isnan(values).all():
+                positions.extend(func(values) for func in extremes)
+        self._extreme_positions = np.array(positions, dtype=np.int64)
+        if self.kind == SCATTER_LOD:
+            rng = np.random.RandomState(0)
+            self._random_values = rng.random_sample(len(x)).astype(np.float32)
+
+    def _compute_positions(self):
+        num_points = len(self.x)
+        if num_points <= self.max_points or \
+                (self.kind == LINE_LOD and not self._x_sorted):
+            return np.arange(num_points)
+
+        renderer = self.renderer
+        width, height = renderer.bounds
+        if renderer.orientation == "v":
+            width, height = height, width
+
+        num_x = int(width) if width >= 1 else DEFAULT_RESOLUTION
+        x_pixels = _to_pixels(renderer.index_mapper, self.x, num_x)
+        if self.kind == LINE_LOD:
+            positions = line_decimation_indices(x_pixels, self.y, num_x,
+                                                self.max_points)
+        else:
+            num_y = int(height) if height >= 1 else DEFAULT_RESOLUTION
+            y_pixels = _to_pixels(renderer.value_mapper, self.y, num_y)
+            positions = stratified_sample_indices(
+                x_pixels, y_pixels, num_x, num_y, self.max_points,
+                cell_size=self.cell_size, random_values=self._random_values
+            )
+
+        return np.union1d(positions, self._extreme_positions)
+
+
+def line_decimation_indices(x_pixels, y, num_columns, max_points):
+    """ Returns the positions of the points needed to draw a line.
+
+    Parameters
+    ----------
+    x_pixels : np.array
+        Sorted positions of the points along the x axis, in pixels from the
+        left of the visible range. NaN for missing values.
+
+    y : np.array
+        Values of the points along the y axis.
+
+    num_columns : int
+        Number of pixel columns in the visible range.
+
+    max_points : int
+        Number of visible points below which all are kept.
+
+    Returns
+    -------
+    np.array
+        Sorted positions of the first, last, minimum and maximum points of
+        each pixel column, and of the points just outside of the visible range
+        to draw the segments crossing its edges.
+    """
+    with np.errstate(invalid="ignore"):
+        visible = (x_pixels >= 0) & (x_pixels < num_columns)
+
+    # Segments crossing the edges of the visible range:
+    keep = visible.copy()
+    keep[1:] |= visible[:-1]
+    keep[:-1] |= visible[1:]
+    edges = np.flatnonzero(keep & ~visible)
+
+    idx = np.flatnonzero(visible)
+    if len(idx) <= max_points:
+        return np.flatnonzero(keep)
+
+    columns = x_pixels[idx].astype(np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(columns)) + 1])
+    ends = np.concatenate([starts[1:], [len(idx)]])
+    segment_ids = np.repeat(np.arange(len(starts)), ends - starts)
+
+    values = y[idx]
+    nans = np.isnan(values)
+    extremes = []
+    for func, fill in [(np.minimum, np.inf), (np.maximum, -np.inf)]:
+        filled = np.where(nans, fill, values)
+        segment_extremes = func.reduceat(filled, starts)
+        hits = np.flatnonzero(filled == segment_extremes[segment_ids])
+        # First hit in each segment:
+        first = np.concatenate([[True], segment_ids[hits][1:] !=
+                                segment_ids[hits][:-1]])
+        extremes.append(idx[hits[first]])
+
+    return np.unique(np.concatenate([idx[starts], idx[ends - 1], edges] +
+                                    extremes))
+
+
+def stratified_sample_indices(x_pixels, y_pixels, width, height, max_points,
+                              cell_size=DEFAULT_CELL_SIZE,
+                              random_values=None):
+    """ Returns the positions of a stratified sample of the visible points.
+
+    The visible area is divided in cells of cell_size x cell_size pixels, and
+    at most k points are kept in each cell, with k the largest number keeping
+    the total around max_points (at least 1 per non-empty cell). Cells with
+    fewer points keep all of them.
+
+    Parameters
+    ----------
+    x_pixels, y_pixels : np.array
+        Positions of the points in pixels from the bottom left corner of the
+        visible area. NaN for missing values.
+
+    width, height : int
+        Size of the visible area, in pixels.
+
+    max_points : int
+        Number of points to aim for.
+
+    cell_size : int
+        Size of the sampling cells, in pixels.
+
+    random_values : np.array, optional
+        Random values in [0, 1), 1 per point, used to select the points in
+        dense cells. Passing the same values for each call keeps the samples
+        stable when panning.
+    """
+    with np.errstate(invalid="ignore"):
+        visible = (x_pixels >= 0) & (x_pixels < width) & \
+            (y_pixels >= 0) & (y_pixels < height)
+
+    idx = np.flatnonzero(visible)
+    if len(idx) <= max_points:
+        return idx
+
+    if random_values is None:
+        random_values = np.random.RandomState(0).random_sample(len(x_pixels))
+
+    num_rows = int(np.ceil(height / cell_size))
+    cells = (x_pixels[idx] // cell_size).astype(np.int64) * num_rows + \
+        (y_pixels[idx] // cell_size).astype(np.int64)
+    counts = np.bincount(cells)
+    max_per_cell = _max_per_cell(counts[counts > 0], max_points)
+
+    # Keep each point of a cell with probability max_per_cell / count:
+    selected = random_values[idx] * counts[cells] < max_per_cell
+    return idx[selected]
+
+
+def lod_positions(source_positions, positions):
+    """ Returns the positions along a decimated dataset of points, given by
+    their positions in the full data. Points not displayed are ignored.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(source_positions) == 0 or len(positions) == 0:
+        return []
+
+    found = np.searchsorted(source_positions, positions)
+    found = np.minimum(found, len(source_positions) - 1)
+    displayed = source_positions[found] == positions
+    return np.unique(found[displayed]).tolist()
+
+
+# Private functions -----------------------------------------------------------
+
+
+def _to_pixels(mapper, values, num_pixels):
+    """ Returns the positions of values in pixels from the start of the
+    mapper's range, assuming it spans num_pixels.
+    """
+    low, high = mapper.range.low, mapper.range.high
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if isinstance(mapper, LogMapper):
+            values = np.log10(np.where(values > 0, values, np.nan))
+            low, high = np.log10(low), np.log10(high)
+
+        if not np.isfinite(low) or not np.isfinite(high) or high <= low:
+            return np.zeros(len(values))
+
+        return (values - low) * (num_pixels / (high - low))
+
+
+def _max_per_cell(counts, max_points):
+    """ Largest number of points per cell keeping the total under max_points.
+    """
+    low, high = 1, int(counts.max())
+    while low < high:
+        mid = (low + high + 1) // 2
+        if np.minimum(counts, mid).sum() <= max_points:
+            low = mid
+        else:
+            high = mid - 1
+    return low
@@ -8,17 +8,20 @@ the translation between dataFrame and numpy arrays consumed by Chaco is done.
 """
 import logging
 
-from traits.api import Bool, Constant, Enum, List, Str
+from traits.api import Bool, cached_property, Constant, Enum, List, \
+    Property, Str
 from traitsui.api import CheckListEditor, EnumEditor, HGroup, Item, Spring, \
     VGroup
 
 from pybleau.app.plotting.plot_config import BasePlotConfigurator, \
-    HistogramPlotConfigurator, HistogramPlotStyle, LinePlotConfigurator, \
-    SingleLinePlotStyle, X_COL_NAME_LABEL
+    HistogramPlotConfigurator, LinePlotConfigurator, SingleLinePlotStyle, \
+    X_COL_NAME_LABEL
 from pybleau.app.plotting.plot_config import BaseSingleXYPlotConfigurator, \
     col_name_to_title
+from pybleau.app.plotting.histogram_data import SortedColumn
 from pybleau.app.plotting.plot_style import BaseColorXYPlotStyle, \
     LineRendererStyle
+from pybleau.app.plotting.renderer_style import BarRendererStyle
 from pybleau.app.utils.chaco_colors import assign_renderer_colors
 from pybleau.app.utils.string_definitions import MULTI_HIST_PLOT_TYPE, \
     MULTI_LINE_PLOT_TYPE
@@ -31,6 +34,9 @@ SINGLE_CURVE = "Multi single-curve plots"
 
 MULTI_CURVE = "Single multi-curve plot"
 
+#: Transparency of the bars of overlaid histograms
+OVERLAID_BAR_ALPHA = 0.6
+
 
 class BaseMultiPlotConfigurator(BasePlotConfigurator):
 
@@ -149,8 +155,10 @@ class MultiLinePlotConfigurator(BaseSingleXYPlotConfigurator,
                 for y_val in self.y_col_names}
 
 
-class MultiHistogramPlotConfigurator(BaseMultiPlotConfigurator):
-    """ Configurator to create multiple histograms (in multiple containers).
+class MultiHistogramPlotConfigurator(HistogramPlotConfigurator,
+                                     BaseMultiPlotConfigurator):
+    """ Configurator to create multiple histograms (in multiple containers), or
+    a single plot overlaying the histograms of multiple columns.
     """
     #: Type of the series of plots being created
     plot_type = Constant(MULTI_HIST_PLOT_TYPE)
@@ -158,8 +166,11 @@ class MultiHistogramPlotConfigurator(BaseMultiPlotConfigurator):
     #: List of col names to make a histogram of
     x_col_names = List(Str)
 
-    #: Multi-curve not supported yet. Remove when it is:
-    multi_mode = Str(SINGLE_CURVE)
+    #: Separate histograms by default
+    multi_mode = Enum(SINGLE_CURVE, [SINGLE_CURVE, MULTI_CURVE])
+
+    #: Sorted finite values of each column, to bin them along shared edges
+    x_sorted = Property(depends_on="transformed_data, x_col_names")
 
     def _data_selection_items(self):
         """ Build the default list of items to select data to plot in XY plots.
@@ -174,6 +185,14 @@ class MultiHistogramPlotConfigurator(BaseMultiPlotConfigurator):
         ]
         return items
 
+    def _get__plot_type_item(self):
+        return HGroup(
+            Spring(),
+            Item('plot_type', style="readonly"),
+            Item("multi_mode", show_label=False),
+            Spring(),
+        )
+
     def _select_all_changed(self, new):
         if new:
             self.x_col_names = self._available_columns
@@ -181,16 +200,62 @@ class MultiHistogramPlotConfigurator(BaseMultiPlotConfigurator):
             self.x_col_names = []
 
     def to_config_list(self):
-        """ Convert self into multiple Histogram configurators.
+        """ Convert self into multiple Histogram configurators (in
+        single-curve mode) or into a configurator of a plot overlaying all
+        histograms (in multi-curve mode).
+
+        The plot styles created are copies of this configurator's, to keep the
+        binning selected, and this configurator is left unchanged.
         """
         config_list = []
-        for x_col in self.x_col_names:
-            single_plot_config = HistogramPlotConfigurator(
+        if self.multi_mode == SINGLE_CURVE:
+            for x_col in self.x_col_names:
+                single_plot_config = HistogramPlotConfigurator(
+                    data_source=self.data_source,
+                    plot_title=self.plot_title,
+                    x_col_name=x_col,
+                    x_axis_title=col_name_to_title(x_col),
+                    plot_style=self.plot_style.clone_traits()
+                )
+                config_list.append(single_plot_config)
+        else:
+            # Overlaid bars need to be transparent:
+            renderer_styles = [BarRendererStyle(alpha=OVERLAID_BAR_ALPHA)
+                               for _ in self.x_col_names]
+            if len(renderer_styles) > 1:
+                assign_renderer_colors(renderer_styles)
+
+            plot_style = self.plot_style.clone_traits()
+            plot_style.renderer_styles = renderer_styles
+            multi_plot_config = MultiHistogramPlotConfigurator(
                 data_source=self.data_source,
                 plot_title=self.plot_title,
-                x_col_name=x_col,
-                x_axis_title=col_name_to_title(x_col),
-                plot_style=HistogramPlotStyle()
+                x_col_names=self.x_col_names,
+                multi_mode=self.multi_mode,
+                x_axis_title=", ".join(col_name_to_title(col)
+                                       for col in self.x_col_names),
+                source_template=self.source_template,
+                view_klass=self.view_klass,
+                plot_style=plot_style
             )
-            config_list.append(single_plot_config)
+            config_list = [multi_plot_config]
+
         return config_list
+
+    # Traits property getters/setters -----------------------------------------
+
+    def _get_x_arr(self):
+        """ Collect the arrays of all columns.
+
+        Only used in the multi_mode == MULTI_CURVE case.
+        """
+        return {x_col: self.df_column2array(x_col)
+                for x_col in self.x_col_names}
+
+    @cached_property
+    def _get_x_sorted(self):
+        if self.transformed_data is None:
+            return None
+
+        return {x_col: SortedColumn.from_values(self.df_column2array(x_col))
+                for x_col in self.x_col_names}
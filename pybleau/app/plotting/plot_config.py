@@ -7,6 +7,7 @@ the translation between dataFrame and numpy arrays consumed by Chaco is done.
 """
 import logging
 
+import numpy as np
 import pandas as pd
 from traits.api import Any, Bool, cached_property, Constant, Dict, \
     HasStrictTraits, Instance, Int, List, on_trait_change, Property, Str
@@ -15,8 +16,13 @@ from traitsui.api import CheckListEditor, EnumEditor, HGroup, InstanceEditor, \
 
 from pybleau.app.model.dataframe_analyzer import CATEGORICAL_COL_TYPES
 from pybleau.app.plotting.bar_plot_style import BarPlotStyle
+from pybleau.app.plotting.grouped_stats import category_codes, \
+    grouped_mean_std
+from pybleau.app.plotting.heatmap_data import pivot_mean, PivotAxis
 from pybleau.app.plotting.heatmap_plot_style import HeatmapPlotStyle
+from pybleau.app.plotting.histogram_data import SortedColumn
 from pybleau.app.plotting.histogram_plot_style import HistogramPlotStyle
+from pybleau.app.plotting.hue_groups import HueGroups
 from pybleau.app.plotting.plot_style import BaseColorXYPlotStyle, \
     BaseXYPlotStyle, SingleLinePlotStyle, SingleScatterPlotStyle
 from pybleau.app.plotting.renderer_style import BarRendererStyle, \
@@ -30,6 +36,12 @@ X_COL_NAME_LABEL = "Column to plot along X"
 
 Y_COL_NAME_LABEL = "Column to plot along Y"
 
+#: Names of the x and y columns of bar plots of melted columns, as named by
+#: `DataFrame.melt`
+MELTED_X_COL_NAME = "variable"
+
+MELTED_Y_COL_NAME = "value"
+
 logger = logging.getLogger(__name__)
 
 
@@ -256,6 +268,10 @@ class BaseSingleXYPlotConfigurator(BaseSinglePlotConfigurator):
     #: Flag setting whether to use only numerical columns in x/y selections
     _numerical_only = Bool
 
+    #: Grouping of the data rows by color (z) values, for multiple renderers
+    _hue_groups = Property(Instance(HueGroups),
+                           depends_on="transformed_data, z_col_name")
+
     @cached_property
     def _get_colorize_by_float(self):
         if not self.z_col_name:
@@ -287,13 +303,7 @@ class BaseSingleXYPlotConfigurator(BaseSinglePlotConfigurator):
         if self._single_renderer:
             return self.df_column2array(self.x_col_name)
         else:
-            grpby = self.transformed_data.groupby(self.z_col_name)
-            all_x_arr = {}
-            for z_val, subdf in grpby:
-                all_x_arr[z_val] = self.df_column2array(self.x_col_name,
-                                                        df=subdf)
-
-            return all_x_arr
+            return self._split_by_hue(self.x_col_name)
 
     def _get_y_arr(self):
         """ Collect the y array from the dataframe and the column name for y.
@@ -310,12 +320,7 @@ class BaseSingleXYPlotConfigurator(BaseSinglePlotConfigurator):
         if self._single_renderer:
             return self.df_column2array(self.y_col_name)
         else:
-            grpby = self.transformed_data.groupby(self.z_col_name)
-            all_y_arr = {}
-            for z_val, subdf in grpby:
-                all_y_arr[z_val] = self.df_column2array(self.y_col_name,
-                                                        df=subdf)
-            return all_y_arr
+            return self._split_by_hue(self.y_col_name)
 
     def _get_hover_data(self):
         """ Collect additional arrays to store in the future ArrayPlotData to
@@ -338,11 +343,7 @@ class BaseSingleXYPlotConfigurator(BaseSinglePlotConfigurator):
                 hover_data[col] = self.df_column2array(col)
         else:
             for col in self.hover_col_names:
-                hover_data[col] = {}
-                grpby = self.transformed_data.groupby(self.z_col_name)
-                for z_val, subdf in grpby:
-                    hover_data[col][z_val] = self.df_column2array(col,
-                                                                  df=subdf)
+                hover_data[col] = self._split_by_hue(col)
         return hover_data
 
     def _get__single_renderer(self):
@@ -361,8 +362,25 @@ class BaseSingleXYPlotConfigurator(BaseSinglePlotConfigurator):
     def _get_z_arr(self):
         return None
 
+    @cached_property
+    def _get__hue_groups(self):
+        if not self.z_col_name or self.transformed_data is None:
+            return None
+
+        hue_values = self.df_column2array(self.z_col_name)
+        return HueGroups.from_values(hue_values)
+
     # Traits private interface ------------------------------------------------
 
+    def _split_by_hue(self, col_name):
+        """ Returns a dict mapping hue values to the arrays of a column.
+
+        The arrays are views into the column sorted by hue value, which is
+        cached until the data or the hue column change.
+        """
+        values = self.df_column2array(col_name)
+        return self._hue_groups.split(col_name, values)
+
     def _data_selection_columns(self):
         return self._numerical_columns if self._numerical_only else \
             self._available_columns
@@ -441,7 +459,9 @@ class BarPlotConfigurator(BaseSingleXYPlotConfigurator):
     3      124  female
     4      114  female
     and then, it's possible to specify that we want to plot the weight as a
-    function of gender.
+    function of gender. The melted table is never built though: the bar
+    heights (mean of each column) and error bars (standard deviation) are
+    computed directly from the columns, for each color (z) value.
     """
     #: Plot type
     plot_type = Str(BAR_PLOT_TYPE)
@@ -458,12 +478,16 @@ class BarPlotConfigurator(BaseSingleXYPlotConfigurator):
     #: View: number of column names to display in each column of checkbox
     column_len = Int(10)
 
-    #: Transform DF to support melting multiple columns as individual bars
-    transformed_data = Property(depends_on="data_source, columns_to_melt, "
-                                           "z_col_name")
+    #: Error bars of the melted columns' bars (array or dict mapped to
+    #: z-values, like y_arr)
+    y_err_arr = Property
 
     renderer_style_klass = BarRendererStyle
 
+    #: Mean and standard deviation of the columns to melt, per color value
+    _melted_stats = Property(depends_on="data_source, columns_to_melt, "
+                                        "z_col_name, force_discrete_colors")
+
     def __init__(self, **traits):
         # Consistency check:
         if "columns_to_melt" in traits and traits["columns_to_melt"]:
@@ -511,37 +535,84 @@ class BarPlotConfigurator(BaseSingleXYPlotConfigurator):
         ]
         return items
 
+    # Traits listeners --------------------------------------------------------
+
+    def _columns_to_melt_changed(self, new):
+        if new:
+            self.x_col_name = MELTED_X_COL_NAME
+            self.y_col_name = MELTED_Y_COL_NAME
+
+    # Traits property getters/setters -----------------------------------------
+
     def _get_x_arr(self):
-        if self.transformed_data is not self.data_source:
-            self.x_col_name = "variable"
+        """ In melt mode, the x values are the names of the melted columns.
+        """
+        if not self.columns_to_melt:
+            return super(BarPlotConfigurator, self)._get_x_arr()
+
+        col_names = np.array(self.columns_to_melt, dtype=object)
+        if self._single_renderer:
+            return col_names
 
-        return super(BarPlotConfigurator, self)._get_x_arr()
+        means, _ = self._melted_stats
+        return {hue_val: col_names for hue_val in means.index}
 
     def _get_y_arr(self):
-        if self.transformed_data is not self.data_source:
-            self.y_col_name = "value"
+        """ In melt mode, the y values are the means of the melted columns.
+        """
+        if not self.columns_to_melt:
+            return super(BarPlotConfigurator, self)._get_y_arr()
+
+        means, _ = self._melted_stats
+        return self._melted_stats_to_arrays(means)
+
+    def _get_y_err_arr(self):
+        if not self.columns_to_melt:
+            return None
 
-        return super(BarPlotConfigurator, self)._get_y_arr()
+        _, stds = self._melted_stats
+        return self._melted_stats_to_arrays(stds)
 
     @cached_property
-    def _get_transformed_data(self):
-        """ If in melt mode, melt the DF, otherwise, return the source_data.
+    def _get__melted_stats(self):
+        """ Compute the mean and std of each column to melt, for each hue.
 
-        In melt mode, melt the columns to display as bars and keep the
-        hue column as an ID variable (pandas terminology) so it can be used for
-        splitting.
+        The hue of each row is computed once and shared by all columns, which
+        are aggregated one at a time, so no long-format copy of the data is
+        ever built.
         """
-        if self.data_source is None:
-            return
+        if self.data_source is None or not self.columns_to_melt:
+            return None
 
-        if self.columns_to_melt:
-            if self.z_col_name:
-                return self.data_source.melt(id_vars=[self.z_col_name],
-                                             value_vars=self.columns_to_melt)
-            else:
-                return self.data_source.melt(value_vars=self.columns_to_melt)
+        df = self.data_source
+        if self._single_renderer:
+            codes = np.zeros(len(df), dtype=np.intp)
+            hue_values = [None]
         else:
-            return self.data_source
+            codes, hue_values = category_codes(
+                self.df_column2array(self.z_col_name, df=df)
+            )
+
+        means = pd.DataFrame(index=hue_values, columns=self.columns_to_melt,
+                             dtype=np.float64)
+        stds = means.copy()
+        for col in self.columns_to_melt:
+            means[col], stds[col], _ = grouped_mean_std(
+                codes, self.df_column2array(col, df=df), len(hue_values)
+            )
+
+        return means, stds
+
+    # Private interface -------------------------------------------------------
+
+    def _melted_stats_to_arrays(self, stats):
+        """ Convert melted column stats to an array, or a dict of arrays.
+        """
+        if self._single_renderer:
+            return stats.values[0]
+
+        return {hue_val: row for hue_val, row in zip(stats.index,
+                                                     stats.values)}
 
     @on_trait_change("z_col_name, transformed_data", post_init=True)
     def update_style(self):
@@ -561,6 +632,9 @@ class BarPlotConfigurator(BaseSingleXYPlotConfigurator):
     def _plot_style_default(self):
         if not self.z_col_name:
             num_renderer = 1
+        elif self.columns_to_melt:
+            means, _ = self._melted_stats
+            num_renderer = len(means)
         else:
             num_renderer = len(self.transformed_data[self.z_col_name].unique())
 
@@ -579,7 +653,7 @@ class BarPlotConfigurator(BaseSingleXYPlotConfigurator):
         return ["plot_title", "x_col_name", "y_col_name", "z_col_name",
                 "x_axis_title", "y_axis_title", "z_axis_title", "x_arr",
                 "y_arr", "z_arr", "hover_data", "hover_col_names",
-                ("columns_to_melt", "x_labels")]
+                ("columns_to_melt", "x_labels"), "y_err_arr"]
 
 
 class LinePlotConfigurator(BaseSingleXYPlotConfigurator):
@@ -603,12 +677,29 @@ class ScatterPlotConfigurator(BaseSingleXYPlotConfigurator):
     """
     plot_type = Property(Str, depends_on="colorize_by_float")
 
+    #: Display the density of the points (count, or mean z value for a
+    #: continuous color column) instead of markers, for very large datasets
+    density_mode = Bool
+
     _support_hover = Bool(True)
 
     renderer_style_klass = Property(Any, depends_on="plot_type")
 
     _numerical_only = Bool(True)
 
+    def _data_selection_items(self):
+        """ Add the density mode control to the default list of items.
+        """
+        items = super(ScatterPlotConfigurator, self)._data_selection_items()
+        items.append(
+            Item("density_mode",
+                 tooltip="Display the density of the points rather than "
+                         "individual markers (recommended for large "
+                         "datasets). Points can't be selected or hovered "
+                         "over in density mode.")
+        )
+        return items
+
     # Traits property getters/setters -----------------------------------------
 
     @cached_property
@@ -668,6 +759,12 @@ class ScatterPlotConfigurator(BaseSingleXYPlotConfigurator):
             style.container_style.include_colorbar = True
         return style
 
+    def __dict_keys_default(self):
+        return ["plot_title", "x_col_name", "y_col_name", "z_col_name",
+                "x_axis_title", "y_axis_title", "z_axis_title", "x_arr",
+                "y_arr", "z_arr", "hover_data", "hover_col_names",
+                "second_y_col_name", "second_y_axis_title", "density_mode"]
+
 
 class HistogramPlotConfigurator(BaseSingleXYPlotConfigurator):
     """ Configurator to define a histogram of single column, shown as bar plot.
@@ -676,7 +773,11 @@ class HistogramPlotConfigurator(BaseSingleXYPlotConfigurator):
 
     plot_style = Instance(HistogramPlotStyle, ())
 
-    _dict_keys = ["plot_title", "x_col_name", "x_axis_title", "x_arr"]
+    #: Sorted finite values of the x column, cached to re-bin it quickly
+    x_sorted = Property(depends_on="transformed_data, x_col_name")
+
+    _dict_keys = ["plot_title", "x_col_name", "x_axis_title", "x_arr",
+                  "x_sorted"]
 
     def _data_selection_items(self):
         """ This version doesn't need to expose the y axis since it is
@@ -692,14 +793,45 @@ class HistogramPlotConfigurator(BaseSingleXYPlotConfigurator):
         ]
         return items
 
+    # Traits property getters/setters -----------------------------------------
+
+    @cached_property
+    def _get_x_sorted(self):
+        if self.transformed_data is None or not self.x_col_name:
+            return None
+
+        return SortedColumn.from_values(self.df_column2array(self.x_col_name))
+
 
 class HeatmapPlotConfigurator(BaseSingleXYPlotConfigurator):
     """ Configuration object for building a plot with 2D heatmap renderer.
+
+    The z column is averaged over each unique (x, y) pair, or over a grid of
+    bins of the x and/or y values if x_num_bins and/or y_num_bins are set.
     """
     plot_type = Constant(HEATMAP_PLOT_TYPE)
 
     plot_style = Instance(HeatmapPlotStyle)
 
+    #: Number of bins to split the x values into (0 for 1 cell per x value)
+    x_num_bins = Int
+
+    #: Number of bins to split the y values into (0 for 1 cell per y value)
+    y_num_bins = Int
+
+    #: Pivoted data, the mean z value of each (x, y) cell
+    transformed_data = Property(depends_on="data_source, x_col_name, "
+                                           "y_col_name, z_col_name, "
+                                           "x_num_bins, y_num_bins")
+
+    #: Position of each row along the x axis, cached across z column changes
+    _x_pivot_axis = Property(Instance(PivotAxis),
+                             depends_on="data_source, x_col_name, x_num_bins")
+
+    #: Position of each row along the y axis, cached across z column changes
+    _y_pivot_axis = Property(Instance(PivotAxis),
+                             depends_on="data_source, y_col_name, y_num_bins")
+
     def _data_selection_items(self):
         enum_data_columns = EnumEditor(values=self._available_columns)
         num_only_columns = EnumEditor(values=self._numerical_columns)
@@ -707,12 +839,14 @@ class HeatmapPlotConfigurator(BaseSingleXYPlotConfigurator):
             HGroup(
                     Item("x_col_name", editor=num_only_columns,
                          label="Column to plot along X"),
-                    Item("x_axis_title")
+                    Item("x_axis_title"),
+                    Item("x_num_bins", label="Num. bins (0 for none)"),
                 ),
             HGroup(
                 Item("y_col_name", editor=num_only_columns,
                      label="Column to plot along Y"),
-                Item("y_axis_title")
+                Item("y_axis_title"),
+                Item("y_num_bins", label="Num. bins (0 for none)"),
             ),
             HGroup(
                 Item("z_col_name", editor=enum_data_columns,
@@ -722,15 +856,28 @@ class HeatmapPlotConfigurator(BaseSingleXYPlotConfigurator):
         ]
         return items
 
+    # Traits property getters/setters -----------------------------------------
+
     @cached_property
     def _get_transformed_data(self):
         if self.data_source is None or not self.x_col_name or \
                 not self.y_col_name or not self.z_col_name:
             return
 
-        return self.data_source.pivot_table(index=self.y_col_name,
-                                            columns=self.x_col_name,
-                                            values=self.z_col_name)
+        z_values = self.df_column2array(self.z_col_name, df=self.data_source)
+        pivoted = pivot_mean(self._y_pivot_axis, self._x_pivot_axis,
+                             z_values)
+        pivoted.index.name = self.y_col_name
+        pivoted.columns.name = self.x_col_name
+        return pivoted
+
+    @cached_property
+    def _get__x_pivot_axis(self):
+        return self._pivot_axis(self.x_col_name, self.x_num_bins)
+
+    @cached_property
+    def _get__y_pivot_axis(self):
+        return self._pivot_axis(self.y_col_name, self.y_num_bins)
 
     def _get_x_arr(self):
         return self.transformed_data.columns.values
@@ -741,6 +888,17 @@ class HeatmapPlotConfigurator(BaseSingleXYPlotConfigurator):
     def _get_z_arr(self):
         return self.transformed_data.values
 
+    # Private interface -------------------------------------------------------
+
+    def _pivot_axis(self, col_name, num_bins):
+        if self.data_source is None or not col_name:
+            return None
+
+        values = self.df_column2array(col_name, df=self.data_source)
+        return PivotAxis.from_values(values, num_bins=num_bins)
+
+    # Traits initialization methods -------------------------------------------
+
     def _plot_style_default(self):
         style = HeatmapPlotStyle()
         style.container_style.include_colorbar = True
@@ -1,7 +1,7 @@
 
 from ..utils.string_definitions import BAR_PLOT_TYPE, CMAP_SCATTER_PLOT_TYPE, \
-    HEATMAP_PLOT_TYPE, HIST_PLOT_TYPE, LINE_PLOT_TYPE, MULTI_LINE_PLOT_TYPE, \
-    SCATTER_PLOT_TYPE
+    HEATMAP_PLOT_TYPE, HIST_PLOT_TYPE, LINE_PLOT_TYPE, MULTI_HIST_PLOT_TYPE, \
+    MULTI_LINE_PLOT_TYPE, SCATTER_PLOT_TYPE
 
 from .bar_factory import BarPlotFactory
 from .heatmap_factory import HeatmapPlotFactory
@@ -11,6 +11,7 @@ from .scatter_factories import CmapScatterPlotFactory, DISCONNECTED_SELECTION_CO
 
 
 DEFAULT_FACTORIES = {HIST_PLOT_TYPE: HistogramPlotFactory,
+                     MULTI_HIST_PLOT_TYPE: HistogramPlotFactory,
                      BAR_PLOT_TYPE: BarPlotFactory,
                      LINE_PLOT_TYPE: LinePlotFactory,
                      MULTI_LINE_PLOT_TYPE: LinePlotFactory,
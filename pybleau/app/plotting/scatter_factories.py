@@ -3,12 +3,13 @@
 
 from __future__ import print_function, division
 
+import numpy as np
 import pandas as pd
 import logging
 
-from traits.api import Constant, Tuple
+from traits.api import Bool, Constant, Instance, Tuple
 from chaco.api import ArrayPlotData, ColormappedSelectionOverlay, \
-    LinearMapper, LogMapper, ScatterInspectorOverlay
+    LinearMapper, LogMapper, PlotAxis, ScatterInspectorOverlay
 from chaco.tools.api import RangeSelection, RangeSelectionOverlay
 
 from app_common.chaco.scatter_position_tool import add_scatter_inspectors, \
@@ -19,6 +20,7 @@ from .renderer_style import STYLE_L_ORIENT
 from .axis_style import LOG_AXIS_STYLE
 from .plot_config import CMAP_SCATTER_PLOT_TYPE, SCATTER_PLOT_TYPE
 from .base_factories import CmapedXYPlotFactoryMixin, StdXYPlotFactory
+from .density import ScatterDensity
 
 SELECTION_COLOR = "red"
 
@@ -35,6 +37,10 @@ class ScatterPlotFactory(StdXYPlotFactory):
     This plot currently supports displaying many dimensions at once since it
     supports a legend tool to select parts of the data and a hover tool to
     display any number of additional columns.
+
+    In density mode, each renderer is an image of the density of its points
+    rather than a set of markers (see :mod:`pybleau.app.plotting.density`).
+    Points can't be selected or hovered over in that mode, and axes are linear.
     """
     #: Plot type as selected by user
     plot_type = Constant(SCATTER_PLOT_TYPE)
@@ -42,9 +48,18 @@ class ScatterPlotFactory(StdXYPlotFactory):
     #: Inspector tool and overlay to query/listen to for events
     inspector = Tuple
 
+    #: Whether to display the density of the points rather than markers
+    density_mode = Bool
+
+    #: Density images of all renderers, in density mode
+    density = Instance(ScatterDensity)
+
     def add_tools(self, plot):
         super(ScatterPlotFactory, self).add_tools(plot)
 
+        if self.density_mode:
+            return
+
         if "click_selector" in self.plot_tools:
             self.add_click_selector_tool(plot)
 
@@ -95,6 +110,67 @@ class ScatterPlotFactory(StdXYPlotFactory):
         add_scatter_inspectors(plot, datasets=renderer_data,
                                include_overlay=True, align="ul")
 
+    def add_renderer(self, plot, desc, style, first_renderer=False):
+        """ Create and add to plot renderer described by desc and style.
+
+        In density mode, the renderer is a density image, displayed along the
+        grid shared by all images.
+        """
+        if not self.density_mode:
+            return super(ScatterPlotFactory, self).add_renderer(
+                plot, desc, style, first_renderer=first_renderer
+            )
+
+        style.renderer_name = desc["name"]
+        if self.density is None:
+            self.density = ScatterDensity()
+
+        renderer = self._build_density_renderer(desc, style)
+        plot.add(renderer)
+        self.renderers[desc["name"]] = renderer
+
+        if first_renderer:
+            # Emulate chaco.Plot interface:
+            plot.x_axis = PlotAxis(component=renderer, orientation="bottom")
+            plot.y_axis = PlotAxis(component=renderer, orientation="left")
+            plot.underlays = [plot.x_axis, plot.y_axis]
+
+        return renderer
+
+    def align_all_renderers(self, plot):
+        # Density images all share the same range:
+        if not self.density_mode:
+            super(ScatterPlotFactory, self).align_all_renderers(plot)
+
+    def remove_renderer(self, rend_desc):
+        if self.density is not None:
+            self.density.remove_layer(rend_desc["name"])
+
+        super(ScatterPlotFactory, self).remove_renderer(rend_desc)
+
+    # Private interface -------------------------------------------------------
+
+    def _build_density_renderer(self, desc, style):
+        """ Add a layer displaying the point counts to the density images.
+        """
+        x = self.plot_data.get_data(desc["x"])
+        y = self.plot_data.get_data(desc["y"])
+        return self.density.add_layer(desc["name"], x, y, color=style.color_,
+                                      alpha=style.alpha)
+
+    def _update_renderer_data(self, desc, renderer):
+        if not self.density_mode:
+            super(ScatterPlotFactory, self)._update_renderer_data(desc,
+                                                                  renderer)
+            return
+
+        x = self.plot_data.get_data(desc["x"])
+        y = self.plot_data.get_data(desc["y"])
+        weights = None
+        if "z" in desc:
+            weights = self.plot_data.get_data(desc["z"])
+        self.density.set_layer_data(desc["name"], x, y, weights=weights)
+
     # Traits initialization methods -------------------------------------------
 
     def _plot_tools_default(self):
@@ -115,6 +191,19 @@ class CmapScatterPlotFactory(ScatterPlotFactory, CmapedXYPlotFactoryMixin):
     #: Plot type as selected by user
     plot_type = Constant(CMAP_SCATTER_PLOT_TYPE)
 
+    def adjust_plot_style(self):
+        """ In density mode, the colorbar spans the range of the z values, like
+        for heatmaps.
+        """
+        if not self.density_mode:
+            return
+
+        z_arr = self.plot_data.get_data(self.z_col_name)
+        z_arr = z_arr[np.isfinite(z_arr)]
+        if len(z_arr):
+            self.plot_style.colorbar_low = z_arr.min()
+            self.plot_style.colorbar_high = z_arr.max()
+
     def generate_colorbar(self, desc):
         """ Generate the colorbar to display along side the plot.
         """
@@ -122,7 +211,9 @@ class CmapScatterPlotFactory(ScatterPlotFactory, CmapedXYPlotFactoryMixin):
 
         colorbar = self.colorbar
         cmap_renderer = self._get_cmap_renderer()
-        select_tool = "colorbar_selector" in self.plot_tools
+        # Selecting a z range fades out markers, not density cells:
+        select_tool = "colorbar_selector" in self.plot_tools and \
+            not self.density_mode
         if select_tool:
             selection = ColormappedSelectionOverlay(cmap_renderer,
                                                     fade_alpha=0.35,
@@ -161,6 +252,22 @@ class CmapScatterPlotFactory(ScatterPlotFactory, CmapedXYPlotFactoryMixin):
                                         value_mapper_class=y_mapper_class,
                                         **style.to_plot_kwargs())
 
+    def _build_density_renderer(self, desc, style):
+        """ Add a layer displaying the mean z value to the density images.
+        """
+        x = self.plot_data.get_data(desc["x"])
+        y = self.plot_data.get_data(desc["y"])
+        z = self.plot_data.get_data(desc["z"])
+        return self.density.add_layer(desc["name"], x, y, weights=z,
+                                      alpha=style.fill_alpha,
+                                      colormap=style.color_mapper)
+
+    def _update_renderer_data(self, desc, renderer):
+        super(CmapScatterPlotFactory, self)._update_renderer_data(desc,
+                                                                  renderer)
+        if not self.density_mode:
+            renderer.color_data.set_data(self.plot_data.get_data(desc["z"]))
+
     def initialize_plot_data(self, x_arr=None, y_arr=None, z_arr=None,
                              **adtl_arrays):
         """ Set the plot_data and the list of renderer descriptions.
@@ -10,8 +10,8 @@ from traits.testing.unittest_tools import UnittestTools
 
 try:
     from enable.tools.pyface.context_menu_tool import ContextMenuTool
-    from chaco.api import BarPlot, LinePlot, PlotGraphicsContext, \
-        ScatterInspectorOverlay, ScatterPlot
+    from chaco.api import BarPlot, ErrorBarPlot, LinePlot, \
+        PlotGraphicsContext, ScatterInspectorOverlay, ScatterPlot
     from chaco.tools.api import BetterSelectingZoom
     from chaco.tools.broadcaster import BroadcasterTool
     from chaco.color_mapper import ColorMapper
@@ -33,10 +33,12 @@ try:
     from pybleau.app.plotting.plot_factories import BAR_PLOT_TYPE, \
         DEFAULT_FACTORIES, HIST_PLOT_TYPE, LINE_PLOT_TYPE, \
         SCATTER_PLOT_TYPE, HEATMAP_PLOT_TYPE, CMAP_SCATTER_PLOT_TYPE
+    from pybleau.app.plotting.density import DensityImagePlot
     from pybleau.app.plotting.bar_factory import BAR_SQUEEZE_FACTOR, \
         ERROR_BAR_DATA_KEY_PREFIX
     from pybleau.app.plotting.plot_context_menu_manager import ALL_ACTIONS
-    from pybleau.app.plotting.histogram_factory import HISTOGRAM_Y_LABEL
+    from pybleau.app.plotting.histogram_factory import BIN_CENTERS_KEY, \
+        HISTOGRAM_Y_LABEL
     from pybleau.app.plotting.histogram_plot_style import HistogramPlotStyle
     from pybleau.app.plotting.plot_config import BarPlotConfigurator, \
         HeatmapPlotConfigurator, LinePlotConfigurator, ScatterPlotConfigurator
@@ -196,6 +198,24 @@ class TestMakeHistogramPlot(BaseTestMakePlot, TestCase):
         self.assert_valid_plot(plot, desc)
         self.assertEqual(plot.components[0].alpha, 0.5)
 
+    def test_histogram_multiple_datasets(self):
+        style = HistogramPlotStyle(
+            renderer_styles=[BarRendererStyle(), BarRendererStyle()]
+        )
+        x_arr = {"a": TEST_DF["a"], "b": TEST_DF["b"]}
+        factory = self.plot_factory_klass(x_arr=x_arr, plot_style=style)
+        desc = factory.generate_plot()
+        plot = desc["plot"]
+        self.assertEqual(len(plot.components), 2)
+        # Both datasets are binned along the same edges:
+        self.assertEqual(factory.renderer_desc[0]["x"], BIN_CENTERS_KEY)
+        self.assertEqual(factory.renderer_desc[1]["x"], BIN_CENTERS_KEY)
+        counts = [plot.data.arrays[renderer_desc["y"]]
+                  for renderer_desc in factory.renderer_desc]
+        self.assertEqual(counts[0].sum(), LEN)
+        # NaN dropped:
+        self.assertEqual(counts[1].sum(), LEN - 1)
+
     # Helpers -----------------------------------------------------------------
 
     def assert_valid_plot(self, plot, desc):
@@ -322,6 +342,35 @@ class TestMakeScatterPlot(BaseTestMakeXYPlot, TestCase):
                         'plot_style': self.config_class().plot_style}
         super(TestMakeScatterPlot, self).setUp()
 
+    def test_density_mode(self):
+        factory = self.plot_factory_klass(x_col_name="a", x_arr=TEST_DF["a"],
+                                          y_col_name="c", y_arr=TEST_DF["c"],
+                                          density_mode=True, **self.plot_kw)
+        desc = factory.generate_plot()
+        plot = desc["plot"]
+        self.renderer_class = DensityImagePlot
+        self.assert_valid_plot(plot, desc)
+        self.assertEqual(factory.inspector, ())
+        counts = factory.density.layers[0].renderer.value.get_data()[..., 3]
+        self.assertGreater(counts.max(), 0)
+
+    def test_density_mode_with_str_color_dimension(self):
+        x_arr, y_arr = self.compute_x_y_arrays_split_by("a", "b", "d")
+        config = self.config_class(data_source=TEST_DF, z_col_name="d")
+        self.plot_kw['plot_style'] = config.plot_style
+        factory = self.plot_factory_klass(x_col_name="a", x_arr=x_arr,
+                                          y_col_name="b", y_arr=y_arr,
+                                          z_col_name="d", density_mode=True,
+                                          **self.plot_kw)
+        desc = factory.generate_plot()
+        plot = desc["plot"]
+        self.renderer_class = DensityImagePlot
+        d_values = TEST_DF["d"].unique()
+        self.assert_valid_plot(plot, desc, num_renderers=len(d_values))
+        # All layers share the same grid:
+        grids = {id(layer.renderer.index) for layer in factory.density.layers}
+        self.assertEqual(len(grids), 1)
+
 
 @skipIf(not BACKEND_AVAILABLE, msg)
 class TestMakeCmapScatterPlot(BaseTestMakeXYPlot, TestCase):
@@ -336,6 +385,17 @@ class TestMakeCmapScatterPlot(BaseTestMakeXYPlot, TestCase):
                         'z_arr': TEST_DF["b"].values}
         super(TestMakeCmapScatterPlot, self).setUp()
 
+    def test_density_mode(self):
+        factory = self.plot_factory_klass(x_col_name="a", x_arr=TEST_DF["a"],
+                                          y_col_name="c", y_arr=TEST_DF["c"],
+                                          density_mode=True, **self.plot_kw)
+        desc = factory.generate_plot()
+        plot = desc["plot"]
+        self.renderer_class = DensityImagePlot
+        self.assert_valid_plot(plot, desc)
+        self.assertEqual(factory.plot_style.colorbar_low, 1)
+        self.assertEqual(factory.plot_style.colorbar_high, 4)
+
     def test_with_str_color_dimension(self):
         # Cannot be the case, because then it wouldn't be a CmapScatterPlot but
         # a regular ScatterPlot
@@ -653,15 +713,34 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
                                           **self.plot_kw)
         desc = factory.generate_plot()
         plot = desc["plot"]
-        num_bars = len(TEST_DF["d"].unique())
-        self.assert_valid_plot(plot, desc, num_renderers=1+num_bars,
+        # 1 renderer for the bars, 1 for all their error bars:
+        self.assert_valid_plot(plot, desc, num_renderers=2,
                                factory=factory, renderer_name="plot0")
         self.assert_bar_height_averaged(plot)
-        # Make sure the error bar renderers are there too:
-        for i in range(len(TEST_DF["d"].unique())):
-            key = "plot{}".format(i+1)
-            self.assertIn(key, factory.renderers)
-            self.assertIsInstance(factory.renderers[key], LinePlot)
+        self.assert_error_bars_present(factory, [""])
+        # The error bars are centered on the bar heights:
+        low = plot.data.arrays[ERROR_BAR_DATA_KEY_PREFIX + "low"]
+        high = plot.data.arrays[ERROR_BAR_DATA_KEY_PREFIX + "high"]
+        assert_array_almost_equal((low + high) / 2., plot.data.arrays["c"])
+        errors = TEST_DF.groupby("d")["c"].std().values
+        assert_array_almost_equal(high - low, errors)
+
+    def test_melted_columns_with_errorbars(self):
+        self.style.show_error_bars = True
+        config = self.config_class(data_source=TEST_DF,
+                                   columns_to_melt=["a", "c"],
+                                   plot_style=self.style)
+        factory = self.plot_factory_klass(**config.to_dict())
+        desc = factory.generate_plot()
+        plot = desc["plot"]
+        self.assert_valid_plot(plot, desc, num_renderers=2,
+                               factory=factory, renderer_name="plot0")
+        assert_array_almost_equal(plot.data.arrays["value"],
+                                  TEST_DF[["a", "c"]].mean())
+        self.assert_error_bars_present(factory, [""])
+        low = plot.data.arrays[ERROR_BAR_DATA_KEY_PREFIX + "low"]
+        high = plot.data.arrays[ERROR_BAR_DATA_KEY_PREFIX + "high"]
+        assert_array_almost_equal(high - low, TEST_DF[["a", "c"]].std())
 
     def test_colors_from_str_int_index_no_aggregation(self):
         x_arr, y_arr = self.compute_x_y_arrays_split_by("b2", "c", "j")
@@ -771,8 +850,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         plot = desc["plot"]
         hue_values = set(TEST_DF["i"])
         x_values = set(TEST_DF["l"])
-        # 1 for the bars, and len(x_values) for the error bars:
-        num_renderers = len(hue_values) * (1 + len(x_values))
+        # 1 for the bars, and 1 for the error bars of each hue:
+        num_renderers = 2 * len(hue_values)
         self.assert_valid_plot(plot, desc, num_renderers=num_renderers)
         assert_array_almost_equal(plot.data.arrays["lF"],
                                   arange(len(x_values)))
@@ -782,8 +861,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         labels = [x.text for x in plot.x_axis.ticklabel_cache]
         self.assertEqual(labels, sorted(x_values))
 
-        num_error_bars = len(hue_values) * len(x_values)
-        self.assert_error_bars_present(factory, num_error_bars)
+        hue_names = [str(hue) for hue in hue_values]
+        self.assert_error_bars_present(factory, hue_names)
 
     def test_colors_from_bool_str_index_with_aggregation_and_error_bars(self):
         """ Bar plot of str vs float, aggregated on bool, w/ error bars.
@@ -804,8 +883,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         plot = desc["plot"]
         hue_values = set(TEST_DF["h"])
         x_values = set(TEST_DF["l"])
-        # 1 for the bars, and len(x_values) for the error bars:
-        num_renderers = len(hue_values) * (1 + len(x_values))
+        # 1 for the bars, and 1 for the error bars of each hue:
+        num_renderers = 2 * len(hue_values)
         self.assert_valid_plot(plot, desc, num_renderers=num_renderers)
 
         assert_array_almost_equal(plot.data.arrays["lFalse"],
@@ -816,8 +895,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         labels = [x.text for x in plot.x_axis.ticklabel_cache]
         self.assertEqual(labels, sorted(x_values))
 
-        num_error_bars = len(hue_values) * len(x_values)
-        self.assert_error_bars_present(factory, num_error_bars)
+        hue_names = [str(hue) for hue in hue_values]
+        self.assert_error_bars_present(factory, hue_names)
 
     def test_colors_from_str_bool_index_with_aggregation_and_error_bars(self):
         """ Bar plot of bool vs float, aggregated on str, w/ error bars.
@@ -838,8 +917,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         plot = desc["plot"]
         hue_values = set(TEST_DF["i"])
         x_values = set(TEST_DF["h"])
-        # 1 for the bars, and len(x_values) for the error bars:
-        num_renderers = len(hue_values) * (1 + len(x_values))
+        # 1 for the bars, and 1 for the error bars of each hue:
+        num_renderers = 2 * len(hue_values)
         self.assert_valid_plot(plot, desc, num_renderers=num_renderers)
         assert_array_almost_equal(plot.data.arrays["hF"],
                                   arange(len(x_values)))
@@ -849,8 +928,8 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         labels = [x.text for x in plot.x_axis.ticklabel_cache]
         self.assertEqual(labels, sorted([str(x) for x in x_values]))
 
-        num_error_bars = len(hue_values) * len(x_values)
-        self.assert_error_bars_present(factory, num_error_bars)
+        hue_names = [str(hue) for hue in hue_values]
+        self.assert_error_bars_present(factory, hue_names)
 
     def test_colors_from_bool_str_index_no_aggregation(self):
         """ Un-aggregated bar plot of bool vs float.
@@ -1004,24 +1083,23 @@ class TestMakeBarPlot(BaseTestMakeXYPlot, TestCase, UnittestTools):
         with temp_bringup_ui_for(wrap_chaco_plot(plot)):
             self.assertEqual(plot.x_axis.labels, expected)
 
-    def assert_error_bars_present(self, factory, num_error_bars):
-
-        for i in range(num_error_bars):
-            key = "plot{}".format(i)
-            self.assertIn(key, factory.renderers)
-            self.assertIsInstance(factory.renderers[key], LinePlot)
+    def assert_error_bars_present(self, factory, hue_names):
+        self.assertEqual(set(factory.error_bar_renderers), set(hue_names))
+        for hue_name in hue_names:
+            renderer = factory.error_bar_renderers[hue_name]
+            self.assertIsInstance(renderer, ErrorBarPlot)
+            self.assertIn(renderer, factory.plot.components)
+            # Error bars are drawn at the bar positions:
+            bar_renderer = factory.renderers[hue_name or "plot0"]
+            self.assertIs(renderer.index, bar_renderer.index)
             if factory.legend:
                 # Make sure the error bars are not present in the legend:
-                self.assertNotIn(key, factory.legend.labels)
-
-        error_bar_x_data = [x for x in factory.plot.data.arrays
-                            if x.startswith(ERROR_BAR_DATA_KEY_PREFIX) and
-                            x.endswith("_x")]
-        error_bar_y_data = [x for x in factory.plot.data.arrays
-                            if x.startswith(ERROR_BAR_DATA_KEY_PREFIX) and
-                            x.endswith("_y")]
-        self.assertEqual(len(error_bar_x_data), num_error_bars)
-        self.assertEqual(len(error_bar_y_data), num_error_bars)
+                self.assertNotIn(renderer, factory.legend.plots.values())
+
+        error_bar_data = [x for x in factory.plot.data.arrays
+                          if x.startswith(ERROR_BAR_DATA_KEY_PREFIX)]
+        # 1 array for the low ends and 1 for the high ends of each hue:
+        self.assertEqual(len(error_bar_data), 2 * len(hue_names))
 
     def assert_bar_height_averaged(self, plot, x_col="d", y_col="c",
                                    reverse_order=False):
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from chaco.api import DataRange1D
+from chaco.default_colormaps import viridis
+
+from pybleau.app.plotting.density import density_grid, MIN_DENSITY_ALPHA, \
+    ScatterDensity, shade_counts, shade_means
+
+
+class TestDensityGrid(TestCase):
+    def test_counts(self):
+        x = np.array([0., 0.4, 0.6, 1., np.nan, 2.])
+        y = np.array([0., 0.9, 0.1, 1., 0., 0.])
+        counts = density_grid(x, y, (0, 1), (0, 1), (2, 2))
+        # Rows along y, columns along x; the high bound is in the last cell:
+        assert_array_equal(counts, [[1, 1], [1, 1]])
+
+    def test_means(self):
+        x = np.array([0.1, 0.2, 0.8, 0.9])
+        y = np.zeros(4)
+        z = np.array([1., 3., np.nan, 5.])
+        means = density_grid(x, y, (0, 1), (0, 1), (2, 1), weights=z)
+        assert_array_equal(means, [[2., 5.]])
+
+        means = density_grid(x[:2], y[:2], (0, 1), (0, 1), (2, 1),
+                             weights=z[:2])
+        self.assertTrue(np.isnan(means[0, 1]))
+
+
+class TestShading(TestCase):
+    def test_shade_counts(self):
+        image = shade_counts(np.array([[0., 1., 9.]]), (1., 0., 0.))
+        self.assertEqual(image.shape, (1, 3, 4))
+        assert_array_equal(image[0, :, 0], 255)
+        alphas = image[0, :, 3]
+        self.assertEqual(alphas[0], 0)
+        self.assertGreaterEqual(alphas[1], round(MIN_DENSITY_ALPHA * 255))
+        self.assertEqual(alphas[2], 255)
+
+    def test_shade_means(self):
+        mapper = viridis(DataRange1D(low=0, high=1))
+        image = shade_means(np.array([[0., np.nan]]), mapper, alpha=0.5)
+        self.assertEqual(image[0, 0, 3], 128)
+        self.assertEqual(image[0, 1, 3], 0)
+
+
+class TestScatterDensity(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.x = rng.rand(10000) * 10
+        self.y = rng.rand(10000)
+        self.density = ScatterDensity(cell_size=2)
+
+    def test_layers_share_grid_and_count_scale(self):
+        sparse = self.density.add_layer("a", self.x[:10], self.y[:10],
+                                        color=(1., 0., 0., 1.))
+        dense = self.density.add_layer("b", self.x, self.y,
+                                       color=(0., 0., 1., 1.))
+        self.assertIs(sparse.index, dense.index)
+        self.assertLess(sparse.value.get_data()[..., 3].max(),
+                        dense.value.get_data()[..., 3].max())
+
+    def test_grid_follows_range_and_size(self):
+        renderer = self.density.add_layer("a", self.x, self.y)
+        renderer.bounds = [200, 100]
+        self.assertEqual(renderer.value.get_data().shape, (50, 100, 4))
+
+        self.density.index_range.x_range.set_bounds(2, 3)
+        x_edges = renderer.index.get_data()[0].get_data()
+        self.assertEqual((x_edges[0], x_edges[-1]), (2, 3))
+
+        # Back to the data extent when resetting the range:
+        self.density.index_range.x_range.reset()
+        x_edges = renderer.index.get_data()[0].get_data()
+        self.assertEqual((x_edges[0], x_edges[-1]),
+                         (self.x.min(), self.x.max()))
+
+    def test_mean_layer(self):
+        renderer = self.density.add_layer("a", self.x, self.y,
+                                          weights=self.x, colormap=viridis)
+        self.assertEqual(renderer.color_mapper.range.low, self.x.min())
+        with self.assertRaises(ValueError):
+            self.density.add_layer("b", self.x, self.y, weights=self.x)
+
+    def test_remove_layer(self):
+        self.density.add_layer("a", self.x, self.y)
+        self.density.add_layer("b", self.x[:10] + 100, self.y[:10])
+        self.assertGreater(self.density.index_range.x_range.high, 100)
+        self.density.remove_layer("b")
+        self.assertLess(self.density.index_range.x_range.high, 10)
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_equal
+
+from pybleau.app.plotting.grouped_plot_data import concatenate_groups, \
+    GroupedArrayPlotData
+from pybleau.app.plotting.hue_groups import HueGroups
+
+
+class TestGroupedArrayPlotData(TestCase):
+    def setUp(self):
+        self.data_map = {"xa": np.arange(3), "xb": np.arange(3, 5),
+                         "ya": np.arange(3) * 2., "yb": np.arange(2) * 3.,
+                         "other": np.ones(4)}
+
+    def test_from_data_map(self):
+        plot_data = GroupedArrayPlotData.from_data_map(
+            self.data_map, ["x", "y"], ["a", "b"]
+        )
+        self.assertEqual(set(plot_data.buffers), {"x", "y"})
+        assert_array_equal(plot_data.offsets, [0, 3, 5])
+        assert_array_equal(plot_data.buffers["x"], np.arange(5))
+        for key, arr in self.data_map.items():
+            assert_array_equal(plot_data.get_data(key), arr)
+
+        # Grouped arrays are views into the buffers:
+        self.assertIs(plot_data.get_data("xb").base, plot_data.buffers["x"])
+        assert_array_equal(plot_data.get_group_data("y", "b"), [0., 3.])
+
+    def test_mismatched_column_stays_ungrouped(self):
+        self.data_map["za"] = np.arange(2)
+        self.data_map["zb"] = np.arange(2)
+        plot_data = GroupedArrayPlotData.from_data_map(
+            self.data_map, ["x", "y", "z"], ["a", "b"]
+        )
+        self.assertEqual(set(plot_data.buffers), {"x", "y"})
+        assert_array_equal(plot_data.get_data("za"), np.arange(2))
+
+    def test_update_from(self):
+        plot_data = GroupedArrayPlotData.from_data_map(
+            self.data_map, ["x", "y"], ["a", "b"]
+        )
+        new_map = {"xa": np.arange(2), "xc": np.arange(4),
+                   "ya": np.arange(2), "yc": np.arange(4)}
+        new_data = GroupedArrayPlotData.from_data_map(new_map, ["x", "y"],
+                                                      ["a", "c"])
+        events = []
+        plot_data.on_trait_change(lambda new: events.append(new),
+                                  "data_changed")
+        removed = plot_data.update_from(new_data)
+        self.assertEqual(removed, ["other", "xb", "yb"])
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["added"], ["xc", "yc"])
+        self.assertEqual(plot_data.group_names, ["a", "c"])
+        for key, arr in new_map.items():
+            assert_array_equal(plot_data.get_data(key), arr)
+
+
+class TestConcatenateGroups(TestCase):
+    def test_views_of_shared_buffer_not_copied(self):
+        df = pd.DataFrame({"x": np.arange(6.), "h": list("bacabc")})
+        groups = HueGroups.from_values(df["h"])
+        split = groups.split("x", df["x"])
+        buffer, offsets = concatenate_groups(list(split.values()))
+        self.assertIs(buffer, groups.sorted_column("x", None))
+        assert_array_equal(offsets, [0, 2, 4, 6])
+
+    def test_independent_arrays_concatenated(self):
+        buffer, offsets = concatenate_groups([np.arange(2), np.arange(3)])
+        assert_array_equal(buffer, [0, 1, 0, 1, 2])
+        assert_array_equal(offsets, [0, 2, 5])
+
+    def test_partial_views_concatenated(self):
+        base = np.arange(6)
+        buffer, offsets = concatenate_groups([base[:2], base[2:4]])
+        self.assertIsNot(buffer, base)
+        assert_array_equal(buffer, np.arange(4))
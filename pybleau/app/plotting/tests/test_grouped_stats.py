@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from pybleau.app.plotting.grouped_stats import category_codes, \
+    grouped_mean_std
+
+
+class TestGroupedStats(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"x": list("baabcbacd"),
+                                "y": [1., 2., 4., 3., 5., np.nan, 0., 7., 9.]})
+
+    def assert_stats_like_groupby(self, df, labels=None):
+        codes, found_labels = category_codes(df["x"].values, labels=labels)
+        means, stds, counts = grouped_mean_std(codes, df["y"].values,
+                                               len(found_labels))
+        expected = df.groupby("x")["y"].agg(["mean", "std", "count"])
+        if labels is not None:
+            expected = expected.reindex(list(labels))
+
+        self.assertEqual(found_labels, list(expected.index))
+        assert_array_almost_equal(means, expected["mean"].values)
+        assert_array_almost_equal(stds, expected["std"].values)
+        assert_array_equal(counts, expected["count"].fillna(0).values)
+
+    def test_stats_sorted_labels(self):
+        self.assert_stats_like_groupby(self.df)
+
+    def test_stats_forced_labels(self):
+        self.assert_stats_like_groupby(self.df, labels=list("edcba"))
+
+    def test_stats_forced_label_index(self):
+        self.assert_stats_like_groupby(self.df, labels=pd.Index(list("cab")))
+
+    def test_null_categories_ignored(self):
+        df = self.df.assign(x=["a", None, "b", "a", np.nan, "b", "a", "b",
+                               "c"])
+        self.assert_stats_like_groupby(df)
+
+    def test_numerical_stability(self):
+        y = 1e9 + np.array([1., 2., 3., 4.])
+        codes = np.zeros(4, dtype=np.intp)
+        _, stds, _ = grouped_mean_std(codes, y, 1)
+        self.assertAlmostEqual(stds[0], np.std([1., 2., 3., 4.], ddof=1))
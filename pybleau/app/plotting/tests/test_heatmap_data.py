@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.plotting.heatmap_data import pivot_mean, PivotAxis
+
+
+class TestPivotMean(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"x": [1, 2, 3, 1, 2, 3, 1, 2],
+                                "y": list("aabbccaa"),
+                                "z": [1., 2., 3., 4., np.nan, 6., 7., 8.]})
+
+    def assert_pivot_like_pivot_table(self, df):
+        pivoted = pivot_mean(PivotAxis.from_values(df["y"]),
+                             PivotAxis.from_values(df["x"]), df["z"])
+        expected = df.pivot_table(index="y", columns="x", values="z")
+        expected.index.name = expected.columns.name = None
+        assert_frame_equal(pivoted, expected)
+
+    def test_pivot(self):
+        self.assert_pivot_like_pivot_table(self.df)
+
+    def test_null_positions_ignored(self):
+        df = self.df.assign(y=["a", None, "b", "b", "c", np.nan, "a", "a"])
+        self.assert_pivot_like_pivot_table(df)
+
+    def test_empty_rows_and_columns_dropped(self):
+        df = self.df.assign(z=[1., 2., np.nan, 4., np.nan, np.nan, 7., 8.])
+        self.assert_pivot_like_pivot_table(df)
+
+    def test_binned_axis(self):
+        x_axis = PivotAxis.from_values(np.array([0., 1., 2., 3., 10.]),
+                                       num_bins=5)
+        assert_array_equal(x_axis.codes, [0, 0, 1, 1, 4])
+        assert_array_almost_equal(x_axis.labels, [1., 3., 5., 7., 9.])
+
+        y_axis = PivotAxis.from_values(np.zeros(5))
+        pivoted = pivot_mean(y_axis, x_axis, np.arange(5.))
+        # Empty bins are kept, to preserve a regular grid:
+        self.assertEqual(pivoted.shape, (1, 5))
+        assert_array_equal(pivoted.values[0], [0.5, 2.5, np.nan, np.nan, 4.])
+
+    def test_binned_axis_ignores_non_finite_values(self):
+        axis = PivotAxis.from_values(np.array([0., np.nan, 1., np.inf]),
+                                     num_bins=2)
+        assert_array_equal(axis.codes, [0, -1, 1, -1])
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+
+from pybleau.app.plotting.histogram_data import compute_bin_edges, \
+    multi_histogram, SortedColumn
+
+
+class TestSortedColumn(TestCase):
+    def test_non_finite_values_dropped(self):
+        col = SortedColumn.from_values(np.array([3., np.nan, 1., np.inf, 2.]))
+        assert_array_equal(col.values, [1., 2., 3.])
+        self.assertEqual((col.low, col.high), (1., 3.))
+
+    def test_empty(self):
+        col = SortedColumn.from_values(np.array([np.nan]))
+        self.assertIsNone(col.low)
+        assert_array_equal(col.counts(np.array([0., 1., 2.])), [0, 0])
+
+    def test_counts_match_numpy(self):
+        rng = np.random.RandomState(0)
+        # Rounded values, so that many fall on bin edges:
+        values = np.round(rng.randn(5000) * 3, 1)
+        col = SortedColumn.from_values(values)
+        for bins in [1, 7, 60]:
+            for bin_range in [None, (-2, 4)]:
+                expected, edges = np.histogram(values, bins=bins,
+                                               range=bin_range)
+                assert_array_equal(col.counts(edges), expected)
+
+
+class TestMultiHistogram(TestCase):
+    def test_shared_edges(self):
+        cols = [SortedColumn.from_values(np.array([0., 1., 1.])),
+                SortedColumn.from_values(np.array([4., 3.]))]
+        edges, counts = multi_histogram(cols, 4)
+        assert_array_almost_equal(edges, [0, 1, 2, 3, 4])
+        assert_array_equal(counts, [[1, 2, 0, 0], [0, 0, 0, 2]])
+
+    def test_bin_limits(self):
+        cols = [SortedColumn.from_values(np.arange(10.))]
+        edges, counts = multi_histogram(cols, 2, bin_limits=(2, 6))
+        assert_array_almost_equal(edges, [2, 4, 6])
+        assert_array_equal(counts, [[2, 3]])
+
+    def test_constant_and_empty_data_edges(self):
+        cols = [SortedColumn.from_values(np.array([2., 2.]))]
+        assert_array_almost_equal(compute_bin_edges(cols, 2), [1.5, 2, 2.5])
+        assert_array_almost_equal(compute_bin_edges([], 2), [0, 0.5, 1])
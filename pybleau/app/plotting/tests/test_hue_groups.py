@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_equal
+
+from pybleau.app.plotting.hue_groups import HueGroups
+
+
+class TestHueGroups(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"x": np.arange(8),
+                                "y": np.arange(8) * 10.,
+                                "h": list("baabcbac")})
+
+    def assert_split_like_groupby(self, df, hue_col, col):
+        groups = HueGroups.from_values(df[hue_col])
+        split = groups.split(col, df[col].values)
+        expected = {key: sub_df[col].values
+                    for key, sub_df in df.groupby(hue_col)}
+        self.assertEqual(list(split.keys()), list(expected.keys()))
+        for key, arr in expected.items():
+            assert_array_equal(split[key], arr)
+
+    def test_split_strings(self):
+        for col in ["x", "y"]:
+            self.assert_split_like_groupby(self.df, "h", col)
+
+    def test_split_numbers(self):
+        df = self.df.assign(h=[3, 1, 1, 2, 3, 2, 1, 3])
+        self.assert_split_like_groupby(df, "h", "x")
+
+    def test_null_hue_ignored(self):
+        df = self.df.assign(h=["a", None, "b", "a", np.nan, "b", "a", "b"])
+        self.assert_split_like_groupby(df, "h", "x")
+
+    def test_categorical_hue(self):
+        df = self.df.assign(h=pd.Categorical(self.df["h"],
+                                             categories=list("cba")))
+        self.assert_split_like_groupby(df, "h", "x")
+
+    def test_groups_are_views_of_cached_buffer(self):
+        groups = HueGroups.from_values(self.df["h"])
+        split = groups.split("x", self.df["x"].values)
+        buffer = groups.sorted_column("x", None)
+        for arr in split.values():
+            self.assertIs(arr.base, buffer)
@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from chaco.plot_factory import create_line_plot, create_scatter_plot
+
+from pybleau.app.plotting.lod import line_decimation_indices, LINE_LOD, \
+    lod_positions, RendererLOD, SCATTER_LOD, SELECTION_METADATA_NAME, \
+    stratified_sample_indices
+
+
+class TestLineDecimation(TestCase):
+    def test_keeps_extremes_of_each_column(self):
+        x = np.linspace(0, 10, 10001)
+        y = np.sin(x * 7)
+        idx = line_decimation_indices(x, y, 10, max_points=100)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertLessEqual(len(idx), 4 * 11)
+        columns = x.astype(int)
+        for col in range(10):
+            in_col = columns == col
+            kept = idx[columns[idx] == col]
+            self.assertEqual(y[kept].min(), y[in_col].min())
+            self.assertEqual(y[kept].max(), y[in_col].max())
+
+    def test_keeps_edges_of_visible_range(self):
+        x = np.linspace(-5, 15, 2001)
+        y = np.ones(len(x))
+        idx = line_decimation_indices(x, y, 10, max_points=100)
+        visible = (x >= 0) & (x < 10)
+        first, last = np.flatnonzero(visible)[[0, -1]]
+        self.assertIn(first - 1, idx)
+        self.assertIn(last + 1, idx)
+        self.assertFalse(np.any(np.isin(idx, np.arange(first - 1))))
+
+    def test_few_visible_points_all_kept(self):
+        x = np.arange(100.)
+        idx = line_decimation_indices(x, x, 10, max_points=100)
+        assert_array_equal(idx, np.arange(11))
+
+
+class TestStratifiedSample(TestCase):
+    def test_sample_size_and_sparse_points(self):
+        rng = np.random.RandomState(1)
+        # Dense cluster, plus a few isolated points:
+        x = np.concatenate([rng.rand(100000) * 10, [50, 90]])
+        y = np.concatenate([rng.rand(100000) * 10, [50, 90]])
+        idx = stratified_sample_indices(x, y, 100, 100, max_points=1000)
+        self.assertLess(len(idx), 1200)
+        self.assertIn(100000, idx)
+        self.assertIn(100001, idx)
+
+    def test_invisible_points_dropped(self):
+        x = np.array([-1., 5., 200., np.nan])
+        idx = stratified_sample_indices(x, x, 100, 100, max_points=10)
+        assert_array_equal(idx, [1])
+
+
+class TestLODPositions(TestCase):
+    def test_lod_positions(self):
+        self.assertEqual(lod_positions(np.array([2, 5, 9]), [0, 5, 9, 10]),
+                         [1, 2])
+        self.assertEqual(lod_positions(np.array([], dtype=int), [1]), [])
+
+
+class TestRendererLOD(TestCase):
+    def setUp(self):
+        self.x = np.linspace(0, 100, 20000)
+        self.y = np.sin(self.x)
+
+    def make_lod(self, factory, kind):
+        renderer = factory((self.x, self.y))
+        renderer.bounds = [200, 100]
+        lod = RendererLOD(renderer=renderer, kind=kind, x=self.x, y=self.y,
+                          max_points=1000)
+        lod.attach()
+        return lod
+
+    def test_line_decimated(self):
+        lod = self.make_lod(create_line_plot, LINE_LOD)
+        data = lod.renderer.index.get_data()
+        self.assertLess(len(data), 1000)
+        assert_array_equal(data, self.x[lod.positions])
+        assert_array_equal(lod.renderer.index.source_positions, lod.positions)
+
+    def test_zoom_in_shows_all_points(self):
+        lod = self.make_lod(create_scatter_plot, SCATTER_LOD)
+        self.assertLess(len(lod.renderer.index.get_data()), 1500)
+        lod.renderer.index_mapper.range.set_bounds(10, 12)
+        visible = (self.x >= 10) & (self.x < 12)
+        displayed = self.x[lod.positions]
+        self.assertEqual(((displayed >= 10) & (displayed < 12)).sum(),
+                         visible.sum())
+
+    def test_selection_mapping(self):
+        lod = self.make_lod(create_scatter_plot, SCATTER_LOD)
+        source = lod.renderer.index
+        hidden = np.setdiff1d(np.arange(len(self.x)), lod.positions)[0]
+        shown = lod.positions[3]
+        selection = source.from_source_selection([hidden, shown])
+        self.assertEqual(selection, [3])
+
+        # Selecting another displayed point keeps the hidden selected point:
+        new_selection = source.to_source_selection([3, 5])
+        self.assertEqual(new_selection.tolist(),
+                         sorted([hidden, shown, lod.positions[5]]))
+
+        # Zooming in re-maps the selection to the new displayed points:
+        source.metadata[SELECTION_METADATA_NAME] = [3, 5]
+        lod.renderer.index_mapper.range.set_bounds(self.x[hidden] - 0.1,
+                                                   self.x[hidden] + 0.1)
+        selected = source.metadata[SELECTION_METADATA_NAME]
+        self.assertIn(hidden, lod.positions[selected])
@@ -84,6 +84,38 @@ class TestMultiHistogramPlotConfig(TestCase, BaseMultiPlotConfig):
             self.assertEqual(config.x_col_name, x_names[i])
             self.assertEqual(config.x_axis_title, x_names[i])
 
+    def test_create_config_list_keeps_binning(self):
+        multi_config = self.configurator(data_source=TEST_DF,
+                                         x_col_names=["a", "b"])
+        multi_config.plot_style.num_bins = 7
+        for config in multi_config.to_config_list():
+            self.assertEqual(config.plot_style.num_bins, 7)
+            self.assertIsNot(config.plot_style, multi_config.plot_style)
+
+    def test_create_config_list_multi_curve_mode(self):
+        x_names = ["a", "b"]
+        multi_config = self.configurator(data_source=TEST_DF,
+                                         x_col_names=x_names,
+                                         multi_mode=MULTI_CURVE)
+        style = multi_config.plot_style
+        style.num_bins = 7
+        style.bin_limits = (0., 5.)
+        config_list = multi_config.to_config_list()
+        self.assertEqual(len(config_list), 1)
+        config = config_list[0]
+        self.assertEqual(config.x_col_names, x_names)
+        self.assertEqual(config.multi_mode, MULTI_CURVE)
+        self.assertEqual(len(config.plot_style.renderer_styles), 2)
+        self.assertEqual(config.plot_style.num_bins, 7)
+        self.assertEqual(config.plot_style.bin_limits, (0., 5.))
+        # The multi-configurator is left unchanged:
+        self.assertIs(multi_config.plot_style, style)
+        self.assertEqual(len(style.renderer_styles), 1)
+        self.assertEqual(multi_config.x_axis_title, "")
+        config_dict = config.to_dict()
+        self.assertEqual(set(config_dict["x_arr"]), set(x_names))
+        self.assertEqual(set(config_dict["x_sorted"]), set(x_names))
+
     def test_plot_NON_EXISTENT_col(self):
         config = self.configurator(data_source=TEST_DF,
                                    x_col_names=["b", "NON-EXISTENT"])
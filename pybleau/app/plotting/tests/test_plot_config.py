@@ -3,8 +3,9 @@ from __future__ import division
 from unittest import skipIf, TestCase
 import os
 from pandas import DataFrame
+from pandas.testing import assert_frame_equal
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_almost_equal, assert_array_equal
 
 BACKEND_AVAILABLE = os.environ.get("ETS_TOOLKIT", "qt4") != "null"
 
@@ -178,6 +179,11 @@ class TestScatterPlotConfig(TestCase, BaseXYPlotConfig):
         config.z_col_name = "e"
         self.assertTrue(config.plot_style.colorize_by_float)
 
+    def test_density_mode_exported(self):
+        config = self.configurator(data_source=TEST_DF, x_col_name="a",
+                                   y_col_name="b", density_mode=True)
+        self.assertTrue(config.to_dict()["density_mode"])
+
     def test_scatter_data_selection_columns(self):
         config = self.configurator(data_source=TEST_DF, x_col_name="a",
                                    y_col_name="b", z_col_name="d")
@@ -242,78 +248,61 @@ class TestBarPlotConfig(TestCase, BaseXYPlotConfig):
         config = self.configurator(data_source=TEST_DF, melt_source_data=True,
                                    columns_to_melt=["e", "f"])
 
-        self.assertIsNot(config.transformed_data, TEST_DF)
+        # The data isn't melted, bar heights are computed from the columns:
+        self.assertIs(config.transformed_data, TEST_DF)
         self.assertIs(config.data_source, TEST_DF)
 
-        # Pulling the x_arr forces a reset of the x_col_name
-        x_values = np.array(["e"]*LEN+["f"]*LEN)
+        # Melting columns forces a reset of the x_col_name
+        x_values = np.array(["e", "f"])
         assert_array_equal(config.x_arr, x_values)
         self.assertEqual(config.x_col_name, "variable")
 
-        self.assertEqual(len(config.y_arr), 2 * LEN)
+        assert_array_almost_equal(config.y_arr, TEST_DF[["e", "f"]].mean())
         self.assertEqual(config.y_col_name, "value")
+        assert_array_almost_equal(config.y_err_arr,
+                                  TEST_DF[["e", "f"]].std())
 
         config_dict = config.to_dict()
         self.assertIsInstance(config_dict, dict)
         self.assertIn("x_arr", config_dict)
         assert_array_equal(config_dict["x_arr"], x_values)
         self.assertIn("y_arr", config_dict)
-        self.assertEqual(len(config_dict["y_arr"]), 2 * LEN)
+        self.assertEqual(len(config_dict["y_arr"]), 2)
+        self.assertIn("y_err_arr", config_dict)
 
     def test_melt_mode_with_melted_columns_and_str_color(self):
-        config = self.configurator(data_source=TEST_DF, melt_source_data=True,
-                                   columns_to_melt=["e", "f"], z_col_name="g")
-
-        self.assertIsNot(config.transformed_data, TEST_DF)
-        self.assertIs(config.data_source, TEST_DF)
-
-        hue_values = TEST_DF["g"].unique()
+        self.assert_melted_columns_split_by_hue("g")
 
-        # Pulling the x_arr forces a reset of the x_col_name
-        x_values = np.array(["e"] * (LEN // 2) + ["f"] * (LEN // 2))
-        self.assertEqual(set(config.x_arr.keys()), set(hue_values))
-        for key in hue_values:
-            assert_array_equal(config.x_arr[key], x_values)
-        self.assertEqual(config.x_col_name, "variable")
-
-        for key in hue_values:
-            self.assertEqual(len(config.y_arr[key]), LEN)
-
-        self.assertEqual(config.y_col_name, "value")
-        self.assertIn("g", config.transformed_data.columns)
-
-        config_dict = config.to_dict()
-        self.assertIsInstance(config_dict, dict)
-        self.assertIn("x_arr", config_dict)
-        self.assertEqual(set(config_dict["x_arr"].keys()), set(hue_values))
-        for key in hue_values:
-            assert_array_equal(config_dict["x_arr"][key], x_values)
+    def test_melt_mode_with_melted_columns_and_bool_color(self):
+        self.assert_melted_columns_split_by_hue("h")
 
-        self.assertIn("y_arr", config_dict)
-        for key in hue_values:
-            self.assertEqual(len(config_dict["y_arr"][key]), LEN)
+    # Assertion utilities -----------------------------------------------------
 
-    def test_melt_mode_with_melted_columns_and_bool_color(self):
+    def assert_melted_columns_split_by_hue(self, hue_col):
         config = self.configurator(data_source=TEST_DF, melt_source_data=True,
-                                   columns_to_melt=["e", "f"], z_col_name="h")
+                                   columns_to_melt=["e", "f"],
+                                   z_col_name=hue_col)
 
-        self.assertIsNot(config.transformed_data, TEST_DF)
         self.assertIs(config.data_source, TEST_DF)
 
-        hue_values = TEST_DF["h"].unique()
+        hue_values = TEST_DF[hue_col].unique()
+        grouped = TEST_DF.groupby(hue_col)[["e", "f"]]
+        means, stds = grouped.mean(), grouped.std()
 
-        # Pulling the x_arr forces a reset of the x_col_name
-        x_values = np.array(["e"] * (LEN // 2) + ["f"] * (LEN // 2))
+        # Melting columns forces a reset of the x_col_name
+        x_values = np.array(["e", "f"])
         self.assertEqual(set(config.x_arr.keys()), set(hue_values))
         for key in hue_values:
             assert_array_equal(config.x_arr[key], x_values)
         self.assertEqual(config.x_col_name, "variable")
 
         for key in hue_values:
-            self.assertEqual(len(config.y_arr[key]), LEN)
+            assert_array_almost_equal(config.y_arr[key], means.loc[key])
+            assert_array_almost_equal(config.y_err_arr[key], stds.loc[key])
 
         self.assertEqual(config.y_col_name, "value")
-        self.assertIn("h", config.transformed_data.columns)
+        self.assertEqual(len(config.plot_style.renderer_styles),
+                         len(hue_values))
 
         config_dict = config.to_dict()
         self.assertIsInstance(config_dict, dict)
@@ -324,7 +313,7 @@ class TestBarPlotConfig(TestCase, BaseXYPlotConfig):
 
         self.assertIn("y_arr", config_dict)
         for key in hue_values:
-            self.assertEqual(len(config_dict["y_arr"][key]), LEN)
+            self.assertEqual(len(config_dict["y_arr"][key]), 2)
 
 
 @skipIf(not BACKEND_AVAILABLE, "No UI backend available")
@@ -377,6 +366,32 @@ class TestHeatmapPlotConfig(BasePlotConfig, TestCase):
         config_dict = config.to_dict()
         self.assertIsInstance(config_dict, dict)
 
+    def test_pivot_like_pivot_table(self):
+        config = self.configurator(data_source=TEST_DF, x_col_name="a",
+                                   y_col_name="b", z_col_name="e")
+        expected = TEST_DF.pivot_table(index="b", columns="a", values="e")
+        assert_frame_equal(config.transformed_data, expected)
+
+    def test_pivot_axes_reused_for_new_color_column(self):
+        config = self.configurator(data_source=TEST_DF, x_col_name="a",
+                                   y_col_name="b", z_col_name="e")
+        config.to_dict()
+        x_axis, y_axis = config._x_pivot_axis, config._y_pivot_axis
+        config.z_col_name = "c"
+        config_dict = config.to_dict()
+        self.assertIs(config._x_pivot_axis, x_axis)
+        self.assertIs(config._y_pivot_axis, y_axis)
+        expected = TEST_DF.pivot_table(index="b", columns="a", values="c")
+        assert_array_equal(config_dict["z_arr"], expected.values)
+
+    def test_binned_pivot(self):
+        config = self.configurator(data_source=TEST_DF, x_col_name="a",
+                                   y_col_name="e", z_col_name="c",
+                                   y_num_bins=3)
+        config_dict = config.to_dict()
+        self.assertEqual(config_dict["z_arr"].shape, (3, 4))
+        self.assertEqual(len(config_dict["y_arr"]), 3)
+
     def test_plot_colored_by_NON_EXISTENT_col(self):
         config = self.configurator(data_source=TEST_DF, x_col_name="a",
                                    y_col_name="b", z_col_name="NON-EXISTENT")
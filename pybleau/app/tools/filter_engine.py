@@ -0,0 +1,327 @@
+""" Module to evaluate filter expressions on a dataframe, caching sub-results.
+
+Filter expressions are the strings passed to `DataFrame.query`. They are split
+here along their top level boolean operators (`and`, `or`, `not` and their
+`&`, `|`, `~` equivalents), and the boolean mask of each elementary clause is
+cached so that modifying 1 clause of an expression only requires evaluating
+that clause again. When an expression only adds row-local conditions to a
+previous one, the added clauses can also be evaluated on the previously
+filtered data only.
+"""
+from collections import OrderedDict
+import io
+import logging
+import tokenize
+
+import numpy as np
+
+from traits.api import HasStrictTraits, Instance, Int
+
+logger = logging.getLogger(__name__)
+
+AND_OPERATORS = {"and", "&"}
+
+OR_OPERATORS = {"or", "|"}
+
+SKIPPED_TOKEN_TYPES = {tokenize.NEWLINE, tokenize.NL, tokenize.INDENT,
+                       tokenize.DEDENT, tokenize.ENDMARKER, tokenize.COMMENT}
+
+CLAUSE = "clause"
+
+AND = "and"
+
+OR = "or"
+
+NOT = "not"
+
+#: Keywords which can precede a parenthesis or bracket outside of a function
+#: call or subscript (e.g. `a in [1, 2]`)
+NON_CALLABLE_KEYWORDS = {"and", "or", "not", "in", "is"}
+
+
+class UnsupportedFilterExpression(ValueError):
+    """ Raised when an expression can't be split into elementary clauses.
+    """
+    pass
+
+
+class FilterEngine(HasStrictTraits):
+    """ Evaluates filter expressions, caching the mask of each of its clauses.
+
+    Masks are cached for a given version of the data: change the
+    `data_version` when the filtered data changes to invalidate the cache.
+    Expressions the engine can't split into clauses are passed as is to
+    `DataFrame.query`, so that the behavior (including errors raised) is
+    identical to pandas'.
+    """
+
+    #: Version of the data being filtered. Change to invalidate cached masks.
+    data_version = Int
+
+    #: Maximum number of clause masks to keep in memory
+    max_cached_masks = Int(32)
+
+    #: Cache of clause masks, mapping (data_version, clause) to boolean arrays
+    _mask_cache = Instance(OrderedDict, ())
+
+    def filter(self, df, query):
+        """ Returns the part of the DF selected by the query.
+
+        Equivalent to `df.query(query)`.
+        """
+        try:
+            mask = self.compute_mask(df, query)
+        except UnsupportedFilterExpression as e:
+            msg = "Evaluating query {!r} without clause cache: {}"
+            logger.debug(msg.format(query, e))
+            return df.query(query)
+
+        return df[mask]
+
+    def compute_mask(self, df, query):
+        """ Returns the boolean array of the DF's rows selected by the query.
+
+        Raises
+        ------
+        UnsupportedFilterExpression
+            If the query can't be split into clauses or if a clause doesn't
+            evaluate to a boolean array.
+        """
+        tree = parse_filter_expression(query)
+        return self._evaluate(df, tree)
+
+    def refine(self, filtered_df, query, new_query):
+        """ Returns filtered_df, filtered with the clauses new_query adds.
+
+        Parameters
+        ----------
+        filtered_df : pd.DataFrame
+            Result of filtering data with query (potentially reordered).
+
+        query : str
+            Query used to create filtered_df.
+
+        new_query : str
+            New query to filter the data with.
+
+        Returns
+        -------
+        pd.DataFrame or None
+            Data selected by new_query, or None if new_query isn't a strict
+            conjunctive refinement of query (query AND additional clauses), or
+            if an added clause isn't row-local (it calls a function or method,
+            such as an aggregate, so its result depends on the rows it is
+            evaluated on).
+        """
+        try:
+            terms = _conjunction_terms(parse_filter_expression(query))
+            new_terms = _conjunction_terms(parse_filter_expression(new_query))
+        except UnsupportedFilterExpression:
+            return None
+
+        if any(term not in new_terms for term in terms):
+            return None
+
+        added_terms = [term for term in new_terms if term not in terms]
+        if not added_terms:
+            return None
+
+        if not all(_is_row_local(clause) for term in added_terms
+                   for clause in _tree_clauses(term)):
+            return None
+
+        # Masks computed on a subset of the data aren't cached:
+        try:
+            mask = self._evaluate(filtered_df, (AND, added_terms),
+                                  use_cache=False)
+        except UnsupportedFilterExpression:
+            return None
+
+        return filtered_df[mask]
+
+    def clear_cache(self):
+        self._mask_cache = OrderedDict()
+
+    # Private interface -------------------------------------------------------
+
+    def _evaluate(self, df, tree, use_cache=True):
+        kind, content = tree
+        if kind == CLAUSE:
+            return self._evaluate_clause(df, content, use_cache=use_cache)
+        elif kind == NOT:
+            return np.logical_not(self._evaluate(df, content, use_cache))
+        elif kind == AND:
+            masks = [self._evaluate(df, sub_tree, use_cache)
+                     for sub_tree in content]
+            return np.logical_and.reduce(masks)
+        else:
+            masks = [self._evaluate(df, sub_tree, use_cache)
+                     for sub_tree in content]
+            return np.logical_or.reduce(masks)
+
+    def _evaluate_clause(self, df, clause, use_cache=True):
+        key = (self.data_version, clause)
+        mask = self._mask_cache.get(key, None)
+        if use_cache and mask is not None:
+            self._mask_cache.move_to_end(key)
+            return mask
+
+        result = df.eval(clause)
+        mask = np.asarray(result)
+        if mask.dtype != bool or mask.shape != (len(df),):
+            msg = "Clause {!r} doesn't evaluate to a boolean array."
+            msg = msg.format(clause)
+            raise UnsupportedFilterExpression(msg)
+
+        if not use_cache:
+            return mask
+
+        self._mask_cache[key] = mask
+        while len(self._mask_cache) > self.max_cached_masks:
+            self._mask_cache.popitem(last=False)
+        return mask
+
+    # Traits listeners --------------------------------------------------------
+
+    def _data_version_changed(self):
+        self.clear_cache()
+
+
+def parse_filter_expression(query):
+    """ Split a filter expression into a tree of elementary clauses.
+
+    Returns
+    -------
+    tuple
+        Tree node, of the form (kind, content). kind is one of "clause" (the
+        content is then the normalized clause string), "not" (the content is a
+        node), or "and" and "or" (the content is a list of nodes).
+
+    Raises
+    ------
+    UnsupportedFilterExpression
+        If the expression can't be tokenized or isn't well formed.
+    """
+    try:
+        tokens = [tok for tok in tokenize.generate_tokens(
+                  io.StringIO(query.strip()).readline)
+                  if tok.type not in SKIPPED_TOKEN_TYPES]
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise UnsupportedFilterExpression(str(e))
+
+    # Local variables are resolved relative to the caller of DataFrame.query,
+    # and backtick quoted names aren't valid python tokens:
+    for tok in tokens:
+        if tok.string == "@" or tok.type == tokenize.ERRORTOKEN:
+            msg = "Unsupported token {!r}".format(tok.string)
+            raise UnsupportedFilterExpression(msg)
+
+    return _parse_tokens(tokens)
+
+
+def _parse_tokens(tokens):
+    """ Recursively parse a list of tokens into a tree of clauses.
+    """
+    if not tokens:
+        raise UnsupportedFilterExpression("Empty clause")
+
+    for operators, kind in [(OR_OPERATORS, OR), (AND_OPERATORS, AND)]:
+        parts = _split_tokens(tokens, operators)
+        if len(parts) > 1:
+            return kind, [_parse_tokens(part) for part in parts]
+
+    first = tokens[0].string
+    if first == "not":
+        return NOT, _parse_tokens(tokens[1:])
+    elif first == "~" and _is_wrapped_in_parenthesis(tokens[1:]):
+        return NOT, _parse_tokens(tokens[2:-1])
+    elif _is_wrapped_in_parenthesis(tokens):
+        return _parse_tokens(tokens[1:-1])
+
+    return CLAUSE, " ".join(tok.string for tok in tokens)
+
+
+def _conjunction_terms(tree):
+    """ Returns the list of nodes that must all be true for tree to be true.
+    """
+    kind, content = tree
+    if kind == AND:
+        return content
+    return [tree]
+
+
+def _tree_clauses(tree):
+    """ Returns the list of all elementary clauses of a tree.
+    """
+    kind, content = tree
+    if kind == CLAUSE:
+        return [content]
+    elif kind == NOT:
+        return _tree_clauses(content)
+    return [clause for sub_tree in content
+            for clause in _tree_clauses(sub_tree)]
+
+
+def _is_row_local(clause):
+    """ Returns whether the result of a clause on a row only depends on that
+    row, i.e. whether it doesn't access attributes (e.g. column methods) nor
+    call functions or subscript values (e.g. aggregates).
+    """
+    tokens = [tok for tok in tokenize.generate_tokens(
+              io.StringIO(clause).readline)
+              if tok.type not in SKIPPED_TOKEN_TYPES]
+    previous = None
+    for tok in tokens:
+        if tok.type == tokenize.OP and tok.string == ".":
+            return False
+        if tok.type == tokenize.OP and tok.string in ("(", "[") and \
+                previous is not None:
+            if previous.type == tokenize.NAME and \
+                    previous.string not in NON_CALLABLE_KEYWORDS:
+                return False
+            if previous.string in (")", "]"):
+                return False
+        previous = tok
+    return True
+
+
+def _split_tokens(tokens, operators):
+    """ Split a list of tokens along the operators found outside parenthesis.
+    """
+    parts = [[]]
+    depth = 0
+    for tok in tokens:
+        if tok.type == tokenize.OP and tok.string in ("(", "[", "{"):
+            depth += 1
+        elif tok.type == tokenize.OP and tok.string in (")", "]", "}"):
+            depth -= 1
+            if depth < 0:
+                raise UnsupportedFilterExpression("Unbalanced parenthesis")
+
+        if depth == 0 and tok.string in operators and \
+                tok.type in (tokenize.OP, tokenize.NAME):
+            parts.append([])
+        else:
+            parts[-1].append(tok)
+
+    if depth != 0:
+        raise UnsupportedFilterExpression("Unbalanced parenthesis")
+    return parts
+
+
+def _is_wrapped_in_parenthesis(tokens):
+    """ Returns whether the first and last tokens are matching parenthesis.
+    """
+    if len(tokens) < 2 or tokens[0].string != "(" or \
+            tokens[-1].string != ")":
+        return False
+
+    depth = 0
+    for i, tok in enumerate(tokens):
+        if tok.string == "(":
+            depth += 1
+        elif tok.string == ")":
+            depth -= 1
+            if depth == 0:
+                return i == len(tokens) - 1
+    return False
@@ -0,0 +1,112 @@
+""" Module to sort subsets of a dataframe using cached sorting permutations.
+
+Sorting a dataframe along one of its columns (or its index) is done once for
+the entire (source) dataframe, and the resulting permutation is cached. Any
+subset of the source dataframe (for example the result of a filter) can then
+be sorted along the same column by selecting the part of the permutation that
+belongs to the subset, which doesn't require any comparison.
+"""
+from collections import OrderedDict
+import logging
+
+import numpy as np
+import pandas as pd
+
+from traits.api import HasStrictTraits, Instance, Int
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = None
+
+
+class SortEngine(HasStrictTraits):
+    """ Sorts subsets of a source dataframe, caching sorting permutations.
+
+    Permutations are cached for a given version of the source data: change the
+    `data_version` when the source data changes to invalidate the cache.
+    """
+
+    #: Version of the source data. Change to invalidate cached permutations.
+    data_version = Int
+
+    #: Maximum number of column permutations to keep in memory
+    max_cached_permutations = Int(8)
+
+    #: Maps column names (None for the index) to a tuple containing the
+    #: ascending permutation and the number of non-null values
+    _permutation_cache = Instance(OrderedDict, ())
+
+    def sort(self, source_df, df, by=INDEX_KEY, ascending=True):
+        """ Returns df sorted along a column or index, using source_df's order.
+
+        Parameters
+        ----------
+        source_df : pd.DataFrame
+            Source dataframe which the cached permutations are computed for.
+            Its index must be unique.
+
+        df : pd.DataFrame
+            Dataframe to sort. Must be a subset of the source_df rows.
+
+        by : str or None
+            Name of the column to sort the rows by. Leave as None to sort
+            along the index.
+
+        ascending : bool
+            Whether to sort in ascending or descending order. The descending
+            order reuses the ascending permutation, reversed, so equal values
+            appear in reverse order. Null values are always placed at the end.
+        """
+        perm = self.get_permutation(source_df, by=by, ascending=ascending)
+
+        if df is not source_df:
+            positions = source_df.index.get_indexer(df.index)
+            if np.any(positions < 0):
+                msg = "Dataframe to sort isn't a subset of the source data."
+                logger.exception(msg)
+                raise ValueError(msg)
+
+            in_subset = np.zeros(len(source_df), dtype=bool)
+            in_subset[positions] = True
+            perm = perm[in_subset[perm]]
+
+        return source_df.take(perm)
+
+    def get_permutation(self, source_df, by=INDEX_KEY, ascending=True):
+        """ Returns the positions sorting the source_df along a column/index.
+        """
+        perm, num_valid = self._get_ascending_permutation(source_df, by)
+        if ascending:
+            return perm
+
+        # Keep null values at the end, like pandas does:
+        return np.concatenate([perm[:num_valid][::-1], perm[num_valid:]])
+
+    def clear_cache(self):
+        self._permutation_cache = OrderedDict()
+
+    # Private interface -------------------------------------------------------
+
+    def _get_ascending_permutation(self, source_df, by):
+        key = (self.data_version, by)
+        if key in self._permutation_cache:
+            self._permutation_cache.move_to_end(key)
+            return self._permutation_cache[key]
+
+        if by is INDEX_KEY:
+            values = pd.Series(source_df.index)
+        else:
+            values = source_df[by].reset_index(drop=True)
+
+        perm = values.sort_values(kind="mergesort").index.values
+        num_valid = int(values.notnull().sum())
+
+        self._permutation_cache[key] = perm, num_valid
+        while len(self._permutation_cache) > self.max_cached_permutations:
+            self._permutation_cache.popitem(last=False)
+        return perm, num_valid
+
+    # Traits listeners --------------------------------------------------------
+
+    def _data_version_changed(self):
+        self.clear_cache()
@@ -0,0 +1,193 @@
+""" Module to compute summary statistics of all columns of a dataframe.
+
+Equivalent to `DataFrame.describe`, but each column's statistics are computed
+in a single pass (all requested percentiles use a single partition of the
+column's data), and columns are distributed over a pool of threads when the
+dataframe is large, since numpy releases the GIL.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype
+
+logger = logging.getLogger(__name__)
+
+#: Minimum number of values in a dataframe to summarize columns in parallel
+PARALLEL_MIN_SIZE = 1000000
+
+NUMERICAL_STATS = ["count", "mean", "std", "min", "max"]
+
+CATEGORICAL_STATS = ["count", "unique", "top", "freq", "next", "next_freq"]
+
+
+def describe_numerical(data, summary_index, exclude=None, max_workers=None):
+    """ Compute the requested summary statistics of the data's numerical cols.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Data to summarize.
+
+    summary_index : list(str)
+        List of statistics to compute, among "count", "mean", "std", "min",
+        "max" and percentiles formatted like "25%". Other values lead to rows
+        of NaNs.
+
+    exclude : list, optional
+        Column dtypes to exclude from the summary, like for
+        `DataFrame.describe`. All columns are summarized if not provided.
+
+    max_workers : int, optional
+        Maximum number of threads to compute the columns' statistics with.
+
+    Returns
+    -------
+    pd.DataFrame
+        Summary dataframe, with the statistics as index, and the summarized
+        columns as columns. Empty if there are no columns to summarize.
+    """
+    columns = _select_columns(data, exclude=exclude)
+    if not columns:
+        return pd.DataFrame([])
+
+    summary_index = list(summary_index)
+    func = _describe_numerical_column
+    results = _map_columns(func, data, columns, max_workers,
+                           summary_index=summary_index)
+    return pd.DataFrame(dict(zip(columns, results)), index=summary_index,
+                        columns=columns)
+
+
+def describe_categorical(data, include=None, max_workers=None):
+    """ Compute count, top and next most frequent values for categorical cols.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Data to summarize.
+
+    include : list, optional
+        Column dtypes to include in the summary, like for
+        `DataFrame.describe`. All columns are summarized if not provided.
+
+    max_workers : int, optional
+        Maximum number of threads to compute the columns' statistics with.
+
+    Returns
+    -------
+    pd.DataFrame
+        Summary dataframe, with the statistics in CATEGORICAL_STATS as index,
+        and the summarized columns as columns. Empty if there are no columns
+        to summarize.
+    """
+    columns = _select_columns(data, include=include)
+    if not columns:
+        return pd.DataFrame([])
+
+    results = _map_columns(_describe_categorical_column, data, columns,
+                           max_workers)
+    return pd.DataFrame(dict(zip(columns, results)), index=CATEGORICAL_STATS,
+                        columns=columns, dtype=object)
+
+
+def parse_percentile(stat_name):
+    """ Returns the quantile (between 0 and 1) for a name like '25%' or None.
+    """
+    if not stat_name.endswith("%"):
+        return None
+    try:
+        return float(stat_name[:-1]) / 100.
+    except ValueError:
+        return None
+
+
+# Private functions -----------------------------------------------------------
+
+
+def _select_columns(data, include=None, exclude=None):
+    """ Select column names by dtype without copying the data.
+    """
+    if not include and not exclude:
+        return data.columns.tolist()
+
+    return data.iloc[:0].select_dtypes(include=include,
+                                       exclude=exclude).columns.tolist()
+
+
+def _map_columns(func, data, columns, max_workers, **kwargs):
+    """ Apply func to all columns, in a thread pool if the data is large.
+    """
+    series_list = [data[col] for col in columns]
+    if len(columns) > 1 and len(data) * len(columns) >= PARALLEL_MIN_SIZE:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, series, **kwargs)
+                       for series in series_list]
+            return [future.result() for future in futures]
+
+    return [func(series, **kwargs) for series in series_list]
+
+
+def _describe_numerical_column(series, summary_index):
+    """ Returns the list of statistics of a numerical column in 1 pass.
+    """
+    dtype = series.dtype
+    if not (is_float_dtype(dtype) or is_integer_dtype(dtype)):
+        return _describe_other_column(series, summary_index)
+
+    values = series.astype(np.float64).values
+    values = values[~np.isnan(values)]
+    count = len(values)
+    stats = {"count": float(count)}
+
+    quantiles = {}
+    for stat_name in summary_index:
+        q = parse_percentile(stat_name)
+        if q is not None:
+            quantiles[stat_name] = q
+
+    if count:
+        # Compute all percentiles and min/max with a single partition:
+        qs = [0., 1.] + list(quantiles.values())
+        results = np.percentile(values, [100 * q for q in qs])
+        stats["min"], stats["max"] = results[:2]
+        stats.update(zip(quantiles.keys(), results[2:]))
+        stats["mean"] = values.mean()
+        if count > 1:
+            stats["std"] = values.std(ddof=1)
+
+    return [stats.get(stat_name, np.nan) for stat_name in summary_index]
+
+
+def _describe_other_column(series, summary_index):
+    """ Returns the list of statistics of a non-float column (e.g. Timedelta).
+    """
+    description = series.describe()
+    stats = []
+    for stat_name in summary_index:
+        q = parse_percentile(stat_name)
+        if q is not None:
+            stats.append(series.quantile(q))
+        elif stat_name in NUMERICAL_STATS and stat_name in description:
+            stats.append(description[stat_name])
+        else:
+            stats.append(np.nan)
+    return stats
+
+
+def _describe_categorical_column(series):
+    """ Returns the list of CATEGORICAL_STATS of a column, from 1 value count.
+    """
+    value_counts = series.value_counts()
+    # Categorical columns count unused categories:
+    value_counts = value_counts[value_counts > 0]
+    count = int(value_counts.sum())
+    unique = len(value_counts)
+    stats = [count, unique]
+    for i in range(2):
+        if unique > i:
+            stats += [value_counts.index[i], int(value_counts.iloc[i])]
+        else:
+            stats += [np.nan, np.nan]
+    return stats
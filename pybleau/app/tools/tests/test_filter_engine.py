@@ -0,0 +1,125 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.tools.filter_engine import AND, CLAUSE, FilterEngine, \
+    NOT, OR, parse_filter_expression, UnsupportedFilterExpression
+
+
+class TestParseFilterExpression(TestCase):
+
+    def test_single_clause(self):
+        tree = parse_filter_expression("a>2")
+        self.assertEqual(tree, (CLAUSE, "a > 2"))
+        # Normalized the same way regardless of spaces:
+        self.assertEqual(parse_filter_expression(" a >  2 "), tree)
+
+    def test_boolean_operators(self):
+        tree = parse_filter_expression("a > 2 and b < 5 or not c == 'x y'")
+        expected = (OR, [(AND, [(CLAUSE, "a > 2"), (CLAUSE, "b < 5")]),
+                         (NOT, (CLAUSE, "c == 'x y'"))])
+        self.assertEqual(tree, expected)
+
+        tree = parse_filter_expression("a > 2 & (b < 5 | ~(c == 'x'))")
+        expected = (AND, [(CLAUSE, "a > 2"),
+                          (OR, [(CLAUSE, "b < 5"),
+                                (NOT, (CLAUSE, "c == 'x'"))])])
+        self.assertEqual(tree, expected)
+
+    def test_operators_in_lists_and_strings_not_split(self):
+        tree = parse_filter_expression("c in ['a and b', 'c']")
+        self.assertEqual(tree, (CLAUSE, "c in [ 'a and b' , 'c' ]"))
+        tree = parse_filter_expression("(a + b) > 3")
+        self.assertEqual(tree, (CLAUSE, "( a + b ) > 3"))
+
+    def test_malformed_expressions(self):
+        for expr in ["a > 2 and", "(a > 2", "a > 2)", "c == 'a", "a > @b"]:
+            with self.assertRaises(UnsupportedFilterExpression):
+                parse_filter_expression(expr)
+
+
+class TestFilterEngine(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"a": range(11), "b": range(0, 110, 10),
+                                "c": list("abcdeabcaab")})
+        self.engine = FilterEngine()
+
+    def test_filter_same_as_query(self):
+        queries = ["a > 2", "a > 2 and b < 50", "a>2 & b<50 | c == 'a'",
+                   "c in ['a', 'b']", "not a > 5", "~(a > 5)",
+                   "(a + b) > 30", "a not in [1, 2]", "index > 3"]
+        for query in queries:
+            assert_frame_equal(self.engine.filter(self.df, query),
+                               self.df.query(query))
+
+    def test_clause_masks_cached(self):
+        self.engine.filter(self.df, "a > 2")
+        mask = self.engine._mask_cache[(0, "a > 2")]
+        self.engine.filter(self.df, "a > 2 and b < 50")
+        self.assertEqual(set(self.engine._mask_cache),
+                         {(0, "a > 2"), (0, "b < 50")})
+        self.assertIs(self.engine._mask_cache[(0, "a > 2")], mask)
+
+    def test_cache_invalidated_by_data_version(self):
+        self.engine.filter(self.df, "a > 2")
+        df = self.df.assign(a=-self.df["a"])
+        self.engine.data_version += 1
+        self.assertEqual(len(self.engine._mask_cache), 0)
+        result = self.engine.filter(df, "a > 2")
+        self.assertEqual(len(result), 0)
+
+    def test_cache_size_limited(self):
+        self.engine.max_cached_masks = 2
+        for i in range(5):
+            self.engine.filter(self.df, "a > {}".format(i))
+        self.assertEqual(set(self.engine._mask_cache),
+                         {(0, "a > 3"), (0, "a > 4")})
+
+    def test_unsupported_expression_falls_back_to_query(self):
+        # Not a boolean mask: pandas behavior is preserved:
+        df = pd.DataFrame({"a": [True, False, True]})
+        assert_frame_equal(self.engine.filter(df, "a"), df.query("a"))
+        with self.assertRaises(SyntaxError):
+            self.engine.filter(self.df, "a > ")
+
+        mask = self.engine.compute_mask(self.df, "b == 20")
+        np.testing.assert_array_equal(mask, self.df["b"].values == 20)
+
+    def test_refine_conjunction(self):
+        filtered = self.engine.filter(self.df, "a > 2")
+        refined = self.engine.refine(filtered, "a > 2", "a > 2 and b < 50")
+        assert_frame_equal(refined, self.df.query("a > 2 and b < 50"))
+        # Added clause evaluated on the filtered data only, so not cached:
+        self.assertEqual(set(self.engine._mask_cache), {(0, "a > 2")})
+
+        # Works on reordered data too:
+        filtered = filtered.iloc[::-1]
+        refined = self.engine.refine(filtered, "a>2", "c == 'a' & a > 2")
+        assert_frame_equal(refined, self.df.query("a > 2 and c == 'a'")[::-1])
+
+    def test_refine_with_aggregate_clause(self):
+        df = pd.DataFrame({"a": np.arange(100), "b": np.arange(100) % 17})
+        filtered = self.engine.filter(df, "a > 5")
+        for new_query in ["a > 5 and b > b.mean()",
+                          "a > 5 and b > b.median()",
+                          "a > 5 and not (b < abs(a - 50))",
+                          "a > 5 and b > b[0]"]:
+            # Depends on all rows, so can't be evaluated on filtered data:
+            self.assertIsNone(self.engine.refine(filtered, "a > 5",
+                                                 new_query))
+
+        # Row-local clauses, including list literals, are refined:
+        refined = self.engine.refine(filtered, "a > 5",
+                                     "a > 5 and b in [1, 2]")
+        assert_frame_equal(refined, df.query("a > 5 and b in [1, 2]"))
+
+    def test_refine_not_a_refinement(self):
+        filtered = self.engine.filter(self.df, "a > 2 and b < 50")
+        for new_query in ["a > 2", "b < 50", "a > 2 and b < 50",
+                          "a > 2 or b < 50", "a > 3 and b < 50",
+                          "a > 2 and b < 50 or c == 'a'"]:
+            refined = self.engine.refine(filtered, "a > 2 and b < 50",
+                                         new_query)
+            self.assertIsNone(refined)
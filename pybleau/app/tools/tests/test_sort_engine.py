@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.tools.sort_engine import SortEngine
+
+
+class TestSortEngine(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"a": [3., np.nan, 1., 2., 5.],
+                                "b": list("xzyvw")},
+                               index=[4, 2, 0, 3, 1])
+        self.engine = SortEngine()
+
+    def test_sort_source_df(self):
+        for by in ["a", "b"]:
+            for ascending in [True, False]:
+                result = self.engine.sort(self.df, self.df, by=by,
+                                          ascending=ascending)
+                expected = self.df.sort_values(by=by, ascending=ascending,
+                                               kind="mergesort")
+                assert_frame_equal(result, expected)
+
+    def test_sort_along_index(self):
+        result = self.engine.sort(self.df, self.df)
+        assert_frame_equal(result, self.df.sort_index())
+        result = self.engine.sort(self.df, self.df, ascending=False)
+        assert_frame_equal(result, self.df.sort_index(ascending=False))
+
+    def test_sort_subset(self):
+        subset = self.df.query("b != 'z'")
+        result = self.engine.sort(self.df, subset, by="a", ascending=False)
+        assert_frame_equal(result, subset.sort_values(by="a",
+                                                      ascending=False))
+        # Same permutation reused:
+        self.assertEqual(list(self.engine._permutation_cache), [(0, "a")])
+
+    def test_sort_not_a_subset(self):
+        other = pd.DataFrame({"a": [1, 2]}, index=[10, 11])
+        with self.assertRaises(ValueError):
+            self.engine.sort(self.df, other, by="a")
+
+    def test_cache_invalidated_by_data_version(self):
+        self.engine.sort(self.df, self.df, by="a")
+        df = self.df.assign(a=-self.df["a"])
+        self.engine.data_version += 1
+        self.assertEqual(len(self.engine._permutation_cache), 0)
+        result = self.engine.sort(df, df, by="a")
+        assert_frame_equal(result, df.sort_values(by="a"))
+
+    def test_cache_size_limited(self):
+        self.engine.max_cached_permutations = 1
+        self.engine.sort(self.df, self.df, by="a")
+        self.engine.sort(self.df, self.df, by="b")
+        self.assertEqual(list(self.engine._permutation_cache), [(0, "b")])
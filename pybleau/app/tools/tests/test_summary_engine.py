@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.app.tools import summary_engine
+from pybleau.app.tools.summary_engine import CATEGORICAL_STATS, \
+    describe_categorical, describe_numerical, parse_percentile
+
+CATEGORICAL_DTYPES = ['O', 'category', 'datetime64', bool]
+
+DESCRIBE_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+class TestDescribeNumerical(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"a": range(11),
+                                "b": np.r_[np.arange(0, 100, 10.), np.nan],
+                                "c": list("abcdeabcaab")})
+
+    def test_same_as_describe(self):
+        summary = describe_numerical(self.df, DESCRIBE_STATS,
+                                     exclude=CATEGORICAL_DTYPES)
+        expected = self.df.describe(exclude=CATEGORICAL_DTYPES)
+        assert_frame_equal(summary, expected)
+
+    def test_same_as_describe_in_parallel(self):
+        df = pd.DataFrame(np.random.randn(100, 5))
+        orig_size = summary_engine.PARALLEL_MIN_SIZE
+        summary_engine.PARALLEL_MIN_SIZE = 1
+        try:
+            summary = describe_numerical(df, DESCRIBE_STATS, max_workers=2)
+        finally:
+            summary_engine.PARALLEL_MIN_SIZE = orig_size
+        assert_frame_equal(summary, df.describe())
+
+    def test_custom_stats(self):
+        summary_index = ["0.1%", "mean", "99.5%", "foo"]
+        summary = describe_numerical(self.df, summary_index,
+                                     exclude=CATEGORICAL_DTYPES)
+        self.assertEqual(summary.index.tolist(), summary_index)
+        self.assertAlmostEqual(summary.loc["0.1%", "a"], 0.01)
+        self.assertAlmostEqual(summary.loc["99.5%", "b"], 89.55)
+        self.assertTrue(np.all(np.isnan(summary.loc["foo"])))
+
+    def test_timedelta_column(self):
+        df = pd.DataFrame({"a": [pd.Timedelta(seconds=i) for i in range(5)]})
+        summary = describe_numerical(df, ["mean", "50%", "3%"])
+        self.assertEqual(summary.loc["mean", "a"], pd.Timedelta(seconds=2))
+        self.assertEqual(summary.loc["50%", "a"], pd.Timedelta(seconds=2))
+        self.assertEqual(summary.loc["3%", "a"], pd.Timedelta(seconds=0.12))
+
+    def test_no_numerical_columns(self):
+        summary = describe_numerical(self.df[["c"]], DESCRIBE_STATS,
+                                     exclude=CATEGORICAL_DTYPES)
+        assert_frame_equal(summary, pd.DataFrame([]))
+
+    def test_parse_percentile(self):
+        self.assertEqual(parse_percentile("25%"), 0.25)
+        self.assertIsNone(parse_percentile("mean"))
+        self.assertIsNone(parse_percentile("a%"))
+
+
+class TestDescribeCategorical(TestCase):
+    def test_describe_categorical(self):
+        df = pd.DataFrame({"a": ["x", "x", "x"], "b": ["x", "y", "y"],
+                           "c": [1, 2, 3]})
+        summary = describe_categorical(df, include=CATEGORICAL_DTYPES)
+        expected = pd.DataFrame({"a": [3, 1, "x", 3, np.nan, np.nan],
+                                 "b": [3, 2, "y", 2, "x", 1]},
+                                index=CATEGORICAL_STATS)
+        assert_frame_equal(summary, expected)
+
+    def test_unused_categories_ignored(self):
+        df = pd.DataFrame({"a": pd.Categorical(["x", "x", "y"],
+                                               categories=list("xyz"))})
+        summary = describe_categorical(df, include=CATEGORICAL_DTYPES)
+        self.assertEqual(summary["a"].tolist(), [3, 2, "x", 2, "y", 1])
+
+    def test_no_categorical_columns(self):
+        df = pd.DataFrame({"a": [1, 2]})
+        summary = describe_categorical(df, include=CATEGORICAL_DTYPES)
+        assert_frame_equal(summary, pd.DataFrame([]))
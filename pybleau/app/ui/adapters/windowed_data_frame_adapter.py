@@ -0,0 +1,146 @@
+""" Tabular adapter for DataFrameEditors displaying very long dataframes.
+
+The traitsui DataFrameAdapter slices the dataframe once per cell and per
+requested attribute (text, alignment, ...). This adapter instead formats the
+text of a window of rows around the rows being displayed (plus a prefetch
+margin) in a single operation per column, and serves the cells of that window
+from a cache. Since the table view only requests the cells that are visible,
+scrolling through a dataframe costs the same regardless of its length, and the
+entire dataframe can be handed to the editor.
+"""
+import logging
+
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from traits.api import Any, Callable, Dict, Int
+from traitsui.ui_editors.data_frame_editor import DataFrameAdapter
+
+logger = logging.getLogger(__name__)
+
+INDEX_COLUMN_ID = "index"
+
+
+class WindowedDataFrameAdapter(DataFrameAdapter):
+    """ DataFrameAdapter formatting and caching a window of rows at a time.
+    """
+    #: Number of rows to format around a requested row, on each side of it
+    prefetch_margin = Int(200)
+
+    #: Function applying cell edits, called with the row's index value, the
+    #: column id and the new value. Leave as None to modify the displayed
+    #: dataframe in place.
+    value_setter = Callable
+
+    #: Dataframe the window was built from
+    _window_df = Any
+
+    #: Formats and columns the window was built with
+    _window_key = Any
+
+    #: First row of the window
+    _window_start = Int
+
+    #: Last row (excluded) of the window
+    _window_end = Int
+
+    #: Formatted texts of the window, mapped by column id
+    _window_texts = Dict
+
+    def get_text(self, object, trait, row, column):
+        """ Returns the text of a cell, formatting its window if needed.
+        """
+        df = getattr(object, trait)
+        self._update_window(df, row)
+        column_id = self.column_map[column]
+        return self._window_texts[column_id][row - self._window_start]
+
+    def get_alignment(self, object, trait, column):
+        """ Returns the alignment of a column, without slicing the data.
+        """
+        df = getattr(object, trait)
+        column_id = self.column_map[column]
+        if column_id == INDEX_COLUMN_ID:
+            dtype = df.index.dtype
+        else:
+            dtype = df[column_id].dtype
+
+        if is_numeric_dtype(dtype) and not is_bool_dtype(dtype):
+            return "right"
+        return "left"
+
+    def set_text(self, object, trait, row, column, text):
+        """ Sets the value of a cell from its text, and discards the window
+        so that the new value is displayed.
+        """
+        super(WindowedDataFrameAdapter, self).set_text(object, trait, row,
+                                                       column, text)
+        self.clear_window()
+
+    def clear_window(self):
+        """ Discard the formatted texts, for example after editing the data.
+        """
+        self._window_df = None
+        self._window_texts = {}
+
+    # Private interface -------------------------------------------------------
+
+    def _update_window(self, df, row):
+        """ Format the window of rows around row if not already available.
+        """
+        key = (tuple(self.column_map), repr(self._formats))
+        if df is not self._window_df or key != self._window_key:
+            self._reset_window(df)
+            self._window_key = key
+        elif self._window_start <= row < self._window_end:
+            return
+
+        start = max(0, row - self.prefetch_margin)
+        end = min(len(df), row + self.prefetch_margin + 1)
+        self._window_texts = {column_id: self._format_column(df, column_id,
+                                                             start, end)
+                              for column_id in self.column_map}
+        self._window_start = start
+        self._window_end = end
+
+    def _set_text(self, value):
+        """ Sets the value of the current cell, located by its column id since
+        the adapter's columns include the index.
+        """
+        df = getattr(self.object, self.name)
+        column = df.columns.get_loc(self.column_id)
+        try:
+            value = df.iloc[:, column].dtype.type(value)
+            if self.value_setter is None:
+                df.iloc[self.row, column] = value
+            else:
+                self.value_setter(df.index[self.row], self.column_id, value)
+        except Exception as e:
+            msg = "Failed to set value {!r} in column {!r}: {}"
+            logger.warning(msg.format(value, self.column_id, e))
+
+    def _reset_window(self, df):
+        self._window_df = df
+        self._window_key = None
+        self._window_texts = {}
+        self._window_start = self._window_end = 0
+
+    def _format_column(self, df, column_id, start, end):
+        """ Returns the texts of a column between 2 positions.
+        """
+        if column_id == INDEX_COLUMN_ID:
+            return [str(val) for val in df.index[start:end]]
+
+        if isinstance(self._formats, str):
+            fmt = self._formats
+        else:
+            fmt = self._formats.get(column_id, "%s")
+
+        values = df[column_id].iloc[start:end].to_numpy()
+        return [fmt % (val,) for val in values]
+
+    # Traits listeners --------------------------------------------------------
+
+    def _columns_changed(self):
+        self.clear_window()
+
+    def _columns_items_changed(self):
+        self.clear_window()
@@ -21,6 +21,8 @@ from pybleau.app.image_resources import pop_out_img, apply_img, \
     manage_img, save_img, load_img
 from pybleau.app.model.dataframe_analyzer import DataFrameAnalyzer, \
     CATEGORICAL_COL_TYPES
+from pybleau.app.ui.adapters.windowed_data_frame_adapter import \
+    WindowedDataFrameAdapter
 from pybleau.app.ui.filter_expression_editor import \
     FilterExpressionEditorView
 
@@ -138,6 +140,10 @@ class DataFrameAnalyzerView(ModelView):
 
     # Functionality controls --------------------------------------------------
 
+    #: Display all filtered rows, only formatting the rows scrolled to, rather
+    #: than truncating the table and showing more rows on demand
+    windowed_table = Bool(True)
+
     #: Button to shuffle the order of the filtered data
     shuffle_button = Button("Shuffle")
 
@@ -214,6 +220,13 @@ class DataFrameAnalyzerView(ModelView):
     #: Popped-up UI to control the visible columns
     _control_popup = Any
 
+    #: Data of the windowed table: all filtered rows, or the selected ones
+    _table_df = Instance(pd.DataFrame)
+
+    #: Rows selected in the data table, as the list of positions its editor
+    #: expects
+    _selected_rows = Property(List(Int), depends_on="model.selected_idx")
+
     #: Collected traitsUI editors for both the data DF and the summary DF
     _df_editors = Dict
 
@@ -225,6 +238,12 @@ class DataFrameAnalyzerView(ModelView):
 
         super(DataFrameAnalyzerView, self).__init__(**traits)
 
+        if self.windowed_table:
+            self.update_table_df()
+
+        # Only update the summaries when they are displayed:
+        self.model.hold_summary_updates = not self._show_summary
+
         if self.include_plotter:
             # If a plotter view was specified, its model should be in the
             # model's list of plot managers:
@@ -322,7 +341,13 @@ class DataFrameAnalyzerView(ModelView):
         """
         editor_kw = dict(show_index=True, columns=self.visible_columns,
                          fonts=self.fonts, formats=self.formats)
-        data_editor = DataFrameEditor(selected_row="selected_idx",
+        if self.windowed_table:
+            # Edits go through the model, to update the data derived from the
+            # edited data:
+            editor_kw["adapter"] = WindowedDataFrameAdapter(
+                value_setter=self.model.set_source_df_val
+            )
+        data_editor = DataFrameEditor(selected_row="object._selected_rows",
                                       multi_select=True, **editor_kw)
 
         filter_group = HGroup(
@@ -348,15 +373,28 @@ class DataFrameAnalyzerView(ModelView):
         truncated = ("len(model.displayed_df) < len(model.filtered_df) and "
                      "not model.show_selected_only")
         more_label = "Show {} More".format(self.model.num_display_increment)
-        display_control_group = HGroup(
-            Item("model.show_selected_only", label="Selected rows only"),
-            Item("truncation_msg", style="readonly", show_label=False,
-                 visible_when=truncated),
-            Item("show_more_button", editor=ButtonEditor(label=more_label),
-                 show_label=False, visible_when=truncated),
-            Item("show_all_button", show_label=False,
-                 visible_when=truncated),
-        )
+        display_controls = [
+            Item("model.show_selected_only", label="Selected rows only")
+        ]
+        # The windowed table displays all rows, so it is never truncated:
+        if not self.windowed_table:
+            display_controls += [
+                Item("truncation_msg", style="readonly", show_label=False,
+                     visible_when=truncated),
+                Item("show_more_button", editor=ButtonEditor(label=more_label),
+                     show_label=False, visible_when=truncated),
+                Item("show_all_button", show_label=False,
+                     visible_when=truncated),
+            ]
+        display_control_group = HGroup(*display_controls)
+
+        if self.windowed_table:
+            # Same editor id, so it is found like the truncated table's:
+            data_item = Item("_table_df", id="displayed_df",
+                             editor=data_editor, show_label=False)
+        else:
+            data_item = Item("model.displayed_df", editor=data_editor,
+                             show_label=False)
 
         data_group = VGroup(
             make_window_title_group(self.data_section_title, title_size=3,
@@ -369,8 +407,7 @@ class DataFrameAnalyzerView(ModelView):
                 filter_group
             ),
             HGroup(
-                Item("model.displayed_df", editor=data_editor,
-                     show_label=False),
+                data_item,
             ),
             HGroup(
                 Item("show_column_controls",
@@ -428,17 +465,17 @@ class DataFrameAnalyzerView(ModelView):
             make_window_title_group(self.summary_section_title, title_size=3,
                                     include_blank_spaces=False),
             Item("model.summary_df", editor=summary_editor, show_label=False,
-                 visible_when="len(model.summary_df) != 0"),
+                 visible_when="_show_summary and len(model.summary_df) != 0"),
             # Workaround the fact that the Label's visible_when is buggy:
             # encapsulate it into a group and add the visible_when to the group
             HGroup(
                 Label("No data columns with numbers were found."),
-                visible_when="len(model.summary_df) == 0"
+                visible_when="_show_summary and len(model.summary_df) == 0"
             ),
             HGroup(
                 Item("show_summary_controls"),
                 Spring(),
-                visible_when="len(model.summary_df) != 0"
+                visible_when="_show_summary and len(model.summary_df) != 0"
             ),
             show_border=True,
         )
@@ -468,13 +505,14 @@ class DataFrameAnalyzerView(ModelView):
             make_window_title_group(self.cat_summary_section_title,
                                     title_size=3, include_blank_spaces=False),
             Item("model.summary_categorical_df", editor=summary_editor,
-                 show_label=False,
-                 visible_when="len(model.summary_categorical_df)!=0"),
+                 show_label=False, visible_when="_show_summary and "
+                 "len(model.summary_categorical_df)!=0"),
             # Workaround the fact that the Label's visible_when is buggy:
             # encapsulate it into a group and add the visible_when to the group
             HGroup(
                 Label("No data columns with numbers were found."),
-                visible_when="len(model.summary_categorical_df)==0"
+                visible_when="_show_summary and "
+                             "len(model.summary_categorical_df)==0"
             ),
             show_border=True, label=self.cat_summary_group_name
         )
@@ -500,6 +538,22 @@ class DataFrameAnalyzerView(ModelView):
 
     # Traits listeners --------------------------------------------------------
 
+    @on_trait_change("model:displayed_df", post_init=True)
+    def update_table_df(self):
+        """ Display all filtered rows in the windowed table, unless only the
+        selected rows should be.
+
+        The model's displayed_df (which may be truncated) is left as
+        configured.
+        """
+        if not self.windowed_table:
+            return
+
+        if self.model.show_selected_only:
+            self._table_df = self.model.displayed_df
+        else:
+            self._table_df = self.model.filtered_df
+
     def _open_column_controls_fired(self):
         """ Pop-up a new view on the column list control.
         """
@@ -592,6 +646,10 @@ class DataFrameAnalyzerView(ModelView):
         expr = FilterExpression(name=exp, expression=exp)
         self.model.known_filter_exps.append(expr)
 
+    @on_trait_change("_show_summary", post_init=True)
+    def hold_summary_updates_when_hidden(self, new):
+        self.model.hold_summary_updates = not new
+
     def _show_more_button_fired(self):
         self.model.num_displayed_rows += self.model.num_display_increment
 
@@ -602,15 +660,15 @@ class DataFrameAnalyzerView(ModelView):
     def warn_if_selection_hidden(self):
         """ Pop up warning msg if some of the selected rows aren't displayed.
         """
-        if not self.warn_if_sel_hidden:
+        if not self.warn_if_sel_hidden or self.windowed_table:
             return
 
-        if not self.model.selected_idx:
+        if len(self.model.selected_idx) == 0:
             return
 
         truncated = len(self.model.displayed_df) < len(self.model.filtered_df)
         max_displayed = self.model.displayed_df.index.max()
-        some_selection_hidden = max(self.model.selected_idx) > max_displayed
+        some_selection_hidden = self.model.selected_idx[-1] > max_displayed
         if truncated and some_selection_hidden:
             warning(None, self.hidden_selection_msg, "Hidden selection")
 
@@ -683,6 +741,12 @@ class DataFrameAnalyzerView(ModelView):
 
     # Traits property getters/setters -----------------------------------------
 
+    def _get__selected_rows(self):
+        return self.model.selected_idx.tolist()
+
+    def _set__selected_rows(self, rows):
+        self.model.selected_idx = rows
+
     def _get__known_expr(self):
         return {e.expression for e in self.model.known_filter_exps}
 
@@ -710,10 +774,14 @@ class DataFrameAnalyzerView(ModelView):
 
                 plot_manager = self.model.plot_manager_list[0]
             else:
+                plotter_kw = dict(self.plotter_kw)
+                # The UI event loop is running: don't block it while
+                # recomputing plots on filter changes:
+                plotter_kw.setdefault("refresh_in_background", True)
                 plot_manager = DataFramePlotManager(
                     data_source=self.model.filtered_df,
                     source_analyzer=self.model,
-                    **self.plotter_kw
+                    **plotter_kw
                 )
 
             view = DataFramePlotManagerView(model=plot_manager,
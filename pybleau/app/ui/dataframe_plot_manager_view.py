@@ -4,8 +4,8 @@ import logging
 import os
 
 from enable.component_editor import ComponentEditor
-from pyface.api import warning
-from traits.api import Any, Bool, Button, Enum, Instance, \
+from pyface.api import GUI, warning
+from traits.api import Any, Bool, Button, Dict, Enum, Instance, \
     Int, List
 from traitsui.api import EnumEditor, HGroup, Item, Label, ModelView, \
     Spring, TableEditor, VGroup, View, VSplit, ObjectColumn
@@ -57,8 +57,15 @@ class DataFramePlotManagerView(ModelView):
     #: List of column names to display in the plot controls
     plot_control_cols = List
 
+    #: Listeners to the display of containers with plots not built yet,
+    #: mapped by container index
+    _container_display_listeners = Dict
+
     def traits_view(self):
         self.raise_dlg_if_failed_plots()
+        if self.model.lazy_plot_creation:
+            self._listen_to_container_display()
+
         plot_list_editor = self.build_plot_list_editor()
 
         tooltip = "Strategy for auto-selecting the target row: 0 -> first " \
@@ -193,6 +200,49 @@ class DataFramePlotManagerView(ModelView):
 
     # Private interface -------------------------------------------------------
 
+    def _listen_to_container_display(self):
+        """ Build lazily created plots once their container is displayed.
+        """
+        managers = self.model.canvas_manager.container_managers
+        for i, manager in enumerate(managers):
+            if i in self._container_display_listeners or \
+                    not self.model.get_unbuilt_plots(i):
+                continue
+
+            container = manager.container
+            handler = self._make_container_display_handler(i, container)
+            container.on_trait_change(handler, "bounds, bounds_items")
+            self._container_display_listeners[i] = handler
+            # Already displayed, e.g. when opening a new view of the model:
+            handler()
+
+    def _make_container_display_handler(self, container_idx, container):
+        def handler():
+            # Containers are only sized once displayed:
+            if not all(container.bounds) or \
+                    container_idx not in self._container_display_listeners:
+                return
+
+            del self._container_display_listeners[container_idx]
+            container.on_trait_change(handler, "bounds, bounds_items",
+                                      remove=True)
+            plots = self.model.get_unbuilt_plots(container_idx)
+            GUI.invoke_later(self._materialize_next_plot, plots)
+
+        return handler
+
+    def _materialize_next_plot(self, plot_descriptions):
+        """ Build the first plot of the list, and schedule building the next
+        one, so the UI stays responsive while building many plots.
+        """
+        if not plot_descriptions:
+            return
+
+        self.model.materialize_plots(plot_descriptions[0])
+        if len(plot_descriptions) > 1:
+            GUI.invoke_later(self._materialize_next_plot,
+                             plot_descriptions[1:])
+
     def raise_dlg_if_failed_plots(self):
         """ If some plots couldn't be rebuilt in the model, issue a warning.
         """
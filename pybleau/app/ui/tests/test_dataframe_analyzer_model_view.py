@@ -175,7 +175,8 @@ class TestDataFrameAnalyzerView(TestCase):
         self.analyzer.num_displayed_rows = 3
         self.analyzer.num_display_increment = 1
         view = DataFrameAnalyzerView(model=self.analyzer,
-                                     include_plotter=False)
+                                     include_plotter=False,
+                                     windowed_table=False)
         self.assertEqual(len(self.analyzer.displayed_df), 3)
         view.show_more_button = True
         self.assertEqual(len(self.analyzer.displayed_df), 4)
@@ -187,6 +188,32 @@ class TestDataFrameAnalyzerView(TestCase):
         view.show_more_button = True
         self.assertEqual(len(self.analyzer.displayed_df), 5)
 
+    def test_windowed_table_not_truncated(self):
+        self.analyzer.num_displayed_rows = 3
+        view = DataFrameAnalyzerView(model=self.analyzer,
+                                     include_plotter=False)
+        # The model's settings are left alone:
+        self.assertEqual(self.analyzer.num_displayed_rows, 3)
+        self.assertEqual(len(self.analyzer.displayed_df), 3)
+        self.assertIs(view._table_df, self.analyzer.filtered_df)
+        self.analyzer.show_selected_only = True
+        self.analyzer.selected_idx = [1, 2]
+        self.assertEqual(len(view._table_df), 2)
+
+    def test_windowed_table_edit_updates_model(self):
+        view = DataFrameAnalyzerView(model=self.analyzer,
+                                     include_plotter=False)
+        self.analyzer.filter_exp = "a > 2"
+        with temp_bringup_ui_for(view):
+            adapter = view.info.displayed_df.adapter
+            adapter.set_text(view, "_table_df", 0, 1, "10")
+
+        self.assertEqual(self.analyzer.source_df["a"].tolist(),
+                         [1, 2, 10, 4, 5])
+        self.assertEqual(view._table_df["a"].tolist(), [10, 4, 5])
+        self.analyzer.filter_exp = "a > 2 and a < 10"
+        self.assertEqual(view._table_df["a"].tolist(), [4, 5])
+
     def test_plot_manager_list_with_plotter(self):
         view = DataFrameAnalyzerView(model=self.analyzer,
                                      include_plotter=True)
@@ -203,10 +230,15 @@ class TestDataFrameAnalyzerView(TestCase):
                                      include_plotter=True)
 
         view.model.selected_idx = [0, 2, 1]
-        self.assertEqual(view.plotter.model.index_selected, [0, 2, 1])
+        self.assertEqual(view.plotter.model.index_selected.tolist(),
+                         [0, 1, 2])
+
+        view.plotter.model.index_selected = [0, 2, 1, 3]
+        self.assertEqual(view.model.selected_idx.tolist(), [0, 1, 2, 3])
+        self.assertEqual(view._selected_rows, [0, 1, 2, 3])
 
-        view.plotter.model.index_selected.append(3)
-        self.assertEqual(view.model.selected_idx, [0, 2, 1, 3])
+        view._selected_rows = [3, 1]
+        self.assertEqual(view.model.selected_idx.tolist(), [1, 3])
 
     def test_apply_filter_button_recomputes_filtered_df_correctly(self):
         self.analyzer.filter_auto_apply = False
@@ -21,11 +21,14 @@ except ImportError:
 BACKEND_AVAILABLE = os.environ.get("ETS_TOOLKIT", "qt4") != "null"
 
 if KIWI_AVAILABLE and BACKEND_AVAILABLE:
+    from pyface.api import GUI
     from app_common.apptools.testing_utils import assert_obj_gui_works
     from pybleau.app.api import DataFrameAnalyzer, DataFramePlotManager
     from pybleau.app.ui.dataframe_plot_manager_view import \
         DataFramePlotManagerView, PlotTypeSelector
     from pybleau.app.model.multi_canvas_manager import MultiCanvasManager
+    from pybleau.app.model.plot_descriptor import PlotDescriptor
+    from pybleau.app.plotting.plot_config import HistogramPlotConfigurator
 
 msg = "No UI backend to paint into or missing kiwisolver package"
 
@@ -73,6 +76,36 @@ class TestDataFramePlotManagerView(TestCase):
                                         plot_control_cols=["x_col_name"])
         assert_obj_gui_works(view)
 
+    def test_lazy_plots_built_when_container_displayed(self):
+        descs = []
+        for container_idx in [0, 0, 1]:
+            config = HistogramPlotConfigurator(data_source=self.df)
+            config.x_col_name = "a"
+            descs.append(PlotDescriptor(x_col_name="a", plot_config=config,
+                                        container_idx=container_idx))
+
+        model = DataFramePlotManager(
+            contained_plots=descs, data_source=self.df,
+            lazy_plot_creation=True,
+            canvas_manager=MultiCanvasManager(num_container_managers=2)
+        )
+        view = DataFramePlotManagerView(model=model)
+        view.traits_view()
+        GUI.process_events()
+        self.assertEqual(model.get_unbuilt_plots(), descs)
+
+        # Displaying the first container builds its plots, one at a time:
+        managers = model.canvas_manager.container_managers
+        managers[0].container.bounds = [400, 400]
+        for _ in range(len(descs)):
+            GUI.process_events()
+
+        self.assertIsNotNone(descs[0].plot)
+        self.assertIsNotNone(descs[1].plot)
+        # The container never displayed keeps its plot unbuilt:
+        self.assertIsNone(descs[2].plot)
+        self.assertEqual(model.get_unbuilt_plots(), [descs[2]])
+
     def test_create_configurator_from_file(self):
         view = DataFramePlotManagerView(model=self.plotter)
         plot_type = 'template plot'
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame
+from traits.api import HasStrictTraits, Instance
+
+from pybleau.app.ui.adapters.windowed_data_frame_adapter import \
+    WindowedDataFrameAdapter
+
+
+class DataHolder(HasStrictTraits):
+    df = Instance(DataFrame)
+
+
+class TestWindowedDataFrameAdapter(TestCase):
+    def setUp(self):
+        self.df = DataFrame({"a": np.arange(1000) / 3.,
+                             "b": ["x", "y"] * 500},
+                            index=np.arange(1000, 2000))
+        self.holder = DataHolder(df=self.df)
+        self.adapter = WindowedDataFrameAdapter(
+            columns=[("", "index"), ("a", "a"), ("b", "b")],
+            _formats={"a": "%.2f"}, prefetch_margin=10
+        )
+
+    def test_get_text(self):
+        adapter, holder = self.adapter, self.holder
+        for row in [0, 5, 500, 999, 3]:
+            self.assertEqual(adapter.get_text(holder, "df", row, 0),
+                             str(self.df.index[row]))
+            self.assertEqual(adapter.get_text(holder, "df", row, 1),
+                             "%.2f" % self.df["a"].iloc[row])
+            self.assertEqual(adapter.get_text(holder, "df", row, 2),
+                             self.df["b"].iloc[row])
+
+    def test_only_window_formatted(self):
+        adapter, holder = self.adapter, self.holder
+        adapter.get_text(holder, "df", 500, 1)
+        self.assertEqual(adapter._window_start, 490)
+        self.assertEqual(adapter._window_end, 511)
+        self.assertEqual(len(adapter._window_texts["a"]), 21)
+
+    def test_new_data(self):
+        adapter, holder = self.adapter, self.holder
+        self.assertEqual(adapter.get_text(holder, "df", 1, 1), "0.33")
+        holder.df = self.df.iloc[::-1]
+        self.assertEqual(adapter.get_text(holder, "df", 1, 1), "332.67")
+
+    def test_change_columns(self):
+        adapter, holder = self.adapter, self.holder
+        self.assertEqual(adapter.get_text(holder, "df", 1, 1), "0.33")
+        adapter.columns = [("", "index"), ("b", "b")]
+        self.assertEqual(adapter.get_text(holder, "df", 1, 1), "y")
+
+    def test_edit_cell(self):
+        adapter, holder = self.adapter, self.holder
+        self.assertEqual(adapter.get_text(holder, "df", 5, 1), "1.67")
+        adapter.set_text(holder, "df", 5, 1, "100")
+        self.assertEqual(self.df["a"].iloc[5], 100.)
+        self.assertEqual(self.df["b"].iloc[5], "y")
+        self.assertEqual(adapter.get_text(holder, "df", 5, 1), "100.00")
+        adapter.set_text(holder, "df", 6, 2, "z")
+        self.assertEqual(adapter.get_text(holder, "df", 6, 2), "z")
+
+    def test_edit_cell_with_value_setter(self):
+        adapter, holder = self.adapter, self.holder
+        edits = []
+
+        def set_value(index, column_id, value):
+            edits.append((index, column_id, value))
+            holder.df = self.df.assign(a=value)
+
+        adapter.value_setter = set_value
+        self.assertEqual(adapter.get_text(holder, "df", 5, 1), "1.67")
+        adapter.set_text(holder, "df", 5, 1, "100")
+        self.assertEqual(edits, [(1005, "a", 100.)])
+        # The displayed data wasn't modified in place:
+        self.assertEqual(self.df["a"].iloc[5], 5 / 3.)
+        self.assertEqual(adapter.get_text(holder, "df", 5, 1), "100.00")
+
+    def test_edit_cell_invalid_value(self):
+        adapter, holder = self.adapter, self.holder
+        with self.assertLogs(level="WARNING"):
+            adapter.set_text(holder, "df", 5, 1, "not a number")
+        self.assertEqual(adapter.get_text(holder, "df", 5, 1), "1.67")
+
+    def test_alignment(self):
+        adapter, holder = self.adapter, self.holder
+        self.assertEqual(adapter.get_alignment(holder, "df", 0), "right")
+        self.assertEqual(adapter.get_alignment(holder, "df", 1), "right")
+        self.assertEqual(adapter.get_alignment(holder, "df", 2), "left")
@@ -0,0 +1,72 @@
+""" Vectorized utilities to store, map and compare data selections.
+
+Selections can contain a very large number of elements (for example when
+lasso-selecting points in a scatter plot), so they are stored as sorted
+arrays of unique positions, which are compared with a single vectorized
+operation, instead of python lists and sets.
+"""
+import numpy as np
+from traits.api import Array
+
+
+class Selection(Array):
+    """ Trait for a selection of positions along a dataframe.
+
+    Assigned values (lists or arrays of positions, or boolean masks) are
+    converted to a sorted array of unique positions.
+    """
+    def __init__(self, **metadata):
+        super(Selection, self).__init__(
+            dtype=np.int64, shape=(None,), value=np.array([], dtype=np.int64),
+            **metadata
+        )
+
+    def validate(self, object, name, value):
+        value = to_selection(value)
+        return super(Selection, self).validate(object, name, value)
+
+
+def to_selection(positions):
+    """ Returns a selection as a sorted array of unique positions.
+
+    Parameters
+    ----------
+    positions : list or array
+        Positions selected, in any order, or boolean mask of the selected
+        positions.
+    """
+    positions = np.asarray(positions)
+    if positions.dtype == bool:
+        return np.flatnonzero(positions).astype(np.int64, copy=False)
+
+    positions = positions.astype(np.int64, copy=False)
+    if positions.ndim == 1 and np.all(positions[1:] > positions[:-1]):
+        return positions
+    return np.unique(positions)
+
+
+def selections_equal(selection1, selection2):
+    """ Returns whether 2 selections, made by `to_selection`, are equal.
+    """
+    return selection1 is selection2 or np.array_equal(selection1, selection2)
+
+
+def index_values_to_positions(index, index_values):
+    """ Returns the sorted positions along an index of a list of index values.
+
+    Values not found in the index are ignored. Relies on the index's own hash
+    table, which pandas builds once per index object.
+
+    Parameters
+    ----------
+    index : pd.Index
+        Unique index to look values up in.
+
+    index_values : list or array
+        Values to look up.
+    """
+    if len(index_values) == 0:
+        return np.array([], dtype=np.int64)
+
+    positions = index.get_indexer(index_values)
+    return np.sort(positions[positions >= 0])
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from traits.api import HasStrictTraits
+
+from pybleau.app.utils.selection_utils import index_values_to_positions, \
+    Selection, selections_equal, to_selection
+
+
+class Selector(HasStrictTraits):
+    selection = Selection
+
+
+class TestSelection(TestCase):
+    def test_default(self):
+        selector = Selector()
+        self.assertEqual(selector.selection.dtype, np.int64)
+        self.assertEqual(selector.selection.tolist(), [])
+
+    def test_sorted_unique(self):
+        selector = Selector(selection=[3, 1, 3])
+        self.assertEqual(selector.selection.dtype, np.int64)
+        self.assertEqual(selector.selection.tolist(), [1, 3])
+
+    def test_mask(self):
+        selector = Selector(selection=np.array([False, True, False, True]))
+        self.assertEqual(selector.selection.tolist(), [1, 3])
+
+    def test_sorted_array_not_copied(self):
+        positions = np.array([1, 4, 6])
+        selector = Selector(selection=positions)
+        self.assertIs(selector.selection, positions)
+
+
+class TestToSelection(TestCase):
+    def test_positions(self):
+        self.assertEqual(to_selection([]).tolist(), [])
+        self.assertEqual(to_selection([]).dtype, np.int64)
+        self.assertEqual(to_selection([2, 1, 2]).tolist(), [1, 2])
+        self.assertEqual(to_selection(np.array([0, 5])).tolist(), [0, 5])
+
+    def test_mask(self):
+        selection = to_selection([True, False, True])
+        self.assertEqual(selection.tolist(), [0, 2])
+        self.assertEqual(selection.dtype, np.int64)
+
+
+class TestSelectionsEqual(TestCase):
+    def test_positions(self):
+        self.assertTrue(selections_equal(to_selection([]), to_selection([])))
+        self.assertTrue(selections_equal(to_selection([1, 2, 3]),
+                                         to_selection([3, 1, 2])))
+        self.assertTrue(selections_equal(to_selection([1, 2, 2]),
+                                         to_selection(np.array([2, 1]))))
+        self.assertFalse(selections_equal(to_selection([1, 2, 3]),
+                                          to_selection([1, 2])))
+        self.assertFalse(selections_equal(to_selection([1, 2, 3]),
+                                          to_selection([1, 2, 4])))
+        self.assertFalse(selections_equal(to_selection([]),
+                                          to_selection([1])))
+
+    def test_same_selection(self):
+        selection = to_selection([1, 2])
+        self.assertTrue(selections_equal(selection, selection))
+
+
+class TestIndexValuesToPositions(TestCase):
+    def test_lookup(self):
+        index = pd.Index([5, 3, 8, 1])
+        positions = index_values_to_positions(index, [1, 5, 7])
+        self.assertEqual(positions.tolist(), [0, 3])
+        positions = index_values_to_positions(index, [])
+        self.assertEqual(positions.tolist(), [])
+
+    def test_string_lookup(self):
+        index = pd.Index(list("dcba"))
+        positions = index_values_to_positions(index, np.array(["a", "d"]))
+        self.assertEqual(positions.tolist(), [0, 3])
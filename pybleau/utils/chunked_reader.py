@@ -0,0 +1,243 @@
+""" Reader loading large CSV or HDF files in chunks, reporting its progress.
+
+Chunks can be reduced as they are read (subset of columns, random sample of
+rows, downcasted numerical dtypes), so that a quick look at a very large file
+doesn't require loading it entirely in memory. The chunks are assembled one
+column at a time, releasing each column's chunks once assembled, so that the
+final dataframe never coexists with a second full copy of the data.
+"""
+import logging
+import os
+from os.path import splitext
+
+import numpy as np
+import pandas as pd
+from traits.api import Bool, HasStrictTraits, Int, Range
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100000
+
+CSV_EXTENSIONS = [".csv"]
+
+HDF_EXTENSIONS = [".h5", ".hdf"]
+
+
+class ReadingCancelled(Exception):
+    """ Raised when the reading of a file is cancelled before completion.
+    """
+    pass
+
+
+class ChunkedDataFrameReader(HasStrictTraits):
+    """ Reads CSV and HDF files in chunks, reporting progress along the way.
+
+    Reading can be cancelled from another thread using `cancel()`. Listeners
+    to the progress are notified from the thread doing the reading.
+
+    Examples
+    --------
+    >>> reader = ChunkedDataFrameReader()
+    >>> reader.on_trait_change(lambda new: print(new), "progress")
+    >>> df = reader.read("data.csv", columns=["a", "b"], sample_fraction=0.1)
+    """
+    #: Fraction of the file read so far
+    progress = Range(0., 1.)
+
+    #: Number of rows collected so far
+    num_rows_read = Int
+
+    #: Whether a reading is in progress
+    reading = Bool
+
+    #: Whether the current reading should be interrupted
+    _cancel_requested = Bool
+
+    def read(self, target, columns=None, sample_fraction=1., downcast=None,
+             chunksize=DEFAULT_CHUNK_SIZE, **kwargs):
+        """ Read a CSV or HDF file in chunks.
+
+        Parameters
+        ----------
+        target : str
+            Path to the file to load.
+
+        columns : list, optional
+            Names of the columns to load. All are loaded if not provided.
+
+        sample_fraction : float, optional
+            Fraction of the rows to load, randomly selected (reproducibly).
+            All rows are loaded by default.
+
+        downcast : str or None, optional
+            Type of numerical columns to downcast to the smallest dtype that
+            can hold each chunk's values: "integer", "float" (also converts
+            floats to float32, losing precision), or None (the default) to
+            keep the dtypes pandas reads. Downcasting saves memory, but
+            arithmetic on small integer dtypes (e.g. in filter expressions)
+            can overflow.
+
+        chunksize : int, optional
+            Number of rows to read at a time.
+
+        kwargs : dict
+            Keywords passed to pd.read_csv or pd.HDFStore.select.
+
+        Raises
+        ------
+        ReadingCancelled
+            If cancel() was called during the reading.
+        """
+        ext = splitext(target)[1].lower()
+        if ext in CSV_EXTENSIONS:
+            chunk_iter = self._iter_csv_chunks(target, columns, chunksize,
+                                               **kwargs)
+        elif ext in HDF_EXTENSIONS:
+            chunk_iter = self._iter_hdf_chunks(target, columns, chunksize,
+                                               **kwargs)
+        else:
+            msg = "Extension {} not supported by the chunked reader."
+            msg = msg.format(ext)
+            logger.exception(msg)
+            raise ValueError(msg)
+
+        # Seeded, so sampling a file gives the same rows each time:
+        rng = np.random.RandomState(0)
+        self._cancel_requested = False
+        self.progress = 0.
+        self.num_rows_read = 0
+        self.reading = True
+        try:
+            chunks = []
+            for chunk, progress in chunk_iter:
+                if self._cancel_requested:
+                    raise ReadingCancelled("Reading {} cancelled.".format(
+                        target))
+
+                if sample_fraction < 1.:
+                    mask = rng.random_sample(len(chunk)) < sample_fraction
+                    chunk = chunk[mask]
+                if downcast:
+                    chunk = downcast_numerical_columns(chunk, downcast)
+
+                chunks.append(chunk)
+                self.num_rows_read += len(chunk)
+                self.progress = min(progress, 1.)
+
+            df = concat_chunks(chunks)
+        finally:
+            self.reading = False
+
+        self.progress = 1.
+        return df
+
+    def cancel(self):
+        """ Interrupt the reading in progress (after the current chunk).
+        """
+        self._cancel_requested = True
+
+    # Private interface -------------------------------------------------------
+
+    def _iter_csv_chunks(self, target, columns, chunksize, **kwargs):
+        """ Yields CSV chunks and the fraction of the file read so far.
+        """
+        if columns is not None:
+            kwargs["usecols"] = columns
+
+        file_size = max(os.path.getsize(target), 1)
+        with open(target, "rb") as f:
+            for chunk in pd.read_csv(f, chunksize=chunksize, **kwargs):
+                yield chunk, f.tell() / file_size
+
+    def _iter_hdf_chunks(self, target, columns, chunksize, key=None,
+                         **kwargs):
+        """ Yields HDF chunks and the fraction of the rows read so far.
+
+        Only table formatted data can be read in chunks: data stored in the
+        fixed format is read in 1 chunk.
+        """
+        with pd.HDFStore(target, mode="r") as store:
+            if key is None:
+                key = store.keys()[0]
+
+            storer = store.get_storer(key)
+            if not storer.is_table:
+                df = store.select(key, **kwargs)
+                if columns is not None:
+                    df = df[columns]
+                yield df, 1.
+                return
+
+            num_rows = max(storer.nrows, 1)
+            num_read = 0
+            for chunk in store.select(key, columns=columns,
+                                      chunksize=chunksize, **kwargs):
+                num_read += chunksize
+                yield chunk, num_read / num_rows
+
+
+def downcast_numerical_columns(df, downcast="integer"):
+    """ Returns the dataframe with numerical columns converted to the smallest
+    dtype that can hold their values.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe to convert.
+
+    downcast : str
+        Type of columns to downcast: "integer" or "float" to also downcast
+        float columns.
+    """
+    converted = {}
+    for i, dtype in enumerate(df.dtypes):
+        if not isinstance(dtype, np.dtype):
+            continue
+        if dtype.kind in "iu":
+            to = "unsigned" if dtype.kind == "u" else "integer"
+            converted[i] = pd.to_numeric(df.iloc[:, i], downcast=to)
+        elif downcast == "float" and dtype.kind == "f":
+            converted[i] = pd.to_numeric(df.iloc[:, i], downcast="float")
+
+    if not converted:
+        return df
+
+    df = df.copy(deep=False)
+    for i, values in converted.items():
+        df.isetitem(i, values)
+    return df
+
+
+def concat_chunks(chunks):
+    """ Concatenate dataframe chunks column by column, releasing the chunks.
+
+    The chunks are first split into independent columns, so that each
+    column's chunks can be released as soon as the column is assembled: the
+    peak memory usage is the size of the data plus 1 column.
+
+    Parameters
+    ----------
+    chunks : list(pd.DataFrame)
+        Chunks to concatenate, with the same columns. The list is emptied.
+    """
+    if not chunks:
+        return pd.DataFrame()
+
+    columns = chunks[0].columns
+    index = chunks[0].index.append([chunk.index for chunk in chunks[1:]])
+    pieces = {i: [] for i in range(len(columns))}
+    for j, chunk in enumerate(chunks):
+        for i in range(len(columns)):
+            pieces[i].append(chunk.iloc[:, i].array.copy())
+        chunks[j] = None
+    del chunk, chunks[:]
+
+    data = {}
+    for i in range(len(columns)):
+        col_pieces = [pd.Series(piece, copy=False) for piece in pieces.pop(i)]
+        data[i] = pd.concat(col_pieces, ignore_index=True).array
+        del col_pieces
+
+    df = pd.DataFrame(data, index=index, copy=False)
+    df.columns = columns
+    return df
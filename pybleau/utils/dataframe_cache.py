@@ -0,0 +1,338 @@
+""" On-disk cache of dataframes loaded from files, stored column by column.
+
+Parsing large CSV or Excel files is slow. The first time a file is loaded, the
+resulting dataframe is stored in a cache directory as 1 numpy binary file per
+column (and for the index), next to a JSON manifest describing the dtypes
+and names. Later loads of the same file (same path, size, modification time
+and reading keywords) memory-map these binary files instead of parsing the
+file again. The cache lives in ~/.pybleau/df_cache by default, and its total
+size is bounded (1 GB by default): least recently used entries are evicted
+first.
+
+Numerical, boolean, datetime, timedelta and categorical columns are memory
+mapped (copy-on-write, so the source file is never modified). Columns of
+strings are stored as integer codes and unique values, and decoded on load.
+Dataframes containing other column types aren't cached.
+"""
+from hashlib import sha1
+import json
+import logging
+import os
+from os.path import abspath, getsize, isdir, isfile, join
+import shutil
+from time import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_string_dtype
+from traits.api import HasStrictTraits, Int, Str
+
+logger = logging.getLogger(__name__)
+
+#: Version of the storage format. Change to invalidate all existing entries.
+CACHE_FORMAT_VERSION = 1
+
+MANIFEST_FILENAME = "manifest.json"
+
+DEFAULT_CACHE_DIR = join(os.path.expanduser("~"), ".pybleau", "df_cache")
+
+#: Default maximum total size of the cache, in bytes
+DEFAULT_MAX_CACHE_SIZE = 1024 ** 3
+
+NUMERICAL_KIND = "numerical"
+
+CATEGORICAL_KIND = "categorical"
+
+STRING_KIND = "string"
+
+
+class UnsupportedCacheData(ValueError):
+    """ Raised when a dataframe contains data that can't be cached.
+    """
+    pass
+
+
+class DataFrameFileCache(HasStrictTraits):
+    """ Persistent cache of dataframes read from files.
+
+    Examples
+    --------
+    >>> cache = DataFrameFileCache()
+    >>> df = cache.read("data.csv", pd.read_csv, index_col=0)
+    """
+    #: Directory containing the cache entries
+    cache_dir = Str(DEFAULT_CACHE_DIR)
+
+    #: Maximum total size of the cache entries, in bytes
+    max_size = Int(DEFAULT_MAX_CACHE_SIZE)
+
+    def read(self, target, pandas_func, **kwargs):
+        """ Returns the dataframe read from target, loading it from the cache
+        if available, and storing it in the cache otherwise.
+
+        Parameters
+        ----------
+        target : str
+            Path to the file to load.
+
+        pandas_func : callable
+            Pandas reading function to load the file with if not cached.
+
+        kwargs : dict
+            Keywords passed to the pandas reading function.
+        """
+        key = self.make_key(target, pandas_func, **kwargs)
+        if key is None:
+            return pandas_func(target, **kwargs)
+
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        df = pandas_func(target, **kwargs)
+        if isinstance(df, pd.DataFrame):
+            self.store(key, df)
+        return df
+
+    def make_key(self, target, pandas_func, **kwargs):
+        """ Returns the cache key for a file and a set of reading keywords.
+
+        Returns None if the reading keywords can't be described reliably (for
+        example if they contain functions), since the result of the reading
+        can't be cached then.
+        """
+        for value in kwargs.values():
+            if callable(value):
+                return None
+
+        try:
+            kwargs_desc = json.dumps(kwargs, sort_keys=True, default=repr)
+        except TypeError:
+            return None
+
+        target = abspath(target)
+        stat = os.stat(target)
+        func_name = "{}.{}".format(getattr(pandas_func, "__module__", ""),
+                                   getattr(pandas_func, "__qualname__", ""))
+        desc = [CACHE_FORMAT_VERSION, target, stat.st_size, stat.st_mtime_ns,
+                func_name, kwargs_desc]
+        return sha1(json.dumps(desc).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """ Returns the dataframe cached under key, or None if not cached.
+        """
+        entry_dir = join(self.cache_dir, key)
+        manifest_path = join(entry_dir, MANIFEST_FILENAME)
+        if not isfile(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            df = _load_dataframe(entry_dir, manifest)
+        except Exception as e:
+            msg = "Failed to load cache entry {}: {}. Removing it."
+            logger.warning(msg.format(key, e))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # Record the access time for eviction:
+        os.utime(manifest_path)
+        return df
+
+    def store(self, key, df):
+        """ Store a dataframe in the cache under key.
+
+        Returns
+        -------
+        bool
+            Whether the dataframe was stored.
+        """
+        entry_dir = join(self.cache_dir, key)
+        tmp_dir = "{}.tmp{}".format(entry_dir, os.getpid())
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            manifest = _save_dataframe(tmp_dir, df)
+            with open(join(tmp_dir, MANIFEST_FILENAME), "w") as f:
+                json.dump(manifest, f)
+        except UnsupportedCacheData as e:
+            msg = "Dataframe not cached: {}".format(e)
+            logger.info(msg)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        if _dir_size(tmp_dir) > self.max_size:
+            msg = "Dataframe not cached: larger than the maximum cache size."
+            logger.info(msg)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.rename(tmp_dir, entry_dir)
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep=None):
+        """ Remove the least recently used entries until the cache is small
+        enough.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Key of an entry to never evict.
+        """
+        entries = []
+        for key in self.keys():
+            entry_dir = join(self.cache_dir, key)
+            manifest_path = join(entry_dir, MANIFEST_FILENAME)
+            entries.append((os.stat(manifest_path).st_mtime, key,
+                            _dir_size(entry_dir)))
+
+        total_size = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(join(self.cache_dir, key), ignore_errors=True)
+            total_size -= size
+
+    def keys(self):
+        """ Returns the list of keys of all cache entries.
+        """
+        if not isdir(self.cache_dir):
+            return []
+
+        return [name for name in os.listdir(self.cache_dir)
+                if isfile(join(self.cache_dir, name, MANIFEST_FILENAME))]
+
+    def clear(self):
+        """ Remove all cache entries.
+        """
+        for key in self.keys():
+            shutil.rmtree(join(self.cache_dir, key), ignore_errors=True)
+
+
+# Private functions -----------------------------------------------------------
+
+
+def _save_dataframe(folder, df):
+    """ Store all columns and the index of a dataframe, and return the
+    manifest describing them.
+    """
+    if not df.columns.is_unique:
+        raise UnsupportedCacheData("duplicate column names.")
+
+    columns = [_save_array(folder, "col{}".format(i), df.iloc[:, i])
+               for i in range(df.shape[1])]
+
+    if isinstance(df.index, pd.RangeIndex):
+        index = {"start": df.index.start, "stop": df.index.stop,
+                 "step": df.index.step}
+    elif df.index.nlevels == 1:
+        index = _save_array(folder, "index", pd.Series(df.index))
+    else:
+        raise UnsupportedCacheData("multi-level index.")
+
+    names = [_json_name(name) for name in df.columns]
+    return {"version": CACHE_FORMAT_VERSION, "columns": columns,
+            "column_names": names, "index": index,
+            "index_name": _json_name(df.index.name), "created": time()}
+
+
+def _save_array(folder, name, series):
+    """ Store a column in 1 or 2 .npy files, and return its description.
+    """
+    dtype = series.dtype
+    desc = {"name": name, "dtype": str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        desc["kind"] = CATEGORICAL_KIND
+        desc["ordered"] = bool(dtype.ordered)
+        codes = np.asarray(series.cat.codes)
+        categories = np.asarray(dtype.categories)
+        _save_categories(folder, name, categories)
+        np.save(join(folder, name + ".npy"), codes)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        desc["kind"] = NUMERICAL_KIND
+        np.save(join(folder, name + ".npy"), series.to_numpy())
+    elif dtype == object or is_string_dtype(dtype):
+        desc["kind"] = STRING_KIND
+        codes, uniques = pd.factorize(series)
+        _save_categories(folder, name, np.asarray(uniques, dtype=object))
+        np.save(join(folder, name + ".npy"), codes)
+    else:
+        raise UnsupportedCacheData("dtype {}.".format(dtype))
+
+    return desc
+
+
+def _save_categories(folder, name, values):
+    """ Store unique values, which must all be strings.
+    """
+    if values.dtype == object:
+        if not all(isinstance(val, str) for val in values):
+            raise UnsupportedCacheData("column {} contains non-string "
+                                       "objects.".format(name))
+        values = values.astype(str)
+    np.save(join(folder, name + "_values.npy"), values)
+
+
+def _load_dataframe(folder, manifest):
+    """ Rebuild a dataframe from a cache entry, memory-mapping the data.
+    """
+    if manifest["version"] != CACHE_FORMAT_VERSION:
+        raise ValueError("Unsupported cache format.")
+
+    data = {i: _load_array(folder, desc)
+            for i, desc in enumerate(manifest["columns"])}
+    index_desc = manifest["index"]
+    if "start" in index_desc:
+        index = pd.RangeIndex(index_desc["start"], index_desc["stop"],
+                              index_desc["step"])
+    else:
+        index = pd.Index(_load_array(folder, index_desc))
+    index.name = manifest["index_name"]
+
+    # Avoid copying the memory-mapped arrays into a single block:
+    df = pd.DataFrame(data, index=index, copy=False)
+    df.columns = manifest["column_names"]
+    return df
+
+
+def _load_array(folder, desc):
+    """ Returns the array of values of a column or index from a cache entry.
+    """
+    name = desc["name"]
+    # Plain array view on the (copy-on-write) memory map:
+    values = np.load(join(folder, name + ".npy"), mmap_mode="c")
+    values = values.view(np.ndarray)
+    kind = desc["kind"]
+    if kind == NUMERICAL_KIND:
+        return values
+
+    uniques = np.load(join(folder, name + "_values.npy"))
+    if kind == CATEGORICAL_KIND:
+        dtype = pd.CategoricalDtype(uniques, ordered=desc["ordered"])
+        return pd.Categorical.from_codes(values, dtype=dtype)
+
+    decoded = uniques.astype(object).take(values)
+    decoded[values < 0] = np.nan
+    if desc["dtype"] != "object":
+        return pd.array(decoded, dtype=desc["dtype"])
+    return decoded
+
+
+def _json_name(name):
+    """ Convert a column or index name to a JSON-compatible value.
+    """
+    if name is None or isinstance(name, (str, int, float)):
+        return name
+    if isinstance(name, np.integer):
+        return int(name)
+    raise UnsupportedCacheData("name {!r} can't be stored.".format(name))
+
+
+def _dir_size(folder):
+    return sum(getsize(join(folder, filename))
+               for filename in os.listdir(folder))
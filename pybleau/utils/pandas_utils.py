@@ -3,6 +3,8 @@ from six import string_types
 import pandas as pd
 from os.path import isfile, splitext
 
+from pybleau.utils.chunked_reader import CSV_EXTENSIONS, HDF_EXTENSIONS
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +29,8 @@ def get_col(df, col_name):
         return df[col_name]
 
 
-def pd_read_any(target, pandas_func=None, **kwargs):
+def pd_read_any(target, pandas_func=None, cache=None, chunk_reader=None,
+                **kwargs):
     """ Wraps pd.read_csv, pd.read_excel, ... Load DF from any supported format
 
     Parameters
@@ -35,6 +38,20 @@ def pd_read_any(target, pandas_func=None, **kwargs):
     target : str
         Path to the file to load.
 
+    pandas_func : callable, optional
+        Pandas function to read the file with. Selected based on the file
+        extension if not provided.
+
+    cache : DataFrameFileCache, optional
+        On-disk cache to load the DF from, and to store it into once read.
+        Leave as None to bypass caching.
+
+    chunk_reader : ChunkedDataFrameReader, optional
+        Reader to load CSV and HDF files in chunks with, for example to
+        monitor the reading progress. Other files are read with pandas. When
+        provided, kwargs can contain the reader's options (columns,
+        sample_fraction, downcast and chunksize).
+
     kwargs : dict
         Keywords passed to the pandas read_** function. Refer to pandas
         documentation.
@@ -46,7 +63,10 @@ def pd_read_any(target, pandas_func=None, **kwargs):
 
     if pandas_func is None:
         ext = splitext(target)[1].lower()
-        if ext in [".xls", ".xlsx"]:
+        if chunk_reader is not None and \
+                ext in CSV_EXTENSIONS + HDF_EXTENSIONS:
+            pandas_func = chunk_reader.read
+        elif ext in [".xls", ".xlsx"]:
             pandas_func = pd.read_excel
         elif ext == ".csv":
             pandas_func = pd.read_csv
@@ -57,5 +77,8 @@ def pd_read_any(target, pandas_func=None, **kwargs):
             logger.error(msg)
             return
 
+    if cache is not None:
+        return cache.read(target, pandas_func, **kwargs)
+
     target = pandas_func(target, **kwargs)
     return target
@@ -0,0 +1,103 @@
+from os.path import join
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.utils.chunked_reader import ChunkedDataFrameReader, \
+    concat_chunks, downcast_numerical_columns, ReadingCancelled
+from pybleau.utils.pandas_utils import pd_read_any
+
+
+class TestChunkedDataFrameReader(TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+        self.df = pd.DataFrame({"a": np.arange(1000) / 3.,
+                                "b": np.arange(1000),
+                                "c": ["x", "y", "z", "t"] * 250},
+                               index=pd.Index(np.arange(1000), name="idx"))
+        self.filename = join(self.folder, "data.csv")
+        self.df.to_csv(self.filename)
+        self.reader = ChunkedDataFrameReader()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_read_csv(self):
+        progress = []
+        self.reader.on_trait_change(lambda new: progress.append(new),
+                                    "progress")
+        df = self.reader.read(self.filename, chunksize=100, index_col=0)
+        assert_frame_equal(df, pd.read_csv(self.filename, index_col=0))
+        self.assertEqual(self.reader.num_rows_read, 1000)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.)
+        self.assertFalse(self.reader.reading)
+
+    def test_read_csv_downcast(self):
+        df = self.reader.read(self.filename, chunksize=100, index_col=0,
+                              downcast="integer")
+        assert_frame_equal(df, pd.read_csv(self.filename, index_col=0),
+                           check_dtype=False)
+        self.assertEqual(df["b"].dtype, np.int16)
+
+    def test_read_columns_and_sample(self):
+        df = self.reader.read(self.filename, columns=["idx", "a"],
+                              sample_fraction=0.1, chunksize=100,
+                              index_col=0)
+        self.assertEqual(list(df.columns), ["a"])
+        self.assertLess(len(df), 200)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        assert_frame_equal(df, self.df.loc[df.index, ["a"]])
+
+        # Sampling is reproducible:
+        df2 = self.reader.read(self.filename, columns=["idx", "a"],
+                               sample_fraction=0.1, chunksize=100,
+                               index_col=0)
+        assert_frame_equal(df, df2)
+
+    def test_cancel(self):
+        def cancel(new):
+            self.reader.cancel()
+
+        self.reader.on_trait_change(cancel, "num_rows_read")
+        with self.assertRaises(ReadingCancelled):
+            self.reader.read(self.filename, chunksize=100)
+        self.assertEqual(self.reader.num_rows_read, 100)
+        self.assertFalse(self.reader.reading)
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            self.reader.read(join(self.folder, "data.xlsx"))
+
+    def test_pd_read_any_with_chunk_reader(self):
+        df = pd_read_any(self.filename, chunk_reader=self.reader,
+                         columns=["a"], chunksize=100)
+        self.assertEqual(list(df.columns), ["a"])
+        self.assertEqual(self.reader.progress, 1.)
+
+
+class TestChunkUtilities(TestCase):
+    def test_downcast(self):
+        df = pd.DataFrame({"a": [1, 2, 3], "b": [1., 2., 3.],
+                           "c": [1, 2, 300]})
+        converted = downcast_numerical_columns(df)
+        self.assertEqual(list(converted.dtypes),
+                         [np.int8, np.float64, np.int16])
+        converted = downcast_numerical_columns(df, downcast="float")
+        self.assertEqual(converted["b"].dtype, np.float32)
+        # Original data unchanged:
+        self.assertEqual(df["a"].dtype, np.int64)
+
+    def test_concat_chunks(self):
+        df = pd.DataFrame({"a": np.arange(10), "b": list("abcdefghij")},
+                          index=np.arange(10, 20))
+        chunks = [df.iloc[:3], df.iloc[3:7].astype({"a": np.int8}),
+                  df.iloc[7:]]
+        result = concat_chunks(chunks)
+        assert_frame_equal(result, df)
+        self.assertEqual(chunks, [])
+        assert_frame_equal(concat_chunks([]), pd.DataFrame())
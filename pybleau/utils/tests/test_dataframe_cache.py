@@ -0,0 +1,92 @@
+from os.path import join
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from pybleau.utils.dataframe_cache import DataFrameFileCache
+from pybleau.utils.pandas_utils import pd_read_any
+
+
+class TestDataFrameFileCache(TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+        self.cache = DataFrameFileCache(cache_dir=join(self.folder, "cache"))
+        self.df = pd.DataFrame({"a": np.arange(10) / 3.,
+                                "b": np.arange(10),
+                                "c": list("abcdefghi") + [np.nan],
+                                "d": [True, False] * 5},
+                               index=pd.Index(np.arange(10, 20), name="idx"))
+        self.filename = join(self.folder, "data.csv")
+        self.df.to_csv(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_read_stores_and_loads(self):
+        df = self.cache.read(self.filename, pd.read_csv, index_col=0)
+        assert_frame_equal(df, pd.read_csv(self.filename, index_col=0))
+        self.assertEqual(len(self.cache.keys()), 1)
+
+        cached_df = self.cache.read(self.filename, pd.read_csv, index_col=0)
+        assert_frame_equal(cached_df, df)
+        self.assertEqual(len(self.cache.keys()), 1)
+
+    def test_read_kwargs_in_key(self):
+        self.cache.read(self.filename, pd.read_csv, index_col=0)
+        df = self.cache.read(self.filename, pd.read_csv)
+        self.assertNotIn("idx", df.index.names)
+        self.assertEqual(len(self.cache.keys()), 2)
+
+    def test_modified_file_not_loaded_from_cache(self):
+        self.cache.read(self.filename, pd.read_csv, index_col=0)
+        self.df.iloc[:5].to_csv(self.filename)
+        df = self.cache.read(self.filename, pd.read_csv, index_col=0)
+        self.assertEqual(len(df), 5)
+
+    def test_cached_data_modifiable(self):
+        self.cache.read(self.filename, pd.read_csv, index_col=0)
+        df = self.cache.read(self.filename, pd.read_csv, index_col=0)
+        df.loc[10, "a"] = 100.
+        df = self.cache.read(self.filename, pd.read_csv, index_col=0)
+        self.assertEqual(df.loc[10, "a"], 0.)
+
+    def test_categorical_and_range_index(self):
+        df = pd.DataFrame({"a": pd.Categorical(list("xyzx")),
+                           "b": pd.date_range("2020-01-01", periods=4)})
+        self.assertTrue(self.cache.store("key", df))
+        assert_frame_equal(self.cache.get("key"), df)
+
+    def test_unsupported_data_not_cached(self):
+        df = pd.DataFrame({"a": [1, "b", None]})
+        self.assertFalse(self.cache.store("key", df))
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.keys(), [])
+
+    def test_eviction(self):
+        self.cache.store("key1", self.df)
+        self.cache.store("key2", self.df)
+        self.assertEqual(set(self.cache.keys()), {"key1", "key2"})
+        # Only room for 1 entry:
+        self.cache.max_size = 2000
+        self.cache.get("key1")
+        self.cache.store("key3", self.df)
+        self.assertEqual(set(self.cache.keys()), {"key3"})
+
+    def test_too_large(self):
+        self.cache.max_size = 10
+        self.assertFalse(self.cache.store("key", self.df))
+        self.assertEqual(self.cache.keys(), [])
+
+    def test_clear(self):
+        self.cache.read(self.filename, pd.read_csv, index_col=0)
+        self.cache.clear()
+        self.assertEqual(self.cache.keys(), [])
+
+    def test_pd_read_any_with_cache(self):
+        df = pd_read_any(self.filename, cache=self.cache, index_col=0)
+        self.assertEqual(len(self.cache.keys()), 1)
+        assert_frame_equal(df, pd_read_any(self.filename, index_col=0))
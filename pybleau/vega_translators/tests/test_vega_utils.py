@@ -0,0 +1,75 @@
+from io import StringIO
+import json
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from pybleau.vega_translators.vega_utils import columnar_transform, \
+    df_to_vega, VegaDataValues, write_vega_json
+
+TEST_DF = pd.DataFrame({
+    "a": [1, 2, 3],
+    "b": [1.5, np.nan, np.inf],
+    "c": ["x", None, "z"],
+    "d": pd.to_datetime(["2020-01-01 00:00", None, "2020-01-02 10:00"]),
+    "e": [True, False, True],
+})
+
+
+class TestDfToVega(TestCase):
+    def test_records(self):
+        records = df_to_vega(TEST_DF)
+        self.assertEqual(records[0], {"index": 0, "a": 1, "b": 1.5, "c": "x",
+                                      "d": "2020-01-01", "e": True})
+        # Missing and infinite values are null in JSON:
+        self.assertEqual(records[1], {"index": 1, "a": 2, "b": None,
+                                      "c": None, "d": None, "e": False})
+        self.assertEqual(records[2]["d"], "2020-01-02T10:00")
+        self.assertIsNone(records[2]["b"])
+        self.assertIsInstance(records[0]["a"], int)
+        self.assertIsInstance(records[0]["e"], bool)
+
+    def test_same_as_row_conversion(self):
+        df = TEST_DF[["a", "c"]].fillna("w").set_index("c")
+        expected = [row.to_dict() for _, row in df.reset_index().iterrows()]
+        self.assertEqual(df_to_vega(df), expected)
+
+    def test_columnar(self):
+        values = df_to_vega(TEST_DF, columnar=True)
+        self.assertEqual(list(values), ["index", "a", "b", "c", "d", "e"])
+        self.assertEqual(values["b"], [1.5, None, None])
+        self.assertEqual(columnar_transform(TEST_DF),
+                         {"flatten": list(values)})
+
+    def test_tz_aware_datetimes(self):
+        df = pd.DataFrame({"t": pd.date_range("2020-01-01", periods=2,
+                                              tz="US/Eastern")})
+        self.assertEqual(df_to_vega(df, columnar=True)["t"],
+                         ["2020-01-01T05:00Z", "2020-01-02T05:00Z"])
+
+
+class TestWriteVegaJson(TestCase):
+    def test_same_as_json_dump(self):
+        desc = {"a": [1, {"b": 2, "c": [3, 4]}], "d": "s", "e": [], "f": {}}
+        for indent in [None, 2]:
+            f = StringIO()
+            write_vega_json(desc, f, indent=indent)
+            self.assertEqual(f.getvalue(), json.dumps(desc, indent=indent))
+
+    def test_stream_data_values(self):
+        for columnar in [False, True]:
+            desc = {"data": {"values": VegaDataValues(TEST_DF, columnar)}}
+            f = StringIO()
+            write_vega_json(desc, f, indent=2)
+            expected = {"data": {"values": df_to_vega(TEST_DF, columnar)}}
+            self.assertEqual(json.loads(f.getvalue()), expected)
+
+    def test_stream_in_chunks(self):
+        df = pd.DataFrame({"a": np.arange(25.)})
+        values = VegaDataValues(df, columnar=True)
+        text = "".join(values.iter_json(chunk_size=10))
+        self.assertEqual(json.loads(text), df_to_vega(df, columnar=True))
+        values = VegaDataValues(df)
+        text = "".join(values.iter_json(chunk_size=10))
+        self.assertEqual(json.loads(text), df_to_vega(df))
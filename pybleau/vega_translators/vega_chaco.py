@@ -6,14 +6,17 @@ test vega outputs, see online editors such as https://vega.github.io/editor/.
 
 import logging
 from os.path import isfile, splitext
-import json
 
+from pybleau.app.plotting.multi_plot_config import \
+    MultiHistogramPlotConfigurator
 from pybleau.app.plotting.plot_config import BasePlotConfigurator, \
     CMAP_SCATTER_PLOT_TYPE, HIST_PLOT_TYPE, HistogramPlotConfigurator, \
-    LINE_PLOT_TYPE, LinePlotConfigurator, SCATTER_PLOT_TYPE, \
-    ScatterPlotConfigurator
+    LINE_PLOT_TYPE, LinePlotConfigurator, MELTED_X_COL_NAME, \
+    MELTED_Y_COL_NAME, SCATTER_PLOT_TYPE, ScatterPlotConfigurator
+from pybleau.app.utils.string_definitions import MULTI_HIST_PLOT_TYPE
 from pybleau.reporting.string_definitions import IDX_NAME_KEY
-from pybleau.vega_translators.vega_utils import df_to_vega
+from pybleau.vega_translators.vega_utils import columnar_transform, \
+    df_to_vega, VegaDataValues, write_vega_json
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +24,15 @@ TARGET_VEGA_SCHEMA = "https://vega.github.io/schema/vega-lite/v3.json"
 
 CHACO_TO_VEGA_TYPES = {
     HIST_PLOT_TYPE: "bar",
+    MULTI_HIST_PLOT_TYPE: "bar",
     LINE_PLOT_TYPE: "line",
     SCATTER_PLOT_TYPE: "point",
     CMAP_SCATTER_PLOT_TYPE: "point"
 }
 
 
-def chaco2vega(plot_config, export_data=False, filepath="", indent=None):
+def chaco2vega(plot_config, export_data=False, filepath="", indent=None,
+               columnar=False, lazy_data=False):
     """ Export the plot configuration to a vega-lite description (dict).
 
     Parameters
@@ -52,6 +57,16 @@ def chaco2vega(plot_config, export_data=False, filepath="", indent=None):
     indent : None or int
         Indent to use when writing the description to json. Use, say, 2 for
         readability and leave as None to keep the file compact.
+
+    columnar : bool
+        Whether to store inline data as a single object of per-column value
+        lists, with a `flatten` transform rebuilding the records, rather than
+        as a list of records. Much more compact for large datasets.
+
+    lazy_data : bool
+        Whether to store inline data as a VegaDataValues, converted only when
+        the description is written with `write_vega_json` (and to
+        `filepath`), rather than as JSON-ready values.
     """
     if not isinstance(plot_config, BasePlotConfigurator):
         msg = "A Plot Configurator should be passed but a {} was received."
@@ -64,8 +79,15 @@ def chaco2vega(plot_config, export_data=False, filepath="", indent=None):
         if export_data is False:
             desc["data"] = {}
         elif export_data is True or export_data == "inline":
-            desc["data"] = {"values": df_to_vega(data),
-                            IDX_NAME_KEY: data.index.name}
+            if lazy_data:
+                values = VegaDataValues(data, columnar=columnar)
+            else:
+                values = df_to_vega(data, columnar=columnar)
+            if columnar:
+                # Vega-Lite data values are a list of objects:
+                values = [values]
+                desc["transform"] = [columnar_transform(data)]
+            desc["data"] = {"values": values, IDX_NAME_KEY: data.index.name}
         else:
             basename, ext = splitext(export_data)
             if ext == ".csv":
@@ -80,6 +102,13 @@ def chaco2vega(plot_config, export_data=False, filepath="", indent=None):
                 logger.exception(msg)
                 raise ValueError(msg)
 
+    if isinstance(plot_config, MultiHistogramPlotConfigurator):
+        # Turn the histogrammed columns into (column name, value) records:
+        desc.setdefault("transform", []).append({
+            "fold": list(plot_config.x_col_names),
+            "as": [MELTED_X_COL_NAME, MELTED_Y_COL_NAME]
+        })
+
     desc["mark"] = CHACO_TO_VEGA_TYPES[plot_config.plot_type]
     desc["encoding"] = build_vega_encoding(plot_config)
 
@@ -89,7 +118,8 @@ def chaco2vega(plot_config, export_data=False, filepath="", indent=None):
             logger.exception(msg)
             raise IOError(msg)
 
-        json.dump(desc, open(filepath, "w"), indent=indent)
+        with open(filepath, "w") as f:
+            write_vega_json(desc, f, indent=indent)
 
     return desc
 
@@ -100,6 +130,8 @@ def build_vega_encoding(plot_config):
     two_d_plots = (LinePlotConfigurator, ScatterPlotConfigurator)
     if isinstance(plot_config, two_d_plots):
         return two_d_plots_encoding(plot_config)
+    elif isinstance(plot_config, MultiHistogramPlotConfigurator):
+        return multi_hist_plot_encoding(plot_config)
     elif isinstance(plot_config, HistogramPlotConfigurator):
         return hist_plot_encoding(plot_config)
     else:
@@ -141,6 +173,29 @@ def hist_plot_encoding(plot_config):
     return encoding
 
 
+def multi_hist_plot_encoding(plot_config):
+    """ Build encoding portion of Vega plot description for overlaid
+    histograms of multiple columns, folded by the description's transform.
+    """
+    encoding = {
+        "x": {
+          "bin": True,
+          "field": MELTED_Y_COL_NAME,
+          "type": "quantitative"
+        },
+        "y": {
+          "aggregate": "count",
+          "type": "quantitative",
+          "stack": None
+        },
+        "color": {
+          "field": MELTED_X_COL_NAME,
+          "type": "nominal"
+        }
+    }
+    return encoding
+
+
 def vega2chaco(plot_desc):
     raise NotImplementedError()
 
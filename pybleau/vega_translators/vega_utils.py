@@ -1,9 +1,171 @@
+""" Conversion of DataFrames to Vega-Lite data, and streaming of Vega-Lite
+descriptions to JSON files.
+
+Data can be converted to the usual list of records, or to a more compact
+columnar layout: a single object mapping each column name to the list of its
+values, which a `flatten` transform (see `columnar_transform`) turns back into
+records in Vega-Lite.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+#: Number of rows converted at once when streaming data to JSON
+DEFAULT_CHUNK_SIZE = 10000
+
 
 class UnsupportedVegaSchemaVersion(NotImplementedError):
     pass
 
 
-def df_to_vega(df):
+class VegaDataValues(object):
+    """ Data of a DataFrame, converted to Vega-Lite values when written.
+
+    Use in place of the output of `df_to_vega` in a Vega-Lite description,
+    to write it with `write_vega_json` without ever holding all converted
+    values in memory.
+    """
+    def __init__(self, df, columnar=False):
+        self.df = df
+        self.columnar = columnar
+
+    def to_values(self):
+        """ Returns the converted values, as `df_to_vega` would.
+        """
+        return df_to_vega(self.df, columnar=self.columnar)
+
+    def iter_json(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Generate the JSON text of the values, a chunk of rows at a time.
+        """
+        df = self.df.reset_index()
+        num_rows = len(df)
+        starts = range(0, num_rows, chunk_size)
+        if self.columnar:
+            yield "{"
+            for i, col in enumerate(df.columns):
+                if i:
+                    yield ", "
+                yield json.dumps(str(col)) + ": ["
+                for start in starts:
+                    if start:
+                        yield ", "
+                    chunk = df[col].iloc[start:start + chunk_size]
+                    yield json.dumps(_to_json_values(chunk))[1:-1]
+                yield "]"
+            yield "}"
+        else:
+            yield "["
+            for start in starts:
+                if start:
+                    yield ", "
+                chunk = df.iloc[start:start + chunk_size]
+                yield json.dumps(_to_records(chunk))[1:-1]
+            yield "]"
+
+
+def df_to_vega(df, columnar=False):
     """ Convert a Pandas dataframe to the format Vega-Lite expects.
+
+    The index is included as a column. Values are converted column by column
+    to JSON compatible python objects: missing values become None, and
+    datetimes ISO 8601 strings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Data to convert.
+
+    columnar : bool
+        Whether to return a dict mapping column names to lists of values,
+        rather than a list of records (dicts). Columnar data is much more
+        compact, and needs the `columnar_transform` in the Vega-Lite plot
+        description.
+    """
+    df = df.reset_index()
+    if columnar:
+        return {col: _to_json_values(df[col]) for col in df.columns}
+    return _to_records(df)
+
+
+def columnar_transform(df):
+    """ Returns the Vega-Lite transform turning columnar values into records.
     """
-    return [row[1].to_dict() for row in df.reset_index().iterrows()]
+    return {"flatten": [str(col) for col in df.reset_index().columns]}
+
+
+def write_vega_json(desc, fp, indent=None):
+    """ Write a Vega-Lite description to a file object as JSON, streaming it.
+
+    VegaDataValues contained in the description are converted and written a
+    chunk of rows at a time.
+    """
+    for chunk in _iter_vega_json(desc, indent=indent, level=0):
+        fp.write(chunk)
+
+
+# Private functions -----------------------------------------------------------
+
+def _to_records(df):
+    columns = [_to_json_values(df[col]) for col in df.columns]
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _to_json_values(series):
+    """ Convert a column to a list of JSON compatible values, in bulk.
+    """
+    dtype = series.dtype
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        suffix = ""
+        if getattr(dtype, "tz", None) is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            suffix = "Z"
+        values = np.datetime_as_string(series.to_numpy(), unit="auto")
+        values = np.char.add(values, suffix).astype(object)
+    elif pd.api.types.is_timedelta64_dtype(dtype):
+        values = series.dt.total_seconds().to_numpy().astype(object)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        if dtype.kind == "f":
+            missing = missing | np.isinf(series.to_numpy())
+        # Converts numpy scalars to python scalars:
+        values = series.to_numpy().astype(object)
+    else:
+        values = series.to_numpy(dtype=object, na_value=None)
+
+    if missing.any():
+        values[missing] = None
+    return values.tolist()
+
+
+def _iter_vega_json(obj, indent, level):
+    """ Generate the JSON text of an object, with json.dumps' indentation.
+    """
+    if isinstance(obj, VegaDataValues):
+        yield from obj.iter_json()
+        return
+    elif not isinstance(obj, (dict, list, tuple)) or not obj:
+        yield json.dumps(obj)
+        return
+
+    if indent is None:
+        separator, newline, closing_newline = ", ", "", ""
+    else:
+        separator = ","
+        newline = "\n" + " " * indent * (level + 1)
+        closing_newline = "\n" + " " * indent * level
+
+    if isinstance(obj, dict):
+        yield "{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (separator if i else "") + newline + json.dumps(str(key))
+            yield ": "
+            yield from _iter_vega_json(value, indent, level + 1)
+        yield closing_newline + "}"
+    else:
+        yield "["
+        for i, value in enumerate(obj):
+            yield (separator if i else "") + newline
+            yield from _iter_vega_json(value, indent, level + 1)
+        yield closing_newline + "]"